@@ -1,48 +1,42 @@
 """
 Lambda Function: TB1_agenda_dia_lambda
 Description: Get daily agenda for AGENDA DEL DÍA view
-API Endpoint: GET /agenda?userId=1&fecha=2025-12-10
+API Endpoint: GET /agenda?userId=1&fecha=2025-12-10[&since=<syncToken>]
 Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
 
 Environment Variables:
     - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Conditional GET: the response carries an ETag built from the agenda's
+change marker (conditional_get); a request whose If-None-Match matches gets
+304 without the agenda query.
+
+Delta sync: with ?since= the response only has the follow-ups changed since
+the token (delta_sync).
 """
 import json
-import pyodbc
-import os
 import logging
 from datetime import datetime
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts
+from conditional_get import fetch_etag, is_fresh, add_etag, not_modified
+from delta_sync import sync_requested, parse_since, fetch_changes
+from page_token import InvalidTokenError
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='GET,OPTIONS'):
     """Return CORS headers."""
     return {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token,If-None-Match',
         'Access-Control-Allow-Methods': methods,
         'Access-Control-Max-Age': '3600'
     }
@@ -52,7 +46,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -81,6 +75,7 @@ def validate_date(date_str):
     except ValueError:
         return False
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Get daily agenda for a user.
@@ -88,12 +83,14 @@ def lambda_handler(event, context):
     Query Parameters:
         - userId: User ID (required)
         - fecha: Date in YYYY-MM-DD format (required)
+        - since: syncToken of the previous sync, empty for the first one (optional)
     
     Response:
         {
             "isSuccess": true,
             "data": [ list of scheduled items ]
         }
+    With since, data is {"cambios": [...], "eliminados": [ids], "completo": bool, "syncToken": "..."}.
     """
     # Handle OPTIONS preflight
     if event.get('httpMethod') == 'OPTIONS':
@@ -130,10 +127,30 @@ def lambda_handler(event, context):
         if not validate_date(fecha):
             return error_response('Formato de fecha inválido. Use YYYY-MM-DD', 400)
         
+        sync = sync_requested(event)
+        if sync:
+            try:
+                desde = parse_since(query_params.get('since'), 'AGENDA', user_id, fecha, fecha)
+            except InvalidTokenError:
+                return error_response('Token de sincronización inválido', 400)
+        
         # Connect to database
         conn = get_connection()
         cursor = conn.cursor()
         
+        # Delta sync: only the follow-ups changed since the client's token
+        if sync:
+            data = fetch_changes(cursor, 'AGENDA', user_id, fecha, fecha, desde)
+            logger.info(f"Agenda sync for user {user_id} on {fecha}: "
+                        f"{len(data['cambios'])} changed, {len(data['eliminados'])} removed")
+            return success_response(data)
+        
+        # Change marker first: an unchanged agenda costs no agenda query
+        etag = fetch_etag(cursor, 'AGENDA', user_id, fecha)
+        if is_fresh(event, etag):
+            logger.info(f"Agenda for user {user_id} on {fecha} not modified")
+            return not_modified(etag, get_cors_headers())
+        
         # Execute stored procedure
         cursor.execute(
             'EXEC usp_ObtenerAgendaDia @IdUsuario=?, @Fecha=?',
@@ -141,22 +158,12 @@ def lambda_handler(event, context):
         )
         
         # Fetch results
-        data = []
-        columns = [column[0] for column in cursor.description]
-        
-        for row in cursor:
-            item = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                item[column] = value
-            data.append(item)
+        data = fetch_all_dicts(cursor)
         
         logger.info(f"Agenda for user {user_id} on {fecha}: {len(data)} items")
-        return success_response(data)
+        return add_etag(success_response(data), etag)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in agenda_dia: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -168,4 +175,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
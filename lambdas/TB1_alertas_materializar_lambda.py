@@ -0,0 +1,113 @@
+"""
+Lambda Function: TB1_alertas_materializar_lambda
+Description: Materialize high-value alerts (HU007) as notifications, for every user in one pass
+Trigger: EventBridge schedule rate(15 minutes); also POST /alertas/materializar for manual runs
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+usp_MaterializarAlertasAltoValor creates one TM_NOTIFICACION per ALTA /
+PENDIENTE seguimiento unattended for 24+ hours (TIPOENTIDAD =
+'SEGUIMIENTO_ALTO_VALOR', deduplicated per seguimiento) and retires the ones
+that no longer apply. GET /notificaciones then reads them with an index seek
+instead of evaluating the condition on every poll, so a new alert shows up
+at most one schedule interval late (attended ones disappear immediately).
+"""
+import json
+import logging
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def get_cors_headers(methods='POST,OPTIONS'):
+    """Return CORS headers."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': methods,
+        'Access-Control-Max-Age': '3600'
+    }
+
+def success_response(data, message='OK', status_code=200):
+    """Generate success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+def error_response(message, status_code=500):
+    """Generate error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Run one materialization pass.
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": { "AlertasCreadas": 3, "AlertasRetiradas": 1, "AlertasActivas": 42 }
+        }
+    """
+    # Handle OPTIONS preflight
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': ''
+        }
+
+    conn = None
+    cursor = None
+
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('EXEC usp_MaterializarAlertasAltoValor')
+        rows = fetch_all_dicts(cursor)
+        summary = rows[0] if rows else {}
+
+        conn.commit()
+
+        logger.info(f"High-value alerts materialized ({event.get('source', 'api')}): {summary}")
+        return success_response(summary, 'Alertas actualizadas correctamente')
+
+    except DatabaseError as e:
+        logger.error(f"Database error in alertas_materializar: {str(e)}")
+        return error_response('Error de base de datos al actualizar alertas', 500)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in alertas_materializar: {str(e)}")
+        return error_response('Error interno del servidor', 500)
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
@@ -0,0 +1,230 @@
+"""
+Lambda Function: TB1_app_inicio_lambda
+Description: First screen after login: agenda, notifications and dashboard in one call
+API Endpoint: GET /inicio?userId=4&fecha=2025-12-10&limite=50
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+    - DB_POOL_SIZE: set to 3 so the three parts get a connection each
+      (with 1 they still work, one after the other)
+
+Replaces the three calls the app makes after login (GET /agenda,
+GET /notificaciones, GET /dashboard). Each part runs the same stored
+procedure as its own endpoint (usp_ObtenerAgendaDia,
+usp_ObtenerNotificacionesUsuario, usp_ObtenerDashboardSupervisor) on its own
+pooled connection, all at the same time, so the response takes as long as
+the slowest query. A part that fails is reported in "errores" and the others
+are still returned.
+"""
+import json
+import logging
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+from db_connection import get_connection, release_connection, pool_size, DatabaseError
+from request_timing import timed_handler, timed_dumps, current as current_timing, run_in
+from row_converter import fetch_all_dicts, fetch_one_dict
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Notification page size, as in GET /notificaciones
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Kept across warm invocations; threads start on demand and the connection
+# pool bounds how many parts really run at once (the local gateway serves
+# several requests per process, hence more than 3)
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='inicio')
+
+def get_cors_headers(methods='GET,OPTIONS'):
+    """Return CORS headers."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': methods,
+        'Access-Control-Max-Age': '3600'
+    }
+
+def success_response(data, message='OK', status_code=200):
+    """Generate success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+def error_response(message, status_code=500):
+    """Generate error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+def load_agenda(cursor, user_id, fecha, limit):
+    """Same data as GET /agenda."""
+    cursor.execute('EXEC usp_ObtenerAgendaDia @IdUsuario=?, @Fecha=?', (user_id, fecha))
+    return fetch_all_dicts(cursor)
+
+def load_notificaciones(cursor, user_id, fecha, limit):
+    """Same data as GET /notificaciones."""
+    cursor.execute('EXEC usp_ObtenerNotificacionesUsuario @IdUsuario=?, @Limite=?', (user_id, limit))
+
+    alerts = fetch_all_dicts(cursor)
+    for item in alerts:
+        item['TIPO_ALERTA'] = 'ALTO_VALOR_NO_ATENDIDO'
+        item['MENSAJE'] = f"Seguimiento de alta prioridad con {item.get('EMPRESA', '')} sin atender por más de 24 horas"
+
+    notifications = []
+    if cursor.nextset() and cursor.description:
+        notifications = fetch_all_dicts(cursor)
+
+    unread_count = 0
+    if cursor.nextset() and cursor.description:
+        unread_row = cursor.fetchone()
+        unread_count = unread_row[0] if unread_row else 0
+
+    return {
+        'alertas': alerts,
+        'notificaciones': notifications,
+        'totalAlertas': len(alerts),
+        'totalNotificaciones': len(notifications),
+        'noLeidos': unread_count + len(alerts)
+    }
+
+def load_dashboard(cursor, user_id, fecha, limit):
+    """Same data as GET /dashboard."""
+    cursor.execute('EXEC usp_ObtenerDashboardSupervisor @IdSupervisor=?, @FechaInicio=?, @FechaFin=?',
+                   (user_id, fecha, fecha))
+    return fetch_one_dict(cursor) or {
+        'PROGRAMADOS_SEMANA': 0,
+        'COMPLETADOS_SEMANA': 0,
+        'PENDIENTES_SEMANA': 0,
+        'CANCELADOS_SEMANA': 0
+    }
+
+# Response key -> loader
+PARTS = {
+    'agenda': load_agenda,
+    'notificaciones': load_notificaciones,
+    'dashboard': load_dashboard,
+}
+
+def run_part(name, user_id, fecha, limit):
+    """Run one part on its own pooled connection. Returns (data, error message)."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        return PARTS[name](cursor, user_id, fecha, limit), None
+    except DatabaseError as e:
+        logger.error(f"Database error in app_inicio ({name}): {str(e)}")
+        return None, 'Error de base de datos'
+    except Exception as e:
+        logger.error(f"Unexpected error in app_inicio ({name}): {str(e)}")
+        return None, 'Error interno del servidor'
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Get the first screen of the app for a user.
+
+    Query Parameters:
+        - userId: User ID (required)
+        - fecha: Date in YYYY-MM-DD format (default today)
+        - limite: notification page size (default 50)
+        - partes: comma separated subset of agenda,notificaciones,dashboard (default all)
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": {
+                "agenda": [ ... as GET /agenda ... ],
+                "notificaciones": { ... as GET /notificaciones ... },
+                "dashboard": { ... as GET /dashboard ... },
+                "errores": {}
+            }
+        }
+    A part that failed is null and its message is in "errores"; the call only
+    fails (500) when every part does.
+    """
+    # Handle OPTIONS preflight
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': ''
+        }
+
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+
+        try:
+            user_id = int(query_params.get('userId'))
+            if user_id <= 0:
+                return error_response('userId inválido', 400)
+        except (ValueError, TypeError):
+            return error_response('Parámetro userId es requerido y debe ser numérico', 400)
+
+        fecha = query_params.get('fecha') or date.today().isoformat()
+        try:
+            date.fromisoformat(fecha)
+        except ValueError:
+            return error_response('Formato de fecha inválido. Use YYYY-MM-DD', 400)
+
+        try:
+            limit = int(query_params.get('limite') or DEFAULT_LIMIT)
+        except (ValueError, TypeError):
+            return error_response('limite debe ser un número válido', 400)
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        names = list(PARTS)
+        if query_params.get('partes'):
+            names = list(dict.fromkeys(name.strip() for name in query_params['partes'].split(',')))
+            unknown = [name for name in names if name not in PARTS]
+            if unknown:
+                return error_response(f'Partes válidas: {", ".join(PARTS)}', 400)
+
+        # A single-connection pool would only make the workers queue for it
+        timing = current_timing()
+        if pool_size() > 1 and len(names) > 1:
+            futures = {name: _executor.submit(run_in, timing, run_part, name, user_id, fecha, limit)
+                       for name in names}
+            results = {name: future.result() for name, future in futures.items()}
+        else:
+            results = {name: run_part(name, user_id, fecha, limit) for name in names}
+
+        data = {name: part_data for name, (part_data, _) in results.items()}
+        data['errores'] = {name: error for name, (_, error) in results.items() if error}
+
+        if len(data['errores']) == len(names):
+            return error_response('Error de base de datos', 500)
+
+        logger.info(f"App inicio for user {user_id} on {fecha}: {names}, errores={list(data['errores'])}")
+        return success_response(data)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in app_inicio: {str(e)}")
+        return error_response('Error interno del servidor', 500)
@@ -1,49 +1,45 @@
 """
 Lambda Function: TB1_calendario_supervisor_lambda
 Description: Get weekly calendar for ASIG. SUPERVISOR view - shows scheduled tasks
-API Endpoint: GET /calendario?fechaIni=2025-12-09&fechaFin=2025-12-15&userId=1
+API Endpoint: GET /calendario?fechaIni=2025-12-09&fechaFin=2025-12-15&userId=1[&since=<syncToken>]
 Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
 Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Conditional GET: the response carries an ETag built from the range's change
+marker (conditional_get); a request whose If-None-Match matches gets 304
+without the calendar query.
+
+Delta sync: with ?since= the response only has the follow-ups changed since
+the token (delta_sync).
 """
 import json
-import pyodbc
-import os
 import logging
 import re
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import iter_dict_batches
+from json_stream import stream_requested, iter_array, iter_envelope, close_after
+from conditional_get import fetch_etag, is_fresh, add_etag, not_modified
+from delta_sync import sync_requested, parse_since, fetch_changes
+from page_token import InvalidTokenError
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
 # Date format pattern for validation
 DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
 
-def get_connection():
-    """Create and return a database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-    )
-
-
 def get_cors_headers():
     """Return CORS headers for responses."""
     return {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match',
         'Access-Control-Allow-Methods': 'GET,OPTIONS',
         'Access-Control-Max-Age': '86400'
     }
@@ -54,7 +50,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -82,10 +78,14 @@ def validate_date_format(date_str):
     return bool(DATE_PATTERN.match(date_str)) if date_str else False
 
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Main handler for retrieving calendar/schedule data for supervisor view.
     Returns scheduled follow-ups within a date range.
+    The response is serialized incrementally and streamed when the transport allows it.
+    With ?since= (syncToken of the previous sync, empty for the first one) only
+    the changes are returned: {"cambios", "eliminados", "completo", "syncToken"}.
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
@@ -131,35 +131,59 @@ def lambda_handler(event, context):
             except (ValueError, TypeError):
                 return error_response('userId debe ser un número válido', 400)
         
+        sync = sync_requested(event)
+        if sync:
+            try:
+                desde = parse_since(query_params.get('since'), 'CALENDARIO', parsed_user_id or 1,
+                                    fecha_ini, fecha_fin)
+            except InvalidTokenError:
+                return error_response('Token de sincronización inválido', 400)
+        
         logger.info(f"Querying calendar from {fecha_ini} to {fecha_fin}, userId: {parsed_user_id}")
         
         # Connect to database
         conn = get_connection()
         cursor = conn.cursor()
         
+        # Delta sync: only the follow-ups changed since the client's token
+        if sync:
+            data = fetch_changes(cursor, 'CALENDARIO', parsed_user_id or 1, fecha_ini, fecha_fin, desde)
+            logger.info(f"Calendar sync: {len(data['cambios'])} changed, {len(data['eliminados'])} removed")
+            return success_response(data)
+        
+        # Change marker first: an unchanged week costs no calendar query
+        etag = fetch_etag(cursor, 'CALENDARIO', parsed_user_id or 1, fecha_ini, fecha_fin)
+        if is_fresh(event, etag):
+            logger.info("Calendar not modified")
+            return not_modified(etag, get_cors_headers())
+        
         # Execute stored procedure
         params = (parsed_user_id or 1, fecha_ini, fecha_fin)
         cursor.execute('EXEC usp_ObtenerCalendarioSupervisor @IdSupervisor=?, @FechaInicio=?, @FechaFin=?', params)
         
-        # Fetch results
-        data = []
-        columns = [column[0] for column in cursor.description]
+        # Serialize rows batch by batch (multi-month ranges can be very large)
+        stats = {'rows': 0}
+        chunks = iter_envelope(iter_array(iter_dict_batches(cursor), stats), 'OK')
         
-        for row in cursor:
-            item = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                # Convert datetime objects to ISO format string
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                item[column] = value
-            data.append(item)
+        def log_completed():
+            logger.info(f"Retrieved {stats['rows']} calendar entries")
         
-        logger.info(f"Retrieved {len(data)} calendar entries")
+        if stream_requested(event):
+            # The body generator now owns the cursor and connection
+            body = close_after(chunks, cursor, conn, log_completed)
+            cursor = None
+            conn = None
+        else:
+            body = ''.join(chunks)
+            log_completed()
         
-        return success_response(data, 'OK')
+        return add_etag({
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': body
+        }, etag)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error: {str(e)}")
         return error_response('Error de base de datos al consultar calendario', 500)
         
@@ -171,4 +195,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
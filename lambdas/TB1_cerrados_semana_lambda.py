@@ -8,37 +8,23 @@ Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
 Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
 """
 import json
-import pyodbc
-import os
 import logging
 import re
 from decimal import Decimal
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts, iter_dict_batches
+from json_stream import stream_requested, iter_array, iter_envelope, close_after
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
 # Date format pattern for validation
 DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 
 
-def get_connection():
-    """Create and return a database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-    )
-
-
 def get_cors_headers():
     """Return CORS headers for responses."""
     return {
@@ -62,7 +48,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -90,34 +76,55 @@ def validate_date_format(date_str):
     return bool(DATE_PATTERN.match(date_str)) if date_str else False
 
 
-def convert_value(value):
-    """Convert database value to JSON-serializable format."""
-    if isinstance(value, Decimal):
-        return float(value)
-    elif value is not None and hasattr(value, 'isoformat'):
-        return value.isoformat()
-    return value
+def build_metricas(stats):
+    """Map the metrics result set to the field names the frontend expects."""
+    if not stats:
+        return None
+    return {
+        'TOTAL_CERRADOS': stats[0].get('TOTAL_CERRADOS', stats[0].get('TotalCerrados', 0)),
+        'EXITOSOS': stats[0].get('Exitosos', 0),
+        'SIN_RESPUESTA': stats[0].get('SinRespuesta', 0),
+        'NO_INTERESADOS': stats[0].get('NoInteresados', 0),
+        'MONTO_TOTAL': stats[0].get('MontoTotal', 0),
+        'DIAS_PROMEDIO_CIERRE': stats[0].get('DiasPromedioCierre', 0)
+    }
 
 
-def fetch_result_set(cursor):
-    """Fetch all rows from current result set as list of dicts."""
-    if not cursor.description:
-        return []
-    
-    columns = [column[0] for column in cursor.description]
-    results = []
+def iter_cerrados_data(cursor, counts):
+    """
+    Yield the data object as JSON chunks, reading the three result sets in order.
+    Row counts per section are recorded in counts.
+    """
+    # Result set 1: Historial (detailed list of completados) - the large one
+    historial_stats = {'rows': 0}
+    yield '{"historial": '
+    yield from iter_array(iter_dict_batches(cursor), historial_stats)
+    counts['historial'] = historial_stats['rows']
     
-    for row in cursor:
-        item = {columns[idx]: convert_value(value) for idx, value in enumerate(row)}
-        results.append(item)
+    # Result set 2: Métricas/Estadísticas (summary with MONTO and DIAS)
+    metricas = None
+    if cursor.nextset() and cursor.description:
+        metricas = build_metricas(fetch_all_dicts(cursor))
+    counts['metricas'] = metricas
+    yield ', "metricas": ' + json.dumps(metricas)
     
-    return results
-
-
+    # Result set 3: Breakdown por día (for the chart)
+    por_dia_stats = {'rows': 0}
+    yield ', "porDia": '
+    if cursor.nextset():
+        yield from iter_array(iter_dict_batches(cursor), por_dia_stats)
+    else:
+        yield '[]'
+    counts['porDia'] = por_dia_stats['rows']
+    yield '}'
+
+
+@timed_handler
 def lambda_handler(event, context):
     """
     Main handler for retrieving closed deals report.
     Returns metrics, daily breakdown, and history for the date range.
+    The response is serialized incrementally and streamed when the transport allows it.
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
@@ -173,41 +180,29 @@ def lambda_handler(event, context):
         params = (user_id, fecha_inicio, fecha_fin)
         cursor.execute('EXEC usp_ObtenerCerradosSemana @IdUsuario=?, @FechaInicio=?, @FechaFin=?', params)
         
-        # Result set 1: Historial (detailed list of completados)
-        historial = []
-        if cursor.description:
-            historial = fetch_result_set(cursor)
-        
-        # Result set 2: Métricas/Estadísticas (summary with MONTO and DIAS)
-        metricas = None
-        if cursor.nextset() and cursor.description:
-            stats = fetch_result_set(cursor)
-            if stats:
-                metricas = {
-                    'TOTAL_CERRADOS': stats[0].get('TOTAL_CERRADOS', stats[0].get('TotalCerrados', 0)),
-                    'EXITOSOS': stats[0].get('Exitosos', 0),
-                    'SIN_RESPUESTA': stats[0].get('SinRespuesta', 0),
-                    'NO_INTERESADOS': stats[0].get('NoInteresados', 0),
-                    'MONTO_TOTAL': stats[0].get('MontoTotal', 0),
-                    'DIAS_PROMEDIO_CIERRE': stats[0].get('DiasPromedioCierre', 0)
-                }
+        # Serialize the result sets incrementally (historial grows with the range)
+        counts = {}
+        chunks = iter_envelope(iter_cerrados_data(cursor, counts), 'OK')
         
-        # Result set 3: Breakdown por día (for the chart)
-        por_dia = []
-        if cursor.nextset() and cursor.description:
-            por_dia = fetch_result_set(cursor)
+        def log_completed():
+            logger.info(f"Retrieved {counts.get('historial', 0)} history records, metrics: {counts.get('metricas')}, {counts.get('porDia', 0)} daily entries")
         
-        logger.info(f"Retrieved {len(historial)} history records, metrics: {metricas}, {len(por_dia)} daily entries")
+        if stream_requested(event):
+            # The body generator now owns the cursor and connection
+            body = close_after(chunks, cursor, conn, log_completed)
+            cursor = None
+            conn = None
+        else:
+            body = ''.join(chunks)
+            log_completed()
         
-        data = {
-            'metricas': metricas,
-            'porDia': por_dia,
-            'historial': historial
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': body
         }
         
-        return success_response(data, 'OK')
-        
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error: {str(e)}")
         return error_response('Error de base de datos al consultar cerrados', 500)
         
@@ -219,4 +214,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
@@ -10,32 +10,16 @@ Environment Variables:
     - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_one_dict
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='GET,OPTIONS'):
     """Return CORS headers."""
     return {
@@ -51,7 +35,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -72,6 +56,7 @@ def error_response(message, status_code=500):
         })
     }
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Get supervisor dashboard with metrics per executive.
@@ -118,17 +103,9 @@ def lambda_handler(event, context):
         cursor.execute('EXEC usp_ObtenerDashboardSupervisor @IdSupervisor=?, @FechaInicio=?, @FechaFin=?', (user_id, fecha, fecha))
         
         # Fetch single row result (dashboard metrics)
-        columns = [column[0] for column in cursor.description]
-        row = cursor.fetchone()
+        data = fetch_one_dict(cursor)
         
-        if row:
-            data = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                data[column] = value
-        else:
+        if not data:
             # Return zeros if no data
             data = {
                 'PROGRAMADOS_SEMANA': 0,
@@ -140,7 +117,7 @@ def lambda_handler(event, context):
         logger.info(f"Dashboard supervisor for {fecha}, userId={user_id}: {data}")
         return success_response(data)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in dashboard_supervisor: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -152,4 +129,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
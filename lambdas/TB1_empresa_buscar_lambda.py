@@ -1,7 +1,7 @@
 """
 Lambda Function: TB1_empresa_buscar_lambda
 Description: Search companies with filters for BÚSQUEDA view
-API Endpoint: GET /empresas?search=texto&usuario=username
+API Endpoint: GET /empresas?search=texto&usuario=username&limite=100&cursor=token
 Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
@@ -11,33 +11,29 @@ Environment Variables (configure in Lambda):
     - DB_NAME: Database name
     - DB_USER: Database user
     - DB_PASSWORD: Database password
+    - SEARCH_INDEX_ENABLED: 0 to search with usp_BuscarEmpresas (default 1)
 """
-import json
-import pyodbc
 import os
+import json
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts, fetch_one_dict
+from page_token import encode_token, decode_token, InvalidTokenError
+from empresa_search_index import search_empresas
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
+# Page size bounds (usp_BuscarEmpresas clamps to the same range)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
+# Text searches go through the in-memory trigram index (empresa_search_index);
+# set SEARCH_INDEX_ENABLED=0 to send them to usp_BuscarEmpresas instead
+SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', '1') != '0'
 
 def get_cors_headers(methods='GET,OPTIONS'):
     """Return CORS headers."""
@@ -49,17 +45,20 @@ def get_cors_headers(methods='GET,OPTIONS'):
         'Access-Control-Max-Age': '3600'
     }
 
-def success_response(data, message='OK', status_code=200):
-    """Generate success response."""
+def success_response(data, message='OK', status_code=200, extra=None):
+    """Generate success response. `extra` adds top-level envelope keys."""
+    body = {
+        'isSuccess': True,
+        'errorCode': str(status_code),
+        'errorMessage': message,
+        'data': data
+    }
+    if extra:
+        body.update(extra)
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
-            'isSuccess': True,
-            'errorCode': str(status_code),
-            'errorMessage': message,
-            'data': data
-        })
+        'body': timed_dumps(body)
     }
 
 def error_response(message, status_code=500):
@@ -75,6 +74,7 @@ def error_response(message, status_code=500):
         })
     }
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Search companies with optional filters.
@@ -82,11 +82,20 @@ def lambda_handler(event, context):
     Query Parameters:
         - search: Text to search in company name, RUC, contact (optional)
         - usuario: Filter by assigned user (optional)
+        - limite: Page size (optional, default 100, max 500)
+        - cursor: `next` token from the previous page (optional)
+        - total: 1 to include the total match count (optional)
+    
+    With search text the companies come ranked by relevance from the
+    in-memory index; without it they are listed by name from the database.
     
     Response:
         {
             "isSuccess": true,
-            "data": [ list of companies ]
+            "data": [ one page of companies ],
+            "next": "token for the following page, or null on the last page",
+            "pageSize": 100,
+            "total": 1234          (only when total=1)
         }
     """
     # Handle OPTIONS preflight
@@ -112,35 +121,75 @@ def lambda_handler(event, context):
         if usuario:
             usuario = str(usuario).strip()[:64]
         
-        # Connect to database
-        conn = get_connection()
-        cursor = conn.cursor()
+        try:
+            page_size = int(query_params.get('limite') or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return error_response('limite debe ser numérico', 400)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        include_total = query_params.get('total') in ('1', 'true')
+        
+        use_index = bool(search_text) and SEARCH_INDEX_ENABLED
         
-        # Execute stored procedure with parameterized query
-        # usp_BuscarEmpresas expects @Criterio (search text), @TipoCliente, @TipoCartera
-        cursor.execute(
-            'EXEC usp_BuscarEmpresas @Criterio=?',
-            (search_text,)
-        )
+        # Keyset position: key of the last company already delivered,
+        # (score, name, id) for ranked searches, (NOMBRECOMERCIAL, IDEMPRESA) otherwise
+        after = None
+        token = query_params.get('cursor')
+        if token:
+            try:
+                if use_index:
+                    score, nombre, id_empresa = decode_token(str(token), 3)
+                    after = (int(score), str(nombre), int(id_empresa))
+                else:
+                    nombre, id_empresa = decode_token(str(token), 2)
+                    after = (str(nombre), int(id_empresa))
+            except (InvalidTokenError, TypeError, ValueError):
+                return error_response('Cursor de paginación inválido', 400)
         
-        # Fetch results
-        data = []
-        columns = [column[0] for column in cursor.description]
+        extra = {'next': None, 'pageSize': page_size}
         
-        for row in cursor:
-            empresa = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                # Convert types for JSON serialization
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                empresa[column] = value
-            data.append(empresa)
+        if use_index:
+            # Ranked substring search in memory; a connection is only taken
+            # when the index has to be loaded or refreshed
+            def connect():
+                nonlocal conn
+                conn = get_connection()
+                return conn
+            
+            data, keys, total = search_empresas(connect, search_text, page_size, after)
+            if len(data) > page_size:
+                del data[page_size:]
+                extra['next'] = encode_token(*keys[page_size - 1])
+            if include_total:
+                extra['total'] = total
+        else:
+            # Connect to database
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor_nombre, cursor_id = after or (None, None)
+            
+            # Execute stored procedure with parameterized query
+            # usp_BuscarEmpresas returns up to @Limite + 1 rows after the cursor key;
+            # the extra row only signals that another page exists
+            cursor.execute(
+                'EXEC usp_BuscarEmpresas @Criterio=?, @Limite=?, @CursorNombre=?, @CursorId=?, @IncluirTotal=?',
+                (search_text, page_size, cursor_nombre, cursor_id, 1 if include_total else 0)
+            )
+            
+            # Fetch results
+            data = fetch_all_dicts(cursor)
+            if len(data) > page_size:
+                del data[page_size:]
+                last = data[-1]
+                extra['next'] = encode_token(last['NOMBRECOMERCIAL'], last['IDEMPRESA'])
+            
+            if include_total and cursor.nextset():
+                row = fetch_one_dict(cursor)
+                extra['total'] = row['TOTAL'] if row else 0
         
-        logger.info(f"Search returned {len(data)} companies")
-        return success_response(data)
+        logger.info(f"Search returned {len(data)} companies (more: {extra['next'] is not None})")
+        return success_response(data, extra=extra)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in empresa_buscar: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -152,4 +201,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
@@ -0,0 +1,185 @@
+"""
+Lambda Function: TB1_empresa_importar_lambda
+Description: Import a portfolio of companies from CSV or XLSX (HU001 support)
+API Endpoint: POST /empresas/importar
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+       (plus openpyxl for XLSX uploads)
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+The request body is the file itself: CSV text, or XLSX sent base64 encoded
+(API Gateway binary media type). empresa_import parses it row by row and
+stages it in chunks. usp_ImportarEmpresas then merges everything set-wise in
+one transaction. Large files (above the 10 MB API Gateway limit) go through
+tools/import_empresas.py, which shares the same pipeline.
+"""
+import io
+import json
+import base64
+import logging
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from entity_cache import empresa_cache
+from empresa_import import EmpresaImporter, InvalidFileError, read_csv, read_xlsx
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Report rows returned in the response (the counts cover all of them)
+MAX_REPORT_ROWS = 1000
+
+def get_cors_headers(methods='POST,OPTIONS'):
+    """Return CORS headers."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': methods,
+        'Access-Control-Max-Age': '3600'
+    }
+
+def success_response(data, message='OK', status_code=200):
+    """Generate success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+def error_response(message, status_code=500):
+    """Generate error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+def open_rows(event, formato):
+    """Return the row iterator for the request body."""
+    body = event.get('body') or ''
+    raw = base64.b64decode(body) if event.get('isBase64Encoded') else None
+
+    if not formato:
+        headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+        content_type = headers.get('content-type', '')
+        is_zip = raw is not None and raw[:2] == b'PK'
+        formato = 'xlsx' if 'spreadsheetml' in content_type or is_zip else 'csv'
+
+    if formato == 'xlsx':
+        if raw is None:
+            raise InvalidFileError('El archivo XLSX debe enviarse en base64')
+        return read_xlsx(io.BytesIO(raw))
+    if formato == 'csv':
+        text = raw.decode('utf-8-sig') if raw is not None else body
+        return read_csv(io.StringIO(text))
+    raise InvalidFileError('formato debe ser csv o xlsx')
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Import companies.
+
+    Query Parameters:
+        - usuarioCrea: user recorded as creator (default 1)
+        - actualizar: 'true' updates companies whose RUC is already registered
+          (default: they are only reported)
+        - formato: 'csv' or 'xlsx' (default: from Content-Type)
+
+    Body: the file. Header row with the TM_EMPRESA column names (NOMBRECOMERCIAL
+    and RUC required; "Nombre Comercial" / nombreComercial also accepted).
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": {
+                "resumen": {"Leidas": 1200, "Invalidas": 3, "Filas": 1197, "Creadas": 1150,
+                            "Actualizadas": 0, "Existentes": 40, "Duplicadas": 7},
+                "reporte": [{"FILA": 15, "RUC": "20123456789", "RESULTADO": "EXISTENTE",
+                             "IDEMPRESA": 1, "DETALLE": "RUC ya registrado"}, ...],
+                "reporteTruncado": false
+            }
+        }
+    RESULTADO is INVALIDA, DUPLICADO_ARCHIVO, EXISTENTE or ACTUALIZADA.
+    """
+    # Handle OPTIONS preflight
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': ''
+        }
+
+    conn = None
+
+    try:
+        params = event.get('queryStringParameters') or {}
+        try:
+            usuarioCrea = int(params.get('usuarioCrea') or 1)
+        except ValueError:
+            return error_response('usuarioCrea debe ser numérico', 400)
+        actualizar = str(params.get('actualizar', '')).lower() in ('1', 'true', 'si')
+        formato = (params.get('formato') or '').lower() or None
+
+        if not event.get('body'):
+            return error_response('El cuerpo de la solicitud debe contener el archivo', 400)
+
+        rows = open_rows(event, formato)
+
+        reporte = []
+        reportados = 0
+
+        def on_report(row):
+            nonlocal reportados
+            reportados += 1
+            if len(reporte) < MAX_REPORT_ROWS:
+                reporte.append(row)
+
+        # Connect to database
+        conn = get_connection()
+
+        importer = EmpresaImporter(conn, usuarioCrea, actualizar, on_report=on_report)
+        resumen = importer.run(rows)
+
+        conn.commit()
+        if resumen.get('Actualizadas'):
+            empresa_cache.clear()
+
+        logger.info(f"Import {importer.id_importacion} finished: {resumen}")
+        return success_response({
+            'resumen': resumen,
+            'reporte': reporte,
+            'reporteTruncado': reportados > len(reporte),
+        }, f"{resumen.get('Creadas', 0)} empresas creadas, {resumen.get('Actualizadas', 0)} actualizadas")
+
+    except InvalidFileError as e:
+        return error_response(str(e), 400)
+
+    except (ValueError, UnicodeDecodeError):
+        return error_response('Archivo inválido: use CSV en UTF-8 o XLSX', 400)
+
+    except DatabaseError as e:
+        logger.error(f"Database error in empresa_importar: {str(e)}")
+        return error_response('Error de base de datos', 500)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in empresa_importar: {str(e)}")
+        return error_response('Error interno del servidor', 500)
+
+    finally:
+        if conn:
+            release_connection(conn)
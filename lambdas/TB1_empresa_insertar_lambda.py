@@ -10,32 +10,15 @@ Environment Variables:
     - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='POST,OPTIONS'):
     """Return CORS headers."""
     return {
@@ -51,7 +34,7 @@ def success_response(data, message='OK', status_code=201):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -72,6 +55,7 @@ def error_response(message, status_code=500):
         })
     }
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Create a new company.
@@ -174,7 +158,7 @@ def lambda_handler(event, context):
         logger.info(f"Created new empresa with ID: {idempresa_new}")
         return success_response({'idEmpresa': idempresa_new}, 'Empresa creada correctamente', 201)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in empresa_insertar: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -189,4 +173,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
@@ -11,34 +11,24 @@ Environment Variables (configure in Lambda):
     - DB_NAME: Database name
     - DB_USER: Database user
     - DB_PASSWORD: Database password
+    - EMPRESA_CACHE_SIZE / EMPRESA_CACHE_TTL_SECONDS: see entity_cache
+
+Responses are served from empresa_cache (LRU, keyed by IDEMPRESA) while
+the company's change marker (usp_ObtenerVersionEmpresa) is the one they were
+read at, so a write made by any other function is seen on the next read.
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts, fetch_one_dict
+from entity_cache import empresa_cache
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='GET,OPTIONS'):
     """Return CORS headers."""
     return {
@@ -54,7 +44,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -62,6 +52,16 @@ def success_response(data, message='OK', status_code=200):
         })
     }
 
+def cached_response(body, cache_status):
+    """Success response around an already serialized body."""
+    headers = get_cors_headers()
+    headers['X-Cache'] = cache_status
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': body
+    }
+
 def error_response(message, status_code=500):
     """Generate error response."""
     return {
@@ -75,37 +75,7 @@ def error_response(message, status_code=500):
         })
     }
 
-def row_to_dict(cursor, row):
-    """Convert a row to dictionary with proper type handling."""
-    if row is None or cursor.description is None:
-        return None
-    
-    columns = [column[0] for column in cursor.description]
-    result = {}
-    for idx, column in enumerate(columns):
-        value = row[idx]
-        if value is not None and hasattr(value, 'isoformat'):
-            value = value.isoformat()
-        result[column] = value
-    return result
-
-def rows_to_list(cursor):
-    """Convert all cursor rows to list of dictionaries."""
-    if cursor.description is None:
-        return []
-    
-    columns = [column[0] for column in cursor.description]
-    data = []
-    for row in cursor:
-        item = {}
-        for idx, column in enumerate(columns):
-            value = row[idx]
-            if value is not None and hasattr(value, 'isoformat'):
-                value = value.isoformat()
-            item[column] = value
-        data.append(item)
-    return data
-
+@timed_handler
 def lambda_handler(event, context):
     """
     Get complete company details with multi-resultset handling.
@@ -156,26 +126,35 @@ def lambda_handler(event, context):
         conn = get_connection()
         cursor = conn.cursor()
         
+        # Change marker first: a cached detail is served only while it matches
+        cursor.execute('EXEC usp_ObtenerVersionEmpresa @IdEmpresa=?', (id_empresa,))
+        version = tuple(cursor.fetchone() or ())
+        cached = empresa_cache.get(id_empresa, version)
+        if cached is not None:
+            logger.info(f"Retrieved empresa {id_empresa} (cache)")
+            return cached_response(cached, 'HIT')
+        epoch = empresa_cache.epoch()
+        
         # Execute stored procedure with parameterized query
         cursor.execute('EXEC usp_ObtenerEmpresa @IdEmpresa=?', (id_empresa,))
         
         # Result set 1: Empresa data
-        empresa = row_to_dict(cursor, cursor.fetchone())
+        empresa = fetch_one_dict(cursor)
         
         # Result set 2: Sedes
         sedes = []
         if cursor.nextset() and cursor.description:
-            sedes = rows_to_list(cursor)
+            sedes = fetch_all_dicts(cursor)
         
         # Result set 3: Último seguimiento
         seguimiento = None
         if cursor.nextset() and cursor.description:
-            seguimiento = row_to_dict(cursor, cursor.fetchone())
+            seguimiento = fetch_one_dict(cursor)
         
         # Result set 4: Detalle seguimiento
         detalle_seguimiento = None
         if cursor.nextset() and cursor.description:
-            detalle_seguimiento = row_to_dict(cursor, cursor.fetchone())
+            detalle_seguimiento = fetch_one_dict(cursor)
         
         # Build response
         if empresa:
@@ -184,11 +163,13 @@ def lambda_handler(event, context):
             empresa['detalleSeguimiento'] = detalle_seguimiento
             
             logger.info(f"Retrieved empresa {id_empresa}")
-            return success_response(empresa)
+            body = success_response(empresa)['body']
+            empresa_cache.put(id_empresa, body, epoch, version)
+            return cached_response(body, 'MISS')
         else:
             return error_response('Empresa no encontrada', 404)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in empresa_obtener: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -200,4 +181,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
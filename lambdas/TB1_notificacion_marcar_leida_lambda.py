@@ -6,33 +6,20 @@ Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
 Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+To mark several at once use PUT /notificaciones/leidas
+(TB1_notificaciones_marcar_leidas_lambda).
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-
-def get_connection():
-    """Create and return a database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-    )
-
 
 def get_cors_headers():
     """Return CORS headers for responses."""
@@ -50,7 +37,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -73,6 +60,7 @@ def error_response(message, status_code=500):
     }
 
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Main handler for marking notification as read.
@@ -112,7 +100,8 @@ def lambda_handler(event, context):
         # Update notification as read
         cursor.execute('''
             UPDATE dbo.TM_NOTIFICACION
-            SET LEIDO = 1
+            SET LEIDA = 1,
+                FECHALEIDA = ISNULL(FECHALEIDA, GETDATE())
             WHERE IDNOTIFICACION = ? AND ACTIVO = 1
         ''', (notification_id,))
         
@@ -129,7 +118,7 @@ def lambda_handler(event, context):
             'Notificación marcada como leída'
         )
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -141,4 +130,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
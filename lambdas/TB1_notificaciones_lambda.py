@@ -1,7 +1,7 @@
 """
 Lambda Function: TB1_notificaciones_lambda
 Description: Get notifications and alerts for high-value follow-ups not attended in 24+ hours (HU007)
-API Endpoint: GET /notificaciones?userId=3
+API Endpoint: GET /notificaciones?userId=3&limite=50
 Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
@@ -11,32 +11,31 @@ HU007: Notificación de Alerta para el equipo Comerciala
 - Como Ejecutiva Comercial, quiero recibir notificaciones cuando un seguimiento 
   considerado de alto valor no haya sido atendido en más de 24 horas
 - Para intervenir oportunamente y reducir el riesgo de perder oportunidades importantes
+
+The alerts are materialized by TB1_alertas_materializar_lambda (scheduled)
+and read here as notification rows; see sql/21_alertas_alto_valor.sql.
+
+Conditional GET: polls send If-None-Match and get 304 without the
+notifications query while the user's notifications, their alerts and the
+hour are unchanged (conditional_get). The hour counts because alerts show
+HORAS_SIN_ATENCION.
 """
 import json
-import pyodbc
-import os
 import logging
+from datetime import datetime
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts
+from conditional_get import fetch_etag, is_fresh, add_etag, not_modified
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-
-def get_connection():
-    """Create and return a database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-    )
+# Notification page size (the unread count always covers every notification)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
 
 
 def get_cors_headers():
@@ -44,7 +43,7 @@ def get_cors_headers():
     return {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match',
         'Access-Control-Allow-Methods': 'GET,OPTIONS',
         'Access-Control-Max-Age': '86400'
     }
@@ -55,7 +54,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -78,13 +77,15 @@ def error_response(message, status_code=500):
     }
 
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Main handler for retrieving notifications.
     Returns:
     - High-value follow-ups not attended in 24+ hours (alerts)
-    - System notifications for the user
+    - Latest system notifications for the user (at most `limite`, default 50)
     - Unread notification count
+    All three come from a single stored procedure call (one round trip).
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
@@ -116,94 +117,50 @@ def lambda_handler(event, context):
         except (ValueError, TypeError):
             return error_response('userId debe ser un número válido', 400)
         
+        # Validate optional page size
+        try:
+            limit = int(query_params.get('limite') or DEFAULT_LIMIT)
+        except (ValueError, TypeError):
+            return error_response('limite debe ser un número válido', 400)
+        limit = max(1, min(limit, MAX_LIMIT))
+        
         logger.info(f"Fetching notifications for user: {user_id}")
         
         # Connect to database
         conn = get_connection()
         cursor = conn.cursor()
         
-        # 1. Get high-value alerts (seguimientos de alta prioridad sin atender en 24+ horas)
-        cursor.execute('''
-            SELECT 
-                S.IDSEGUIMIENTO,
-                S.FECHAPROGRAMADA,
-                S.HORAPROGRAMADA,
-                S.PRIORIDAD,
-                S.ESTADO,
-                E.IDEMPRESA,
-                E.NOMBRECOMERCIAL AS EMPRESA,
-                E.CONTACTO_NOMBRE AS CONTACTO,
-                T.NOMBRE AS TIPOSEGUIMIENTO,
-                DATEDIFF(HOUR, 
-                    CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
-                    GETDATE()
-                ) AS HORAS_SIN_ATENCION,
-                D.PRESUPUESTO
-            FROM dbo.TM_SEGUIMIENTO S
-            INNER JOIN dbo.TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
-            INNER JOIN dbo.TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
-            LEFT JOIN dbo.TM_SEGUIMIENTO_DETALLE D ON S.IDSEGUIMIENTO = D.IDSEGUIMIENTO AND D.ACTIVO = 1
-            WHERE S.IDUSUARIOASIGNADO = ?
-              AND UPPER(S.PRIORIDAD) = 'ALTA'
-              AND S.ESTADO = 'PENDIENTE'
-              AND DATEDIFF(HOUR, 
-                    CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
-                    GETDATE()
-                  ) >= 24
-              AND S.ACTIVO = 1
-            ORDER BY S.FECHAPROGRAMADA
-        ''', (user_id,))
-        
-        alerts = []
-        columns = [column[0] for column in cursor.description]
-        for row in cursor:
-            item = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                item[column] = value
+        # Change marker first: an unchanged poll costs no notifications query
+        etag = fetch_etag(cursor, 'NOTIFICACIONES', user_id,
+                          variant=(limit, datetime.now().strftime('%Y-%m-%d %H')))
+        if is_fresh(event, etag):
+            logger.info(f"Notifications for user {user_id} not modified")
+            return not_modified(etag, get_cors_headers())
+        
+        # Single round trip: alerts, latest notifications page and unread count
+        cursor.execute(
+            'EXEC usp_ObtenerNotificacionesUsuario @IdUsuario=?, @Limite=?',
+            (user_id, limit)
+        )
+        
+        # Result set 1: High-value alerts (seguimientos de alta prioridad sin atender en 24+ horas,
+        # materialized by the scheduled TB1_alertas_materializar_lambda)
+        alerts = fetch_all_dicts(cursor)
+        for item in alerts:
             # Add alert type
             item['TIPO_ALERTA'] = 'ALTO_VALOR_NO_ATENDIDO'
             item['MENSAJE'] = f"Seguimiento de alta prioridad con {item.get('EMPRESA', '')} sin atender por más de 24 horas"
-            alerts.append(item)
-        
-        # 2. Get system notifications for the user
-        cursor.execute('''
-            SELECT 
-                N.IDNOTIFICACION,
-                N.TITULO,
-                N.MENSAJE,
-                N.TIPO,
-                N.LEIDO,
-                N.FECHAENVIO
-            FROM dbo.TM_NOTIFICACION N
-            WHERE N.IDUSUARIO = ?
-              AND N.ACTIVO = 1
-            ORDER BY N.FECHAENVIO DESC
-        ''', (user_id,))
         
+        # Result set 2: System notifications for the user (bounded page)
         notifications = []
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            for row in cursor:
-                item = {}
-                for idx, column in enumerate(columns):
-                    value = row[idx]
-                    if value is not None and hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    item[column] = value
-                notifications.append(item)
-        
-        # 3. Count unread
-        cursor.execute('''
-            SELECT COUNT(*) AS UNREAD_COUNT
-            FROM dbo.TM_NOTIFICACION
-            WHERE IDUSUARIO = ? AND LEIDO = 0 AND ACTIVO = 1
-        ''', (user_id,))
-        
-        unread_row = cursor.fetchone()
-        unread_count = unread_row[0] if unread_row else 0
+        if cursor.nextset() and cursor.description:
+            notifications = fetch_all_dicts(cursor)
+        
+        # Result set 3: Unread count
+        unread_count = 0
+        if cursor.nextset() and cursor.description:
+            unread_row = cursor.fetchone()
+            unread_count = unread_row[0] if unread_row else 0
         
         # Add alerts count to unread
         total_unread = unread_count + len(alerts)
@@ -218,9 +175,9 @@ def lambda_handler(event, context):
             'noLeidos': total_unread
         }
         
-        return success_response(data, 'OK')
+        return add_etag(success_response(data, 'OK'), etag)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error: {str(e)}")
         return error_response('Error de base de datos al consultar notificaciones', 500)
         
@@ -232,4 +189,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
@@ -0,0 +1,188 @@
+"""
+Lambda Function: TB1_notificaciones_marcar_leidas_lambda
+Description: Mark many notifications as read in one call (HU007 support)
+API Endpoint: PUT /notificaciones/leidas
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Either a list of IDs or every unread notification of the user up to a
+timestamp is marked with one set-based UPDATE (usp_MarcarNotificacionesLeidas),
+which also records FECHALEIDA. The response has one result per requested ID.
+"""
+import json
+import logging
+from datetime import datetime
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts, fetch_one_dict
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# IDs accepted per call
+MAX_IDS = 500
+
+
+def get_cors_headers():
+    """Return CORS headers for responses."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': 'PUT,OPTIONS',
+        'Access-Control-Max-Age': '86400'
+    }
+
+
+def success_response(data, message='OK', status_code=200):
+    """Return a standardized success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+
+def error_response(message, status_code=500):
+    """Return a standardized error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+
+def parse_ids(values):
+    """Validate the ID list; returns the IDs (deduplicated, in order) or None if invalid."""
+    if not isinstance(values, list) or not values:
+        return None
+    ids = []
+    for value in values:
+        try:
+            value = int(value)
+        except (ValueError, TypeError):
+            return None
+        if value <= 0:
+            return None
+        ids.append(value)
+    return list(dict.fromkeys(ids))
+
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Main handler for marking notifications as read in bulk.
+
+    Request Body (one of):
+        { "userId": 4, "ids": [12, 15, 31] }
+        { "userId": 4, "todas": true, "hasta": "2025-12-10T12:00:00" }   (hasta optional, default now)
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": {
+                "resultados": [{"IDNOTIFICACION": 12, "RESULTADO": "MARCADA", "FECHALEIDA": "..."}, ...],
+                "marcadas": 2,
+                "noLeidos": 5,
+                "fechaLeida": "..."
+            }
+        }
+    RESULTADO is MARCADA, YA_LEIDA or NO_ENCONTRADA (missing or of another user).
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+
+    # Handle OPTIONS preflight request
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'message': 'OK'})
+        }
+
+    conn = None
+    cursor = None
+
+    try:
+        body = json.loads(event.get('body', '{}') or '{}')
+
+        try:
+            user_id = int(body.get('userId'))
+        except (ValueError, TypeError):
+            return error_response('userId es requerido y debe ser un número válido', 400)
+
+        ids_param = None
+        hasta = None
+        if body.get('todas'):
+            if body.get('hasta'):
+                try:
+                    hasta = datetime.fromisoformat(str(body['hasta']).replace('Z', '+00:00')).replace(tzinfo=None)
+                except ValueError:
+                    return error_response('Formato de hasta inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)', 400)
+        else:
+            ids = parse_ids(body.get('ids'))
+            if ids is None:
+                return error_response('Envíe ids (lista de números) o todas: true', 400)
+            if len(ids) > MAX_IDS:
+                return error_response(f'Máximo {MAX_IDS} notificaciones por solicitud', 400)
+            ids_param = ','.join(str(value) for value in ids)
+
+        logger.info(f"Marking notifications as read for user {user_id}: "
+                    f"{'all up to ' + str(hasta or 'now') if ids_param is None else ids_param}")
+
+        # Connect to database
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'EXEC usp_MarcarNotificacionesLeidas @IdUsuario=?, @Ids=?, @Hasta=?',
+            (user_id, ids_param, hasta)
+        )
+
+        # Result set 1: per-ID results; result set 2: summary
+        resultados = fetch_all_dicts(cursor)
+        resumen = {}
+        if cursor.nextset() and cursor.description:
+            resumen = fetch_one_dict(cursor) or {}
+
+        conn.commit()
+
+        marcadas = resumen.get('Marcadas', 0)
+        logger.info(f"Marked {marcadas} notifications as read for user {user_id}")
+
+        return success_response({
+            'resultados': resultados,
+            'marcadas': marcadas,
+            'noLeidos': resumen.get('NoLeidas', 0),
+            'fechaLeida': resumen.get('FechaLeida'),
+        }, 'Notificaciones marcadas como leídas')
+
+    except json.JSONDecodeError:
+        return error_response('Formato de solicitud inválido', 400)
+
+    except DatabaseError as e:
+        logger.error(f"Database error: {str(e)}")
+        return error_response('Error de base de datos', 500)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return error_response('Error interno del servidor', 500)
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
@@ -10,32 +10,16 @@ Environment Variables:
     - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='GET,OPTIONS'):
     """Return CORS headers."""
     return {
@@ -51,7 +35,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -72,6 +56,7 @@ def error_response(message, status_code=500):
         })
     }
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Get accumulated pending items (future follow-ups).
@@ -140,22 +125,12 @@ def lambda_handler(event, context):
         )
         
         # Fetch results
-        data = []
-        columns = [column[0] for column in cursor.description]
-        
-        for row in cursor:
-            item = {}
-            for idx, column in enumerate(columns):
-                value = row[idx]
-                if value is not None and hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                item[column] = value
-            data.append(item)
+        data = fetch_all_dicts(cursor)
         
         logger.info(f"Pendientes acumulados for user {user_id}: {len(data)} items (filters: prioridad={prioridad}, fechaIni={fecha_ini}, fechaFin={fecha_fin})")
         return success_response(data)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error in pendientes_acumulados: {str(e)}")
         return error_response('Error de base de datos', 500)
         
@@ -167,4 +142,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
@@ -6,35 +6,31 @@ Runtime: Python 3.13
 Database: DB_APPCOMERCIAL
 Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
 Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Every changed field (estado, detalle and the scheduling fields) goes to
+usp_ActualizarSeguimiento in a single EXEC, so an edit is one statement and
+one commit. Status changes of many follow-ups at once go through
+PUT /seguimientos/estado (TB1_seguimientos_estado_lambda).
 """
 import json
-import pyodbc
-import os
 import logging
+from datetime import date, time
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from entity_cache import empresa_cache
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-# Valid estados for validation
-VALID_ESTADOS = ['PENDIENTE', 'REALIZADO', 'REPROGRAMADO', 'CANCELADO']
+# Valid estados (CHK_SEGUIMIENTO_ESTADO)
+VALID_ESTADOS = ['PENDIENTE', 'EN_PROGRESO', 'COMPLETADO', 'CANCELADO']
 
+# Labels the frontend shows for some estados
+ESTADO_ALIASES = {'REALIZADO': 'COMPLETADO', 'REPROGRAMADO': 'PENDIENTE'}
 
-def get_connection():
-    """Create and return a database connection."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-    )
+VALID_PRIORIDADES = ['ALTA', 'MEDIA', 'BAJA']
 
 
 def get_cors_headers():
@@ -53,7 +49,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -83,10 +79,30 @@ def sanitize_string(value, max_length=500):
     return str(value)[:max_length] if value else None
 
 
+def normalize_estado(value):
+    """Return the stored estado for a request value (aliases accepted), or None if invalid."""
+    estado = str(value).strip().upper()
+    estado = ESTADO_ALIASES.get(estado, estado)
+    return estado if estado in VALID_ESTADOS else None
+
+
+@timed_handler
 def lambda_handler(event, context):
     """
     Main handler for updating seguimiento (follow-up) records.
-    Supports updating status and/or detailed information.
+
+    Request Body (every field but idSeguimiento optional, at least one to update):
+        {
+            "idSeguimiento": 10,
+            "estado": "COMPLETADO",            (REALIZADO / REPROGRAMADO accepted)
+            "resultado": "Cliente interesado",
+            "prioridad": "ALTA",
+            "fechaProgramada": "2025-12-15",
+            "horaProgramada": "10:30",
+            "detalle": {"observaciones": "..."},
+            "idEmpresa": 3,
+            "usuarioModifica": 2
+        }
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
@@ -117,8 +133,6 @@ def lambda_handler(event, context):
         except (ValueError, TypeError):
             return error_response('idSeguimiento debe ser un número válido', 400)
         
-        # Extract optional parameters
-        estado = body.get('estado')
         usuarioModifica = body.get('usuarioModifica', 1)
         
         try:
@@ -127,47 +141,76 @@ def lambda_handler(event, context):
             usuarioModifica = 1
         
         # Validate estado if provided
-        if estado and estado not in VALID_ESTADOS:
-            logger.warning(f"Invalid estado value: {estado}")
-            return error_response(
-                f'Estado inválido. Valores permitidos: {", ".join(VALID_ESTADOS)}', 
-                400
-            )
+        estado = None
+        if body.get('estado'):
+            estado = normalize_estado(body['estado'])
+            if estado is None:
+                logger.warning(f"Invalid estado value: {body['estado']}")
+                return error_response(
+                    f'Estado inválido. Valores permitidos: {", ".join(VALID_ESTADOS)}', 
+                    400
+                )
+        
+        prioridad = None
+        if body.get('prioridad'):
+            prioridad = str(body['prioridad']).upper()
+            if prioridad not in VALID_PRIORIDADES:
+                return error_response(
+                    f'Prioridad inválida. Valores permitidos: {", ".join(VALID_PRIORIDADES)}',
+                    400
+                )
         
-        # Connect to database
-        conn = get_connection()
-        cursor = conn.cursor()
+        try:
+            fechaProgramada = date.fromisoformat(body['fechaProgramada']) if body.get('fechaProgramada') else None
+        except (ValueError, TypeError):
+            return error_response('Formato de fechaProgramada inválido. Use YYYY-MM-DD', 400)
+        try:
+            horaProgramada = time.fromisoformat(body['horaProgramada']) if body.get('horaProgramada') else None
+        except (ValueError, TypeError):
+            return error_response('Formato de horaProgramada inválido. Use HH:MM', 400)
+        
+        resultado = sanitize_string(body.get('resultado'), 64)
         
-        rows_affected = 0
-        operations_performed = []
-        
-        # Update status if provided
-        if estado:
-            logger.info(f"Updating estado to {estado} for seguimiento {idSeguimiento}")
-            cursor.execute('''
-                EXEC usp_ActualizarSeguimiento 
-                    @IdSeguimiento=?, @Estado=?, @UsuarioModifica=?
-            ''', (idSeguimiento, estado, usuarioModifica))
-            row = cursor.fetchone()
-            rows_affected = row[0] if row else 0
-            operations_performed.append('estado')
-        
-        # Update details if provided
         detalle = body.get('detalle')
+        notas = None
         if detalle and isinstance(detalle, dict):
-            logger.info(f"Updating detalle for seguimiento {idSeguimiento}")
-            
-            cursor.execute('''
-                EXEC usp_ActualizarSeguimiento 
-                    @IdSeguimiento=?, @Notas=?, @UsuarioModifica=?
-            ''', (idSeguimiento, sanitize_string(detalle.get('observaciones'), 500), usuarioModifica))
-            operations_performed.append('detalle')
+            notas = sanitize_string(detalle.get('observaciones'), 500)
+        
+        # Fields sent to the procedure, in the order the response reports them
+        operations_performed = [
+            name for name, value in (
+                ('estado', estado), ('detalle', notas), ('resultado', resultado), ('prioridad', prioridad),
+                ('fechaProgramada', fechaProgramada), ('horaProgramada', horaProgramada),
+            ) if value is not None
+        ]
         
         # Check if any operation was performed
         if not operations_performed:
             return error_response('No se proporcionaron datos para actualizar (estado o detalle)', 400)
         
+        # Connect to database
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        # One EXEC for every changed field: a single statement on the row
+        logger.info(f"Updating seguimiento {idSeguimiento}: {operations_performed}")
+        cursor.execute('''
+            EXEC usp_ActualizarSeguimiento 
+                @IdSeguimiento=?, @FechaProgramada=?, @HoraProgramada=?, @Prioridad=?,
+                @Estado=?, @Notas=?, @Resultado=?, @UsuarioModifica=?
+        ''', (idSeguimiento, fechaProgramada, horaProgramada, prioridad,
+              estado, notas, resultado, usuarioModifica))
+        row = cursor.fetchone()
+        rows_affected = row[0] if row else 0
+        
         conn.commit()
+        
+        # The company detail shows its latest seguimiento; without idEmpresa
+        # in the request the owning company is unknown, so drop every entry
+        try:
+            empresa_cache.invalidate(int(body['idEmpresa']))
+        except (KeyError, TypeError, ValueError):
+            empresa_cache.clear()
         logger.info(f"Successfully updated seguimiento {idSeguimiento}: {operations_performed}")
         
         return success_response(
@@ -183,7 +226,7 @@ def lambda_handler(event, context):
         logger.error(f"JSON parse error: {str(e)}")
         return error_response('Formato JSON inválido en el cuerpo de la solicitud', 400)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         logger.error(f"Database error: {str(e)}")
         return error_response('Error de base de datos al actualizar seguimiento', 500)
         
@@ -195,4 +238,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
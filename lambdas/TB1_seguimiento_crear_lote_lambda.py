@@ -0,0 +1,250 @@
+"""
+Lambda Function: TB1_seguimiento_crear_lote_lambda
+Description: Create many follow-up records in one call (HU009 support)
+API Endpoint: POST /seguimientos/lote
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Every item is validated before touching the database (same rules as
+POST /seguimiento). The valid ones are loaded into TM_SEGUIMIENTO_LOTE with
+one fast_executemany INSERT, and usp_CrearSeguimientosLote checks their
+references set-wise and creates them. Everything runs in one transaction
+with one commit. The response has one result per item.
+"""
+import json
+import uuid
+import logging
+from datetime import date, time
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts
+from entity_cache import empresa_cache
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Follow-ups accepted per call
+MAX_ITEMS = 200
+
+VALID_PRIORIDADES = ['Alta', 'Media', 'Baja']
+
+STAGING_INSERT = '''
+    INSERT INTO TM_SEGUIMIENTO_LOTE (
+        IDLOTE, ITEM, IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO,
+        FECHAPROGRAMADA, HORAPROGRAMADA, PRIORIDAD, NOTAS, USUARIOCREA
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def get_cors_headers(methods='POST,OPTIONS'):
+    """Return CORS headers."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': methods,
+        'Access-Control-Max-Age': '3600'
+    }
+
+def success_response(data, message='OK', status_code=201):
+    """Generate success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+def error_response(message, status_code=500):
+    """Generate error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+def validate_item(item, usuario_crea):
+    """
+    Validate one follow-up of the batch.
+
+    Returns (row, None) with the staging values (without IDLOTE / ITEM), or
+    (None, message) when the item is invalid.
+    """
+    if not isinstance(item, dict):
+        return None, 'Cada seguimiento debe ser un objeto'
+
+    required_fields = ('idEmpresa', 'idUsuarioAsignado', 'idTipoSeguimiento',
+                       'prioridad', 'fechaProgramada', 'horaProgramada')
+    missing = [k for k in required_fields if not item.get(k)]
+    if missing:
+        return None, f'Campos requeridos: {", ".join(missing)}'
+
+    try:
+        idEmpresa = int(item['idEmpresa'])
+        idUsuarioAsignado = int(item['idUsuarioAsignado'])
+        idTipoSeguimiento = int(item['idTipoSeguimiento'])
+    except (ValueError, TypeError):
+        return None, 'Los IDs deben ser numéricos'
+
+    prioridad = str(item['prioridad']).strip()[:16]
+    if prioridad not in VALID_PRIORIDADES:
+        return None, 'Prioridad debe ser: Alta, Media o Baja'
+
+    # One bad date would fail the whole INSERT, so formats are checked here
+    try:
+        fechaProgramada = date.fromisoformat(str(item['fechaProgramada']).strip()[:10])
+    except ValueError:
+        return None, 'Formato de fechaProgramada inválido. Use YYYY-MM-DD'
+    try:
+        horaProgramada = time.fromisoformat(str(item['horaProgramada']).strip()[:8])
+    except ValueError:
+        return None, 'Formato de horaProgramada inválido. Use HH:MM'
+
+    notas = item.get('notas')
+    if notas:
+        notas = str(notas).strip()[:1024]
+
+    return (idEmpresa, idTipoSeguimiento, idUsuarioAsignado, fechaProgramada.isoformat(),
+            horaProgramada.isoformat(), prioridad, notas or None, usuario_crea), None
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Create a batch of follow-ups (seguimientos).
+
+    Request Body:
+        {
+            "usuarioCrea": 2 (optional, defaults to 1),
+            "atomico": false (optional; true creates nothing if any item fails),
+            "seguimientos": [
+                {
+                    "idEmpresa": 1, "idUsuarioAsignado": 3, "idTipoSeguimiento": 1,
+                    "prioridad": "Alta", "fechaProgramada": "2025-12-15",
+                    "horaProgramada": "10:00", "notas": "..."
+                },
+                ...
+            ]
+        }
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": {
+                "resultados": [
+                    {"item": 0, "idSeguimiento": 9, "error": null},
+                    {"item": 1, "idSeguimiento": null, "error": "Empresa no encontrada o inactiva"}
+                ],
+                "creados": 1,
+                "rechazados": 1
+            }
+        }
+    item is the position of the follow-up in seguimientos.
+    """
+    # Handle OPTIONS preflight
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': ''
+        }
+
+    conn = None
+    cursor = None
+
+    try:
+        # Parse request body
+        body = json.loads(event.get('body', '{}') or '{}')
+
+        items = body.get('seguimientos')
+        if not isinstance(items, list) or not items:
+            return error_response('seguimientos es requerido y debe ser una lista', 400)
+        if len(items) > MAX_ITEMS:
+            return error_response(f'Máximo {MAX_ITEMS} seguimientos por solicitud', 400)
+
+        try:
+            usuarioCrea = int(body.get('usuarioCrea', 1))
+        except (ValueError, TypeError):
+            return error_response('usuarioCrea debe ser numérico', 400)
+        atomico = bool(body.get('atomico'))
+
+        # Validate everything up front
+        id_lote = str(uuid.uuid4())
+        resultados = {}
+        rows = []
+        for position, item in enumerate(items):
+            row, error = validate_item(item, usuarioCrea)
+            if error:
+                resultados[position] = {'item': position, 'idSeguimiento': None, 'error': error}
+            else:
+                rows.append((id_lote, position) + row)
+
+        if rows and not (atomico and resultados):
+            # Connect to database
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            # One round trip for every row, then one EXEC
+            cursor.fast_executemany = True
+            cursor.executemany(STAGING_INSERT, rows)
+            cursor.execute('EXEC usp_CrearSeguimientosLote @IdLote=?, @Atomico=?', (id_lote, atomico))
+
+            for result in fetch_all_dicts(cursor):
+                resultados[result['ITEM']] = {
+                    'item': result['ITEM'],
+                    'idSeguimiento': result['IDSEGUIMIENTO'],
+                    'error': result['ERROR'],
+                }
+
+            conn.commit()
+        elif atomico:
+            for row in rows:
+                resultados[row[1]] = {'item': row[1], 'idSeguimiento': None,
+                                      'error': 'No creado: otro seguimiento del lote es inválido'}
+
+        resultados = [resultados[position] for position in sorted(resultados)]
+        creados = [r for r in resultados if r['idSeguimiento'] is not None]
+
+        # The company detail shows its latest seguimiento
+        for idEmpresa in {int(items[r['item']]['idEmpresa']) for r in creados}:
+            empresa_cache.invalidate(idEmpresa)
+
+        logger.info(f"Batch {id_lote}: created {len(creados)} of {len(items)} seguimientos")
+        data = {
+            'resultados': resultados,
+            'creados': len(creados),
+            'rechazados': len(resultados) - len(creados),
+        }
+        if not creados:
+            return success_response(data, 'No se creó ningún seguimiento', 200)
+        return success_response(data, f'{len(creados)} de {len(items)} seguimientos creados correctamente', 201)
+
+    except DatabaseError as e:
+        logger.error(f"Database error in seguimiento_crear_lote: {str(e)}")
+        return error_response('Error de base de datos', 500)
+
+    except json.JSONDecodeError:
+        return error_response('Formato de solicitud inválido', 400)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in seguimiento_crear_lote: {str(e)}")
+        return error_response('Error interno del servidor', 500)
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
@@ -0,0 +1,221 @@
+"""
+Lambda Function: TB1_seguimientos_estado_lambda
+Description: Change the status of many follow-ups in one call (HU009 support)
+API Endpoint: PUT /seguimientos/estado
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+Environment Variables: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+Either a list of IDs or every follow-up of a user on a date (a supervisor
+cancelling a day of visits) moves with one set-based UPDATE
+(usp_CambiarEstadoSeguimientos). Only open follow-ups (PENDIENTE /
+EN_PROGRESO) change; the response has one result per follow-up.
+"""
+import json
+import logging
+from datetime import date
+
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_all_dicts, fetch_one_dict
+from entity_cache import empresa_cache
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# IDs accepted per call
+MAX_IDS = 500
+
+# Valid target estados (CHK_SEGUIMIENTO_ESTADO)
+VALID_ESTADOS = ['PENDIENTE', 'EN_PROGRESO', 'COMPLETADO', 'CANCELADO']
+
+# Labels the frontend shows for some estados
+ESTADO_ALIASES = {'REALIZADO': 'COMPLETADO', 'REPROGRAMADO': 'PENDIENTE'}
+
+
+def get_cors_headers():
+    """Return CORS headers for responses."""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Methods': 'PUT,OPTIONS',
+        'Access-Control-Max-Age': '86400'
+    }
+
+
+def success_response(data, message='OK', status_code=200):
+    """Return a standardized success response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': timed_dumps({
+            'isSuccess': True,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': data
+        })
+    }
+
+
+def error_response(message, status_code=500):
+    """Return a standardized error response."""
+    return {
+        'statusCode': status_code,
+        'headers': get_cors_headers(),
+        'body': json.dumps({
+            'isSuccess': False,
+            'errorCode': str(status_code),
+            'errorMessage': message,
+            'data': None
+        })
+    }
+
+
+def parse_ids(values):
+    """Validate the ID list; returns the IDs (deduplicated, in order) or None if invalid."""
+    if not isinstance(values, list) or not values:
+        return None
+    ids = []
+    for value in values:
+        try:
+            value = int(value)
+        except (ValueError, TypeError):
+            return None
+        if value <= 0:
+            return None
+        ids.append(value)
+    return list(dict.fromkeys(ids))
+
+
+def sanitize_string(value, max_length=500):
+    """Sanitize string input by truncating to max length."""
+    if value is None:
+        return None
+    return str(value)[:max_length] if value else None
+
+
+@timed_handler
+def lambda_handler(event, context):
+    """
+    Main handler for batch status transitions.
+
+    Request Body (one of):
+        { "estado": "CANCELADO", "ids": [12, 15, 31], "usuarioModifica": 2 }
+        { "estado": "CANCELADO", "idUsuarioAsignado": 4, "fecha": "2025-12-15",
+          "resultado": "Cancelado por supervisor", "usuarioModifica": 2 }
+    resultado and notas are optional.
+
+    Response:
+        {
+            "isSuccess": true,
+            "data": {
+                "resultados": [{"IDSEGUIMIENTO": 12, "RESULTADO": "ACTUALIZADO", "IDEMPRESA": 3,
+                                "ESTADOANTERIOR": "PENDIENTE", "ESTADO": "CANCELADO"}, ...],
+                "solicitados": 3,
+                "actualizados": 2,
+                "fechaModifica": "..."
+            }
+        }
+    RESULTADO is ACTUALIZADO, SIN_CAMBIO (already in that estado), ESTADO_FINAL
+    (COMPLETADO / CANCELADO) or NO_ENCONTRADO.
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+
+    # Handle OPTIONS preflight request
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'message': 'OK'})
+        }
+
+    conn = None
+    cursor = None
+
+    try:
+        body = json.loads(event.get('body', '{}') or '{}')
+
+        estado = str(body.get('estado') or '').strip().upper()
+        estado = ESTADO_ALIASES.get(estado, estado)
+        if estado not in VALID_ESTADOS:
+            return error_response(f'Estado inválido. Valores permitidos: {", ".join(VALID_ESTADOS)}', 400)
+
+        try:
+            usuarioModifica = int(body.get('usuarioModifica', 1))
+        except (ValueError, TypeError):
+            usuarioModifica = 1
+
+        ids_param = None
+        idUsuarioAsignado = None
+        fecha = None
+        if body.get('ids') is not None:
+            ids = parse_ids(body.get('ids'))
+            if ids is None:
+                return error_response('ids debe ser una lista de números', 400)
+            if len(ids) > MAX_IDS:
+                return error_response(f'Máximo {MAX_IDS} seguimientos por solicitud', 400)
+            ids_param = ','.join(str(value) for value in ids)
+        else:
+            try:
+                idUsuarioAsignado = int(body.get('idUsuarioAsignado'))
+                fecha = date.fromisoformat(body.get('fecha'))
+            except (ValueError, TypeError):
+                return error_response('Envíe ids (lista de números) o idUsuarioAsignado y fecha (YYYY-MM-DD)', 400)
+
+        resultado = sanitize_string(body.get('resultado'), 64)
+        notas = sanitize_string(body.get('notas'), 500)
+
+        logger.info(f"Changing seguimientos to {estado}: "
+                    f"{ids_param if ids_param is not None else f'user {idUsuarioAsignado} on {fecha}'}")
+
+        # Connect to database
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            EXEC usp_CambiarEstadoSeguimientos
+                @Estado=?, @UsuarioModifica=?, @Ids=?, @IdUsuarioAsignado=?, @Fecha=?,
+                @Resultado=?, @Notas=?
+        ''', (estado, usuarioModifica, ids_param, idUsuarioAsignado, fecha, resultado, notas))
+
+        # Result set 1: per-follow-up results; result set 2: summary
+        resultados = fetch_all_dicts(cursor)
+        resumen = {}
+        if cursor.nextset() and cursor.description:
+            resumen = fetch_one_dict(cursor) or {}
+
+        conn.commit()
+
+        # Company details show their latest seguimiento
+        for id_empresa in {row['IDEMPRESA'] for row in resultados if row['RESULTADO'] == 'ACTUALIZADO'}:
+            empresa_cache.invalidate(id_empresa)
+
+        actualizados = resumen.get('Actualizados', 0)
+        logger.info(f"Changed {actualizados} seguimientos to {estado}")
+
+        return success_response({
+            'resultados': resultados,
+            'solicitados': resumen.get('Solicitados', 0),
+            'actualizados': actualizados,
+            'fechaModifica': resumen.get('FechaModifica'),
+        }, f'{actualizados} seguimientos actualizados a {estado}')
+
+    except json.JSONDecodeError:
+        return error_response('Formato de solicitud inválido', 400)
+
+    except DatabaseError as e:
+        logger.error(f"Database error: {str(e)}")
+        return error_response('Error de base de datos', 500)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return error_response('Error interno del servidor', 500)
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
@@ -13,32 +13,16 @@ Environment Variables (configure in Lambda):
     - DB_PASSWORD: Database password
 """
 import json
-import pyodbc
-import os
 import logging
 
+from db_connection import get_connection, release_connection, DatabaseError
+from request_timing import timed_handler, timed_dumps
+from row_converter import fetch_one_dict
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Database configuration from environment variables (with defaults for development)
-DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
-DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
-DB_USER = os.environ.get('DB_USER', 'admin')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
-
-def get_connection():
-    """Create database connection with proper settings."""
-    return pyodbc.connect(
-        f"Driver={{ODBC Driver 18 for SQL Server}};"
-        f"Server={DB_HOST};"
-        f"Database={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
-        f"Connection Timeout=30;"
-        f"TrustServerCertificate=yes;"
-    )
-
 def get_cors_headers(methods='POST,OPTIONS'):
     """Return CORS headers."""
     return {
@@ -54,7 +38,7 @@ def success_response(data, message='OK', status_code=200):
     return {
         'statusCode': status_code,
         'headers': get_cors_headers(),
-        'body': json.dumps({
+        'body': timed_dumps({
             'isSuccess': True,
             'errorCode': str(status_code),
             'errorMessage': message,
@@ -75,6 +59,7 @@ def error_response(message, status_code=500):
         })
     }
 
+@timed_handler
 def lambda_handler(event, context):
     """
     Handle login request.
@@ -134,22 +119,16 @@ def lambda_handler(event, context):
         )
         
         # Fetch result
-        row = cursor.fetchone()
+        user_data = fetch_one_dict(cursor)
         
-        if row:
-            # Build user data from columns
-            columns = [column[0] for column in cursor.description]
-            user_data = {}
-            for idx, column in enumerate(columns):
-                user_data[column] = row[idx]
-            
+        if user_data:
             logger.info(f"Login successful for user: {username}")
             return success_response(user_data, 'Login exitoso', 200)
         else:
             logger.warning(f"Login failed for user: {username}")
             return error_response('Credenciales inválidas', 401)
         
-    except pyodbc.Error as e:
+    except DatabaseError as e:
         # Log error internally but don't expose to client
         logger.error(f"Database error during login: {str(e)}")
         return error_response('Error de conexión a base de datos', 500)
@@ -166,4 +145,4 @@ def lambda_handler(event, context):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            release_connection(conn)
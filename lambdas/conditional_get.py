@@ -0,0 +1,85 @@
+"""
+Shared Module: conditional_get
+Description: ETag / If-None-Match for polled read endpoints
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+
+The app polls GET /notificaciones and reloads GET /agenda and GET /calendario
+even when nothing changed. Before running its view, a handler asks
+usp_ObtenerVersionDatos (26_version_datos_etag.sql) for the change marker of
+the rows the view would read: row count plus highest VERSIONFILA per table,
+one small indexed query. The ETag is a hash of that marker and the request
+parameters. When the client already has it (If-None-Match) the handler
+answers 304 with an empty body and the view is never run.
+
+ETags are weak (W/"..."): they identify the data, not the bytes, so they
+survive compression and key order. Responses carry Cache-Control: no-cache,
+so browsers store the body and revalidate it on every request. The
+If-None-Match header is added by the browser cache, and Angular's HttpClient
+receives the stored body as a normal 200.
+
+The marker is read before the view, so a write landing in between is only
+picked up on the next poll. No stale data is ever served as unchanged.
+"""
+import hashlib
+
+# Bump when the response shape of a covered endpoint changes, so clients
+# holding an old ETag get the new shape
+ETAG_FORMAT = 1
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def fetch_etag(cursor, vista, user_id, fecha_inicio=None, fecha_fin=None, variant=()):
+    """
+    Run usp_ObtenerVersionDatos for a view and return its ETag.
+
+    variant: request parameters that change the response without changing
+    the rows read (page size, time buckets).
+    """
+    cursor.execute(
+        'EXEC usp_ObtenerVersionDatos @Vista=?, @IdUsuario=?, @FechaInicio=?, @FechaFin=?',
+        (vista, user_id, fecha_inicio, fecha_fin)
+    )
+    marker = cursor.fetchone()
+    key = repr((ETAG_FORMAT, vista, user_id, fecha_inicio, fecha_fin, tuple(variant),
+                tuple(marker) if marker else None))
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def if_none_match(event):
+    """The If-None-Match header of the request (header names are case-insensitive)."""
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'if-none-match':
+            return value
+    return None
+
+
+def is_fresh(event, etag):
+    """True when the client's If-None-Match already names this ETag (weak comparison)."""
+    header = if_none_match(event)
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def add_etag(response, etag):
+    """Add the ETag and revalidation headers to a 200 response; returns it."""
+    headers = response.setdefault('headers', {})
+    headers['ETag'] = etag
+    headers['Cache-Control'] = CACHE_CONTROL
+    expose = headers.get('Access-Control-Expose-Headers')
+    headers['Access-Control-Expose-Headers'] = f'{expose},ETag' if expose else 'ETag'
+    return response
+
+
+def not_modified(etag, headers):
+    """304 response for a client that already has the data (no body)."""
+    return add_etag({'statusCode': 304, 'headers': dict(headers), 'body': ''}, etag)
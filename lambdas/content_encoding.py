@@ -0,0 +1,140 @@
+"""
+Shared Module: content_encoding
+Description: gzip / brotli response compression negotiated with Accept-Encoding
+Runtime: Python 3.13
+
+Calendar, cerrados historial and search responses run to hundreds of KB,
+and field executives load them over mobile links. JSON compresses 5-10x, so
+@timed_handler (request_timing) passes every response through
+compress_response(). When the body is at least COMPRESS_MIN_BYTES and the
+client accepts br or gzip, the body is compressed and returned base64
+encoded with isBase64Encoded, as Lambda proxy integrations require for
+binary bodies. Smaller bodies, 304s and streamed (generator) bodies stay
+plain.
+
+API Gateway REST only turns a base64 body back into bytes when the API has
+a matching binary media type. Configure binaryMediaTypes = */*. With that
+setting API Gateway also base64-encodes text request bodies, so
+decode_text_body() turns JSON / text bodies back into the text the handlers
+expect before they run. Binary uploads (XLSX) stay encoded.
+
+Optional dependency: brotli (pip install brotli, or a layer). Without it
+only gzip is offered.
+
+Environment Variables:
+    - RESPONSE_COMPRESSION: '1' (default) to compress, '0' to always send plain bodies
+    - COMPRESS_MIN_BYTES: smallest body worth compressing (default 1024)
+"""
+import os
+import gzip
+import base64
+import binascii
+
+try:
+    import brotli
+except ImportError:  # gzip alone is enough
+    brotli = None
+
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') != '0'
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+
+# Fast settings: on dynamic JSON they get most of the ratio of the maximum
+# levels at a fraction of the CPU time
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Preference order when the client weights several encodings equally
+_ENCODERS = {}
+if brotli is not None:
+    _ENCODERS['br'] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+_ENCODERS['gzip'] = lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+# Request bodies API Gateway may deliver base64 encoded although they are text
+_TEXT_TYPES = ('application/json', 'text/', 'application/x-www-form-urlencoded')
+
+
+def _header(headers, name):
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def choose_encoding(accept_encoding):
+    """
+    The encoding to use for an Accept-Encoding value, or None for identity.
+
+    q-values are honoured (q=0 refuses an encoding); '*' stands for any
+    encoding not listed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    best, best_q = None, 0.0
+    for name in _ENCODERS:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress_response(event, response):
+    """
+    Compress a response body in place when it is worth it.
+
+    Returns the number of compressed bytes sent, or None when the body was
+    left as is.
+    """
+    body = response.get('body')
+    if (not RESPONSE_COMPRESSION or not isinstance(body, str) or not body
+            or response.get('isBase64Encoded')):
+        return None
+    headers = response.setdefault('headers', {})
+    if _header(headers, 'content-encoding'):
+        return None
+
+    data = body.encode('utf-8')
+    if len(data) < COMPRESS_MIN_BYTES:
+        return None
+
+    # Caches must key on Accept-Encoding from here on, compressed or not
+    vary = headers.get('Vary')
+    headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+    encoding = choose_encoding(_header(event.get('headers'), 'accept-encoding'))
+    if encoding is None:
+        return None
+    compressed = _ENCODERS[encoding](data)
+    if len(compressed) >= len(data):
+        return None
+
+    headers['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return len(compressed)
+
+
+def decode_text_body(event):
+    """Undo API Gateway's base64 encoding of a text request body (in place)."""
+    if not event.get('isBase64Encoded') or not event.get('body'):
+        return
+    content_type = (_header(event.get('headers'), 'content-type') or 'application/json').lower()
+    if not content_type.startswith(_TEXT_TYPES):
+        return
+    try:
+        event['body'] = base64.b64decode(event['body'], validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError):
+        return  # not text after all: leave it for the handler
+    event['isBase64Encoded'] = False
@@ -0,0 +1,239 @@
+"""
+Shared Module: db_connection
+Description: Warm database connections reused across Lambda invocations
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+Layer: arn:aws:lambda:us-east-1:411014146872:layer:pyodbc313:1
+       (package this module next to the handler or inside the layer)
+
+Connections live in a small module-level pool, so a warm container pays the
+ODBC handshake (TLS + login) only once. On Lambda the pool holds a single
+connection (one invocation at a time per container); the local gateway
+raises the size to match its worker threads via configure_pool().
+
+Before reuse a connection is validated with a trivial round trip, but only
+when it has been idle for longer than DB_PING_INTERVAL seconds. A broken
+link is discarded and reopened transparently. release_connection() rolls
+back any open transaction so the next request starts with a clean session.
+
+A connection that fails with a communication-link error (SQLSTATE 08S01 /
+08001, e.g. after an RDS failover) is discarded when it is released, and
+the other idle connections, which went to the same server, are flagged so
+the next checkout pings them first: the failure reaches one request, not
+one request per pooled slot.
+
+DB_BACKEND=offline swaps SQL Server for offline_db, an in-process SQLite
+stand-in that implements the same stored procedures, so handlers can be run
+and profiled without a database server (pyodbc is then optional).
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+    - DB_BACKEND: 'pyodbc' (default) or 'offline' (see offline_db)
+    - DB_PING_INTERVAL: idle seconds before a ping is required (default 30)
+    - DB_POOL_SIZE: maximum open connections per process (default 1)
+    - DB_POOL_TIMEOUT: seconds to wait for a free connection (default 30)
+"""
+import os
+import time
+import logging
+import threading
+
+from request_timing import record as record_phase, wrap_connection, unwrap_connection
+
+try:
+    import pyodbc
+except ImportError:  # only the offline backend can run without the ODBC layer
+    pyodbc = None
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Database configuration from environment variables
+DB_HOST = os.environ.get('DB_HOST', 'database-1.c9ywsse2shj2.us-east-1.rds.amazonaws.com')
+DB_NAME = os.environ.get('DB_NAME', 'DB_APPCOMERCIAL')
+DB_USER = os.environ.get('DB_USER', 'admin')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Deviljin99!')
+DB_BACKEND = os.environ.get('DB_BACKEND', 'pyodbc').lower()
+
+if DB_BACKEND == 'offline' or pyodbc is None:
+    import offline_db
+
+# Idle time after which a cached connection is pinged before reuse
+DB_PING_INTERVAL = float(os.environ.get('DB_PING_INTERVAL', '30'))
+
+# Pool sizing
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '1'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+
+# Idle connections as (connection, last_used) pairs, most recent last
+_idle = []
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+_pool_size = DB_POOL_SIZE
+
+# SQLSTATEs of a lost or refused link (pyodbc puts the SQLSTATE in args[0])
+_LINK_FAILURE_STATES = ('08S01', '08001')
+
+# Semaphore each checked-out connection was taken from, keyed by id()
+# (pyodbc connections do not accept extra attributes)
+_checked_out = {}
+
+# Base class of the errors raised by the active backend; handlers catch this
+# instead of pyodbc.Error (offline_db.Error subclasses it when pyodbc exists)
+DatabaseError = pyodbc.Error if pyodbc is not None else offline_db.Error
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+
+def configure_pool(size):
+    """
+    Resize the pool. Call once at startup, before any connection is taken.
+    """
+    global _slots, _pool_size
+
+    size = max(1, int(size))
+    with _lock:
+        for conn, _ in _idle:
+            _discard(conn)
+        _idle.clear()
+        _slots = threading.BoundedSemaphore(size)
+        _pool_size = size
+    logger.info(f"Database pool configured with {size} connection(s)")
+
+
+def pool_size():
+    """Return the configured maximum number of connections."""
+    return _pool_size
+
+
+def _open_connection():
+    """Open a new database connection on the configured backend."""
+    if DB_BACKEND == 'offline':
+        return offline_db.connect()
+    if pyodbc is None:
+        raise ImportError('pyodbc is required unless DB_BACKEND=offline')
+    return pyodbc.connect(
+        f"Driver={{ODBC Driver 18 for SQL Server}};"
+        f"Server={DB_HOST};"
+        f"Database={DB_NAME};"
+        f"UID={DB_USER};"
+        f"PWD={DB_PASSWORD};"
+        f"Connection Timeout=30;"
+        f"TrustServerCertificate=yes;"
+    )
+
+
+def _is_alive(conn):
+    """Check the connection with the cheapest possible round trip."""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1').fetchone()
+        finally:
+            cursor.close()
+        return True
+    except DatabaseError:
+        return False
+
+
+def is_link_failure(error):
+    """True for a database error caused by a lost or refused server link."""
+    args = getattr(error, 'args', ())
+    return bool(args) and args[0] in _LINK_FAILURE_STATES
+
+
+def _flag_idle():
+    """Make every idle connection be pinged before its next reuse."""
+    with _lock:
+        _idle[:] = [(conn, float('-inf')) for conn, _ in _idle]
+
+
+def _discard(conn):
+    """Close a connection, ignoring errors from an already broken link."""
+    try:
+        conn.close()
+    except DatabaseError:
+        pass
+
+
+def get_connection():
+    """
+    Take a connection from the pool, opening a new one if none is idle.
+
+    A pooled connection is only pinged when it sat idle longer than
+    DB_PING_INTERVAL; if the ping fails a new connection is opened.
+    Every call must be paired with release_connection(). Inside a timed
+    invocation (request_timing) the wait and login count as the connect
+    phase and the connection is returned wrapped so its queries are timed.
+    """
+    started = time.perf_counter()
+    try:
+        return wrap_connection(_checkout())
+    finally:
+        record_phase('connect', time.perf_counter() - started)
+
+
+def _checkout():
+    """Take or open a raw connection; see get_connection()."""
+    slots = _slots
+    if not slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise PoolTimeoutError(f"No database connection available after {DB_POOL_TIMEOUT:.0f}s")
+
+    try:
+        with _lock:
+            entry = _idle.pop() if _idle else None
+
+        if entry is not None:
+            conn, last_used = entry
+            idle = time.monotonic() - last_used
+            if idle < DB_PING_INTERVAL or _is_alive(conn):
+                _checked_out[id(conn)] = slots
+                return conn
+            logger.warning(f"Discarding stale database connection (idle {idle:.0f}s)")
+            _discard(conn)
+
+        conn = _open_connection()
+        _checked_out[id(conn)] = slots
+        return conn
+    except BaseException:
+        slots.release()
+        raise
+
+
+def release_connection(conn, discard=False):
+    """
+    Return a connection to the pool for reuse by the next request.
+
+    Any uncommitted work is rolled back so no session state leaks between
+    requests. If the rollback fails the link is considered broken and the
+    connection is dropped; the next get_connection() reconnects. On a
+    communication-link failure the idle connections are flagged for a ping
+    as well, since they were opened against the same server.
+    """
+    if conn is None:
+        return
+
+    conn = unwrap_connection(conn)
+    slots = _checked_out.pop(id(conn), None)
+
+    if not discard:
+        try:
+            conn.rollback()
+        except DatabaseError as e:
+            logger.warning(f"Database connection reset failed, reconnecting next time: {str(e)}")
+            discard = True
+            if is_link_failure(e):
+                _flag_idle()
+
+    if discard or slots is not _slots:
+        # Broken link, or the pool was reconfigured while it was checked out
+        _discard(conn)
+    else:
+        with _lock:
+            _idle.append((conn, time.monotonic()))
+
+    if slots is not None:
+        slots.release()
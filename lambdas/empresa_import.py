@@ -0,0 +1,222 @@
+"""
+Shared Module: empresa_import
+Description: Streaming company import from CSV / XLSX (HU001 support)
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+
+Rows are read one at a time (csv.reader over a text stream, openpyxl in
+read-only mode for XLSX), validated and normalized, and written to
+TM_EMPRESA_IMPORTACION in chunks with fast_executemany. Only one chunk is
+held in memory, so the file size does not matter. usp_ImportarEmpresas then
+merges the whole import set-wise (24_empresas_importacion.sql) and returns
+the rows that did not create a company, keyed on RUC.
+
+Used by TB1_empresa_importar_lambda and tools/import_empresas.py. The caller
+owns the connection and commits.
+
+Optional dependency: openpyxl (XLSX only).
+"""
+import csv
+import uuid
+import logging
+import unicodedata
+
+from empresa_search_index import fold_text, compact_ruc
+from row_converter import fetch_one_dict, iter_dict_batches
+
+try:
+    import openpyxl
+except ImportError:  # CSV imports do not need it
+    openpyxl = None
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Staged rows per fast_executemany call
+DEFAULT_CHUNK_SIZE = 5000
+
+# Staging columns and their maximum lengths (None: integer)
+FIELDS = (
+    ('NOMBRECOMERCIAL', 256), ('RAZONSOCIAL', 256), ('RUC', 11), ('SEDEPRINCIPAL', 256),
+    ('DOMICILIO', 512), ('CONTACTO_NOMBRE', 128), ('CONTACTO_EMAIL', 128), ('CONTACTO_TELEFONO', 20),
+    ('CONTACTO_CARGO', 64), ('TIPOCLIENTE', 64), ('LINEANEGOCIO', 128), ('SUBLINEANEGOCIO', 128),
+    ('TIPOCREDITO', 64), ('TIPOCARTERA', 64), ('ACTIVIDADECONOMICA', 256), ('RIESGO', 32),
+    ('NUMTRABAJADORES', None),
+)
+REQUIRED_COLUMNS = ('NOMBRECOMERCIAL', 'RUC')
+
+# Free-text classifications (no catalog table or CHECK constraint; POST
+# /empresa and the app accept any value). They are only brought to the
+# upper-case, unaccented form of the sample data ("Estándar" -> "ESTANDAR")
+CLASSIFICATION_COLUMNS = ('TIPOCLIENTE', 'TIPOCARTERA', 'RIESGO')
+
+STAGING_INSERT = (
+    f"INSERT INTO TM_EMPRESA_IMPORTACION (IDIMPORTACION, FILA, {', '.join(name for name, _ in FIELDS)}, USUARIOCREA) "
+    f"VALUES ({', '.join('?' * (len(FIELDS) + 3))})"
+)
+
+# Header names are compared folded and without spaces/underscores, so
+# "Nombre Comercial", "nombreComercial" and "NOMBRECOMERCIAL" all match
+_HEADER_ALIASES = {''.join(fold_text(name).split()): name for name, _ in FIELDS}
+_HEADER_ALIASES.update({'contacto': 'CONTACTO_NOMBRE', 'email': 'CONTACTO_EMAIL',
+                        'telefono': 'CONTACTO_TELEFONO', 'cargo': 'CONTACTO_CARGO'})
+
+
+class InvalidFileError(ValueError):
+    """Raised when the file cannot be imported at all (format, header)."""
+
+
+def read_csv(stream):
+    """
+    Yield the rows of a CSV text stream as lists of strings, header first.
+
+    The delimiter (',' or ';', as Excel writes it with Spanish locale
+    settings) is taken from the header line.
+    """
+    header = stream.readline().lstrip('\ufeff')
+    if not header.strip():
+        raise InvalidFileError('El archivo está vacío')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    yield next(csv.reader([header], delimiter=delimiter))
+    yield from csv.reader(stream, delimiter=delimiter)
+
+
+def read_xlsx(source):
+    """Yield the rows of the first sheet of an XLSX file (path or binary stream), header first."""
+    if openpyxl is None:
+        raise InvalidFileError('La importación de XLSX requiere openpyxl')
+    try:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except Exception as e:
+        raise InvalidFileError(f'No se pudo leer el archivo XLSX: {e}') from e
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def map_header(header):
+    """Return the staging column of each header position (None for unknown columns)."""
+    columns = []
+    for cell in header:
+        key = ''.join(fold_text(cell).split())
+        column = _HEADER_ALIASES.get(key)
+        columns.append(column if column not in columns else None)
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise InvalidFileError(f'Columnas requeridas: {", ".join(missing)}')
+    return columns
+
+
+def _text(value, max_len):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # numbers typed in Excel (RUC, teléfono)
+    value = ' '.join(str(value).split())
+    return value[:max_len] if value else None
+
+
+def _classification(value):
+    """Upper case without accents, punctuation kept ("Pequeña-Empresa" -> "PEQUENA-EMPRESA")."""
+    text = unicodedata.normalize('NFKD', value.upper())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def normalize_row(columns, cells):
+    """
+    Validate and normalize one data row.
+
+    Returns (values, None) with one value per FIELDS entry, or
+    (None, message) when the row is invalid.
+    """
+    raw = {column: cell for column, cell in zip(columns, cells) if column}
+    values = {name: _text(raw.get(name), max_len) for name, max_len in FIELDS if max_len}
+
+    if not values['NOMBRECOMERCIAL']:
+        return None, 'NOMBRECOMERCIAL es requerido'
+
+    ruc = compact_ruc(_text(raw.get('RUC'), 32))
+    if not ruc:
+        return None, 'RUC es requerido'
+    if len(ruc) != 11 or not ruc.isdigit():
+        return None, 'RUC debe tener 11 dígitos'
+    values['RUC'] = ruc
+
+    for name in CLASSIFICATION_COLUMNS:
+        if values[name]:
+            values[name] = _classification(values[name])
+
+    # Like POST /empresa, an unreadable NUMTRABAJADORES is left empty
+    try:
+        trabajadores = int(float(str(raw.get('NUMTRABAJADORES')).strip()))
+        values['NUMTRABAJADORES'] = trabajadores if trabajadores >= 0 else None
+    except (ValueError, TypeError, OverflowError):
+        values['NUMTRABAJADORES'] = None
+
+    return [values[name] for name, _ in FIELDS], None
+
+
+class EmpresaImporter:
+    """
+    Streams one import into TM_EMPRESA_IMPORTACION and merges it.
+
+    on_report(row) is called for every row that did not create a company:
+    invalid rows while reading, then the report of usp_ImportarEmpresas
+    (FILA, RUC, RESULTADO, IDEMPRESA, DETALLE), so it can be written out
+    without keeping it in memory.
+    """
+
+    def __init__(self, conn, usuario_crea, actualizar=False, chunk_size=DEFAULT_CHUNK_SIZE, on_report=None):
+        self.conn = conn
+        self.usuario_crea = usuario_crea
+        self.actualizar = actualizar
+        self.chunk_size = chunk_size
+        self.on_report = on_report or (lambda row: None)
+        self.id_importacion = str(uuid.uuid4())
+
+    def run(self, rows):
+        """Import the rows of read_csv() / read_xlsx(). Returns the summary dict."""
+        rows = iter(rows)
+        columns = map_header(next(rows, None) or [])
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.fast_executemany = True
+            leidas = invalidas = 0
+            chunk = []
+            for fila, cells in enumerate(rows, start=2):
+                if not any(str(cell).strip() for cell in cells):
+                    continue  # blank line
+                leidas += 1
+                values, error = normalize_row(columns, cells)
+                if error:
+                    invalidas += 1
+                    ruc = next((cell for column, cell in zip(columns, cells) if column == 'RUC'), None)
+                    self.on_report({'FILA': fila, 'RUC': _text(ruc, 32), 'RESULTADO': 'INVALIDA',
+                                    'IDEMPRESA': None, 'DETALLE': error})
+                    continue
+                chunk.append((self.id_importacion, fila, *values, self.usuario_crea))
+                if len(chunk) >= self.chunk_size:
+                    cursor.executemany(STAGING_INSERT, chunk)
+                    chunk = []
+            if chunk:
+                cursor.executemany(STAGING_INSERT, chunk)
+
+            logger.info(f"Import {self.id_importacion}: {leidas - invalidas} rows staged, {invalidas} invalid")
+
+            cursor.execute('EXEC usp_ImportarEmpresas @IdImportacion=?, @Actualizar=?',
+                           (self.id_importacion, self.actualizar))
+            summary = fetch_one_dict(cursor) or {}
+            if cursor.nextset():
+                for batch in iter_dict_batches(cursor):
+                    for row in batch:
+                        self.on_report(row)
+        finally:
+            cursor.close()
+
+        summary = {key: value or 0 for key, value in summary.items()}
+        summary.update({'Leidas': leidas, 'Invalidas': invalidas})
+        return summary
@@ -0,0 +1,355 @@
+"""
+Shared Module: empresa_search_index
+Description: In-memory trigram index for the company type-ahead search
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+
+usp_BuscarEmpresas filters with LIKE '%texto%', which no index can serve, so
+each keystroke scanned TM_EMPRESA. Instead, the warm container keeps an
+inverted index from character trigrams to companies over NOMBRECOMERCIAL,
+RAZONSOCIAL, RUC and CONTACTO_NOMBRE:
+    - bulk loaded once from usp_ObtenerEmpresasIndice
+    - refreshed incrementally with the rows created / modified since the
+      last watermark (FECHACREA / FECHAMODIFICA), at most every
+      SEARCH_INDEX_REFRESH_SECONDS
+    - fully rebuilt every SEARCH_INDEX_REBUILD_SECONDS, which also drops
+      companies deleted outright
+
+Loads and refreshes run outside the lock that searches take: the new index
+(or a copy with the changed rows applied) is swapped in when it is ready,
+so concurrent searches never wait for a rebuild once an index exists.
+
+Text is folded (lower case, no accents, punctuation as spaces) before it is
+indexed or searched, the same way fn_ClaveBusqueda builds the stored search
+keys; RUCs are compacted to their digits. Each query word must occur as a substring of one of the
+fields; candidates come from intersecting the trigram posting sets and are
+then verified. Results are ranked by where the words matched (exact field,
+prefix, word start, anywhere) weighted by field, then by name.
+
+Environment Variables:
+    - SEARCH_INDEX_REFRESH_SECONDS: incremental refresh interval (default 15)
+    - SEARCH_INDEX_REBUILD_SECONDS: full rebuild interval (default 3600)
+"""
+import os
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+from row_converter import fetch_one_dict, iter_dict_batches
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SEARCH_INDEX_REFRESH_SECONDS = float(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '15'))
+SEARCH_INDEX_REBUILD_SECONDS = float(os.environ.get('SEARCH_INDEX_REBUILD_SECONDS', '3600'))
+
+# Re-read this much before the last watermark: a row stamped just before it
+# may have been committed after the previous refresh read the table
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# Indexed fields and their ranking weight
+FIELDS = (
+    ('NOMBRECOMERCIAL', 4),
+    ('RAZONSOCIAL', 3),
+    ('RUC', 3),
+    ('CONTACTO_NOMBRE', 1),
+)
+
+# Points per match position, multiplied by the field weight
+MATCH_EXACT = 6
+MATCH_PREFIX = 4
+MATCH_WORD = 3
+MATCH_ANYWHERE = 2
+
+GRAM = 3
+
+# Above this many companies, queries with no word of 3+ characters only
+# consider names starting with the first word instead of every company
+_SHORT_QUERY_SCAN_LIMIT = 200000
+
+
+def fold_text(value):
+    """Lower-case, strip accents and turn punctuation into single spaces."""
+    if not value:
+        return ''
+    text = unicodedata.normalize('NFKD', str(value).lower())
+    chars = []
+    for ch in text:
+        if unicodedata.combining(ch):
+            continue
+        chars.append(ch if ch.isalnum() else ' ')
+    return ' '.join(''.join(chars).split())
+
+
+def compact_ruc(value):
+    """RUC without separators ("20 123-456.789" -> "20123456789")."""
+    return ''.join(fold_text(value).split())
+
+
+def trigrams(text):
+    """Set of character trigrams of a folded string."""
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class _Doc:
+    __slots__ = ('row', 'fields', 'name', 'grams')
+
+    def __init__(self, row):
+        self.row = row
+        self.fields = tuple(
+            compact_ruc(row.get(column)) if column == 'RUC' else fold_text(row.get(column))
+            for column, _ in FIELDS
+        )
+        self.name = self.fields[0]
+        grams = set()
+        for field in self.fields:
+            grams |= trigrams(field)
+        self.grams = grams
+
+
+def _term_score(doc, term):
+    """Best weighted score of one query word across the fields, 0 if absent."""
+    best = 0
+    for field, (_, weight) in zip(doc.fields, FIELDS):
+        pos = field.find(term)
+        if pos < 0:
+            continue
+        if field == term:
+            points = MATCH_EXACT
+        elif pos == 0:
+            points = MATCH_PREFIX
+        elif field[pos - 1] == ' ' or (' ' + term) in field:
+            points = MATCH_WORD
+        else:
+            points = MATCH_ANYWHERE
+        best = max(best, points * weight)
+    return best
+
+
+class EmpresaSearchIndex:
+    """Trigram inverted index over the searchable company fields."""
+
+    def __init__(self):
+        self._docs = {}
+        self._postings = {}
+        # Grams whose posting set this index may modify in place (None: all)
+        self._owned = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def copy(self):
+        """
+        A copy to apply changes to while this index keeps serving searches.
+
+        Posting sets stay shared until the copy first changes one of them,
+        so only the sets touched by the changed companies are duplicated.
+        """
+        clone = EmpresaSearchIndex()
+        clone._docs = dict(self._docs)
+        clone._postings = dict(self._postings)
+        clone._owned = set()
+        return clone
+
+    def _own(self, gram):
+        """The posting set of a gram, safe to modify (None if absent)."""
+        ids = self._postings.get(gram)
+        if ids is not None and self._owned is not None and gram not in self._owned:
+            ids = self._postings[gram] = set(ids)
+            self._owned.add(gram)
+        return ids
+
+    def upsert(self, row):
+        """Add or replace a company; inactive companies are removed."""
+        id_empresa = row['IDEMPRESA']
+        self.remove(id_empresa)
+        if not row.get('ACTIVO', True):
+            return
+        doc = _Doc(row)
+        self._docs[id_empresa] = doc
+        postings = self._postings
+        for gram in doc.grams:
+            ids = self._own(gram)
+            if ids is None:
+                postings[gram] = {id_empresa}
+                if self._owned is not None:
+                    self._owned.add(gram)
+            else:
+                ids.add(id_empresa)
+
+    def remove(self, id_empresa):
+        """Drop a company from the index if present."""
+        doc = self._docs.pop(id_empresa, None)
+        if doc is None:
+            return
+        for gram in doc.grams:
+            ids = self._own(gram)
+            if ids is not None:
+                ids.discard(id_empresa)
+                if not ids:
+                    del self._postings[gram]
+
+    def _candidates(self, terms):
+        """Ids that may contain every term (None = no trigram filter possible)."""
+        grams = set()
+        for term in terms:
+            grams |= trigrams(term)
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def search(self, text, limit, after=None):
+        """
+        Ranked companies matching every word of `text`.
+
+        Returns (rows, sort keys, total matches). At most `limit` + 1 rows
+        are returned, ordered by (-score, folded name, IDEMPRESA) and strictly
+        after the `after` key, so the caller can page with the key of the
+        last row it returned.
+        """
+        terms = fold_text(text).split()
+        if not terms:
+            return [], [], 0
+        compact = ''.join(terms)
+        if len(terms) > 1 and compact.isdigit():
+            # A RUC typed in groups ("20 123 456") is one term
+            terms = [compact]
+
+        candidates = self._candidates(terms)
+        if candidates is None:
+            # Only words shorter than a trigram: verify every company
+            candidates = self._docs.keys()
+            if len(self._docs) > _SHORT_QUERY_SCAN_LIMIT:
+                prefix = terms[0]
+                candidates = [i for i, d in self._docs.items() if d.name.startswith(prefix)]
+
+        after = tuple(after) if after else None
+        matches = []
+        total = 0
+        docs = self._docs
+        for id_empresa in candidates:
+            doc = docs[id_empresa]
+            score = 0
+            for term in terms:
+                points = _term_score(doc, term)
+                if not points:
+                    break
+                score += points
+            else:
+                total += 1
+                key = (-score, doc.name, id_empresa)
+                if after is None or key > after:
+                    matches.append(key)
+
+        top = heapq.nsmallest(limit + 1, matches)
+        return [docs[key[2]].row for key in top], top, total
+
+
+# Module-level index shared by the invocations of a warm container. A
+# published index is never modified: refreshes apply their rows to a copy
+# and swap it in, so searches run on a snapshot without holding any lock.
+_index = None
+_watermark = None
+_last_refresh = 0.0
+_last_rebuild = 0.0
+# Guards the module state above (held only to read or swap it)
+_lock = threading.Lock()
+# Held by the one request that is loading or refreshing the index
+_refresh_lock = threading.Lock()
+
+
+def _load(conn, since):
+    """Read companies from usp_ObtenerEmpresasIndice. Returns (watermark, row batches)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('EXEC usp_ObtenerEmpresasIndice @Desde=?', (since,))
+        watermark = fetch_one_dict(cursor)['WATERMARK']
+        cursor.nextset()
+        return watermark, list(iter_dict_batches(cursor))
+    finally:
+        cursor.close()
+
+
+def _refresh(get_conn):
+    """Build or refresh the index if its intervals require it. Caller holds _refresh_lock."""
+    global _index, _watermark, _last_refresh, _last_rebuild
+
+    with _lock:
+        index, watermark = _index, _watermark
+        last_refresh, last_rebuild = _last_refresh, _last_rebuild
+    now = time.monotonic()
+
+    if index is None or now - last_rebuild >= SEARCH_INDEX_REBUILD_SECONDS:
+        started = time.perf_counter()
+        watermark, batches = _load(get_conn(), None)
+        index = EmpresaSearchIndex()
+        for batch in batches:
+            for row in batch:
+                index.upsert(row)
+        with _lock:
+            _index, _watermark = index, watermark
+            _last_refresh = _last_rebuild = now
+        logger.info(f"Company search index built: {len(index)} companies in "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms")
+    elif now - last_refresh >= SEARCH_INDEX_REFRESH_SECONDS:
+        # The watermark comes back as an ISO string (row_converter)
+        since = datetime.fromisoformat(watermark) - WATERMARK_OVERLAP
+        watermark, batches = _load(get_conn(), since)
+        changed = sum(len(batch) for batch in batches)
+        if changed:
+            index = index.copy()
+            for batch in batches:
+                for row in batch:
+                    index.upsert(row)
+        with _lock:
+            _index, _watermark = index, watermark
+            _last_refresh = now
+        if changed:
+            logger.info(f"Company search index refreshed: {changed} companies changed")
+
+
+def _due():
+    """True when the index is missing or one of its intervals has elapsed."""
+    now = time.monotonic()
+    with _lock:
+        return (_index is None or now - _last_rebuild >= SEARCH_INDEX_REBUILD_SECONDS
+                or now - _last_refresh >= SEARCH_INDEX_REFRESH_SECONDS)
+
+
+def search_empresas(get_conn, text, limit, after=None):
+    """
+    Search companies through the shared index, refreshing it first if due.
+
+    get_conn() returns the database connection to load from; it is only
+    called when the index has to be loaded or refreshed. Only one request
+    loads at a time: the others keep searching the current index, and wait
+    only when there is none yet. Returns (rows, sort keys, total matches)
+    as EmpresaSearchIndex.search().
+    """
+    if _due():
+        with _lock:
+            have_index = _index is not None
+        if _refresh_lock.acquire(blocking=not have_index):
+            try:
+                _refresh(get_conn)
+            finally:
+                _refresh_lock.release()
+    with _lock:
+        index = _index
+    return index.search(text, limit, after)
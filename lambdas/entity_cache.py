@@ -0,0 +1,109 @@
+"""
+Shared Module: entity_cache
+Description: Bounded LRU read-through cache for composed entity responses
+Runtime: Python 3.13
+
+The company detail view (usp_ObtenerEmpresa: company, locations and latest
+follow-ups, three result sets) is opened over and over during a day of
+calls. empresa_cache keeps the serialized response body per IDEMPRESA, so a
+hot read costs one small marker query instead of the full detail.
+
+Entries are stored with the version they were read at. A reader passes the
+current version to get(): an entry stored at another version is dropped and
+reported as a miss. TB1_empresa_obtener_lambda uses the change marker of
+usp_ObtenerVersionEmpresa (18_empresa_version_cache.sql), so a write from
+any process or container is seen by the next read.
+
+Writers in the same process also invalidate the entries they touch
+(empresa_actualizar, seguimiento_crear, seguimiento_actualizar, ...). A read
+that started before an invalidation is not allowed to store its (possibly
+old) result: fills carry the invalidation epoch observed before the query
+and are dropped if it changed in between. Entries expire after
+EMPRESA_CACHE_TTL_SECONDS, so companies nobody opens any more free their
+memory.
+
+Environment Variables:
+    - EMPRESA_CACHE_SIZE: max cached companies per process (default 2000, 0 disables)
+    - EMPRESA_CACHE_TTL_SECONDS: max age of an entry (default 60)
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+EMPRESA_CACHE_SIZE = int(os.environ.get('EMPRESA_CACHE_SIZE', '2000'))
+EMPRESA_CACHE_TTL_SECONDS = float(os.environ.get('EMPRESA_CACHE_TTL_SECONDS', '60'))
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a size bound and per-entry time to live."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version=None):
+        """
+        Return the cached value or None (missing, expired or stale).
+
+        With `version`, an entry stored at another version is stale.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires, stored_version = entry
+                if expires > time.monotonic() and (version is None or version == stored_version):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def epoch(self):
+        """Invalidation counter to pass to put() for a read about to start."""
+        return self._epoch
+
+    def put(self, key, value, epoch=None, version=None):
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        If `epoch` is given and an invalidation happened since it was taken,
+        the value may be outdated and is not stored. `version` is what the
+        value was read at (see get()).
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop one entry."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for logging."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Company detail responses keyed by IDEMPRESA
+empresa_cache = LRUCache(EMPRESA_CACHE_SIZE, EMPRESA_CACHE_TTL_SECONDS)
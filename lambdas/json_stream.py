@@ -0,0 +1,87 @@
+"""
+Shared Module: json_stream
+Description: Incremental JSON envelope for large result sets
+Runtime: Python 3.13
+
+Builds the standard response envelope
+    {"isSuccess": true, "errorCode": "200", "errorMessage": "OK", "data": ...}
+as a generator of text chunks. Rows are read from the cursor in fetchmany()
+batches and serialized a batch at a time, so no list of every row and no
+second copy of the whole payload is kept in memory.
+
+When the transport can stream (the local gateway marks the event with
+requestContext.streamingResponse) the generator itself is returned as the
+body and written with chunked transfer encoding; it then owns the cursor
+and connection and releases them when it finishes. API Gateway REST
+integrations buffer responses, so on Lambda the chunks are joined into the
+body string instead.
+"""
+import json
+import time
+import logging
+
+from db_connection import release_connection
+from request_timing import record as record_phase
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def stream_requested(event):
+    """True when the caller can consume a streamed (generator) body."""
+    return bool((event.get('requestContext') or {}).get('streamingResponse'))
+
+
+def iter_array(batches, stats=None):
+    """
+    Yield a JSON array from batches of JSON-ready items.
+
+    If a stats dict is given, stats['rows'] is incremented per item.
+    """
+    yield '['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        if stats is not None:
+            stats['rows'] = stats.get('rows', 0) + len(batch)
+        started = time.perf_counter()
+        chunk = ', '.join([json.dumps(item) for item in batch])
+        record_phase('serialize', time.perf_counter() - started)
+        yield chunk if first else ', ' + chunk
+        first = False
+    yield ']'
+
+
+def iter_envelope(data_chunks, message='OK', status_code=200):
+    """Wrap already-serialized data chunks in the success envelope."""
+    yield json.dumps({
+        'isSuccess': True,
+        'errorCode': str(status_code),
+        'errorMessage': message,
+    })[:-1] + ', "data": '
+    yield from data_chunks
+    yield '}'
+
+
+def close_after(chunks, cursor, conn, on_complete=None):
+    """
+    Yield the chunks, then close the cursor and release the connection.
+
+    Used when the body is streamed after the handler has returned. If the
+    stream fails half way the error is logged and the output is cut short;
+    the status line has already been sent at that point.
+    """
+    try:
+        yield from chunks
+        if on_complete:
+            on_complete()
+    except Exception as e:
+        logger.error(f"Error while streaming response: {str(e)}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
@@ -0,0 +1,399 @@
+"""
+Local Gateway: local_gateway
+Description: Single-process HTTP server that hosts every Lambda handler
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+
+Runs the API on our own hosts with the same handlers deployed to Lambda.
+Each HTTP request is translated into an API Gateway proxy event, dispatched
+to the matching lambda_handler on a bounded worker pool, and the proxy
+response is written back. All workers share the pooled connections from
+db_connection, sized to the number of workers by default.
+
+Usage:
+    python local_gateway.py --port 8080 --workers 16
+
+Per-route throughput is available at GET /_stats and is logged on shutdown;
+/_stats also carries the average phase breakdown per route (request_timing).
+Handlers that return a generator body (see json_stream) are written with
+chunked transfer encoding, so large result sets are never fully buffered.
+
+Connections are kept alive (HTTP/1.1), and each one occupies a worker
+until it is closed. An idle client is disconnected after
+GATEWAY_KEEPALIVE_SECONDS. While connections are queued for a worker,
+responses are sent with Connection: close. Either way, a browser holding
+idle sockets cannot starve new requests.
+
+Environment Variables:
+    - DB_HOST, DB_NAME, DB_USER, DB_PASSWORD (see db_connection)
+    - DB_BACKEND=offline: serve from the SQLite stand-in (see offline_db)
+    - GATEWAY_HOST, GATEWAY_PORT, GATEWAY_WORKERS, DB_POOL_SIZE
+    - GATEWAY_KEEPALIVE_SECONDS: idle time before a kept-alive connection is closed (default 5)
+"""
+import argparse
+import base64
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import db_connection
+import request_timing
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Idle keep-alive connections are closed after this many seconds
+GATEWAY_KEEPALIVE_SECONDS = float(os.environ.get('GATEWAY_KEEPALIVE_SECONDS', '5'))
+
+# Streamed bodies are flushed to the socket in chunks of about this size
+STREAM_FLUSH_BYTES = 64 * 1024
+
+# (method, resource, handler module) - resources use API Gateway {param} syntax
+ROUTES = [
+    ('POST', '/login', 'TB1_user_login_lambda'),
+    ('GET', '/empresas', 'TB1_empresa_buscar_lambda'),
+    ('POST', '/empresas/importar', 'TB1_empresa_importar_lambda'),
+    ('GET', '/empresa', 'TB1_empresa_obtener_lambda'),
+    ('POST', '/empresa', 'TB1_empresa_insertar_lambda'),
+    ('PUT', '/empresa', 'TB1_empresa_actualizar_lambda'),
+    ('GET', '/agenda', 'TB1_agenda_dia_lambda'),
+    ('GET', '/dashboard', 'TB1_dashboard_supervisor_lambda'),
+    ('GET', '/inicio', 'TB1_app_inicio_lambda'),
+    ('GET', '/calendario', 'TB1_calendario_supervisor_lambda'),
+    ('GET', '/cerrados', 'TB1_cerrados_semana_lambda'),
+    ('GET', '/produccion', 'TB1_produccion_diaria_lambda'),
+    ('GET', '/pendientes-acumulados', 'TB1_pendientes_acumulados_lambda'),
+    ('GET', '/pendientes-olvidados', 'TB1_pendientes_olvidados_lambda'),
+    ('GET', '/notificaciones', 'TB1_notificaciones_lambda'),
+    ('GET', '/notificaciones/user/{userId}', 'TB1_notificaciones_lambda'),
+    ('PUT', '/notificaciones/leidas', 'TB1_notificaciones_marcar_leidas_lambda'),
+    ('PUT', '/notificaciones/{id}/leida', 'TB1_notificacion_marcar_leida_lambda'),
+    ('POST', '/alertas/materializar', 'TB1_alertas_materializar_lambda'),
+    ('POST', '/seguimiento', 'TB1_seguimiento_crear_lambda'),
+    ('PUT', '/seguimiento', 'TB1_seguimiento_actualizar_lambda'),
+    ('POST', '/seguimientos/lote', 'TB1_seguimiento_crear_lote_lambda'),
+    ('PUT', '/seguimientos/estado', 'TB1_seguimientos_estado_lambda'),
+]
+
+
+def compile_resource(resource):
+    """Turn '/notificaciones/{id}/leida' into an anchored regex with named groups."""
+    pattern = re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(resource))
+    return re.compile(f'^{pattern}/?$')
+
+
+class Route:
+    """A resolved route: compiled resource pattern plus its lambda_handler."""
+
+    def __init__(self, method, resource, module_name):
+        self.method = method
+        self.resource = resource
+        self.module_name = module_name
+        self.pattern = compile_resource(resource)
+        self.handler = importlib.import_module(module_name).lambda_handler
+
+
+class RouteStats:
+    """Thread-safe request counters per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._routes = {}
+
+    def record(self, key, status_code, elapsed):
+        with self._lock:
+            stats = self._routes.setdefault(key, {'requests': 0, 'errors': 0, 'totalSeconds': 0.0, 'maxSeconds': 0.0})
+            stats['requests'] += 1
+            stats['totalSeconds'] += elapsed
+            stats['maxSeconds'] = max(stats['maxSeconds'], elapsed)
+            if status_code >= 500:
+                stats['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            uptime = max(time.monotonic() - self._started, 1e-9)
+            routes = {}
+            for key, stats in sorted(self._routes.items()):
+                requests = stats['requests']
+                routes[key] = {
+                    'requests': requests,
+                    'errors': stats['errors'],
+                    'requestsPerSecond': round(requests / uptime, 3),
+                    'avgMs': round(stats['totalSeconds'] * 1000 / requests, 2) if requests else 0,
+                    'maxMs': round(stats['maxSeconds'] * 1000, 2),
+                }
+            return {'uptimeSeconds': round(uptime, 1), 'routes': routes}
+
+
+class LambdaContext:
+    """Minimal stand-in for the Lambda context object."""
+
+    def __init__(self, function_name, timeout_seconds=30):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+class Gateway:
+    """Route table plus the event/response translation."""
+
+    def __init__(self, routes=ROUTES):
+        self.routes = [Route(method, resource, module) for method, resource, module in routes]
+        self.stats = RouteStats()
+
+    def match(self, method, path):
+        """Find the route for a request; OPTIONS matches any method on the path."""
+        for route in self.routes:
+            found = route.pattern.match(path)
+            if found and (route.method == method or method == 'OPTIONS'):
+                return route, found.groupdict()
+        return None, None
+
+    def build_event(self, route, method, path, path_params, query, headers, body, is_base64=False):
+        """Build an API Gateway (REST, proxy integration) event."""
+        query_pairs = parse_qsl(query, keep_blank_values=True)
+        multi = {}
+        for name, value in query_pairs:
+            multi.setdefault(name, []).append(value)
+        return {
+            'resource': route.resource,
+            'path': path,
+            'httpMethod': method,
+            'headers': headers,
+            'multiValueHeaders': {name: [value] for name, value in headers.items()},
+            'queryStringParameters': {name: values[-1] for name, values in multi.items()} or None,
+            'multiValueQueryStringParameters': multi or None,
+            'pathParameters': path_params or None,
+            'body': body,
+            'isBase64Encoded': is_base64,
+            'requestContext': {
+                'resourcePath': route.resource,
+                'httpMethod': method,
+                'path': path,
+                'stage': 'local',
+                'requestId': str(uuid.uuid4()),
+                'requestTimeEpoch': int(time.time() * 1000),
+                'streamingResponse': True,
+            },
+        }
+
+    def invoke(self, route, event):
+        """Run the handler and time it against the route's counters."""
+        started = time.monotonic()
+        status_code = 500
+        try:
+            response = route.handler(event, LambdaContext(route.module_name))
+            status_code = int(response.get('statusCode', 200))
+            return response
+        finally:
+            self.stats.record(f"{event['httpMethod']} {route.resource}", status_code, time.monotonic() - started)
+
+
+class GatewayRequestHandler(BaseHTTPRequestHandler):
+    """Translates HTTP requests into handler invocations."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AppComercialGateway/1.0'
+
+    # Socket timeout (StreamRequestHandler): ends the wait for the next
+    # request on an idle keep-alive connection, releasing its worker
+    timeout = GATEWAY_KEEPALIVE_SECONDS
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def do_OPTIONS(self):
+        self._dispatch('OPTIONS')
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _dispatch(self, method):
+        gateway = self.server.gateway
+        url = urlsplit(self.path)
+
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+
+        if method == 'GET' and url.path == '/_stats':
+            stats = gateway.stats.snapshot()
+            stats['phases'] = request_timing.snapshot()
+            self._send(200, {'Content-Type': 'application/json'}, json.dumps(stats).encode('utf-8'))
+            return
+
+        route, path_params = gateway.match(method, url.path)
+        if route is None:
+            body = json.dumps({'isSuccess': False, 'errorCode': '404', 'errorMessage': 'Ruta no encontrada', 'data': None})
+            self._send(404, {'Content-Type': 'application/json'}, body.encode('utf-8'))
+            return
+
+        headers = {name: value for name, value in self.headers.items()}
+        # Binary bodies (XLSX uploads) arrive base64 encoded, as with API
+        # Gateway binary media types
+        try:
+            body, is_base64 = (raw_body.decode('utf-8') if raw_body else None), False
+        except UnicodeDecodeError:
+            body, is_base64 = base64.b64encode(raw_body).decode('ascii'), True
+        event = gateway.build_event(route, method, url.path, path_params, url.query, headers, body, is_base64)
+
+        try:
+            response = gateway.invoke(route, event)
+        except Exception as e:
+            logger.error(f"Unhandled error in {route.module_name}: {str(e)}")
+            body = json.dumps({'isSuccess': False, 'errorCode': '500', 'errorMessage': 'Error interno del servidor', 'data': None})
+            self._send(500, {'Content-Type': 'application/json'}, body.encode('utf-8'))
+            return
+
+        body = response.get('body') or ''
+        if not isinstance(body, str):
+            # Generator body (see json_stream): write it as it is produced
+            self._send_stream(int(response.get('statusCode', 200)), response.get('headers') or {}, body)
+            return
+        if response.get('isBase64Encoded'):
+            payload = base64.b64decode(body)
+        else:
+            payload = body.encode('utf-8')
+        self._send(int(response.get('statusCode', 200)), response.get('headers') or {}, payload)
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if self.server.saturated():
+            # Connections are waiting for a worker: free this one
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+
+    def _send(self, status_code, headers, payload):
+        self.send_response(status_code)
+        for name, value in headers.items():
+            if name.lower() != 'content-length':
+                self.send_header(name, value)
+        if status_code != 304:
+            self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    def _send_stream(self, status_code, headers, chunks):
+        """Write a generator body with chunked transfer encoding."""
+        self.send_response(status_code)
+        for name, value in headers.items():
+            if name.lower() not in ('content-length', 'transfer-encoding'):
+                self.send_header(name, value)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        buffer = bytearray()
+        try:
+            for chunk in chunks:
+                buffer += chunk.encode('utf-8')
+                if len(buffer) >= STREAM_FLUSH_BYTES:
+                    self._write_chunk(buffer)
+                    buffer.clear()
+            if buffer:
+                self._write_chunk(buffer)
+            self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # Headers are already sent: drop the connection so the client sees a truncated body
+            logger.error(f"Streaming response aborted: {str(e)}")
+            self.close_connection = True
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + bytes(data) + b'\r\n')
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that serves connections on a fixed-size thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, gateway, workers):
+        super().__init__(server_address, GatewayRequestHandler)
+        self.gateway = gateway
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gateway')
+        # Accepted connections not yet closed (served or queued)
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+
+    def saturated(self):
+        """True when accepted connections are queued for a free worker."""
+        return self._connections > self.workers
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            self._connections += 1
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._connections_lock:
+                self._connections -= 1
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def parse_args():
+    """Read CLI arguments, defaulting to the GATEWAY_* environment variables."""
+    parser = argparse.ArgumentParser(description='Serve all App Comercial handlers from one process.')
+    parser.add_argument('--host', default=os.environ.get('GATEWAY_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('GATEWAY_PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('GATEWAY_WORKERS', '16')))
+    parser.add_argument('--db-pool-size', type=int, default=None,
+                        help='Database connections to keep (defaults to DB_POOL_SIZE, or --workers)')
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
+    args = parse_args()
+
+    pool = args.db_pool_size or int(os.environ.get('DB_POOL_SIZE', '0')) or args.workers
+    db_connection.configure_pool(pool)
+
+    gateway = Gateway()
+    server = PooledHTTPServer((args.host, args.port), gateway, args.workers)
+    logger.info(f"Serving {len(gateway.routes)} routes on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Route stats: {json.dumps(gateway.stats.snapshot())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1961 @@
+"""
+Shared Module: offline_db
+Description: In-process SQLite stand-in for DB_APPCOMERCIAL
+Runtime: Python 3.13
+
+Lets every handler run without SQL Server, so the Python side of a request
+(connect, fetch, convert, serialize) can be profiled and benchmarked on a
+laptop or in CI. db_connection uses it instead of pyodbc.connect() when
+DB_BACKEND=offline.
+
+It mimics the small part of pyodbc the handlers use:
+    - connect() -> Connection with cursor(), commit(), rollback(), close()
+      and the autocommit attribute
+    - Cursor.execute() / executemany() / fetchone() / fetchmany() /
+      fetchall() / nextset(), description with Python types as type_code
+      (what row_converter relies on) and rowcount
+    - Error, raised for every database failure
+
+"EXEC usp_X @Param=?, ..." is dispatched to a Python port of the latest
+version of each stored procedure (same parameters, defaults, result sets
+and column names; see PROCEDURES). Any other statement runs on SQLite after
+a light T-SQL translation (dbo. prefix, ISNULL, GETDATE, N'' literals,
+SET IDENTITY_INSERT, OBJECT_ID), which covers the ad-hoc statements of the
+handlers and of tools/generate_synthetic_data.py.
+
+Query plans and timings are SQLite's, not SQL Server's: use it to measure
+and compare the Python overhead, not the procedures themselves.
+
+Environment Variables:
+    - OFFLINE_DB_PATH: SQLite file to use (default: a temporary file per process)
+    - OFFLINE_DB_SEED: 'sample' fills an empty database with the rows of
+      05_sample_data.sql (dates relative to today), 'none' leaves it empty
+      (default 'sample')
+"""
+import os
+import re
+import atexit
+import inspect
+import logging
+import sqlite3
+import tempfile
+import threading
+from decimal import Decimal
+from datetime import date, datetime, time, timedelta
+
+from empresa_search_index import fold_text, compact_ruc
+
+try:
+    import pyodbc
+    _BaseError = pyodbc.Error
+except ImportError:  # offline runs do not need the ODBC layer
+    _BaseError = Exception
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+OFFLINE_DB_PATH = os.environ.get('OFFLINE_DB_PATH', '')
+OFFLINE_DB_SEED = os.environ.get('OFFLINE_DB_SEED', 'sample')
+
+# Seconds a writer waits for another connection's transaction
+BUSY_TIMEOUT_MS = 30000
+
+
+class Error(_BaseError):
+    """Database error; a pyodbc.Error subclass when pyodbc is installed."""
+
+
+# ---------------------------------------------------------------------
+# Type mapping (declared SQL type <-> Python type, as pyodbc returns them)
+# ---------------------------------------------------------------------
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' ', 'milliseconds'))
+sqlite3.register_adapter(time, time.isoformat)
+sqlite3.register_converter('DATE', lambda raw: date.fromisoformat(raw.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('TIME', lambda raw: time.fromisoformat(raw.decode()))
+sqlite3.register_converter('DECIMAL', lambda raw: Decimal(raw.decode()))
+sqlite3.register_converter('BIT', lambda raw: raw not in (b'0', b''))
+
+
+def _now():
+    return datetime.now().isoformat(' ', 'milliseconds')
+
+
+def _as_datetime(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = str(value)
+    return datetime.fromisoformat(value if len(value) > 10 else value + ' 00:00:00')
+
+
+def _rowversion(counter):
+    """VERSIONFILA value: the counter as 8 big-endian bytes (SQL Server ROWVERSION)."""
+    return None if counter is None else int(counter).to_bytes(8, 'big')
+
+
+def _datediff(unit, start, end):
+    """T-SQL DATEDIFF: number of unit boundaries crossed between two values."""
+    start, end = _as_datetime(start), _as_datetime(end)
+    if start is None or end is None:
+        return None
+    if unit == 'day':
+        return (end.date() - start.date()).days
+    if unit == 'hour':
+        start = start.replace(minute=0, second=0, microsecond=0)
+        end = end.replace(minute=0, second=0, microsecond=0)
+        return int((end - start).total_seconds() // 3600)
+    raise ValueError(f"Unsupported DATEDIFF unit: {unit}")
+
+
+# ---------------------------------------------------------------------
+# Schema (02_create_tables.sql). Text columns compare case-insensitively,
+# like the default SQL Server collation.
+# ---------------------------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS TM_PERFIL (
+    IDPERFIL            INTEGER PRIMARY KEY,
+    NOMBREPERFIL        NVARCHAR(64) COLLATE NOCASE NOT NULL,
+    DESCRIPCION         NVARCHAR(256) COLLATE NOCASE NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_USUARIO (
+    IDUSUARIO           INTEGER PRIMARY KEY,
+    IDPERFIL            INT NOT NULL REFERENCES TM_PERFIL(IDPERFIL),
+    LOGINUSUARIO        NVARCHAR(64) COLLATE NOCASE NOT NULL UNIQUE,
+    CLAVE               NVARCHAR(256) COLLATE NOCASE NOT NULL,
+    NOMBRES             NVARCHAR(128) COLLATE NOCASE NOT NULL,
+    APELLIDOPATERNO     NVARCHAR(64) COLLATE NOCASE NOT NULL,
+    APELLIDOMATERNO     NVARCHAR(64) COLLATE NOCASE NULL,
+    EMAIL               NVARCHAR(128) COLLATE NOCASE NULL,
+    TELEFONO            NVARCHAR(20) COLLATE NOCASE NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    IDSUPERVISOR        INT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL,
+    VERSIONFILA         BINARY(8) NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_EMPRESA (
+    IDEMPRESA           INTEGER PRIMARY KEY,
+    NOMBRECOMERCIAL     NVARCHAR(256) COLLATE NOCASE NOT NULL,
+    RAZONSOCIAL         NVARCHAR(256) COLLATE NOCASE NULL,
+    RUC                 NVARCHAR(11) COLLATE NOCASE NULL,
+    SEDEPRINCIPAL       NVARCHAR(256) COLLATE NOCASE NULL,
+    DOMICILIO           NVARCHAR(512) COLLATE NOCASE NULL,
+    CONTACTO_NOMBRE     NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_EMAIL      NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_TELEFONO   NVARCHAR(20) COLLATE NOCASE NULL,
+    CONTACTO_CARGO      NVARCHAR(64) COLLATE NOCASE NULL,
+    TIPOCLIENTE         NVARCHAR(64) COLLATE NOCASE NULL,
+    LINEANEGOCIO        NVARCHAR(128) COLLATE NOCASE NULL,
+    SUBLINEANEGOCIO     NVARCHAR(128) COLLATE NOCASE NULL,
+    TIPOCREDITO         NVARCHAR(64) COLLATE NOCASE NULL,
+    TIPOCARTERA         NVARCHAR(64) COLLATE NOCASE NULL,
+    ACTIVIDADECONOMICA  NVARCHAR(256) COLLATE NOCASE NULL,
+    RIESGO              NVARCHAR(32) COLLATE NOCASE NULL,
+    NUMTRABAJADORES     INT NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL,
+    VERSIONFILA         BINARY(8) NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_EMPRESA_SEDE (
+    IDSEDE              INTEGER PRIMARY KEY,
+    IDEMPRESA           INT NOT NULL REFERENCES TM_EMPRESA(IDEMPRESA) ON DELETE CASCADE,
+    NOMBRESEDE          NVARCHAR(128) COLLATE NOCASE NOT NULL,
+    DOMICILIO           NVARCHAR(512) COLLATE NOCASE NULL,
+    TELEFONO            NVARCHAR(20) COLLATE NOCASE NULL,
+    CONTACTO_NOMBRE     NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_EMAIL      NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_TELEFONO   NVARCHAR(20) COLLATE NOCASE NULL,
+    ESPRINCIPAL         BIT NOT NULL DEFAULT 0,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_SEGUIMIENTO_TIPO (
+    IDTIPOSEGUIMIENTO   INTEGER PRIMARY KEY,
+    NOMBRE              NVARCHAR(64) COLLATE NOCASE NOT NULL,
+    DESCRIPCION         NVARCHAR(256) COLLATE NOCASE NULL,
+    COLOR               NVARCHAR(7) COLLATE NOCASE NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    VERSIONFILA         BINARY(8) NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_SEGUIMIENTO (
+    IDSEGUIMIENTO       INTEGER PRIMARY KEY,
+    IDEMPRESA           INT NOT NULL REFERENCES TM_EMPRESA(IDEMPRESA),
+    IDTIPOSEGUIMIENTO   INT NULL REFERENCES TM_SEGUIMIENTO_TIPO(IDTIPOSEGUIMIENTO),
+    IDUSUARIOASIGNADO   INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    FECHAPROGRAMADA     DATE NOT NULL,
+    HORAPROGRAMADA      TIME NULL,
+    PRIORIDAD           NVARCHAR(16) COLLATE NOCASE NOT NULL DEFAULT 'MEDIA',
+    ESTADO              NVARCHAR(32) COLLATE NOCASE NOT NULL DEFAULT 'PENDIENTE',
+    NOTAS               NVARCHAR(1024) COLLATE NOCASE NULL,
+    FECHACOMPLETADO     DATETIME NULL,
+    RESULTADO           NVARCHAR(64) COLLATE NOCASE NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL,
+    VERSIONFILA         BINARY(8) NULL,
+    CONSTRAINT CHK_SEGUIMIENTO_PRIORIDAD CHECK (PRIORIDAD IN ('ALTA', 'MEDIA', 'BAJA')),
+    CONSTRAINT CHK_SEGUIMIENTO_ESTADO CHECK (ESTADO IN ('PENDIENTE', 'EN_PROGRESO', 'COMPLETADO', 'CANCELADO'))
+);
+
+-- Staging rows of a company import (24_empresas_importacion.sql)
+CREATE TABLE IF NOT EXISTS TM_EMPRESA_IMPORTACION (
+    IDIMPORTACION       NVARCHAR(36) NOT NULL,
+    FILA                INT NOT NULL,
+    NOMBRECOMERCIAL     NVARCHAR(256) COLLATE NOCASE NOT NULL,
+    RAZONSOCIAL         NVARCHAR(256) COLLATE NOCASE NULL,
+    RUC                 NVARCHAR(11) COLLATE NOCASE NOT NULL,
+    SEDEPRINCIPAL       NVARCHAR(256) COLLATE NOCASE NULL,
+    DOMICILIO           NVARCHAR(512) COLLATE NOCASE NULL,
+    CONTACTO_NOMBRE     NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_EMAIL      NVARCHAR(128) COLLATE NOCASE NULL,
+    CONTACTO_TELEFONO   NVARCHAR(20) COLLATE NOCASE NULL,
+    CONTACTO_CARGO      NVARCHAR(64) COLLATE NOCASE NULL,
+    TIPOCLIENTE         NVARCHAR(64) COLLATE NOCASE NULL,
+    LINEANEGOCIO        NVARCHAR(128) COLLATE NOCASE NULL,
+    SUBLINEANEGOCIO     NVARCHAR(128) COLLATE NOCASE NULL,
+    TIPOCREDITO         NVARCHAR(64) COLLATE NOCASE NULL,
+    TIPOCARTERA         NVARCHAR(64) COLLATE NOCASE NULL,
+    ACTIVIDADECONOMICA  NVARCHAR(256) COLLATE NOCASE NULL,
+    RIESGO              NVARCHAR(32) COLLATE NOCASE NULL,
+    NUMTRABAJADORES     INT NULL,
+    USUARIOCREA         INT NOT NULL,
+    PRIMARY KEY (IDIMPORTACION, FILA)
+);
+
+-- Staging rows of a batch create (23_seguimientos_crear_lote.sql)
+CREATE TABLE IF NOT EXISTS TM_SEGUIMIENTO_LOTE (
+    IDLOTE              NVARCHAR(36) NOT NULL,
+    ITEM                INT NOT NULL,
+    IDEMPRESA           INT NOT NULL,
+    IDTIPOSEGUIMIENTO   INT NULL,
+    IDUSUARIOASIGNADO   INT NOT NULL,
+    FECHAPROGRAMADA     DATE NOT NULL,
+    HORAPROGRAMADA      TIME NULL,
+    PRIORIDAD           NVARCHAR(16) COLLATE NOCASE NOT NULL,
+    NOTAS               NVARCHAR(1024) COLLATE NOCASE NULL,
+    USUARIOCREA         INT NOT NULL,
+    PRIMARY KEY (IDLOTE, ITEM)
+);
+
+CREATE TABLE IF NOT EXISTS TM_SEGUIMIENTO_DETALLE (
+    IDDETALLE           INTEGER PRIMARY KEY,
+    IDSEGUIMIENTO       INT NOT NULL REFERENCES TM_SEGUIMIENTO(IDSEGUIMIENTO) ON DELETE CASCADE,
+    TIPOCOMUNICACION    NVARCHAR(64) COLLATE NOCASE NULL,
+    FECHA1ERCONTACTO    DATE NULL,
+    ESTATUSCLIENTE      NVARCHAR(64) COLLATE NOCASE NULL,
+    DETALLEESTATUS      NVARCHAR(512) COLLATE NOCASE NULL,
+    TIPOLLAMADA         NVARCHAR(64) COLLATE NOCASE NULL,
+    PRESUPUESTO         DECIMAL(18,2) NULL,
+    OBSERVACIONES       NVARCHAR(1024) COLLATE NOCASE NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_INTERACCION (
+    IDINTERACCION       INTEGER PRIMARY KEY,
+    IDEMPRESA           INT NOT NULL REFERENCES TM_EMPRESA(IDEMPRESA),
+    IDSEGUIMIENTO       INT NULL REFERENCES TM_SEGUIMIENTO(IDSEGUIMIENTO),
+    IDUSUARIO           INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    FECHAINTERACCION    DATETIME NOT NULL DEFAULT (GETDATE()),
+    TIPOINTERACCION     NVARCHAR(64) COLLATE NOCASE NOT NULL,
+    DESCRIPCION         NVARCHAR(1024) COLLATE NOCASE NULL,
+    RESULTADO           NVARCHAR(64) COLLATE NOCASE NULL,
+    DURACIONMINUTOS     INT NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE())
+);
+
+CREATE TABLE IF NOT EXISTS TM_VENTA (
+    IDVENTA             INTEGER PRIMARY KEY,
+    IDEMPRESA           INT NOT NULL REFERENCES TM_EMPRESA(IDEMPRESA),
+    IDSEGUIMIENTO       INT NULL REFERENCES TM_SEGUIMIENTO(IDSEGUIMIENTO),
+    IDUSUARIO           INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    FECHAVENTA          DATE NOT NULL,
+    MONTO               DECIMAL(18,2) NOT NULL,
+    MONEDA              NVARCHAR(3) COLLATE NOCASE NOT NULL DEFAULT 'PEN',
+    DESCRIPCION         NVARCHAR(512) COLLATE NOCASE NULL,
+    PRODUCTO            NVARCHAR(256) COLLATE NOCASE NULL,
+    ESTADO              NVARCHAR(32) COLLATE NOCASE NOT NULL DEFAULT 'CERRADA',
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    USUARIOCREA         INT NULL,
+    FECHACREA           DATETIME NOT NULL DEFAULT (GETDATE()),
+    USUARIOMODIFICA     INT NULL,
+    FECHAMODIFICA       DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS TM_NOTIFICACION (
+    IDNOTIFICACION      INTEGER PRIMARY KEY,
+    IDUSUARIO           INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    TITULO              NVARCHAR(200) COLLATE NOCASE NOT NULL,
+    MENSAJE             NVARCHAR(500) COLLATE NOCASE NULL,
+    TIPO                NVARCHAR(50) COLLATE NOCASE NOT NULL DEFAULT 'INFO',
+    LEIDA               BIT NOT NULL DEFAULT 0,
+    FECHACREACION       DATETIME NOT NULL DEFAULT (GETDATE()),
+    FECHALEIDA          DATETIME NULL,
+    TIPOENTIDAD         NVARCHAR(50) COLLATE NOCASE NULL,
+    IDREFERENCIAENTIDAD INT NULL,
+    ACTIVO              BIT NOT NULL DEFAULT 1,
+    VERSIONFILA         BINARY(8) NULL,
+    CONSTRAINT CHK_NOTIFICACION_TIPO CHECK (TIPO IN ('INFO', 'ALERTA', 'URGENTE', 'RECORDATORIO'))
+);
+
+CREATE INDEX IF NOT EXISTS IX_SEGUIMIENTO_USUARIO_FECHA ON TM_SEGUIMIENTO (IDUSUARIOASIGNADO, FECHAPROGRAMADA);
+CREATE INDEX IF NOT EXISTS IX_SEGUIMIENTO_FECHA ON TM_SEGUIMIENTO (FECHAPROGRAMADA);
+CREATE INDEX IF NOT EXISTS IX_SEGUIMIENTO_EMPRESA ON TM_SEGUIMIENTO (IDEMPRESA);
+CREATE INDEX IF NOT EXISTS IX_DETALLE_SEGUIMIENTO ON TM_SEGUIMIENTO_DETALLE (IDSEGUIMIENTO);
+CREATE INDEX IF NOT EXISTS IX_INTERACCION_USUARIO_FECHA ON TM_INTERACCION (IDUSUARIO, FECHAINTERACCION);
+CREATE INDEX IF NOT EXISTS IX_VENTA_USUARIO_FECHA ON TM_VENTA (IDUSUARIO, FECHAVENTA);
+CREATE INDEX IF NOT EXISTS IX_NOTIFICACION_USUARIO ON TM_NOTIFICACION (IDUSUARIO, FECHACREACION);
+CREATE UNIQUE INDEX IF NOT EXISTS UX_NOTIFICACION_ALERTA_ALTO_VALOR ON TM_NOTIFICACION (IDREFERENCIAENTIDAD)
+    WHERE TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND ACTIVO = 1;
+CREATE INDEX IF NOT EXISTS IX_NOTIFICACION_ALERTA_USUARIO ON TM_NOTIFICACION (IDUSUARIO, IDREFERENCIAENTIDAD)
+    WHERE TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND ACTIVO = 1;
+CREATE INDEX IF NOT EXISTS IX_EMPRESA_NOMBRE_KEYSET ON TM_EMPRESA (NOMBRECOMERCIAL COLLATE NOCASE, IDEMPRESA);
+CREATE INDEX IF NOT EXISTS IX_EMPRESA_FECHACREA ON TM_EMPRESA (FECHACREA);
+CREATE INDEX IF NOT EXISTS IX_EMPRESA_FECHAMODIFICA ON TM_EMPRESA (FECHAMODIFICA);
+CREATE INDEX IF NOT EXISTS IX_SEGUIMIENTO_FECHACREA ON TM_SEGUIMIENTO (FECHACREA);
+CREATE INDEX IF NOT EXISTS IX_SEGUIMIENTO_FECHAMODIFICA ON TM_SEGUIMIENTO (FECHAMODIFICA);
+CREATE INDEX IF NOT EXISTS IX_USUARIO_SUPERVISOR ON TM_USUARIO (IDSUPERVISOR);
+
+-- Daily production rollup (19_produccion_diaria_rollup.sql); SQLite
+-- triggers are per row, so each applies the -1 of the old row and the +1
+-- of the new one
+CREATE TABLE IF NOT EXISTS TM_PRODUCCION_DIARIA (
+    FECHA               DATE NOT NULL,
+    IDUSUARIO           INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    CONTACTOS           INT NOT NULL DEFAULT 0,
+    PENDIENTES          INT NOT NULL DEFAULT 0,
+    FECHAACTUALIZACION  DATETIME NOT NULL DEFAULT (GETDATE()),
+    PRIMARY KEY (FECHA, IDUSUARIO)
+);
+
+CREATE TRIGGER IF NOT EXISTS TR_INTERACCION_PRODUCCION_INS AFTER INSERT ON TM_INTERACCION
+WHEN NEW.ACTIVO = 1
+BEGIN
+    INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, CONTACTOS) VALUES (date(NEW.FECHAINTERACCION), NEW.IDUSUARIO, 1)
+    ON CONFLICT (FECHA, IDUSUARIO) DO UPDATE SET CONTACTOS = CONTACTOS + 1, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_INTERACCION_PRODUCCION_DEL AFTER DELETE ON TM_INTERACCION
+WHEN OLD.ACTIVO = 1
+BEGIN
+    UPDATE TM_PRODUCCION_DIARIA SET CONTACTOS = CONTACTOS - 1, FECHAACTUALIZACION = GETDATE()
+    WHERE FECHA = date(OLD.FECHAINTERACCION) AND IDUSUARIO = OLD.IDUSUARIO;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_INTERACCION_PRODUCCION_UPD
+AFTER UPDATE OF IDUSUARIO, FECHAINTERACCION, ACTIVO ON TM_INTERACCION
+BEGIN
+    UPDATE TM_PRODUCCION_DIARIA SET CONTACTOS = CONTACTOS - 1, FECHAACTUALIZACION = GETDATE()
+    WHERE OLD.ACTIVO = 1 AND FECHA = date(OLD.FECHAINTERACCION) AND IDUSUARIO = OLD.IDUSUARIO;
+    INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, CONTACTOS)
+    SELECT date(NEW.FECHAINTERACCION), NEW.IDUSUARIO, 1 WHERE NEW.ACTIVO = 1
+    ON CONFLICT (FECHA, IDUSUARIO) DO UPDATE SET CONTACTOS = CONTACTOS + 1, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_PRODUCCION_INS AFTER INSERT ON TM_SEGUIMIENTO
+WHEN NEW.ACTIVO = 1 AND NEW.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+BEGIN
+    INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, PENDIENTES) VALUES (NEW.FECHAPROGRAMADA, NEW.IDUSUARIOASIGNADO, 1)
+    ON CONFLICT (FECHA, IDUSUARIO) DO UPDATE SET PENDIENTES = PENDIENTES + 1, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_PRODUCCION_DEL AFTER DELETE ON TM_SEGUIMIENTO
+WHEN OLD.ACTIVO = 1 AND OLD.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+BEGIN
+    UPDATE TM_PRODUCCION_DIARIA SET PENDIENTES = PENDIENTES - 1, FECHAACTUALIZACION = GETDATE()
+    WHERE FECHA = OLD.FECHAPROGRAMADA AND IDUSUARIO = OLD.IDUSUARIOASIGNADO;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_PRODUCCION_UPD
+AFTER UPDATE OF IDUSUARIOASIGNADO, FECHAPROGRAMADA, ESTADO, ACTIVO ON TM_SEGUIMIENTO
+BEGIN
+    UPDATE TM_PRODUCCION_DIARIA SET PENDIENTES = PENDIENTES - 1, FECHAACTUALIZACION = GETDATE()
+    WHERE OLD.ACTIVO = 1 AND OLD.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+      AND FECHA = OLD.FECHAPROGRAMADA AND IDUSUARIO = OLD.IDUSUARIOASIGNADO;
+    INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, PENDIENTES)
+    SELECT NEW.FECHAPROGRAMADA, NEW.IDUSUARIOASIGNADO, 1
+    WHERE NEW.ACTIVO = 1 AND NEW.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+    ON CONFLICT (FECHA, IDUSUARIO) DO UPDATE SET PENDIENTES = PENDIENTES + 1, FECHAACTUALIZACION = GETDATE();
+END;
+
+-- Closed deals fact table (20_cerrados_diario_fact.sql), same per-row
+-- -1 / +1 triggers; MONTO is REAL here, so sums are rounded to cents
+CREATE TABLE IF NOT EXISTS TM_CERRADOS_DIARIO (
+    IDUSUARIO           INT NOT NULL REFERENCES TM_USUARIO(IDUSUARIO),
+    FECHA               DATE NOT NULL,
+    CERRADOS            INT NOT NULL DEFAULT 0,
+    MONTO               DECIMAL(18,2) NOT NULL DEFAULT 0,
+    DIASCIERRE          INT NOT NULL DEFAULT 0,
+    COMPLETADOS         INT NOT NULL DEFAULT 0,
+    EXITOSOS            INT NOT NULL DEFAULT 0,
+    SINRESPUESTA        INT NOT NULL DEFAULT 0,
+    NOINTERESADOS       INT NOT NULL DEFAULT 0,
+    FECHAACTUALIZACION  DATETIME NOT NULL DEFAULT (GETDATE()),
+    PRIMARY KEY (IDUSUARIO, FECHA)
+);
+
+CREATE TRIGGER IF NOT EXISTS TR_VENTA_CERRADOS_INS AFTER INSERT ON TM_VENTA
+WHEN NEW.ACTIVO = 1
+BEGIN
+    INSERT INTO TM_CERRADOS_DIARIO (IDUSUARIO, FECHA, CERRADOS, MONTO, DIASCIERRE)
+    VALUES (NEW.IDUSUARIO, NEW.FECHAVENTA, 1, NEW.MONTO,
+            DATEDIFF('day', IFNULL(NEW.FECHACREA, NEW.FECHAVENTA), NEW.FECHAVENTA))
+    ON CONFLICT (IDUSUARIO, FECHA) DO UPDATE SET
+        CERRADOS = CERRADOS + 1, MONTO = round(MONTO + excluded.MONTO, 2),
+        DIASCIERRE = DIASCIERRE + excluded.DIASCIERRE, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_VENTA_CERRADOS_DEL AFTER DELETE ON TM_VENTA
+WHEN OLD.ACTIVO = 1
+BEGIN
+    UPDATE TM_CERRADOS_DIARIO SET
+        CERRADOS = CERRADOS - 1, MONTO = round(MONTO - OLD.MONTO, 2),
+        DIASCIERRE = DIASCIERRE - DATEDIFF('day', IFNULL(OLD.FECHACREA, OLD.FECHAVENTA), OLD.FECHAVENTA),
+        FECHAACTUALIZACION = GETDATE()
+    WHERE IDUSUARIO = OLD.IDUSUARIO AND FECHA = OLD.FECHAVENTA;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_VENTA_CERRADOS_UPD
+AFTER UPDATE OF IDUSUARIO, FECHAVENTA, MONTO, ACTIVO, FECHACREA ON TM_VENTA
+BEGIN
+    UPDATE TM_CERRADOS_DIARIO SET
+        CERRADOS = CERRADOS - 1, MONTO = round(MONTO - OLD.MONTO, 2),
+        DIASCIERRE = DIASCIERRE - DATEDIFF('day', IFNULL(OLD.FECHACREA, OLD.FECHAVENTA), OLD.FECHAVENTA),
+        FECHAACTUALIZACION = GETDATE()
+    WHERE OLD.ACTIVO = 1 AND IDUSUARIO = OLD.IDUSUARIO AND FECHA = OLD.FECHAVENTA;
+    INSERT INTO TM_CERRADOS_DIARIO (IDUSUARIO, FECHA, CERRADOS, MONTO, DIASCIERRE)
+    SELECT NEW.IDUSUARIO, NEW.FECHAVENTA, 1, NEW.MONTO,
+           DATEDIFF('day', IFNULL(NEW.FECHACREA, NEW.FECHAVENTA), NEW.FECHAVENTA)
+    WHERE NEW.ACTIVO = 1
+    ON CONFLICT (IDUSUARIO, FECHA) DO UPDATE SET
+        CERRADOS = CERRADOS + 1, MONTO = round(MONTO + excluded.MONTO, 2),
+        DIASCIERRE = DIASCIERRE + excluded.DIASCIERRE, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_CERRADOS_INS AFTER INSERT ON TM_SEGUIMIENTO
+WHEN NEW.ACTIVO = 1 AND NEW.ESTADO = 'COMPLETADO' AND NEW.FECHACOMPLETADO IS NOT NULL
+BEGIN
+    INSERT INTO TM_CERRADOS_DIARIO (IDUSUARIO, FECHA, COMPLETADOS, EXITOSOS, SINRESPUESTA, NOINTERESADOS)
+    VALUES (NEW.IDUSUARIOASIGNADO, date(NEW.FECHACOMPLETADO), 1, NEW.RESULTADO IS 'EXITOSO',
+            NEW.RESULTADO IS 'SIN_RESPUESTA', NEW.RESULTADO IS 'NO_INTERESADO')
+    ON CONFLICT (IDUSUARIO, FECHA) DO UPDATE SET
+        COMPLETADOS = COMPLETADOS + 1, EXITOSOS = EXITOSOS + excluded.EXITOSOS,
+        SINRESPUESTA = SINRESPUESTA + excluded.SINRESPUESTA,
+        NOINTERESADOS = NOINTERESADOS + excluded.NOINTERESADOS, FECHAACTUALIZACION = GETDATE();
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_CERRADOS_DEL AFTER DELETE ON TM_SEGUIMIENTO
+WHEN OLD.ACTIVO = 1 AND OLD.ESTADO = 'COMPLETADO' AND OLD.FECHACOMPLETADO IS NOT NULL
+BEGIN
+    UPDATE TM_CERRADOS_DIARIO SET
+        COMPLETADOS = COMPLETADOS - 1, EXITOSOS = EXITOSOS - (OLD.RESULTADO IS 'EXITOSO'),
+        SINRESPUESTA = SINRESPUESTA - (OLD.RESULTADO IS 'SIN_RESPUESTA'),
+        NOINTERESADOS = NOINTERESADOS - (OLD.RESULTADO IS 'NO_INTERESADO'), FECHAACTUALIZACION = GETDATE()
+    WHERE IDUSUARIO = OLD.IDUSUARIOASIGNADO AND FECHA = date(OLD.FECHACOMPLETADO);
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_CERRADOS_UPD
+AFTER UPDATE OF IDUSUARIOASIGNADO, ESTADO, FECHACOMPLETADO, RESULTADO, ACTIVO ON TM_SEGUIMIENTO
+BEGIN
+    UPDATE TM_CERRADOS_DIARIO SET
+        COMPLETADOS = COMPLETADOS - 1, EXITOSOS = EXITOSOS - (OLD.RESULTADO IS 'EXITOSO'),
+        SINRESPUESTA = SINRESPUESTA - (OLD.RESULTADO IS 'SIN_RESPUESTA'),
+        NOINTERESADOS = NOINTERESADOS - (OLD.RESULTADO IS 'NO_INTERESADO'), FECHAACTUALIZACION = GETDATE()
+    WHERE OLD.ACTIVO = 1 AND OLD.ESTADO = 'COMPLETADO' AND OLD.FECHACOMPLETADO IS NOT NULL
+      AND IDUSUARIO = OLD.IDUSUARIOASIGNADO AND FECHA = date(OLD.FECHACOMPLETADO);
+    INSERT INTO TM_CERRADOS_DIARIO (IDUSUARIO, FECHA, COMPLETADOS, EXITOSOS, SINRESPUESTA, NOINTERESADOS)
+    SELECT NEW.IDUSUARIOASIGNADO, date(NEW.FECHACOMPLETADO), 1, NEW.RESULTADO IS 'EXITOSO',
+           NEW.RESULTADO IS 'SIN_RESPUESTA', NEW.RESULTADO IS 'NO_INTERESADO'
+    WHERE NEW.ACTIVO = 1 AND NEW.ESTADO = 'COMPLETADO' AND NEW.FECHACOMPLETADO IS NOT NULL
+    ON CONFLICT (IDUSUARIO, FECHA) DO UPDATE SET
+        COMPLETADOS = COMPLETADOS + 1, EXITOSOS = EXITOSOS + excluded.EXITOSOS,
+        SINRESPUESTA = SINRESPUESTA + excluded.SINRESPUESTA,
+        NOINTERESADOS = NOINTERESADOS + excluded.NOINTERESADOS, FECHAACTUALIZACION = GETDATE();
+END;
+
+-- ROWVERSION stand-in (26_version_datos_etag.sql): every insert and update
+-- stamps VERSIONFILA with the next value of a database-wide counter, packed
+-- by ROWVERSION() into 8 big-endian bytes like SQL Server's BINARY(8), so
+-- reads see bytes as they do through pyodbc and MAX() still orders them.
+-- The stamping UPDATE changes VERSIONFILA, so the WHEN clause stops it from
+-- firing the trigger again.
+CREATE TABLE IF NOT EXISTS TM_VERSION_FILA (
+    ID                  INTEGER PRIMARY KEY CHECK (ID = 1),
+    ULTIMA              INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO TM_VERSION_FILA (ID, ULTIMA) VALUES (1, 0);
+
+-- (TR_*_VERSION_*: the INTEGER counter triggers of older files)
+DROP TRIGGER IF EXISTS TR_SEGUIMIENTO_VERSION_INS;
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_ROWVERSION_INS AFTER INSERT ON TM_SEGUIMIENTO
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_SEGUIMIENTO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDSEGUIMIENTO = NEW.IDSEGUIMIENTO;
+END;
+
+DROP TRIGGER IF EXISTS TR_SEGUIMIENTO_VERSION_UPD;
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_ROWVERSION_UPD AFTER UPDATE ON TM_SEGUIMIENTO
+WHEN NEW.VERSIONFILA IS OLD.VERSIONFILA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_SEGUIMIENTO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDSEGUIMIENTO = NEW.IDSEGUIMIENTO;
+END;
+
+DROP TRIGGER IF EXISTS TR_EMPRESA_VERSION_INS;
+CREATE TRIGGER IF NOT EXISTS TR_EMPRESA_ROWVERSION_INS AFTER INSERT ON TM_EMPRESA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_EMPRESA SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDEMPRESA = NEW.IDEMPRESA;
+END;
+
+DROP TRIGGER IF EXISTS TR_EMPRESA_VERSION_UPD;
+CREATE TRIGGER IF NOT EXISTS TR_EMPRESA_ROWVERSION_UPD AFTER UPDATE ON TM_EMPRESA
+WHEN NEW.VERSIONFILA IS OLD.VERSIONFILA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_EMPRESA SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDEMPRESA = NEW.IDEMPRESA;
+END;
+
+DROP TRIGGER IF EXISTS TR_USUARIO_VERSION_INS;
+CREATE TRIGGER IF NOT EXISTS TR_USUARIO_ROWVERSION_INS AFTER INSERT ON TM_USUARIO
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_USUARIO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDUSUARIO = NEW.IDUSUARIO;
+END;
+
+DROP TRIGGER IF EXISTS TR_USUARIO_VERSION_UPD;
+CREATE TRIGGER IF NOT EXISTS TR_USUARIO_ROWVERSION_UPD AFTER UPDATE ON TM_USUARIO
+WHEN NEW.VERSIONFILA IS OLD.VERSIONFILA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_USUARIO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDUSUARIO = NEW.IDUSUARIO;
+END;
+
+DROP TRIGGER IF EXISTS TR_NOTIFICACION_VERSION_INS;
+CREATE TRIGGER IF NOT EXISTS TR_NOTIFICACION_ROWVERSION_INS AFTER INSERT ON TM_NOTIFICACION
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_NOTIFICACION SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDNOTIFICACION = NEW.IDNOTIFICACION;
+END;
+
+DROP TRIGGER IF EXISTS TR_NOTIFICACION_VERSION_UPD;
+CREATE TRIGGER IF NOT EXISTS TR_NOTIFICACION_ROWVERSION_UPD AFTER UPDATE ON TM_NOTIFICACION
+WHEN NEW.VERSIONFILA IS OLD.VERSIONFILA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_NOTIFICACION SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDNOTIFICACION = NEW.IDNOTIFICACION;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_TIPO_ROWVERSION_INS AFTER INSERT ON TM_SEGUIMIENTO_TIPO
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_SEGUIMIENTO_TIPO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDTIPOSEGUIMIENTO = NEW.IDTIPOSEGUIMIENTO;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TR_SEGUIMIENTO_TIPO_ROWVERSION_UPD AFTER UPDATE ON TM_SEGUIMIENTO_TIPO
+WHEN NEW.VERSIONFILA IS OLD.VERSIONFILA
+BEGIN
+    UPDATE TM_VERSION_FILA SET ULTIMA = ULTIMA + 1;
+    UPDATE TM_SEGUIMIENTO_TIPO SET VERSIONFILA = ROWVERSION((SELECT ULTIMA FROM TM_VERSION_FILA)) WHERE IDTIPOSEGUIMIENTO = NEW.IDTIPOSEGUIMIENTO;
+END;
+
+"""
+
+
+# ---------------------------------------------------------------------
+# Sample data (05_sample_data.sql, dates relative to today)
+# ---------------------------------------------------------------------
+_SAMPLE_PERFILES = [
+    (1, 'ADMIN', 'Administrador del sistema con acceso total'),
+    (2, 'SUPERVISOR', 'Supervisor de equipo comercial'),
+    (3, 'EJECUTIVO', 'Ejecutivo comercial de ventas'),
+]
+
+# IDUSUARIO, IDPERFIL, LOGINUSUARIO, CLAVE, NOMBRES, APELLIDOPATERNO, APELLIDOMATERNO, EMAIL, TELEFONO, IDSUPERVISOR
+_SAMPLE_USUARIOS = [
+    (1, 1, 'admin', 'admin123', 'Administrador', 'Sistema', None, 'admin@empresa.com', '999000001', None),
+    (2, 2, 'supervisor1', 'super123', 'Carlos', 'Martinez', 'Lopez', 'cmartinez@empresa.com', '999000002', 1),
+    (3, 2, 'supervisor2', 'super123', 'Maria', 'Gonzales', 'Perez', 'mgonzales@empresa.com', '999000003', 1),
+    (4, 3, 'ejecutivo1', 'ejec123', 'Juan', 'Perez', 'Vargas', 'jperez@empresa.com', '999000004', 2),
+    (5, 3, 'ejecutivo2', 'ejec123', 'Ana', 'Rodriguez', 'Luna', 'arodriguez@empresa.com', '999000005', 2),
+    (6, 3, 'ejecutivo3', 'ejec123', 'Luis', 'Garcia', 'Mendoza', 'lgarcia@empresa.com', '999000006', 2),
+    (7, 3, 'ejecutivo4', 'ejec123', 'Sofia', 'Torres', 'Diaz', 'storres@empresa.com', '999000007', 3),
+    (8, 3, 'ejecutivo5', 'ejec123', 'Pedro', 'Sanchez', 'Flores', 'psanchez@empresa.com', '999000008', 3),
+]
+
+_SAMPLE_TIPOS = [
+    (1, 'Llamada Fría', 'Primer contacto telefónico con prospecto', '#3498db'),
+    (2, 'Llamada Seguimiento', 'Seguimiento a cliente existente', '#2ecc71'),
+    (3, 'Visita Presencial', 'Reunión en oficina del cliente', '#e74c3c'),
+    (4, 'Reunión Virtual', 'Videollamada con cliente', '#9b59b6'),
+    (5, 'Envío Propuesta', 'Envío de cotización o propuesta', '#f39c12'),
+    (6, 'Cierre Venta', 'Firma de contrato o cierre', '#1abc9c'),
+    (7, 'Post-Venta', 'Seguimiento después de venta', '#34495e'),
+    (8, 'Reactivación', 'Contacto con cliente inactivo', '#e67e22'),
+]
+
+# IDEMPRESA, NOMBRECOMERCIAL, RAZONSOCIAL, RUC, SEDEPRINCIPAL, CONTACTO_NOMBRE, TIPOCLIENTE, LINEANEGOCIO, TIPOCARTERA, RIESGO
+_SAMPLE_EMPRESAS = [
+    (1, 'TechCorp Peru', 'TechCorp Peru S.A.C.', '20123456789', 'Lima', 'Roberto Diaz', 'EMPRESA', 'Tecnologia', 'PREMIUM', 'BAJO'),
+    (2, 'Comercial ABC', 'Comercial ABC E.I.R.L.', '20234567890', 'Lima', 'Patricia Luna', 'EMPRESA', 'Comercio', 'ESTANDAR', 'MEDIO'),
+    (3, 'Industrias XYZ', 'Industrias XYZ S.A.', '20345678901', 'Callao', 'Fernando Rojas', 'EMPRESA', 'Manufactura', 'PREMIUM', 'BAJO'),
+    (4, 'Servicios Integrales', 'Servicios Integrales Peru S.A.C.', '20456789012', 'Lima', 'Carmen Vega', 'EMPRESA', 'Servicios', 'ESTANDAR', 'BAJO'),
+    (5, 'Constructora Norte', 'Constructora Norte S.A.C.', '20567890123', 'Trujillo', 'Miguel Angel Ruiz', 'EMPRESA', 'Construccion', 'VIP', 'MEDIO'),
+    (6, 'Farmacia Salud Total', 'Farmacia Salud Total E.I.R.L.', '20678901234', 'Lima', 'Lucia Mendez', 'PYME', 'Salud', 'ESTANDAR', 'BAJO'),
+    (7, 'Transportes Rapido', 'Transportes Rapido S.A.C.', '20789012345', 'Lima', 'Jose Campos', 'EMPRESA', 'Transporte', 'PREMIUM', 'ALTO'),
+    (8, 'Restaurant El Buen Sabor', 'El Buen Sabor S.R.L.', '20890123456', 'Lima', 'Maria Elena Castro', 'PYME', 'Gastronomia', 'ESTANDAR', 'MEDIO'),
+    (9, 'Consultora Legal Plus', 'Consultora Legal Plus S.A.C.', '20901234567', 'Lima', 'Alberto Quispe', 'EMPRESA', 'Servicios Legales', 'VIP', 'BAJO'),
+    (10, 'Agropecuaria Sur', 'Agropecuaria Sur S.A.', '20012345678', 'Arequipa', 'Rosa Paredes', 'EMPRESA', 'Agropecuario', 'PREMIUM', 'MEDIO'),
+    (11, 'Educacion Digital', 'Educacion Digital Peru S.A.C.', '20123456781', 'Lima', 'Victor Huaman', 'EMPRESA', 'Educacion', 'ESTANDAR', 'BAJO'),
+    (12, 'Minera Andina', 'Minera Andina S.A.', '20234567892', 'Cusco', 'Raul Gutierrez', 'EMPRESA', 'Mineria', 'VIP', 'ALTO'),
+]
+
+# IDEMPRESA, NOMBRESEDE, ESPRINCIPAL
+_SAMPLE_SEDES = [
+    (1, 'Sede Principal Lima', 1), (1, 'Sucursal Arequipa', 0), (2, 'Sede Principal', 1),
+    (3, 'Planta Principal Callao', 1), (3, 'Oficina Administrativa Lima', 0), (5, 'Sede Trujillo', 1),
+    (5, 'Sede Chiclayo', 0), (7, 'Terminal Lima', 1), (10, 'Sede Arequipa', 1),
+    (10, 'Sede Tacna', 0), (12, 'Oficina Cusco', 1),
+]
+
+# IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO, days from today, HORAPROGRAMADA, PRIORIDAD, ESTADO, NOTAS, RESULTADO
+_SAMPLE_SEGUIMIENTOS = [
+    (1, 1, 4, 0, '09:00', 'ALTA', 'PENDIENTE', 'Llamar para presentar nuevo producto', None),
+    (2, 2, 4, 0, '10:30', 'MEDIA', 'PENDIENTE', 'Seguimiento cotizacion enviada', None),
+    (3, 3, 4, 0, '14:00', 'ALTA', 'PENDIENTE', 'Visita programada con gerente', None),
+    (4, 2, 4, -1, '11:00', 'MEDIA', 'COMPLETADO', 'Seguimiento realizado', 'EXITOSO'),
+    (5, 5, 4, -1, '15:00', 'ALTA', 'COMPLETADO', 'Propuesta enviada y aceptada', 'EXITOSO'),
+    (6, 1, 4, -14, '09:00', 'MEDIA', 'PENDIENTE', 'Llamada pendiente desde hace tiempo', None),
+    (7, 2, 4, -7, '10:00', 'BAJA', 'PENDIENTE', 'Seguimiento olvidado', None),
+    (8, 4, 4, 1, '11:00', 'MEDIA', 'PENDIENTE', 'Reunion virtual programada', None),
+    (1, 6, 4, 2, '15:00', 'ALTA', 'PENDIENTE', 'Cierre de venta esperado', None),
+    (9, 1, 5, 0, '09:30', 'ALTA', 'PENDIENTE', 'Primera llamada a prospecto VIP', None),
+    (10, 3, 5, 0, '14:30', 'MEDIA', 'PENDIENTE', 'Visita de presentacion', None),
+    (11, 2, 5, -1, '10:00', 'MEDIA', 'COMPLETADO', 'Seguimiento exitoso', 'EXITOSO'),
+    (12, 1, 5, -7, '09:00', 'BAJA', 'PENDIENTE', 'Llamada pendiente', None),
+    (1, 7, 6, 0, '10:00', 'MEDIA', 'PENDIENTE', 'Llamada post-venta', None),
+    (2, 8, 6, 1, '11:00', 'BAJA', 'PENDIENTE', 'Reactivar cuenta inactiva', None),
+    (3, 2, 6, -3, '09:00', 'ALTA', 'COMPLETADO', 'Seguimiento completado', 'SIN_RESPUESTA'),
+    (4, 1, 7, 0, '09:00', 'ALTA', 'PENDIENTE', 'Llamada a nuevo prospecto', None),
+    (5, 5, 7, 0, '14:00', 'ALTA', 'PENDIENTE', 'Enviar propuesta formal', None),
+    (6, 2, 7, -1, '11:00', 'MEDIA', 'COMPLETADO', 'Seguimiento realizado', 'EXITOSO'),
+    (7, 3, 7, -14, '10:00', 'MEDIA', 'PENDIENTE', 'Visita postergada varias veces', None),
+    (8, 1, 8, 0, '10:00', 'MEDIA', 'PENDIENTE', 'Primera llamada restaurante', None),
+    (9, 4, 8, 3, '15:00', 'ALTA', 'PENDIENTE', 'Reunion virtual agendada', None),
+    (10, 2, 8, -2, '09:00', 'MEDIA', 'COMPLETADO', 'Seguimiento exitoso', 'EXITOSO'),
+    (11, 6, 8, -1, '16:00', 'ALTA', 'COMPLETADO', 'Venta cerrada!', 'EXITOSO'),
+]
+
+# IDSEGUIMIENTO, ESTATUSCLIENTE, PRESUPUESTO, OBSERVACIONES
+_SAMPLE_DETALLES = [
+    (1, 'PROSPECTO', '15000.00', 'Cliente con alto potencial'),
+    (2, 'COTIZADO', '8500.00', 'Esperando aprobacion de gerencia'),
+    (3, 'NEGOCIACION', '45000.00', 'Cliente importante - dar seguimiento prioritario'),
+    (4, 'CERRADO', '12000.00', 'Cliente satisfecho'),
+    (5, 'CERRADO', '25000.00', 'Firma de contrato pendiente'),
+    (9, 'PROSPECTO', '5000.00', 'Cliente pyme con potencial'),
+    (10, 'COTIZADO', '35000.00', 'Empresa grande, decision en comite'),
+    (17, 'PROSPECTO', '7500.00', 'Requiere presentacion formal'),
+    (18, 'NEGOCIACION', '18000.00', 'Pendiente aprobacion de descuento'),
+    (21, 'PROSPECTO', '3500.00', 'Interesado en servicios basicos'),
+]
+
+# IDEMPRESA, IDSEGUIMIENTO, IDUSUARIO, days from today, hour, TIPOINTERACCION, RESULTADO
+_SAMPLE_INTERACCIONES = [
+    (1, 1, 4, 0, 9, 'LLAMADA', 'CONTACTADO'), (2, 2, 4, 0, 10, 'LLAMADA', 'PENDIENTE_RESPUESTA'),
+    (4, 4, 4, -1, 11, 'LLAMADA', 'EXITOSO'), (5, 5, 4, -1, 15, 'EMAIL', 'ACEPTADO'),
+    (9, 9, 5, 0, 9, 'LLAMADA', 'CONTACTADO'), (11, 11, 5, -1, 10, 'LLAMADA', 'EXITOSO'),
+    (1, 14, 6, 0, 10, 'LLAMADA', 'SATISFECHO'), (3, 16, 6, -3, 9, 'LLAMADA', 'SIN_RESPUESTA'),
+    (4, 17, 7, 0, 9, 'LLAMADA', 'CONTACTADO'), (6, 19, 7, -1, 11, 'LLAMADA', 'EXITOSO'),
+    (8, 21, 8, 0, 10, 'LLAMADA', 'CONTACTADO'), (10, 23, 8, -2, 9, 'LLAMADA', 'EXITOSO'),
+    (11, 24, 8, -1, 16, 'PRESENCIAL', 'VENTA_CERRADA'),
+]
+
+# IDEMPRESA, IDSEGUIMIENTO, IDUSUARIO, days from today, MONTO, MONEDA, PRODUCTO
+_SAMPLE_VENTAS = [
+    (4, 4, 4, -1, '12000.00', 'PEN', 'Plan Basico'), (5, 5, 4, -1, '25000.00', 'PEN', 'Plan Premium'),
+    (11, 11, 5, -1, '8500.00', 'PEN', 'Licencia Educativa'), (6, 19, 7, -1, '5500.00', 'PEN', 'Plan Pyme'),
+    (11, 24, 8, -1, '18000.00', 'PEN', 'Plan Empresarial'), (1, None, 4, -15, '35000.00', 'PEN', 'Plan Enterprise'),
+    (3, None, 6, -20, '45000.00', 'PEN', 'Solucion Industrial'), (12, None, 8, -10, '75000.00', 'USD', 'Plan Mining Pro'),
+]
+
+# IDUSUARIO, TITULO, MENSAJE, TIPO, LEIDA, TIPOENTIDAD, IDREFERENCIAENTIDAD
+_SAMPLE_NOTIFICACIONES = [
+    (4, 'Seguimiento pendiente hoy', 'Tienes 3 seguimientos programados para hoy', 'RECORDATORIO', 0, 'SEGUIMIENTO', 1),
+    (4, 'Seguimiento atrasado', 'El seguimiento con Farmacia Salud Total tiene 14 dias de atraso', 'ALERTA', 0, 'SEGUIMIENTO', 6),
+    (4, 'Nueva empresa asignada', 'Se te ha asignado TechCorp Peru como cliente', 'INFO', 1, 'EMPRESA', 1),
+    (5, 'Reunion virtual manana', 'Recuerda tu reunion virtual con Agropecuaria Sur', 'RECORDATORIO', 0, 'SEGUIMIENTO', 10),
+    (6, 'Post-venta pendiente', 'Tienes una llamada de post-venta programada para hoy', 'RECORDATORIO', 0, 'SEGUIMIENTO', 14),
+    (7, 'Propuesta urgente', 'Debes enviar la propuesta a Constructora Norte hoy', 'URGENTE', 0, 'SEGUIMIENTO', 18),
+    (8, 'Venta cerrada!', 'Felicitaciones! Cerraste la venta con Educacion Digital', 'INFO', 0, 'VENTA', 5),
+    (2, 'Ejecutivo con atrasos', 'Juan Perez tiene 2 seguimientos con mas de 7 dias de atraso', 'ALERTA', 0, 'USUARIO', 4),
+    (3, 'Meta de equipo superada', 'Tu equipo ha superado la meta mensual!', 'INFO', 0, None, None),
+    (1, 'Backup completado', 'El backup de la base de datos se completo exitosamente', 'INFO', 1, None, None),
+]
+
+
+def _seed_sample_data(db):
+    """Insert the 05_sample_data.sql rows, with dates relative to today."""
+    today = date.today()
+    day = lambda offset: today + timedelta(days=offset)
+    at = lambda offset, hour: datetime.combine(day(offset), time(hour))
+
+    db.executemany('INSERT INTO TM_PERFIL (IDPERFIL, NOMBREPERFIL, DESCRIPCION) VALUES (?, ?, ?)',
+                   _SAMPLE_PERFILES)
+    db.executemany(
+        'INSERT INTO TM_USUARIO (IDUSUARIO, IDPERFIL, LOGINUSUARIO, CLAVE, NOMBRES, APELLIDOPATERNO, '
+        'APELLIDOMATERNO, EMAIL, TELEFONO, IDSUPERVISOR) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        _SAMPLE_USUARIOS)
+    db.executemany('INSERT INTO TM_SEGUIMIENTO_TIPO (IDTIPOSEGUIMIENTO, NOMBRE, DESCRIPCION, COLOR) VALUES (?, ?, ?, ?)',
+                   _SAMPLE_TIPOS)
+    db.executemany(
+        'INSERT INTO TM_EMPRESA (IDEMPRESA, NOMBRECOMERCIAL, RAZONSOCIAL, RUC, SEDEPRINCIPAL, CONTACTO_NOMBRE, '
+        'TIPOCLIENTE, LINEANEGOCIO, TIPOCARTERA, RIESGO, USUARIOCREA) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)',
+        _SAMPLE_EMPRESAS)
+    db.executemany('INSERT INTO TM_EMPRESA_SEDE (IDEMPRESA, NOMBRESEDE, ESPRINCIPAL, USUARIOCREA) VALUES (?, ?, ?, 1)',
+                   _SAMPLE_SEDES)
+    db.executemany(
+        'INSERT INTO TM_SEGUIMIENTO (IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO, FECHAPROGRAMADA, '
+        'HORAPROGRAMADA, PRIORIDAD, ESTADO, NOTAS, FECHACOMPLETADO, RESULTADO, USUARIOCREA) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)',
+        [(e, t, u, day(d), h, p, s, n, at(d, int(h[:2])) if s == 'COMPLETADO' else None, r)
+         for e, t, u, d, h, p, s, n, r in _SAMPLE_SEGUIMIENTOS])
+    db.executemany(
+        'INSERT INTO TM_SEGUIMIENTO_DETALLE (IDSEGUIMIENTO, ESTATUSCLIENTE, PRESUPUESTO, OBSERVACIONES, USUARIOCREA) '
+        'VALUES (?, ?, ?, ?, 1)',
+        [(s, e, Decimal(p), o) for s, e, p, o in _SAMPLE_DETALLES])
+    db.executemany(
+        'INSERT INTO TM_INTERACCION (IDEMPRESA, IDSEGUIMIENTO, IDUSUARIO, FECHAINTERACCION, TIPOINTERACCION, '
+        'RESULTADO, USUARIOCREA) VALUES (?, ?, ?, ?, ?, ?, 1)',
+        [(e, s, u, at(d, h), t, r) for e, s, u, d, h, t, r in _SAMPLE_INTERACCIONES])
+    db.executemany(
+        'INSERT INTO TM_VENTA (IDEMPRESA, IDSEGUIMIENTO, IDUSUARIO, FECHAVENTA, MONTO, MONEDA, PRODUCTO, USUARIOCREA) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+        [(e, s, u, day(d), Decimal(m), c, p) for e, s, u, d, m, c, p in _SAMPLE_VENTAS])
+    db.executemany(
+        'INSERT INTO TM_NOTIFICACION (IDUSUARIO, TITULO, MENSAJE, TIPO, LEIDA, TIPOENTIDAD, IDREFERENCIAENTIDAD) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        _SAMPLE_NOTIFICACIONES)
+
+
+# ---------------------------------------------------------------------
+# Stored procedures
+# ---------------------------------------------------------------------
+class ResultSet:
+    """Rows of one result set with a pyodbc-style description."""
+
+    __slots__ = ('description', 'rows')
+
+    def __init__(self, columns, rows):
+        self.rows = rows
+        self.description = tuple(
+            (name, _column_type(rows, idx), None, None, None, None, True)
+            for idx, name in enumerate(columns)
+        )
+
+
+def _column_type(rows, idx):
+    """Python type of a column, taken from its first non-NULL value."""
+    for row in rows:
+        if row[idx] is not None:
+            return type(row[idx])
+    return str
+
+
+def _select(db, sql, params=()):
+    """Run a query and return its rows as a ResultSet."""
+    cursor = db.execute(sql, params)
+    try:
+        return ResultSet([column[0] for column in cursor.description], cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _scalar(name, value):
+    """Single-cell result set, e.g. SELECT @@ROWCOUNT AS Affected."""
+    return ResultSet([name], [(value,)])
+
+
+def _perfil(db, id_usuario):
+    row = db.execute('SELECT IDPERFIL FROM TM_USUARIO WHERE IDUSUARIO = ?', (id_usuario,)).fetchone()
+    return row[0] if row else None
+
+
+def _current_week():
+    """Sunday..Saturday around today (DATEPART(WEEKDAY) with DATEFIRST 7)."""
+    today = date.today()
+    start = today - timedelta(days=(today.weekday() + 1) % 7)
+    return start, start + timedelta(days=6)
+
+
+def _team_members(db, id_usuario, perfil):
+    """IDs visible to a user: everyone (admin), the team (supervisor) or self."""
+    if perfil == 1:
+        rows = db.execute('SELECT IDUSUARIO FROM TM_USUARIO WHERE ACTIVO = 1').fetchall()
+    elif perfil == 2:
+        rows = db.execute('SELECT IDUSUARIO FROM TM_USUARIO WHERE IDSUPERVISOR = ? AND ACTIVO = 1',
+                          (id_usuario,)).fetchall()
+    else:
+        return [id_usuario]
+    return [row[0] for row in rows]
+
+
+def _in_list(values):
+    """Inline integer list for IN (...); the values are database IDs."""
+    return ', '.join(str(int(v)) for v in values) or 'NULL'
+
+
+# Role-based visibility used by agenda, calendario and pendientes (08_role_based_access_fix_v2)
+_ROLE_FILTER = """(
+          :perfil = 1
+          OR (:perfil = 2 AND u.IDSUPERVISOR = :usuario)
+          OR (:perfil = 3 AND s.IDUSUARIOASIGNADO = :usuario)
+      )"""
+
+_PRIORITY_ORDER = "CASE s.PRIORIDAD WHEN 'ALTA' THEN 1 WHEN 'MEDIA' THEN 2 ELSE 3 END"
+
+PROCEDURES = {}
+
+
+def procedure(func):
+    """Register a Python port of a stored procedure under its SQL name."""
+    PROCEDURES[func.__name__.lower()] = func
+    return func
+
+
+@procedure
+def usp_ValidarLogin(db, LoginUsuario, Clave):
+    return [_select(db, """
+        SELECT u.IDUSUARIO, u.LOGINUSUARIO, u.NOMBRES, u.APELLIDOPATERNO, u.APELLIDOMATERNO,
+               u.EMAIL, u.TELEFONO, p.IDPERFIL, p.NOMBREPERFIL, u.IDSUPERVISOR
+        FROM TM_USUARIO u
+        INNER JOIN TM_PERFIL p ON u.IDPERFIL = p.IDPERFIL
+        WHERE u.LOGINUSUARIO = ? AND u.CLAVE = ? AND u.ACTIVO = 1 AND p.ACTIVO = 1
+    """, (LoginUsuario, Clave))]
+
+
+@procedure
+def usp_ObtenerAgendaDia(db, IdUsuario, Fecha):
+    return [_select(db, f"""
+        SELECT s.IDSEGUIMIENTO, s.FECHAPROGRAMADA, s.HORAPROGRAMADA, s.PRIORIDAD, s.ESTADO, s.NOTAS,
+               e.IDEMPRESA, e.NOMBRECOMERCIAL, e.CONTACTO_NOMBRE, e.CONTACTO_TELEFONO, e.CONTACTO_EMAIL,
+               st.IDTIPOSEGUIMIENTO, st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS EJECUTIVO_ASIGNADO
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA = :fecha
+          AND s.ACTIVO = 1
+          AND {_ROLE_FILTER}
+        ORDER BY {_PRIORITY_ORDER}, s.HORAPROGRAMADA
+    """, {'fecha': Fecha, 'perfil': _perfil(db, IdUsuario), 'usuario': IdUsuario})]
+
+
+@procedure
+def usp_ObtenerCalendarioSupervisor(db, IdSupervisor, FechaInicio, FechaFin):
+    return [_select(db, f"""
+        SELECT s.IDSEGUIMIENTO, s.FECHAPROGRAMADA, s.HORAPROGRAMADA, s.PRIORIDAD, s.ESTADO, s.NOTAS,
+               e.IDEMPRESA, e.NOMBRECOMERCIAL, u.IDUSUARIO,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS NombreEjecutivo,
+               st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA BETWEEN :inicio AND :fin
+          AND s.ACTIVO = 1
+          AND {_ROLE_FILTER}
+        ORDER BY s.FECHAPROGRAMADA, s.HORAPROGRAMADA
+    """, {'inicio': FechaInicio, 'fin': FechaFin, 'perfil': _perfil(db, IdSupervisor), 'usuario': IdSupervisor})]
+
+
+@procedure
+def usp_ObtenerDashboardSupervisor(db, IdSupervisor, FechaInicio=None, FechaFin=None):
+    week_start, week_end = _current_week()
+    FechaInicio = FechaInicio or week_start
+    FechaFin = FechaFin or week_end
+    team = _in_list(_team_members(db, IdSupervisor, _perfil(db, IdSupervisor)))
+    count = f"""(SELECT COUNT(*) FROM TM_SEGUIMIENTO s
+                 WHERE s.IDUSUARIOASIGNADO IN ({team})
+                   AND s.FECHAPROGRAMADA BETWEEN :inicio AND :fin
+                   AND s.ACTIVO = 1 {{}})"""
+    return [_select(db, f"""
+        SELECT {count.format('')} AS PROGRAMADOS_SEMANA,
+               {count.format("AND s.ESTADO = 'COMPLETADO'")} AS COMPLETADOS_SEMANA,
+               {count.format("AND s.ESTADO = 'PENDIENTE'")} AS PENDIENTES_SEMANA,
+               {count.format("AND s.ESTADO = 'CANCELADO'")} AS CANCELADOS_SEMANA
+    """, {'inicio': FechaInicio, 'fin': FechaFin})]
+
+
+@procedure
+def usp_ObtenerCerradosSemana(db, IdUsuario, FechaInicio=None, FechaFin=None):
+    week_start, week_end = _current_week()
+    inicio = date.fromisoformat(str(FechaInicio)) if FechaInicio else week_start
+    fin = date.fromisoformat(str(FechaFin)) if FechaFin else week_end
+    team = _in_list(_team_members(db, IdUsuario, _perfil(db, IdUsuario)))
+
+    # Oldest day still needed for the last 10 sales, from the fact table
+    corte = db.execute(f"""
+        SELECT MIN(FECHA) FROM (
+            SELECT FECHA, SUM(SUM(CERRADOS)) OVER (ORDER BY FECHA DESC ROWS UNBOUNDED PRECEDING)
+                          - SUM(CERRADOS) AS POSTERIORES
+            FROM TM_CERRADOS_DIARIO
+            WHERE IDUSUARIO IN ({team}) AND CERRADOS > 0
+            GROUP BY FECHA
+        ) WHERE POSTERIORES < 10
+    """).fetchone()[0]
+    historial = _select(db, f"""
+        SELECT e.NOMBRECOMERCIAL AS EMPRESA,
+               IFNULL(v.PRODUCTO, 'Servicio Estándar') AS SERVICIO,
+               v.MONTO,
+               strftime('%Y-%m-%d', v.FECHAVENTA) AS FECHA
+        FROM TM_VENTA v
+        INNER JOIN TM_EMPRESA e ON v.IDEMPRESA = e.IDEMPRESA
+        WHERE v.IDUSUARIO IN ({team}) AND v.FECHAVENTA >= ? AND v.ACTIVO = 1
+        ORDER BY v.FECHAVENTA DESC
+        LIMIT 10
+    """, (corte,))
+    metricas = _select(db, f"""
+        SELECT IFNULL(SUM(c.CERRADOS), 0) AS TOTAL_CERRADOS,
+               IFNULL(SUM(c.MONTO), 0) AS "MontoTotal [DECIMAL]",
+               CASE WHEN IFNULL(SUM(c.CERRADOS), 0) = 0 THEN 0
+                    ELSE ABS(SUM(c.DIASCIERRE) / SUM(c.CERRADOS))
+               END AS DiasPromedioCierre,
+               IFNULL(SUM(c.EXITOSOS), 0) AS Exitosos,
+               IFNULL(SUM(c.SINRESPUESTA), 0) AS SinRespuesta,
+               IFNULL(SUM(c.NOINTERESADOS), 0) AS NoInteresados
+        FROM TM_CERRADOS_DIARIO c
+        WHERE c.IDUSUARIO IN ({team})
+          AND c.FECHA BETWEEN ? AND ?
+    """, (inicio, fin))
+
+    # Every day of the range (at most a week), including days without sales
+    per_day = dict(db.execute(f"""
+        SELECT c.FECHA, SUM(c.CERRADOS) FROM TM_CERRADOS_DIARIO c
+        WHERE c.IDUSUARIO IN ({team}) AND c.FECHA BETWEEN ? AND ?
+        GROUP BY c.FECHA
+    """, (inicio, fin)).fetchall())
+    days = [inicio + timedelta(days=offset) for offset in range(7) if inicio + timedelta(days=offset) <= fin]
+    por_dia = ResultSet(['DIA_SEMANA', 'FECHA', 'CANTIDAD'], [
+        (d.strftime('%A')[:3], d.isoformat(), per_day.get(d, 0)) for d in days
+    ])
+    return [historial, metricas, por_dia]
+
+
+@procedure
+def usp_ObtenerPendientesAcumulados(db, IdUsuario, Prioridad=None, FechaIni=None, FechaFin=None):
+    return [_select(db, f"""
+        SELECT s.IDSEGUIMIENTO, s.FECHAPROGRAMADA,
+               DATEDIFF('day', s.FECHAPROGRAMADA, GETDATE()) AS DiasAcumulado,
+               s.PRIORIDAD, s.ESTADO, s.NOTAS,
+               e.IDEMPRESA, e.NOMBRECOMERCIAL, e.CONTACTO_NOMBRE, e.CONTACTO_TELEFONO,
+               st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS EJECUTIVO_ASIGNADO,
+               CASE WHEN s.FECHAPROGRAMADA < date(GETDATE()) THEN 'ATRASADO'
+                    WHEN s.FECHAPROGRAMADA = date(GETDATE()) THEN 'HOY'
+                    ELSE 'FUTURO'
+               END AS EstatusFecha
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.ESTADO IN ('PENDIENTE', 'EN_PROCESO', 'NUEVO')
+          AND s.ACTIVO = 1
+          AND {_ROLE_FILTER}
+          AND (:prioridad IS NULL OR s.PRIORIDAD = :prioridad)
+          AND (:desde IS NULL OR s.FECHAPROGRAMADA >= :desde)
+          AND (:hasta IS NULL OR s.FECHAPROGRAMADA <= :hasta)
+        ORDER BY {_PRIORITY_ORDER}, s.FECHAPROGRAMADA
+    """, {'perfil': _perfil(db, IdUsuario), 'usuario': IdUsuario,
+          'prioridad': Prioridad, 'desde': FechaIni, 'hasta': FechaFin})]
+
+
+@procedure
+def usp_ObtenerPendientesOlvidados(db, IdUsuario, DiasAntiguedad=7, Prioridad=None, FechaHasta=None):
+    return [_select(db, f"""
+        SELECT s.IDSEGUIMIENTO, s.FECHAPROGRAMADA,
+               DATEDIFF('day', s.FECHAPROGRAMADA, GETDATE()) AS DiasAtraso,
+               s.PRIORIDAD, s.ESTADO, s.NOTAS,
+               e.IDEMPRESA, e.NOMBRECOMERCIAL, e.CONTACTO_NOMBRE, e.CONTACTO_TELEFONO,
+               st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS EJECUTIVO_ASIGNADO
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.ESTADO IN ('PENDIENTE', 'EN_PROCESO', 'NUEVO')
+          AND s.FECHAPROGRAMADA < date(GETDATE())
+          AND DATEDIFF('day', s.FECHAPROGRAMADA, GETDATE()) >= :dias
+          AND s.ACTIVO = 1
+          AND {_ROLE_FILTER}
+          AND (:prioridad IS NULL OR s.PRIORIDAD = :prioridad)
+          AND (:hasta IS NULL OR s.FECHAPROGRAMADA <= :hasta)
+        ORDER BY s.FECHAPROGRAMADA
+    """, {'perfil': _perfil(db, IdUsuario), 'usuario': IdUsuario, 'dias': DiasAntiguedad,
+          'prioridad': Prioridad, 'hasta': FechaHasta})]
+
+
+@procedure
+def usp_RecalcularProduccionDiaria(db, FechaInicio=None, FechaFin=None):
+    bounds = db.execute("""
+        SELECT MIN(F), MAX(T) FROM (
+            SELECT MIN(date(FECHAINTERACCION)) AS F, MAX(date(FECHAINTERACCION)) AS T FROM TM_INTERACCION
+            UNION ALL
+            SELECT MIN(FECHAPROGRAMADA), MAX(FECHAPROGRAMADA) FROM TM_SEGUIMIENTO
+        )
+    """).fetchone()
+    desde = str(FechaInicio or bounds[0] or '')
+    hasta = str(FechaFin or bounds[1] or '')
+    if not desde or not hasta or hasta < desde:
+        return [ResultSet(['DiasProcesados', 'FilasGeneradas'], [(0, 0)])]
+
+    db.execute('DELETE FROM TM_PRODUCCION_DIARIA WHERE FECHA BETWEEN ? AND ?', (desde, hasta))
+    cursor = db.execute("""
+        INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, CONTACTOS, PENDIENTES)
+        SELECT FECHA, IDUSUARIO, SUM(CONTACTOS), SUM(PENDIENTES)
+        FROM (
+            SELECT date(FECHAINTERACCION) AS FECHA, IDUSUARIO, COUNT(*) AS CONTACTOS, 0 AS PENDIENTES
+            FROM TM_INTERACCION
+            WHERE date(FECHAINTERACCION) BETWEEN :desde AND :hasta AND ACTIVO = 1
+            GROUP BY date(FECHAINTERACCION), IDUSUARIO
+            UNION ALL
+            SELECT FECHAPROGRAMADA, IDUSUARIOASIGNADO, 0, COUNT(*)
+            FROM TM_SEGUIMIENTO
+            WHERE FECHAPROGRAMADA BETWEEN :desde AND :hasta
+              AND ESTADO IN ('PENDIENTE', 'EN_PROGRESO') AND ACTIVO = 1
+            GROUP BY FECHAPROGRAMADA, IDUSUARIOASIGNADO
+        )
+        GROUP BY FECHA, IDUSUARIO
+    """, {'desde': desde, 'hasta': hasta})
+    dias = (date.fromisoformat(hasta[:10]) - date.fromisoformat(desde[:10])).days + 1
+    return [ResultSet(['DiasProcesados', 'FilasGeneradas'], [(dias, cursor.rowcount)])]
+
+
+@procedure
+def usp_RecalcularCerradosDiario(db, FechaInicio=None, FechaFin=None):
+    bounds = db.execute("""
+        SELECT MIN(F), MAX(T) FROM (
+            SELECT MIN(FECHAVENTA) AS F, MAX(FECHAVENTA) AS T FROM TM_VENTA
+            UNION ALL
+            SELECT MIN(date(FECHACOMPLETADO)), MAX(date(FECHACOMPLETADO)) FROM TM_SEGUIMIENTO
+        )
+    """).fetchone()
+    desde = str(FechaInicio or bounds[0] or '')
+    hasta = str(FechaFin or bounds[1] or '')
+    if not desde or not hasta or hasta < desde:
+        return [ResultSet(['DiasProcesados', 'FilasGeneradas'], [(0, 0)])]
+
+    db.execute('DELETE FROM TM_CERRADOS_DIARIO WHERE FECHA BETWEEN ? AND ?', (desde, hasta))
+    cursor = db.execute("""
+        INSERT INTO TM_CERRADOS_DIARIO
+            (IDUSUARIO, FECHA, CERRADOS, MONTO, DIASCIERRE, COMPLETADOS, EXITOSOS, SINRESPUESTA, NOINTERESADOS)
+        SELECT IDUSUARIO, FECHA, SUM(CERRADOS), round(SUM(MONTO), 2), SUM(DIASCIERRE),
+               SUM(COMPLETADOS), SUM(EXITOSOS), SUM(SINRESPUESTA), SUM(NOINTERESADOS)
+        FROM (
+            SELECT IDUSUARIO, FECHAVENTA AS FECHA, COUNT(*) AS CERRADOS, SUM(MONTO) AS MONTO,
+                   SUM(DATEDIFF('day', IFNULL(FECHACREA, FECHAVENTA), FECHAVENTA)) AS DIASCIERRE,
+                   0 AS COMPLETADOS, 0 AS EXITOSOS, 0 AS SINRESPUESTA, 0 AS NOINTERESADOS
+            FROM TM_VENTA
+            WHERE FECHAVENTA BETWEEN :desde AND :hasta AND ACTIVO = 1
+            GROUP BY IDUSUARIO, FECHAVENTA
+            UNION ALL
+            SELECT IDUSUARIOASIGNADO, date(FECHACOMPLETADO), 0, 0, 0, COUNT(*),
+                   SUM(RESULTADO IS 'EXITOSO'), SUM(RESULTADO IS 'SIN_RESPUESTA'), SUM(RESULTADO IS 'NO_INTERESADO')
+            FROM TM_SEGUIMIENTO
+            WHERE date(FECHACOMPLETADO) BETWEEN :desde AND :hasta
+              AND ESTADO = 'COMPLETADO' AND ACTIVO = 1
+            GROUP BY IDUSUARIOASIGNADO, date(FECHACOMPLETADO)
+        )
+        GROUP BY IDUSUARIO, FECHA
+    """, {'desde': desde, 'hasta': hasta})
+    dias = (date.fromisoformat(hasta[:10]) - date.fromisoformat(desde[:10])).days + 1
+    return [ResultSet(['DiasProcesados', 'FilasGeneradas'], [(dias, cursor.rowcount)])]
+
+
+@procedure
+def usp_ObtenerProduccionDiaria(db, IdUsuario, Fecha=None):
+    return [_select(db, """
+        SELECT u.IDUSUARIO, u.LOGINUSUARIO AS USUARIO,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS NOMBRE,
+               IFNULL(p.CONTACTOS, 0) AS CONTACTOS_DEL_DIA,
+               IFNULL(p.PENDIENTES, 0) AS PENDIENTES_DEL_DIA,
+               IFNULL(p.CONTACTOS, 0) + IFNULL(p.PENDIENTES, 0) AS TOTAL_DEL_DIA
+        FROM TM_USUARIO u
+        LEFT JOIN TM_PRODUCCION_DIARIA p ON p.FECHA = :fecha AND p.IDUSUARIO = u.IDUSUARIO
+        WHERE u.ACTIVO = 1
+          AND u.IDPERFIL IN (2, 3)
+          AND (
+              :perfil = 1
+              OR (:perfil = 2 AND (u.IDSUPERVISOR = :usuario OR u.IDUSUARIO = :usuario))
+              OR (:perfil = 3 AND u.IDUSUARIO = :usuario)
+          )
+        ORDER BY NOMBRE
+    """, {'fecha': str(Fecha or date.today()), 'perfil': _perfil(db, IdUsuario), 'usuario': IdUsuario})]
+
+
+# Materialized high-value alerts (21_alertas_alto_valor.sql)
+_ALERTA_ENTIDAD = 'SEGUIMIENTO_ALTO_VALOR'
+
+
+@procedure
+def usp_MaterializarAlertasAltoValor(db):
+    # Start of the current hour minus 23 hours: DATEDIFF(HOUR, x, now) >= 24 as a range
+    corte = (datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)).isoformat(' ')
+    db.execute('DROP TABLE IF EXISTS temp.VENCIDOS')
+    db.execute("""
+        CREATE TEMP TABLE VENCIDOS AS
+        SELECT S.IDSEGUIMIENTO, S.IDUSUARIOASIGNADO AS IDUSUARIO, E.NOMBRECOMERCIAL AS EMPRESA
+        FROM TM_SEGUIMIENTO S
+        INNER JOIN TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+        INNER JOIN TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+        WHERE S.PRIORIDAD = 'ALTA' AND S.ESTADO = 'PENDIENTE' AND S.ACTIVO = 1
+          AND S.FECHAPROGRAMADA <= date(:corte)
+          AND S.FECHAPROGRAMADA || ' ' || IFNULL(S.HORAPROGRAMADA, '00:00:00') < :corte
+    """, {'corte': corte})
+    try:
+        retiradas = db.execute("""
+            UPDATE TM_NOTIFICACION SET ACTIVO = 0
+            WHERE TIPOENTIDAD = :entidad AND ACTIVO = 1
+              AND NOT EXISTS (
+                  SELECT 1 FROM temp.VENCIDOS V
+                  WHERE V.IDSEGUIMIENTO = TM_NOTIFICACION.IDREFERENCIAENTIDAD
+                    AND V.IDUSUARIO = TM_NOTIFICACION.IDUSUARIO
+              )
+        """, {'entidad': _ALERTA_ENTIDAD}).rowcount
+        creadas = db.execute("""
+            INSERT INTO TM_NOTIFICACION (IDUSUARIO, TITULO, MENSAJE, TIPO, LEIDA, TIPOENTIDAD, IDREFERENCIAENTIDAD)
+            SELECT V.IDUSUARIO, 'Seguimiento de alto valor sin atender',
+                   substr('Seguimiento de alta prioridad con ' || IFNULL(V.EMPRESA, '')
+                          || ' sin atender por más de 24 horas', 1, 500),
+                   'ALERTA', 0, :entidad, V.IDSEGUIMIENTO
+            FROM temp.VENCIDOS V
+            WHERE NOT EXISTS (
+                SELECT 1 FROM TM_NOTIFICACION N
+                WHERE N.TIPOENTIDAD = :entidad AND N.ACTIVO = 1 AND N.IDREFERENCIAENTIDAD = V.IDSEGUIMIENTO
+            )
+        """, {'entidad': _ALERTA_ENTIDAD}).rowcount
+        activas = db.execute('SELECT COUNT(*) FROM temp.VENCIDOS').fetchone()[0]
+    finally:
+        db.execute('DROP TABLE temp.VENCIDOS')
+    return [ResultSet(['AlertasCreadas', 'AlertasRetiradas', 'AlertasActivas'], [(creadas, retiradas, activas)])]
+
+
+@procedure
+def usp_ObtenerNotificacionesUsuario(db, IdUsuario, Limite=50):
+    if Limite is None or Limite < 1:
+        Limite = 50
+    Limite = min(Limite, 200)
+    alertas = _select(db, """
+        SELECT S.IDSEGUIMIENTO, S.FECHAPROGRAMADA, S.HORAPROGRAMADA, S.PRIORIDAD, S.ESTADO,
+               E.IDEMPRESA, E.NOMBRECOMERCIAL AS EMPRESA, E.CONTACTO_NOMBRE AS CONTACTO,
+               T.NOMBRE AS TIPOSEGUIMIENTO,
+               DATEDIFF('hour', S.FECHAPROGRAMADA || ' ' || IFNULL(S.HORAPROGRAMADA, '00:00:00'), GETDATE())
+                   AS HORAS_SIN_ATENCION,
+               D.PRESUPUESTO
+        FROM TM_NOTIFICACION A
+        INNER JOIN TM_SEGUIMIENTO S ON S.IDSEGUIMIENTO = A.IDREFERENCIAENTIDAD
+        INNER JOIN TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+        INNER JOIN TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+        LEFT JOIN TM_SEGUIMIENTO_DETALLE D ON S.IDSEGUIMIENTO = D.IDSEGUIMIENTO AND D.ACTIVO = 1
+        WHERE A.IDUSUARIO = :usuario AND A.TIPOENTIDAD = :entidad AND A.ACTIVO = 1
+          AND S.IDUSUARIOASIGNADO = :usuario
+          AND S.PRIORIDAD = 'ALTA' AND S.ESTADO = 'PENDIENTE' AND S.ACTIVO = 1
+        ORDER BY S.FECHAPROGRAMADA
+    """, {'usuario': IdUsuario, 'entidad': _ALERTA_ENTIDAD})
+    notificaciones = _select(db, """
+        SELECT N.IDNOTIFICACION, N.TITULO, N.MENSAJE, N.TIPO, N.LEIDA AS LEIDO, N.FECHACREACION AS FECHAENVIO
+        FROM TM_NOTIFICACION N
+        WHERE N.IDUSUARIO = ? AND N.ACTIVO = 1 AND IFNULL(N.TIPOENTIDAD, '') <> ?
+        ORDER BY N.FECHACREACION DESC
+        LIMIT ?
+    """, (IdUsuario, _ALERTA_ENTIDAD, Limite))
+    no_leidas = _select(db, """
+        SELECT COUNT(*) AS UNREAD_COUNT
+        FROM TM_NOTIFICACION
+        WHERE IDUSUARIO = ? AND LEIDA = 0 AND ACTIVO = 1 AND IFNULL(TIPOENTIDAD, '') <> ?
+    """, (IdUsuario, _ALERTA_ENTIDAD))
+    return [alertas, notificaciones, no_leidas]
+
+
+@procedure
+def usp_ObtenerVersionDatos(db, Vista, IdUsuario, FechaInicio=None, FechaFin=None):
+    perfil = _perfil(db, IdUsuario)
+    version_usuario = db.execute('SELECT VERSIONFILA FROM TM_USUARIO WHERE IDUSUARIO = ?', (IdUsuario,)).fetchone()
+    if str(Vista).upper() == 'NOTIFICACIONES':
+        return [_select(db, """
+            SELECT :perfil AS PERFIL, COUNT(*) AS FILAS,
+                   MAX(N.VERSIONFILA) AS VERSION_NOTIFICACION, MAX(S.VERSIONFILA) AS VERSION_SEGUIMIENTO,
+                   MAX(E.VERSIONFILA) AS VERSION_EMPRESA, :version_usuario AS VERSION_USUARIO,
+                   MAX(T.VERSIONFILA) AS VERSION_TIPO
+            FROM TM_NOTIFICACION N
+            LEFT JOIN TM_SEGUIMIENTO S
+                ON N.TIPOENTIDAD = :entidad AND S.IDSEGUIMIENTO = N.IDREFERENCIAENTIDAD
+            LEFT JOIN TM_EMPRESA E ON E.IDEMPRESA = S.IDEMPRESA
+            LEFT JOIN TM_SEGUIMIENTO_TIPO T ON T.IDTIPOSEGUIMIENTO = S.IDTIPOSEGUIMIENTO
+            WHERE N.IDUSUARIO = :usuario
+        """, {'perfil': perfil, 'version_usuario': version_usuario[0] if version_usuario else None,
+              'entidad': _ALERTA_ENTIDAD, 'usuario': IdUsuario})]
+    return [_select(db, f"""
+        SELECT :perfil AS PERFIL, COUNT(*) AS FILAS,
+               MAX(s.VERSIONFILA) AS VERSION_SEGUIMIENTO, MAX(e.VERSIONFILA) AS VERSION_EMPRESA,
+               MAX(u.VERSIONFILA) AS VERSION_USUARIO, MAX(st.VERSIONFILA) AS VERSION_TIPO
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA BETWEEN :inicio AND :fin
+          AND {_ROLE_FILTER}
+    """, {'perfil': perfil, 'usuario': IdUsuario, 'inicio': str(FechaInicio),
+          'fin': str(FechaFin or FechaInicio)})]
+
+
+# Columns and order of usp_ObtenerAgendaDia / usp_ObtenerCalendarioSupervisor
+_VISTA_SEGUIMIENTOS = {
+    'AGENDA': ("""s.IDSEGUIMIENTO, s.FECHAPROGRAMADA, s.HORAPROGRAMADA, s.PRIORIDAD, s.ESTADO, s.NOTAS,
+               e.IDEMPRESA, e.NOMBRECOMERCIAL, e.CONTACTO_NOMBRE, e.CONTACTO_TELEFONO, e.CONTACTO_EMAIL,
+               st.IDTIPOSEGUIMIENTO, st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR,
+               u.NOMBRES || ' ' || u.APELLIDOPATERNO AS EJECUTIVO_ASIGNADO""",
+               f"{_PRIORITY_ORDER}, s.HORAPROGRAMADA"),
+    'CALENDARIO': ("""s.IDSEGUIMIENTO, s.FECHAPROGRAMADA, s.HORAPROGRAMADA, s.PRIORIDAD, s.ESTADO, s.NOTAS,
+                   e.IDEMPRESA, e.NOMBRECOMERCIAL, u.IDUSUARIO,
+                   u.NOMBRES || ' ' || u.APELLIDOPATERNO AS NombreEjecutivo,
+                   st.NOMBRE AS TIPOSEGUIMIENTO, st.COLOR""",
+                   "s.FECHAPROGRAMADA, s.HORAPROGRAMADA"),
+}
+
+
+@procedure
+def usp_ObtenerCambiosSeguimientos(db, Vista, IdUsuario, FechaInicio, FechaFin=None, Desde=None):
+    watermark = _select(db, 'SELECT GETDATE() AS "WATERMARK [DATETIME]"')
+    columns, order = _VISTA_SEGUIMIENTOS['AGENDA' if str(Vista).upper() == 'AGENDA' else 'CALENDARIO']
+    params = {'perfil': _perfil(db, IdUsuario), 'usuario': IdUsuario, 'inicio': str(FechaInicio),
+              'fin': str(FechaFin or FechaInicio), 'desde': Desde}
+    cambios = """s.IDSEGUIMIENTO IN (
+              SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO WHERE FECHACREA >= :desde
+              UNION
+              SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO WHERE FECHAMODIFICA >= :desde)"""
+    rows = _select(db, f"""
+        SELECT {columns}
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA BETWEEN :inicio AND :fin
+          AND s.ACTIVO = 1
+          AND {'1 = 1' if Desde is None else cambios}
+          AND {_ROLE_FILTER}
+        ORDER BY {order}
+    """, params)
+    if Desde is None:
+        return [watermark, rows, ResultSet(['IDSEGUIMIENTO'], [])]
+    eliminados = _select(db, f"""
+        SELECT IDSEGUIMIENTO FROM (
+            SELECT s.IDSEGUIMIENTO, s.ACTIVO,
+                   s.FECHAPROGRAMADA BETWEEN :inicio AND :fin AS ENRANGO,
+                   {_ROLE_FILTER} AS VISIBLE
+            FROM TM_SEGUIMIENTO s
+            INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+            WHERE s.FECHAMODIFICA >= :desde
+        )
+        WHERE (ENRANGO OR VISIBLE) AND NOT (ACTIVO = 1 AND ENRANGO AND VISIBLE)
+        ORDER BY IDSEGUIMIENTO
+    """, params)
+    return [watermark, rows, eliminados]
+
+
+@procedure
+def usp_MarcarNotificacionesLeidas(db, IdUsuario, Ids=None, Hasta=None):
+    ahora = _now()
+    if Ids is not None:
+        solicitadas = sorted({int(value) for value in str(Ids).split(',') if value.strip().lstrip('-').isdigit()})
+        marcadas = set()
+        # One UPDATE per chunk keeps the statement under SQLite's variable limit
+        for start in range(0, len(solicitadas), 500):
+            chunk = solicitadas[start:start + 500]
+            marcadas.update(row[0] for row in db.execute(f"""
+                UPDATE TM_NOTIFICACION SET LEIDA = 1, FECHALEIDA = ?
+                WHERE IDNOTIFICACION IN ({', '.join('?' * len(chunk))})
+                  AND IDUSUARIO = ? AND LEIDA = 0 AND ACTIVO = 1
+                RETURNING IDNOTIFICACION
+            """, (ahora, *chunk, IdUsuario)).fetchall())
+        existentes = {}
+        for start in range(0, len(solicitadas), 500):
+            chunk = solicitadas[start:start + 500]
+            existentes.update(db.execute(f"""
+                SELECT IDNOTIFICACION, FECHALEIDA FROM TM_NOTIFICACION
+                WHERE IDNOTIFICACION IN ({', '.join('?' * len(chunk))}) AND IDUSUARIO = ? AND ACTIVO = 1
+            """, (*chunk, IdUsuario)).fetchall())
+        resultados = ResultSet(['IDNOTIFICACION', 'RESULTADO', 'FECHALEIDA'], [
+            (id_notificacion,
+             'MARCADA' if id_notificacion in marcadas else 'YA_LEIDA' if id_notificacion in existentes else 'NO_ENCONTRADA',
+             existentes.get(id_notificacion))
+            for id_notificacion in solicitadas
+        ])
+    else:
+        marcadas = sorted(row[0] for row in db.execute("""
+            UPDATE TM_NOTIFICACION SET LEIDA = 1, FECHALEIDA = :ahora
+            WHERE IDUSUARIO = :usuario AND LEIDA = 0 AND ACTIVO = 1 AND FECHACREACION <= :hasta
+            RETURNING IDNOTIFICACION
+        """, {'ahora': ahora, 'usuario': IdUsuario, 'hasta': Hasta or ahora}).fetchall())
+        fecha = _as_datetime(ahora)
+        resultados = ResultSet(['IDNOTIFICACION', 'RESULTADO', 'FECHALEIDA'],
+                               [(id_notificacion, 'MARCADA', fecha) for id_notificacion in marcadas])
+    resumen = db.execute("""
+        SELECT COUNT(*) FROM TM_NOTIFICACION
+        WHERE IDUSUARIO = ? AND LEIDA = 0 AND ACTIVO = 1 AND IFNULL(TIPOENTIDAD, '') <> ?
+    """, (IdUsuario, _ALERTA_ENTIDAD)).fetchone()[0]
+    return [resultados, ResultSet(['Marcadas', 'FechaLeida', 'NoLeidas'], [(len(marcadas), _as_datetime(ahora), resumen)])]
+
+
+_EMPRESA_LIST_COLUMNS = """e.IDEMPRESA, e.NOMBRECOMERCIAL, e.RAZONSOCIAL, e.RUC, e.TIPOCLIENTE, e.TIPOCARTERA,
+               e.CONTACTO_NOMBRE, e.CONTACTO_EMAIL, e.CONTACTO_TELEFONO, e.ACTIVO"""
+
+
+@procedure
+def usp_BuscarEmpresas(db, Criterio=None, TipoCliente=None, TipoCartera=None, Limite=100,
+                       CursorNombre=None, CursorId=None, IncluirTotal=0):
+    if Limite is None or Limite < 1:
+        Limite = 100
+    Limite = min(Limite, 500)
+    if CursorNombre is None:
+        CursorNombre, CursorId = '', 0
+    CursorId = CursorId or 0
+
+    # Word-prefix match on the folded keys, as TM_EMPRESA_PALABRA does (script 17)
+    conditions = ['e.ACTIVO = 1',
+                  '(:tipocliente IS NULL OR e.TIPOCLIENTE = :tipocliente)',
+                  '(:tipocartera IS NULL OR e.TIPOCARTERA = :tipocartera)']
+    params = {'tipocliente': TipoCliente, 'tipocartera': TipoCartera}
+    words = fold_text(Criterio).split()
+    if words:
+        keys = "(' ' || CLAVE_BUSQUEDA(e.NOMBRECOMERCIAL) || ' ' || CLAVE_BUSQUEDA(e.RAZONSOCIAL) " \
+               "|| ' ' || CLAVE_BUSQUEDA(e.CONTACTO_NOMBRE))"
+        match = ' AND '.join(f"{keys} LIKE '% ' || :w{i} || '%'" for i in range(len(words)))
+        params.update((f'w{i}', word) for i, word in enumerate(words))
+        ruc = compact_ruc(Criterio)
+        if len(ruc) >= 3 and ruc.isdigit():
+            match = f"({match}) OR RUC_COMPACTO(e.RUC) LIKE :ruc || '%'"
+            params['ruc'] = ruc
+        conditions.append(f'({match})')
+    where = ' AND '.join(conditions)
+
+    page = _select(db, f"""
+        SELECT {_EMPRESA_LIST_COLUMNS}
+        FROM TM_EMPRESA e
+        WHERE {where}
+          AND e.NOMBRECOMERCIAL >= :cursor_nombre COLLATE NOCASE
+          AND (e.NOMBRECOMERCIAL > :cursor_nombre COLLATE NOCASE OR e.IDEMPRESA > :cursor_id)
+        ORDER BY e.NOMBRECOMERCIAL COLLATE NOCASE, e.IDEMPRESA
+        LIMIT :limite
+    """, dict(params, cursor_nombre=CursorNombre, cursor_id=CursorId, limite=Limite + 1))
+    if not IncluirTotal:
+        return [page]
+    return [page, _select(db, f'SELECT COUNT(*) AS TOTAL FROM TM_EMPRESA e WHERE {where}', params)]
+
+
+@procedure
+def usp_ObtenerEmpresasIndice(db, Desde=None):
+    watermark = _select(db, 'SELECT GETDATE() AS "WATERMARK [DATETIME]"')
+    if Desde is None:
+        rows = _select(db, f'SELECT {_EMPRESA_LIST_COLUMNS} FROM TM_EMPRESA e WHERE e.ACTIVO = 1')
+    else:
+        rows = _select(db, f"""
+            SELECT {_EMPRESA_LIST_COLUMNS} FROM TM_EMPRESA e
+            WHERE e.FECHACREA >= :desde OR e.FECHAMODIFICA >= :desde
+        """, {'desde': Desde})
+    return [watermark, rows]
+
+
+# Company columns of usp_ObtenerEmpresa (26_version_datos_etag.sql): the
+# columns of 02_create_tables.sql, without VERSIONFILA and the search keys
+_EMPRESA_DETALLE_COLUMNS = """e.IDEMPRESA, e.NOMBRECOMERCIAL, e.RAZONSOCIAL, e.RUC, e.SEDEPRINCIPAL, e.DOMICILIO,
+    e.CONTACTO_NOMBRE, e.CONTACTO_EMAIL, e.CONTACTO_TELEFONO, e.CONTACTO_CARGO, e.TIPOCLIENTE,
+    e.LINEANEGOCIO, e.SUBLINEANEGOCIO, e.TIPOCREDITO, e.TIPOCARTERA, e.ACTIVIDADECONOMICA, e.RIESGO,
+    e.NUMTRABAJADORES, e.ACTIVO, e.USUARIOCREA, e.FECHACREA, e.USUARIOMODIFICA, e.FECHAMODIFICA"""
+
+
+@procedure
+def usp_ObtenerEmpresa(db, IdEmpresa):
+    return [
+        _select(db, f'SELECT {_EMPRESA_DETALLE_COLUMNS} FROM TM_EMPRESA e WHERE e.IDEMPRESA = ?', (IdEmpresa,)),
+        _select(db, """
+            SELECT s.* FROM TM_EMPRESA_SEDE s
+            WHERE s.IDEMPRESA = ? AND s.ACTIVO = 1
+            ORDER BY s.ESPRINCIPAL DESC, s.NOMBRESEDE
+        """, (IdEmpresa,)),
+        _select(db, """
+            SELECT seg.IDSEGUIMIENTO, seg.FECHAPROGRAMADA, seg.ESTADO, seg.RESULTADO, st.NOMBRE AS TIPOSEGUIMIENTO
+            FROM TM_SEGUIMIENTO seg
+            LEFT JOIN TM_SEGUIMIENTO_TIPO st ON seg.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+            WHERE seg.IDEMPRESA = ? AND seg.ACTIVO = 1
+            ORDER BY seg.FECHAPROGRAMADA DESC
+            LIMIT 10
+        """, (IdEmpresa,)),
+    ]
+
+
+@procedure
+def usp_ObtenerVersionEmpresa(db, IdEmpresa):
+    return [_select(db, """
+        SELECT
+            (SELECT VERSIONFILA FROM TM_EMPRESA WHERE IDEMPRESA = :id) AS VERSION_EMPRESA,
+            (SELECT MAX(S.VERSIONFILA) FROM TM_SEGUIMIENTO S WHERE S.IDEMPRESA = :id) AS VERSION_SEGUIMIENTO,
+            (SELECT MAX(T.VERSIONFILA) FROM TM_SEGUIMIENTO_TIPO T
+             WHERE T.IDTIPOSEGUIMIENTO IN (SELECT S.IDTIPOSEGUIMIENTO FROM TM_SEGUIMIENTO S
+                                           WHERE S.IDEMPRESA = :id)) AS VERSION_TIPO,
+            (SELECT COUNT(*) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = :id) AS SEDES,
+            (SELECT MAX(IFNULL(FECHAMODIFICA, FECHACREA)) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = :id) AS CAMBIO_SEDES
+    """, {'id': IdEmpresa})]
+
+
+# usp_InsertarEmpresa / usp_ActualizarEmpresa parameters and their columns
+_EMPRESA_FIELDS = {
+    'NombreComercial': 'NOMBRECOMERCIAL', 'RazonSocial': 'RAZONSOCIAL', 'RUC': 'RUC',
+    'SedePrincipal': 'SEDEPRINCIPAL', 'Domicilio': 'DOMICILIO', 'ContactoNombre': 'CONTACTO_NOMBRE',
+    'ContactoEmail': 'CONTACTO_EMAIL', 'ContactoTelefono': 'CONTACTO_TELEFONO', 'ContactoCargo': 'CONTACTO_CARGO',
+    'TipoCliente': 'TIPOCLIENTE', 'LineaNegocio': 'LINEANEGOCIO', 'SublineaNegocio': 'SUBLINEANEGOCIO',
+    'TipoCredito': 'TIPOCREDITO', 'TipoCartera': 'TIPOCARTERA', 'ActividadEconomica': 'ACTIVIDADECONOMICA',
+    'Riesgo': 'RIESGO', 'NumTrabajadores': 'NUMTRABAJADORES',
+}
+
+
+@procedure
+def usp_InsertarEmpresa(db, NombreComercial, UsuarioCrea, RazonSocial=None, RUC=None, SedePrincipal=None,
+                        Domicilio=None, ContactoNombre=None, ContactoEmail=None, ContactoTelefono=None,
+                        ContactoCargo=None, TipoCliente=None, LineaNegocio=None, SublineaNegocio=None,
+                        TipoCredito=None, TipoCartera=None, ActividadEconomica=None, Riesgo=None,
+                        NumTrabajadores=None):
+    values = locals()
+    columns = list(_EMPRESA_FIELDS.values()) + ['USUARIOCREA']
+    params = [values[name] for name in _EMPRESA_FIELDS] + [UsuarioCrea]
+    cursor = db.execute(f"INSERT INTO TM_EMPRESA ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        params)
+    return [_scalar('IdEmpresa', cursor.lastrowid)]
+
+
+@procedure
+def usp_ActualizarEmpresa(db, IdEmpresa, UsuarioModifica, NombreComercial=None, RazonSocial=None, RUC=None,
+                          SedePrincipal=None, Domicilio=None, ContactoNombre=None, ContactoEmail=None,
+                          ContactoTelefono=None, ContactoCargo=None, TipoCliente=None, LineaNegocio=None,
+                          SublineaNegocio=None, TipoCredito=None, TipoCartera=None, ActividadEconomica=None,
+                          Riesgo=None, NumTrabajadores=None):
+    values = locals()
+    assignments = ', '.join(f'{column} = IFNULL(?, {column})' for column in _EMPRESA_FIELDS.values())
+    params = [values[name] for name in _EMPRESA_FIELDS] + [UsuarioModifica, IdEmpresa]
+    cursor = db.execute(f"""
+        UPDATE TM_EMPRESA
+        SET {assignments}, USUARIOMODIFICA = ?, FECHAMODIFICA = GETDATE()
+        WHERE IDEMPRESA = ?
+    """, params)
+    return [_scalar('Affected', cursor.rowcount)]
+
+
+@procedure
+def usp_ImportarEmpresas(db, IdImportacion, Actualizar=0):
+    columns = list(_EMPRESA_FIELDS.values())
+    # RUC_COMPACTO index of script 17 (SQLite has no stored key to seek on)
+    existentes = {}
+    for ruc, id_empresa in db.execute('SELECT RUC_COMPACTO(RUC), IDEMPRESA FROM TM_EMPRESA ORDER BY IDEMPRESA DESC'):
+        existentes[ruc] = id_empresa
+    filas = db.execute("""
+        SELECT FILA, RUC, MIN(FILA) OVER (PARTITION BY RUC)
+        FROM TM_EMPRESA_IMPORTACION
+        WHERE IDIMPORTACION = ?
+        ORDER BY FILA
+    """, (IdImportacion,)).fetchall()
+
+    resultados = {}
+    for fila, ruc, original in filas:
+        id_empresa = existentes.get(ruc)
+        if fila != original:
+            resultados[fila] = [ruc, 'DUPLICADO_ARCHIVO', None, original]
+        elif id_empresa is None:
+            cursor = db.execute(f"""
+                INSERT INTO TM_EMPRESA ({', '.join(columns)}, USUARIOCREA)
+                SELECT {', '.join(columns)}, USUARIOCREA
+                FROM TM_EMPRESA_IMPORTACION WHERE IDIMPORTACION = ? AND FILA = ?
+            """, (IdImportacion, fila))
+            resultados[fila] = [ruc, 'CREADA', cursor.lastrowid, original]
+            db.execute("""
+                INSERT INTO TM_EMPRESA_SEDE (IDEMPRESA, NOMBRESEDE, DOMICILIO, TELEFONO, CONTACTO_NOMBRE,
+                                             CONTACTO_EMAIL, CONTACTO_TELEFONO, ESPRINCIPAL, USUARIOCREA)
+                SELECT ?, substr(IFNULL(SEDEPRINCIPAL, 'Principal'), 1, 128), DOMICILIO, CONTACTO_TELEFONO,
+                       CONTACTO_NOMBRE, CONTACTO_EMAIL, CONTACTO_TELEFONO, 1, USUARIOCREA
+                FROM TM_EMPRESA_IMPORTACION WHERE IDIMPORTACION = ? AND FILA = ?
+            """, (cursor.lastrowid, IdImportacion, fila))
+        elif Actualizar:
+            resultados[fila] = [ruc, 'ACTUALIZADA', id_empresa, original]
+        else:
+            resultados[fila] = [ruc, 'EXISTENTE', id_empresa, original]
+    for resultado in resultados.values():
+        if resultado[1] == 'DUPLICADO_ARCHIVO':
+            resultado[2] = resultados[resultado[3]][2]
+    if Actualizar:
+        assignments = ', '.join(f'{column} = IFNULL(?, {column})' for column in columns)
+        db.executemany(f"""
+            UPDATE TM_EMPRESA
+            SET {assignments}, USUARIOMODIFICA = ?, FECHAMODIFICA = GETDATE()
+            WHERE IDEMPRESA = ?
+        """, [
+            (*row[1:], resultados[row[0]][2])
+            for row in db.execute(f"""
+                SELECT FILA, {', '.join(columns)}, USUARIOCREA
+                FROM TM_EMPRESA_IMPORTACION WHERE IDIMPORTACION = ?
+            """, (IdImportacion,))
+            if resultados[row[0]][1] == 'ACTUALIZADA'
+        ])
+    db.execute('DELETE FROM TM_EMPRESA_IMPORTACION WHERE IDIMPORTACION = ?', (IdImportacion,))
+
+    conteo = {}
+    for resultado in resultados.values():
+        conteo[resultado[1]] = conteo.get(resultado[1], 0) + 1
+    detalle = {'EXISTENTE': 'RUC ya registrado', 'ACTUALIZADA': 'RUC ya registrado; datos actualizados'}
+    reporte = sorted((
+        (fila, ruc, estado, id_empresa,
+         f'RUC repetido; se usó la fila {original}' if estado == 'DUPLICADO_ARCHIVO' else detalle[estado])
+        for fila, (ruc, estado, id_empresa, original) in resultados.items() if estado != 'CREADA'
+    ), key=lambda row: (row[1], row[0]))
+    return [
+        ResultSet(['Filas', 'Creadas', 'Actualizadas', 'Existentes', 'Duplicadas'], [(
+            len(resultados), conteo.get('CREADA', 0), conteo.get('ACTUALIZADA', 0),
+            conteo.get('EXISTENTE', 0), conteo.get('DUPLICADO_ARCHIVO', 0),
+        )]),
+        ResultSet(['FILA', 'RUC', 'RESULTADO', 'IDEMPRESA', 'DETALLE'], reporte),
+    ]
+
+
+@procedure
+def usp_RegenerarClavesBusquedaEmpresas(db):
+    # Offline searches fold the columns on the fly; there are no stored keys
+    return []
+
+
+@procedure
+def usp_CrearSeguimiento(db, IdEmpresa, IdUsuarioAsignado, FechaProgramada, UsuarioCrea, IdTipoSeguimiento=None,
+                         HoraProgramada=None, Prioridad='MEDIA', Notas=None):
+    cursor = db.execute("""
+        INSERT INTO TM_SEGUIMIENTO (
+            IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO,
+            FECHAPROGRAMADA, HORAPROGRAMADA, PRIORIDAD, NOTAS, USUARIOCREA
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (IdEmpresa, IdTipoSeguimiento, IdUsuarioAsignado, FechaProgramada, HoraProgramada,
+          Prioridad, Notas, UsuarioCrea))
+    return [_scalar('IdSeguimiento', cursor.lastrowid)]
+
+
+@procedure
+def usp_CrearSeguimientosLote(db, IdLote, Atomico=0):
+    items = db.execute("""
+        SELECT L.ITEM,
+               CASE
+                   WHEN E.IDEMPRESA IS NULL THEN 'Empresa no encontrada o inactiva'
+                   WHEN U.IDUSUARIO IS NULL THEN 'Usuario asignado no encontrado o inactivo'
+                   WHEN L.IDTIPOSEGUIMIENTO IS NOT NULL AND T.IDTIPOSEGUIMIENTO IS NULL
+                       THEN 'Tipo de seguimiento no encontrado o inactivo'
+               END,
+               L.IDEMPRESA, L.IDTIPOSEGUIMIENTO, L.IDUSUARIOASIGNADO, L.FECHAPROGRAMADA,
+               L.HORAPROGRAMADA, L.PRIORIDAD, L.NOTAS, L.USUARIOCREA
+        FROM TM_SEGUIMIENTO_LOTE L
+        LEFT JOIN TM_EMPRESA E ON E.IDEMPRESA = L.IDEMPRESA AND E.ACTIVO = 1
+        LEFT JOIN TM_USUARIO U ON U.IDUSUARIO = L.IDUSUARIOASIGNADO AND U.ACTIVO = 1
+        LEFT JOIN TM_SEGUIMIENTO_TIPO T ON T.IDTIPOSEGUIMIENTO = L.IDTIPOSEGUIMIENTO AND T.ACTIVO = 1
+        WHERE L.IDLOTE = ?
+        ORDER BY L.ITEM
+    """, (IdLote,)).fetchall()
+    creados = {}
+    if Atomico and any(item[1] is not None for item in items):
+        items = [(item[0], item[1] or 'No creado: otro seguimiento del lote es inválido') + item[2:] for item in items]
+    else:
+        for item in items:
+            if item[1] is None:
+                cursor = db.execute("""
+                    INSERT INTO TM_SEGUIMIENTO (
+                        IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO,
+                        FECHAPROGRAMADA, HORAPROGRAMADA, PRIORIDAD, NOTAS, USUARIOCREA
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, item[2:])
+                creados[item[0]] = cursor.lastrowid
+    db.execute('DELETE FROM TM_SEGUIMIENTO_LOTE WHERE IDLOTE = ?', (IdLote,))
+    return [ResultSet(['ITEM', 'IDSEGUIMIENTO', 'ERROR'],
+                      [(item[0], creados.get(item[0]), item[1]) for item in items])]
+
+
+@procedure
+def usp_ActualizarSeguimiento(db, IdSeguimiento, UsuarioModifica, IdTipoSeguimiento=None, FechaProgramada=None,
+                              HoraProgramada=None, Prioridad=None, Estado=None, Notas=None, Resultado=None):
+    cursor = db.execute("""
+        UPDATE TM_SEGUIMIENTO
+        SET IDTIPOSEGUIMIENTO = IFNULL(:tipo, IDTIPOSEGUIMIENTO),
+            FECHAPROGRAMADA = IFNULL(:fecha, FECHAPROGRAMADA),
+            HORAPROGRAMADA = IFNULL(:hora, HORAPROGRAMADA),
+            PRIORIDAD = IFNULL(:prioridad, PRIORIDAD),
+            ESTADO = IFNULL(:estado, ESTADO),
+            NOTAS = IFNULL(:notas, NOTAS),
+            RESULTADO = IFNULL(:resultado, RESULTADO),
+            FECHACOMPLETADO = CASE WHEN :estado = 'COMPLETADO' THEN GETDATE() ELSE FECHACOMPLETADO END,
+            USUARIOMODIFICA = :usuario,
+            FECHAMODIFICA = GETDATE()
+        WHERE IDSEGUIMIENTO = :id AND ACTIVO = 1
+    """, {'tipo': IdTipoSeguimiento, 'fecha': FechaProgramada, 'hora': HoraProgramada, 'prioridad': Prioridad,
+          'estado': Estado, 'notas': Notas, 'resultado': Resultado, 'usuario': UsuarioModifica,
+          'id': IdSeguimiento})
+    return [_scalar('Affected', cursor.rowcount)]
+
+
+@procedure
+def usp_CambiarEstadoSeguimientos(db, Estado, UsuarioModifica, Ids=None, IdUsuarioAsignado=None, Fecha=None,
+                                  Resultado=None, Notas=None):
+    ahora = _now()
+    if Ids is not None:
+        solicitados = sorted({int(value) for value in str(Ids).split(',') if value.strip().lstrip('-').isdigit()})
+    else:
+        solicitados = [row[0] for row in db.execute("""
+            SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO
+            WHERE FECHAPROGRAMADA = ? AND IDUSUARIOASIGNADO = ? AND ACTIVO = 1
+            ORDER BY IDSEGUIMIENTO
+        """, (str(Fecha), IdUsuarioAsignado)).fetchall()]
+    anteriores = {}
+    existentes = {}
+    # One UPDATE per chunk keeps the statement under SQLite's variable limit
+    for start in range(0, len(solicitados), 500):
+        chunk = solicitados[start:start + 500]
+        marks = ', '.join('?' * len(chunk))
+        existentes.update((row[0], row[1:]) for row in db.execute(f"""
+            SELECT IDSEGUIMIENTO, IDEMPRESA, ESTADO FROM TM_SEGUIMIENTO
+            WHERE IDSEGUIMIENTO IN ({marks}) AND ACTIVO = 1
+        """, chunk).fetchall())
+        db.execute(f"""
+            UPDATE TM_SEGUIMIENTO
+            SET ESTADO = ?,
+                RESULTADO = IFNULL(?, RESULTADO),
+                NOTAS = IFNULL(?, NOTAS),
+                FECHACOMPLETADO = CASE WHEN ? = 'COMPLETADO' THEN ? ELSE FECHACOMPLETADO END,
+                USUARIOMODIFICA = ?,
+                FECHAMODIFICA = ?
+            WHERE IDSEGUIMIENTO IN ({marks})
+              AND ACTIVO = 1 AND ESTADO IN ('PENDIENTE', 'EN_PROGRESO') AND ESTADO <> ?
+        """, (Estado, Resultado, Notas, Estado, ahora, UsuarioModifica, ahora, *chunk, Estado))
+    for id_seguimiento, (id_empresa, estado) in existentes.items():
+        if estado in ('PENDIENTE', 'EN_PROGRESO') and estado != Estado:
+            anteriores[id_seguimiento] = estado
+    rows = []
+    for id_seguimiento in solicitados:
+        if id_seguimiento not in existentes:
+            rows.append((id_seguimiento, 'NO_ENCONTRADO', None, None, None))
+            continue
+        id_empresa, estado = existentes[id_seguimiento]
+        if id_seguimiento in anteriores:
+            rows.append((id_seguimiento, 'ACTUALIZADO', id_empresa, estado, Estado))
+        else:
+            rows.append((id_seguimiento, 'SIN_CAMBIO' if estado == Estado else 'ESTADO_FINAL', id_empresa, estado, estado))
+    return [
+        ResultSet(['IDSEGUIMIENTO', 'RESULTADO', 'IDEMPRESA', 'ESTADOANTERIOR', 'ESTADO'], rows),
+        ResultSet(['Solicitados', 'Actualizados', 'FechaModifica'],
+                  [(len(solicitados), len(anteriores), _as_datetime(ahora))]),
+    ]
+
+
+@procedure
+def usp_ObtenerTiposSeguimiento(db):
+    return [_select(db, """
+        SELECT IDTIPOSEGUIMIENTO, NOMBRE, DESCRIPCION, COLOR, ACTIVO
+        FROM TM_SEGUIMIENTO_TIPO
+        WHERE ACTIVO = 1
+        ORDER BY IDTIPOSEGUIMIENTO
+    """)]
+
+
+def _bind_procedure(name, args):
+    """
+    Resolve a procedure and its named arguments the way SQL Server does:
+    names are case-insensitive, omitted parameters take their default.
+    """
+    func = PROCEDURES.get(name.lower())
+    if func is None:
+        raise Error(f"Could not find stored procedure '{name}'.")
+    signature = inspect.signature(func)
+    accepted = {param.lower(): param for param in list(signature.parameters)[1:]}
+    kwargs = {}
+    for arg, value in args:
+        param = accepted.get(arg.lower())
+        if param is None:
+            raise Error(f"@{arg} is not a parameter for procedure {func.__name__}.")
+        kwargs[param] = value
+    for param, spec in list(signature.parameters.items())[1:]:
+        if param not in kwargs and spec.default is inspect.Parameter.empty:
+            raise Error(f"Procedure or function '{func.__name__}' expects parameter '@{param}', which was not supplied.")
+    return func, kwargs
+
+
+# ---------------------------------------------------------------------
+# T-SQL statements
+# ---------------------------------------------------------------------
+_EXEC = re.compile(r'^\s*EXEC(?:UTE)?\s+(?:dbo\.)?(\w+)\s*(.*?)\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+_ARG = re.compile(r"""@(\w+)\s*=\s*(\?|N?'(?:[^']|'')*'|[^,\s]+)""", re.IGNORECASE)
+_IDENTITY_INSERT = re.compile(r'^\s*SET\s+IDENTITY_INSERT\b', re.IGNORECASE)
+_TRANSLATIONS = [
+    (re.compile(r'\bdbo\.', re.IGNORECASE), ''),
+    (re.compile(r'\bISNULL\s*\(', re.IGNORECASE), 'IFNULL('),
+    (re.compile(r"\bN'"), "'"),
+]
+
+
+def _literal(text):
+    """Value of a literal procedure argument (EXEC usp_X @Id = 5)."""
+    if text.upper() == 'NULL':
+        return None
+    if text[:1] in ("'", 'N', 'n') and text.endswith("'"):
+        return text[text.index("'") + 1:-1].replace("''", "'")
+    try:
+        return int(text)
+    except ValueError:
+        return Decimal(text)
+
+
+def _parse_exec(sql, params):
+    """Split 'EXEC usp_X @A=?, @B=5' into (name, [(arg, value), ...]) or None."""
+    match = _EXEC.match(sql)
+    if match is None:
+        return None
+    values = iter(params)
+    args = []
+    for arg, value in _ARG.findall(match.group(2)):
+        args.append((arg, next(values, None) if value == '?' else _literal(value)))
+    return match.group(1), args
+
+
+def _translate(sql):
+    for pattern, replacement in _TRANSLATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+# ---------------------------------------------------------------------
+# DB-API objects
+# ---------------------------------------------------------------------
+class Cursor:
+    """pyodbc-like cursor over materialized result sets."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.fast_executemany = False
+        self.rowcount = -1
+        self._results = []
+        self._rows = None
+        self._pos = 0
+        self.description = None
+
+    def _load(self, results):
+        self._results = list(results)
+        self._next_result()
+
+    def _next_result(self):
+        if not self._results:
+            self.description, self._rows, self._pos = None, None, 0
+            return False
+        result = self._results.pop(0)
+        self.description, self._rows, self._pos = result.description, result.rows, 0
+        return True
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple, dict)):
+            params = params[0]
+        db = self.connection._db
+        try:
+            call = _parse_exec(sql, params)
+            if call is not None:
+                func, kwargs = _bind_procedure(*call)
+                self._load(func(db, **kwargs))
+                self.rowcount = -1
+            elif _IDENTITY_INSERT.match(sql):
+                self._load([])
+            else:
+                cursor = db.execute(_translate(sql), params)
+                try:
+                    self.rowcount = cursor.rowcount
+                    if cursor.description:
+                        self._load([ResultSet([c[0] for c in cursor.description], cursor.fetchall())])
+                    else:
+                        self._load([])
+                finally:
+                    cursor.close()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        try:
+            cursor = self.connection._db.executemany(_translate(sql), seq_of_params)
+            self.rowcount = cursor.rowcount
+            cursor.close()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+        self._load([])
+
+    def fetchone(self):
+        if self._rows is None or self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size=1):
+        if self._rows is None:
+            return []
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        if self._rows is None:
+            return []
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def nextset(self):
+        return True if self._next_result() else None
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._results, self._rows, self.description = [], None, None
+
+
+class Connection:
+    """pyodbc-like connection on its own SQLite connection."""
+
+    def __init__(self, db):
+        self._db = db
+
+    @property
+    def autocommit(self):
+        return self._db.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value):
+        if value:
+            self._db.commit()
+        self._db.isolation_level = None if value else ''
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        try:
+            self._db.commit()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def rollback(self):
+        try:
+            self._db.rollback()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def close(self):
+        self._db.close()
+
+
+_initialized = set()
+_init_lock = threading.Lock()
+_temp_path = None
+
+
+# Pre-aggregated tables kept by triggers, and the procedure that rebuilds each
+_ROLLUPS = (
+    ('TM_PRODUCCION_DIARIA', usp_RecalcularProduccionDiaria),
+    ('TM_CERRADOS_DIARIO', usp_RecalcularCerradosDiario),
+)
+
+
+def _default_path():
+    """Temporary database file for this process, removed at exit."""
+    global _temp_path
+    if _temp_path is None:
+        handle, _temp_path = tempfile.mkstemp(prefix='appcomercial_offline_', suffix='.db')
+        os.close(handle)
+        atexit.register(lambda: os.path.exists(_temp_path) and os.remove(_temp_path))
+    return _temp_path
+
+
+def _object_id(db):
+    """OBJECT_ID() that knows the offline procedures and the tables."""
+    def object_id(name):
+        name = (name or '').split('.')[-1]
+        if name.lower() in PROCEDURES:
+            return 1
+        row = db.execute('SELECT 1 FROM sqlite_master WHERE name = ? COLLATE NOCASE', (name,)).fetchone()
+        return 1 if row else None
+    return object_id
+
+
+def connect(path=None):
+    """Open a connection to the offline database, creating and seeding it on first use."""
+    path = path or OFFLINE_DB_PATH or _default_path()
+    try:
+        db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        db.create_function('GETDATE', 0, _now)
+        db.create_function('DATEDIFF', 3, _datediff, deterministic=True)
+        db.create_function('CLAVE_BUSQUEDA', 1, fold_text, deterministic=True)
+        db.create_function('RUC_COMPACTO', 1, compact_ruc, deterministic=True)
+        db.create_function('OBJECT_ID', 1, _object_id(db))
+        db.create_function('ROWVERSION', 1, _rowversion, deterministic=True)
+        db.execute('PRAGMA foreign_keys = ON')
+        # Durable enough for a development copy and keeps commit latency
+        # free of fsync stalls (synchronous is per connection)
+        db.execute('PRAGMA synchronous = NORMAL')
+        with _init_lock:
+            if path not in _initialized:
+                db.execute('PRAGMA journal_mode = WAL')
+                db.executescript(SCHEMA)
+                empty = db.execute('SELECT COUNT(*) FROM TM_PERFIL').fetchone()[0] == 0
+                if empty and OFFLINE_DB_SEED == 'sample':
+                    _seed_sample_data(db)
+                    usp_MaterializarAlertasAltoValor(db)
+                    db.commit()
+                    logger.info(f"Offline database seeded with sample data: {path}")
+                else:
+                    # File created before the rollups existed: backfill them once
+                    for table, rebuild in _ROLLUPS:
+                        if db.execute(f'SELECT NOT EXISTS (SELECT 1 FROM {table})').fetchone()[0]:
+                            rebuild(db)
+                    db.commit()
+                _initialized.add(path)
+    except sqlite3.Error as e:
+        raise Error(str(e)) from e
+    return Connection(db)
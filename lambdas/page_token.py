@@ -0,0 +1,43 @@
+"""
+Shared Module: page_token
+Description: Opaque continuation tokens for paginated endpoints
+Runtime: Python 3.13
+
+A token carries the key of the last row the client received, e.g.
+(NOMBRECOMERCIAL, IDEMPRESA) for the company search. It is JSON packed in
+URL-safe base64 so it can travel in a query string untouched; clients must
+treat it as opaque and only send it back. Tokens are not signed: a client can
+forge one, so they must never carry anything the client may not choose
+itself (they only hold a position in a result the client may read anyway).
+"""
+import json
+import base64
+import binascii
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token cannot be decoded or has the wrong shape."""
+
+
+def encode_token(*values):
+    """Pack key values into an opaque token."""
+    raw = json.dumps(list(values), separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_token(token, size):
+    """
+    Unpack a token produced by encode_token() into a list of `size` values.
+
+    Only the shape is checked: tokens are not signed, so any base64 JSON
+    list of `size` values is accepted. Raises InvalidTokenError for anything
+    else; callers validate the values themselves.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidTokenError(f"Malformed token: {str(e)}")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidTokenError('Unexpected token shape')
+    return values
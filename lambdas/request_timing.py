@@ -0,0 +1,416 @@
+"""
+Shared Module: request_timing
+Description: Per-invocation phase timing, Server-Timing header and metric line
+Runtime: Python 3.13
+
+Every handler is wrapped with @timed_handler. While it runs, the shared
+layers record how long each phase took:
+    - connect:   db_connection.get_connection (pool checkout or new login)
+    - execute:   cursor.execute / executemany / nextset / commit
+    - fetch:     cursor.fetchone / fetchmany / fetchall (also counts rows)
+    - convert:   row_converter, cursor rows -> dicts
+    - serialize: json.dumps of the response (timed_dumps, json_stream)
+    - compress:  gzip / brotli of the body (content_encoding)
+
+Connections handed out during a timed invocation are wrapped in
+TimedConnection, whose cursors time themselves, so handlers need no
+changes beyond the decorator and timed_dumps in success_response. The same
+cursors feed slow_query_log with each statement's database time.
+
+Each response gets a Server-Timing header (shown per request in the
+browser dev tools) and one line per invocation is written to stdout in
+CloudWatch Embedded Metric Format: CloudWatch turns it into per-route
+metrics (duration, phases, rows, bytes) without any API call, and the line
+stays greppable in the logs. A process-wide aggregate per route is kept in
+memory as well (snapshot(), served by the local gateway at /_stats).
+
+Bodies are compressed here too (content_encoding.compress_response), after
+the handler returns, so the metric line reports both the JSON size (Bytes)
+and what went over the wire (WireBytes).
+
+The overhead is a few perf_counter() calls and one small json.dumps per
+invocation, cheap enough to leave enabled in production.
+
+Environment Variables:
+    - REQUEST_METRICS: '1' (default) to write the metric line, '0' to skip it
+    - METRICS_NAMESPACE: CloudWatch namespace (default 'AppComercial')
+
+A generator body (see json_stream) is timed until it is exhausted: its
+header only carries the phases up to the return from the handler, the
+metric line is written when the stream ends.
+
+Work a handler hands to other threads (TB1_app_inicio_lambda runs its
+queries concurrently) is timed with run_in(): each worker records on its own
+Timing, merged into the invocation's when it finishes. Phases of concurrent
+workers add up, so they can exceed the invocation's wall time.
+"""
+import os
+import sys
+import json
+import time
+import threading
+import functools
+
+import slow_query_log
+import content_encoding
+
+# Phases in the order they are reported
+PHASES = ('connect', 'execute', 'fetch', 'convert', 'serialize', 'compress')
+
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '1') != '0'
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'AppComercial')
+
+# The metric line must reach stdout verbatim (no Lambda log prefix) and a
+# logging record costs more than the line itself, so it is written directly;
+# tools can point this at another stream
+metrics_stream = sys.stdout
+
+_perf_counter = time.perf_counter
+_local = threading.local()
+_cold_start = True
+
+_aggregate_lock = threading.Lock()
+_aggregates = {}
+
+
+class Timing:
+    """Phase durations (seconds) and counters of one invocation."""
+
+    __slots__ = ('route', 'started', 'phases', 'rows', 'cold_start')
+
+    def __init__(self, route, cold_start=False):
+        self.route = route
+        self.started = _perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+        self.cold_start = cold_start
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds."""
+        parts = [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in self.phases.items() if seconds]
+        parts.append(f'total;dur={(_perf_counter() - self.started) * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def current():
+    """The Timing of the invocation running on this thread, if any."""
+    return getattr(_local, 'timing', None)
+
+
+def record(phase, seconds):
+    """Add time to a phase of the current invocation (no-op outside one)."""
+    timing = getattr(_local, 'timing', None)
+    if timing is not None:
+        timing.phases[phase] += seconds
+
+
+def timed_dumps(obj, **kwargs):
+    """json.dumps timed as the serialize phase."""
+    started = _perf_counter()
+    try:
+        return json.dumps(obj, **kwargs)
+    finally:
+        record('serialize', _perf_counter() - started)
+
+
+def run_in(timing, func, *args):
+    """
+    Call func(*args) on this thread as part of the invocation `timing`
+    (current() of the handler thread; None runs it untimed).
+    """
+    if timing is None:
+        return func(*args)
+    worker = Timing(timing.route)
+    previous = getattr(_local, 'timing', None)
+    _local.timing = worker
+    try:
+        return func(*args)
+    finally:
+        _local.timing = previous
+        with _aggregate_lock:
+            for phase, seconds in worker.phases.items():
+                timing.phases[phase] += seconds
+            timing.rows += worker.rows
+
+
+class TimedCursor:
+    """
+    Cursor wrapper that times execute and fetch calls.
+
+    It also tracks the current statement (database time and rows per result
+    set) and hands it to slow_query_log when the next one starts or the
+    cursor is closed.
+    """
+
+    __slots__ = ('_cursor', '_conn', '_timing', '_statement')
+
+    def __init__(self, cursor, conn, timing):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_timing', timing)
+        object.__setattr__(self, '_statement', None)
+
+    def _end_statement(self, conn=None):
+        statement = self._statement
+        if statement is not None:
+            object.__setattr__(self, '_statement', None)
+            slow_query_log.observe(statement, self._timing.route, conn)
+
+    def _run(self, method, sql, params):
+        self._end_statement()
+        started = _perf_counter()
+        try:
+            method(sql, *params)
+        finally:
+            elapsed = _perf_counter() - started
+            self._timing.phases['execute'] += elapsed
+        # Failed statements are reported by the handler, not as slow queries
+        object.__setattr__(self, '_statement', slow_query_log.Statement(sql, params, elapsed))
+
+    def execute(self, sql, *params):
+        self._run(self._cursor.execute, sql, params)
+        self._statement.rows_affected = self._cursor.rowcount
+        return self
+
+    def executemany(self, sql, params):
+        self._run(self._cursor.executemany, sql, (params,))
+
+    def nextset(self):
+        started = _perf_counter()
+        try:
+            more = self._cursor.nextset()
+        finally:
+            elapsed = _perf_counter() - started
+            self._timing.phases['execute'] += elapsed
+        statement = self._statement
+        if statement is not None:
+            statement.execute_seconds += elapsed
+            if more:
+                statement.rows.append(0)
+        return more
+
+    def _fetched(self, started, count):
+        elapsed = _perf_counter() - started
+        timing = self._timing
+        timing.phases['fetch'] += elapsed
+        timing.rows += count
+        statement = self._statement
+        if statement is not None:
+            statement.fetch_seconds += elapsed
+            statement.rows[-1] += count
+
+    def fetchone(self):
+        started = _perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = _perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = _perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def close(self):
+        # Close first: the plan lookup needs the connection free of results
+        self._cursor.close()
+        self._end_statement(self._conn)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class TimedConnection:
+    """Connection wrapper whose cursors are timed; commit counts as execute."""
+
+    __slots__ = ('raw', '_timing')
+
+    def __init__(self, conn, timing):
+        object.__setattr__(self, 'raw', conn)
+        object.__setattr__(self, '_timing', timing)
+
+    def cursor(self):
+        return TimedCursor(self.raw.cursor(), self.raw, self._timing)
+
+    def commit(self):
+        started = _perf_counter()
+        try:
+            self.raw.commit()
+        finally:
+            self._timing.phases['execute'] += _perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.raw, name, value)
+
+
+def wrap_connection(conn):
+    """Wrap a connection for the current invocation (returned as is outside one)."""
+    timing = getattr(_local, 'timing', None)
+    return conn if timing is None else TimedConnection(conn, timing)
+
+
+def unwrap_connection(conn):
+    """The underlying driver connection of a possibly wrapped one."""
+    return conn.raw if isinstance(conn, TimedConnection) else conn
+
+
+def _route_of(event, context):
+    resource = event.get('resource') or event.get('path')
+    if resource:
+        return f"{event.get('httpMethod', '')} {resource}".strip()
+    return getattr(context, 'function_name', None) or 'unknown'
+
+
+def _body_bytes(body):
+    return len(body) if body.isascii() else len(body.encode('utf-8'))
+
+
+def _finish(timing, status_code, body_bytes, wire_bytes=None):
+    """
+    Aggregate the invocation and write its metric line.
+
+    body_bytes is the JSON size, wire_bytes what is sent after compression
+    (the same when the body went out plain).
+    """
+    if wire_bytes is None:
+        wire_bytes = body_bytes
+    total = _perf_counter() - timing.started
+    phases = timing.phases
+
+    with _aggregate_lock:
+        stats = _aggregates.get(timing.route)
+        if stats is None:
+            stats = _aggregates[timing.route] = {
+                'invocations': 0, 'totalSeconds': 0.0, 'rows': 0, 'bytes': 0, 'wireBytes': 0,
+                'phases': dict.fromkeys(PHASES, 0.0),
+            }
+        stats['invocations'] += 1
+        stats['totalSeconds'] += total
+        stats['rows'] += timing.rows
+        stats['bytes'] += body_bytes
+        stats['wireBytes'] += wire_bytes
+        for phase, seconds in phases.items():
+            stats['phases'][phase] += seconds
+
+    if not REQUEST_METRICS:
+        return
+    values = (
+        f'"Route": {json.dumps(timing.route)}, "StatusCode": {status_code}, '
+        f'"ColdStart": {"true" if timing.cold_start else "false"}, '
+        f'"DurationMs": {total * 1000:.2f}, "Rows": {timing.rows}, "Bytes": {body_bytes}, '
+        f'"WireBytes": {wire_bytes}'
+    )
+    for phase, seconds in phases.items():
+        values += f', "{_PHASE_METRICS[phase]}": {seconds * 1000:.2f}'
+    metrics_stream.write(f'{{"_aws": {{"Timestamp": {int(time.time() * 1000)}, {_METRIC_DIRECTIVE}}}, {values}}}\n')
+
+
+# Phase name -> metric name, e.g. 'connect' -> 'ConnectMs'
+_PHASE_METRICS = {phase: f'{phase.capitalize()}Ms' for phase in PHASES}
+
+# The constant part of the metric line, serialized once
+_METRIC_DIRECTIVE = '"CloudWatchMetrics": ' + json.dumps([{
+    'Namespace': METRICS_NAMESPACE,
+    'Dimensions': [['Route']],
+    'Metrics': (
+        [{'Name': 'DurationMs', 'Unit': 'Milliseconds'}]
+        + [{'Name': name, 'Unit': 'Milliseconds'} for name in _PHASE_METRICS.values()]
+        + [{'Name': 'Rows', 'Unit': 'Count'}, {'Name': 'Bytes', 'Unit': 'Bytes'},
+           {'Name': 'WireBytes', 'Unit': 'Bytes'}]
+    ),
+}])
+
+
+def _timed_stream(chunks, timing, status_code):
+    """Re-enter the invocation's timing while a generator body is consumed."""
+    body_bytes = 0
+    previous = getattr(_local, 'timing', None)
+    _local.timing = timing
+    try:
+        for chunk in chunks:
+            body_bytes += _body_bytes(chunk)
+            yield chunk
+    finally:
+        # Closing the wrapper must close the inner stream too: it owns the
+        # cursor and connection (json_stream.close_after)
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+        _local.timing = previous
+        _finish(timing, status_code, body_bytes)
+
+
+def timed_handler(handler):
+    """Decorator for lambda_handler: times the invocation and its phases."""
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+
+        timing = Timing(_route_of(event, context), _cold_start)
+        _cold_start = False
+        previous = getattr(_local, 'timing', None)
+        _local.timing = timing
+        try:
+            content_encoding.decode_text_body(event)
+            response = handler(event, context)
+        finally:
+            _local.timing = previous
+
+        status_code = int(response.get('statusCode', 200))
+        body = response.get('body')
+        body_bytes = _body_bytes(body) if isinstance(body, str) and body else 0
+        started = _perf_counter()
+        wire_bytes = content_encoding.compress_response(event, response)
+        if wire_bytes is not None:
+            timing.phases['compress'] += _perf_counter() - started
+
+        headers = response.get('headers')
+        if headers is None:
+            headers = response['headers'] = {}
+        headers['Server-Timing'] = timing.server_timing()
+        headers['Timing-Allow-Origin'] = '*'
+        expose = headers.get('Access-Control-Expose-Headers')
+        headers['Access-Control-Expose-Headers'] = f'{expose},Server-Timing' if expose else 'Server-Timing'
+
+        if body is None or isinstance(body, str):
+            _finish(timing, status_code, body_bytes, wire_bytes)
+        else:
+            response['body'] = _timed_stream(body, timing, status_code)
+        return response
+
+    return wrapper
+
+
+def snapshot():
+    """Average duration, phases, rows and bytes per route since the process started."""
+    with _aggregate_lock:
+        routes = {}
+        for route, stats in sorted(_aggregates.items()):
+            count = stats['invocations']
+            routes[route] = {
+                'invocations': count,
+                'avgMs': round(stats['totalSeconds'] * 1000 / count, 2),
+                'avgRows': round(stats['rows'] / count, 1),
+                'avgBytes': round(stats['bytes'] / count),
+                'avgWireBytes': round(stats['wireBytes'] / count),
+                'phasesAvgMs': {
+                    phase: round(seconds * 1000 / count, 2) for phase, seconds in stats['phases'].items()
+                },
+            }
+        return routes
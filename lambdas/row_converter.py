@@ -0,0 +1,133 @@
+"""
+Shared Module: row_converter
+Description: Cursor rows to JSON-ready dicts, compiled once per result shape
+Runtime: Python 3.13
+
+Handlers used to probe every cell with hasattr(value, 'isoformat'). Here the
+conversion for each column is chosen once from cursor.description (pyodbc
+reports the Python type of every column) and compiled into a single
+comprehension that is cached per result shape. Only the columns that need
+it are converted:
+    - datetime, date, time -> ISO 8601 string
+    - Decimal              -> float
+    - bytes (BINARY, ROWVERSION) -> hex string
+
+Rows are read in fetchmany() batches and converted a batch at a time; the
+conversion is timed as the convert phase of request_timing.
+"""
+import time
+import datetime
+from decimal import Decimal
+from operator import methodcaller
+
+from request_timing import record as record_phase
+
+# Rows read per fetchmany() call
+DEFAULT_BATCH_SIZE = 500
+
+# Converters by pyodbc type_code; columns of any other type pass through
+CONVERSIONS = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    Decimal: float,
+    # pyodbc reports binary columns as bytearray but returns bytes values
+    bytes: methodcaller('hex'),
+    bytearray: methodcaller('hex'),
+}
+
+# Compiled converters keyed by result shape (column name, type) pairs
+_MAX_CACHED_SHAPES = 256
+_converters = {}
+
+
+class RowConverter:
+    """Converts rows of one result shape into dicts."""
+
+    __slots__ = ('columns', 'convert')
+
+    def __init__(self, description):
+        self.columns = tuple(column[0] for column in description)
+        self.convert = _compile_batch_converter(description)
+
+    def convert_row(self, row):
+        """Convert a single row."""
+        return self.convert((row,))[0]
+
+
+def _compile_batch_converter(description):
+    """
+    Build a function that turns a batch of rows into dicts in one comprehension.
+
+    For a shape (IDSEGUIMIENTO int, FECHAPROGRAMADA date) the generated code is
+        [{'IDSEGUIMIENTO': v0, 'FECHAPROGRAMADA': None if v1 is None else c1(v1)}
+         for v0, v1 in rows]
+    so no per-cell type probing or attribute lookups happen at runtime.
+    """
+    namespace = {}
+    names = []
+    fields = []
+    for idx, column in enumerate(description):
+        value = f'v{idx}'
+        names.append(value)
+        convert = CONVERSIONS.get(column[1])
+        if convert is None:
+            fields.append(f'{column[0]!r}: {value}')
+        else:
+            namespace[f'c{idx}'] = convert
+            fields.append(f'{column[0]!r}: None if {value} is None else c{idx}({value})')
+
+    source = (
+        'def convert_batch(rows):\n'
+        f'    return [{{{", ".join(fields)}}} for {", ".join(names)}, in rows]\n'
+    )
+    exec(compile(source, '<row_converter>', 'exec'), namespace)
+    return namespace['convert_batch']
+
+
+def get_row_converter(description):
+    """Return the cached converter for a cursor.description."""
+    shape = tuple((column[0], column[1]) for column in description)
+    converter = _converters.get(shape)
+    if converter is None:
+        if len(_converters) >= _MAX_CACHED_SHAPES:
+            _converters.clear()
+        converter = _converters[shape] = RowConverter(description)
+    return converter
+
+
+def iter_dict_batches(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the current result set as lists of dicts, one fetchmany() batch at a time."""
+    if not cursor.description:
+        return
+    converter = get_row_converter(cursor.description)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        started = time.perf_counter()
+        batch = converter.convert(rows)
+        record_phase('convert', time.perf_counter() - started)
+        yield batch
+
+
+def fetch_all_dicts(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """Fetch the current result set as a list of dicts."""
+    data = []
+    for batch in iter_dict_batches(cursor, batch_size):
+        data.extend(batch)
+    return data
+
+
+def fetch_one_dict(cursor):
+    """Fetch the next row of the current result set as a dict (None if exhausted)."""
+    if not cursor.description:
+        return None
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    started = time.perf_counter()
+    try:
+        return get_row_converter(cursor.description).convert_row(row)
+    finally:
+        record_phase('convert', time.perf_counter() - started)
@@ -0,0 +1,221 @@
+"""
+Shared Module: slow_query_log
+Description: Record database calls slower than a threshold, with parameters and plans
+Runtime: Python 3.13
+Database: DB_APPCOMERCIAL
+
+Every statement run through a timed cursor (request_timing.TimedCursor, i.e.
+every handler query) is observed when it completes. If the time spent in the
+database for it (execute + nextset + fetch calls) reaches SLOW_QUERY_MS, one
+JSON line is appended to a rotating log file:
+
+    {"ts": "2025-12-10T09:15:02", "route": "GET /cerrados",
+     "procedure": "usp_ObtenerCerradosSemana",
+     "params": {"IdUsuario": 2, "FechaInicio": "2025-12-07", ...},
+     "durationMs": 812.4, "executeMs": 790.1, "fetchMs": 22.3,
+     "rows": [146, 1, 7], "rowsAffected": -1, "plan": "plans/usp_...sqlplan"}
+
+Parameter names come from the '@Name=?' pairs of the EXEC text; values of
+parameters whose name matches SLOW_QUERY_REDACT (passwords, tokens) are
+replaced by '***' and long strings are truncated. A WARNING with the
+procedure and duration also goes to the regular log (CloudWatch on Lambda,
+where /tmp does not outlive the container).
+
+With SLOW_QUERY_PLANS=1 the cached plan of a slow stored procedure is read
+from sys.dm_exec_procedure_stats (needs VIEW SERVER STATE) and saved next to
+the log as a .sqlplan file that SSMS opens graphically, at most once per
+procedure every SLOW_QUERY_PLAN_INTERVAL seconds (never on the offline
+backend). Plans are only captured
+when the cursor is closed, so the lookup never runs while results are
+still pending on the connection.
+
+tools/slow_query_report.py summarizes the log (worst offenders first).
+
+Environment Variables:
+    - SLOW_QUERY_MS: threshold in milliseconds (default 500, negative disables)
+    - SLOW_QUERY_LOG: log file (default <tempdir>/appcomercial_slow_queries.log)
+    - SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS: rotation (5 MB x 5)
+    - SLOW_QUERY_PLANS: '1' to capture execution plans (default '0')
+    - SLOW_QUERY_PLAN_INTERVAL: seconds between plans of one procedure (default 600)
+    - SLOW_QUERY_REDACT: regex of parameter names to redact
+"""
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '500'))
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG', os.path.join(tempfile.gettempdir(), 'appcomercial_slow_queries.log')
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', '5'))
+SLOW_QUERY_PLANS = os.environ.get('SLOW_QUERY_PLANS', '0') == '1'
+SLOW_QUERY_PLAN_INTERVAL = float(os.environ.get('SLOW_QUERY_PLAN_INTERVAL', '600'))
+SLOW_QUERY_REDACT = re.compile(
+    os.environ.get('SLOW_QUERY_REDACT', r'clave|password|pwd|token|secret'), re.IGNORECASE
+)
+
+# The SQLite stand-in (offline_db) has no plan cache to read from
+OFFLINE_BACKEND = os.environ.get('DB_BACKEND', 'pyodbc').lower() == 'offline'
+
+# Strings longer than this are truncated in the log
+MAX_VALUE_LENGTH = 200
+MAX_STATEMENT_LENGTH = 500
+
+_EXEC_NAME = re.compile(r'^\s*EXEC(?:UTE)?\s+(?:\[?dbo\]?\.)?\[?(\w+)', re.IGNORECASE)
+_PARAM_NAME = re.compile(r'@(\w+)\s*=\s*\?')
+_WHITESPACE = re.compile(r'\s+')
+
+_PLAN_QUERY = '''
+    SELECT TOP 1 qp.query_plan
+    FROM sys.dm_exec_procedure_stats AS ps
+    CROSS APPLY sys.dm_exec_query_plan(ps.plan_handle) AS qp
+    WHERE ps.database_id = DB_ID() AND ps.object_id = OBJECT_ID(?)
+    ORDER BY ps.last_execution_time DESC
+'''
+
+_file_logger = None
+_init_lock = threading.Lock()
+_last_plan = {}
+
+
+class Statement:
+    """Database time and row counts of one execute() on a timed cursor."""
+
+    __slots__ = ('sql', 'params', 'execute_seconds', 'fetch_seconds', 'rows', 'rows_affected')
+
+    def __init__(self, sql, params, execute_seconds, rows_affected=-1):
+        self.sql = sql
+        self.params = params
+        self.execute_seconds = execute_seconds
+        self.fetch_seconds = 0.0
+        self.rows = [0]
+        self.rows_affected = rows_affected
+
+    @property
+    def seconds(self):
+        return self.execute_seconds + self.fetch_seconds
+
+
+def procedure_name(sql):
+    """Procedure called by an EXEC statement, or the collapsed statement text."""
+    found = _EXEC_NAME.match(sql)
+    if found:
+        return found.group(1)
+    return _WHITESPACE.sub(' ', sql).strip()[:80]
+
+
+def _loggable(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH] + '...'
+
+
+def redact_params(sql, params):
+    """Parameters by name (from '@Name=?'), secrets replaced by '***'."""
+    if len(params) == 1 and isinstance(params[0], (tuple, list)):
+        params = params[0]
+    names = _PARAM_NAME.findall(sql)
+    logged = {}
+    for idx, value in enumerate(params):
+        name = names[idx] if idx < len(names) else f'p{idx + 1}'
+        logged[name] = '***' if SLOW_QUERY_REDACT.search(name) else _loggable(value)
+    return logged
+
+
+def _get_file_logger():
+    """Logger writing to the rotating slow query file, created on first use."""
+    global _file_logger
+
+    if _file_logger is None:
+        with _init_lock:
+            if _file_logger is None:
+                directory = os.path.dirname(os.path.abspath(SLOW_QUERY_LOG))
+                os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=SLOW_QUERY_LOG_BACKUPS, encoding='utf-8'
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                file_logger = logging.getLogger('slow_queries')
+                file_logger.propagate = False
+                file_logger.setLevel(logging.INFO)
+                file_logger.handlers[:] = [handler]
+                _file_logger = file_logger
+    return _file_logger
+
+
+def _capture_plan(conn, procedure):
+    """Save the cached plan of a procedure as .sqlplan; returns its path relative to the log."""
+    now = time.monotonic()
+    with _init_lock:
+        last = _last_plan.get(procedure)
+        if last is not None and now - last < SLOW_QUERY_PLAN_INTERVAL:
+            return None
+        _last_plan[procedure] = now
+
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(_PLAN_QUERY, (f'dbo.{procedure}',))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+    except Exception as e:
+        logger.warning(f"Could not capture plan for {procedure}: {str(e)}")
+        return None
+    if not row or not row[0]:
+        return None
+
+    relative = os.path.join('plans', f"{procedure}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.sqlplan")
+    path = os.path.join(os.path.dirname(os.path.abspath(SLOW_QUERY_LOG)), relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(row[0])
+    return relative
+
+
+def observe(statement, route=None, conn=None):
+    """
+    Log the statement if it reached the threshold.
+
+    conn is given only when it is safe to run the plan lookup on it (the
+    statement's cursor is closed).
+    """
+    duration_ms = statement.seconds * 1000
+    if SLOW_QUERY_MS < 0 or duration_ms < SLOW_QUERY_MS:
+        return
+
+    procedure = procedure_name(statement.sql)
+    record = {
+        'ts': datetime.now().isoformat(timespec='seconds'),
+        'route': route,
+        'procedure': procedure,
+        'params': redact_params(statement.sql, statement.params),
+        'durationMs': round(duration_ms, 1),
+        'executeMs': round(statement.execute_seconds * 1000, 1),
+        'fetchMs': round(statement.fetch_seconds * 1000, 1),
+        'rows': statement.rows,
+        'rowsAffected': statement.rows_affected,
+    }
+    if not _EXEC_NAME.match(statement.sql):
+        record['statement'] = _WHITESPACE.sub(' ', statement.sql).strip()[:MAX_STATEMENT_LENGTH]
+    elif SLOW_QUERY_PLANS and conn is not None and not OFFLINE_BACKEND:
+        record['plan'] = _capture_plan(conn, procedure)
+
+    logger.warning(f"Slow query {procedure}: {duration_ms:.0f} ms, rows {statement.rows} ({route})")
+    try:
+        _get_file_logger().info(json.dumps(record, default=str))
+    except OSError as e:
+        logger.warning(f"Could not write slow query log {SLOW_QUERY_LOG}: {str(e)}")
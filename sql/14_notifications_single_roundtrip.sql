@@ -0,0 +1,95 @@
+-- =====================================================================
+-- 14_notifications_single_roundtrip.sql
+-- Description: Serve the notification badge in one round trip
+--              - usp_ObtenerNotificacionesUsuario returns alerts, a bounded
+--                page of notifications and the unread count as three
+--                result sets (read with cursor.nextset())
+--              - Index for the "latest notifications of a user" page
+-- Used by: TB1_notificaciones_lambda (GET /notificaciones)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Latest notifications per user (TOP N page)
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_NOTIFICACION_USUARIO_FECHA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_NOTIFICACION_USUARIO_FECHA
+    ON TM_NOTIFICACION (IDUSUARIO, FECHACREACION DESC)
+    INCLUDE (TITULO, MENSAJE, TIPO, LEIDA)
+    WHERE ACTIVO = 1;
+    PRINT '  Created: IX_NOTIFICACION_USUARIO_FECHA';
+END
+GO
+
+-- =====================================================================
+-- HU007: Notifications + alerts + unread count in a single call
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerNotificacionesUsuario
+    @IdUsuario INT,
+    @Limite INT = 50                    -- Max notifications returned
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @Limite IS NULL OR @Limite < 1 SET @Limite = 50;
+    IF @Limite > 200 SET @Limite = 200;
+
+    -- RESULT SET 1: High-value alerts (alta prioridad sin atender en 24+ horas)
+    SELECT
+        S.IDSEGUIMIENTO,
+        S.FECHAPROGRAMADA,
+        S.HORAPROGRAMADA,
+        S.PRIORIDAD,
+        S.ESTADO,
+        E.IDEMPRESA,
+        E.NOMBRECOMERCIAL AS EMPRESA,
+        E.CONTACTO_NOMBRE AS CONTACTO,
+        T.NOMBRE AS TIPOSEGUIMIENTO,
+        DATEDIFF(HOUR,
+            CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
+            GETDATE()
+        ) AS HORAS_SIN_ATENCION,
+        D.PRESUPUESTO
+    FROM dbo.TM_SEGUIMIENTO S
+    INNER JOIN dbo.TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+    INNER JOIN dbo.TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+    LEFT JOIN dbo.TM_SEGUIMIENTO_DETALLE D ON S.IDSEGUIMIENTO = D.IDSEGUIMIENTO AND D.ACTIVO = 1
+    WHERE S.IDUSUARIOASIGNADO = @IdUsuario
+      AND UPPER(S.PRIORIDAD) = 'ALTA'
+      AND S.ESTADO = 'PENDIENTE'
+      AND DATEDIFF(HOUR,
+            CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
+            GETDATE()
+          ) >= 24
+      AND S.ACTIVO = 1
+    ORDER BY S.FECHAPROGRAMADA;
+
+    -- RESULT SET 2: Latest notifications (bounded page)
+    -- (TM_NOTIFICACION uses LEIDA/FECHACREACION; aliased to the names the frontend expects)
+    SELECT TOP (@Limite)
+        N.IDNOTIFICACION,
+        N.TITULO,
+        N.MENSAJE,
+        N.TIPO,
+        N.LEIDA AS LEIDO,
+        N.FECHACREACION AS FECHAENVIO
+    FROM dbo.TM_NOTIFICACION N
+    WHERE N.IDUSUARIO = @IdUsuario
+      AND N.ACTIVO = 1
+    ORDER BY N.FECHACREACION DESC;
+
+    -- RESULT SET 3: Unread count (over all notifications, not just the page)
+    SELECT COUNT(*) AS UNREAD_COUNT
+    FROM dbo.TM_NOTIFICACION
+    WHERE IDUSUARIO = @IdUsuario AND LEIDA = 0 AND ACTIVO = 1;
+END;
+GO
+PRINT '  Created: usp_ObtenerNotificacionesUsuario (single round trip)';
+GO
+
+-- Verification
+EXEC usp_ObtenerNotificacionesUsuario @IdUsuario = 4, @Limite = 10;
+GO
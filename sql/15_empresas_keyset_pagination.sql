@@ -0,0 +1,93 @@
+-- =====================================================================
+-- 15_empresas_keyset_pagination.sql
+-- Description: Keyset (seek) pagination for the company search
+--              - usp_BuscarEmpresas pages on (NOMBRECOMERCIAL, IDEMPRESA)
+--                instead of a fixed TOP 100; the caller passes the last
+--                key of the previous page and gets the rows after it
+--              - Covering index in the same order, so every page is an
+--                index seek + ordered range read (no OFFSET scans)
+-- Used by: TB1_empresa_buscar_lambda (GET /empresas)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_EMPRESA - Search pages ordered by name, id
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_NOMBRE_KEYSET')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_NOMBRE_KEYSET
+    ON TM_EMPRESA (NOMBRECOMERCIAL, IDEMPRESA)
+    INCLUDE (RAZONSOCIAL, RUC, TIPOCLIENTE, TIPOCARTERA,
+             CONTACTO_NOMBRE, CONTACTO_EMAIL, CONTACTO_TELEFONO)
+    WHERE ACTIVO = 1;
+    PRINT '  Created: IX_EMPRESA_NOMBRE_KEYSET';
+END
+GO
+
+-- =====================================================================
+-- HU001: Company search, one keyset page per call
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_BuscarEmpresas
+    @Criterio NVARCHAR(128) = NULL,
+    @TipoCliente NVARCHAR(64) = NULL,
+    @TipoCartera NVARCHAR(64) = NULL,
+    @Limite INT = 100,                      -- Page size
+    @CursorNombre NVARCHAR(256) = NULL,     -- Last NOMBRECOMERCIAL of the previous page
+    @CursorId INT = NULL,                   -- Last IDEMPRESA of the previous page
+    @IncluirTotal BIT = 0                   -- 1 = also return the total match count
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @Limite IS NULL OR @Limite < 1 SET @Limite = 100;
+    IF @Limite > 500 SET @Limite = 500;
+
+    -- First page: start before every key (NOMBRECOMERCIAL is NOT NULL)
+    IF @CursorNombre IS NULL
+    BEGIN
+        SET @CursorNombre = N'';
+        SET @CursorId = 0;
+    END
+    SET @CursorId = ISNULL(@CursorId, 0);
+
+    -- RESULT SET 1: One row more than the page size; the extra row only
+    -- tells the caller that another page exists.
+    -- The >= prefix makes the keyset condition an index seek.
+    SELECT TOP (@Limite + 1)
+        e.IDEMPRESA,
+        e.NOMBRECOMERCIAL,
+        e.RAZONSOCIAL,
+        e.RUC,
+        e.TIPOCLIENTE,
+        e.TIPOCARTERA,
+        e.CONTACTO_NOMBRE,
+        e.CONTACTO_EMAIL,
+        e.CONTACTO_TELEFONO,
+        e.ACTIVO
+    FROM TM_EMPRESA e
+    WHERE e.ACTIVO = 1
+      AND e.NOMBRECOMERCIAL >= @CursorNombre
+      AND (e.NOMBRECOMERCIAL > @CursorNombre OR e.IDEMPRESA > @CursorId)
+      AND (@Criterio IS NULL OR e.NOMBRECOMERCIAL LIKE '%' + @Criterio + '%' OR e.RUC LIKE '%' + @Criterio + '%')
+      AND (@TipoCliente IS NULL OR e.TIPOCLIENTE = @TipoCliente)
+      AND (@TipoCartera IS NULL OR e.TIPOCARTERA = @TipoCartera)
+    ORDER BY e.NOMBRECOMERCIAL, e.IDEMPRESA;
+
+    -- RESULT SET 2 (optional): Total matches, independent of the page
+    IF @IncluirTotal = 1
+        SELECT COUNT(*) AS TOTAL
+        FROM TM_EMPRESA e
+        WHERE e.ACTIVO = 1
+          AND (@Criterio IS NULL OR e.NOMBRECOMERCIAL LIKE '%' + @Criterio + '%' OR e.RUC LIKE '%' + @Criterio + '%')
+          AND (@TipoCliente IS NULL OR e.TIPOCLIENTE = @TipoCliente)
+          AND (@TipoCartera IS NULL OR e.TIPOCARTERA = @TipoCartera);
+END;
+GO
+PRINT '  Created: usp_BuscarEmpresas (keyset pagination)';
+GO
+
+-- Verification
+EXEC usp_BuscarEmpresas @Limite = 5, @IncluirTotal = 1;
+GO
@@ -0,0 +1,91 @@
+-- =====================================================================
+-- 16_empresas_search_index_feed.sql
+-- Description: Feed for the in-memory company search index
+--              - usp_ObtenerEmpresasIndice returns every active company
+--                (bulk load) or only the companies created / modified
+--                since a watermark (incremental refresh)
+--              - Indexes on FECHACREA / FECHAMODIFICA so the incremental
+--                read is two range seeks instead of a table scan
+-- Used by: empresa_search_index (TB1_empresa_buscar_lambda, GET /empresas)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_EMPRESA - Created since watermark
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_FECHACREA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_FECHACREA
+    ON TM_EMPRESA (FECHACREA);
+    PRINT '  Created: IX_EMPRESA_FECHACREA';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_EMPRESA - Modified since watermark
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_FECHAMODIFICA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_FECHAMODIFICA
+    ON TM_EMPRESA (FECHAMODIFICA)
+    WHERE FECHAMODIFICA IS NOT NULL;
+    PRINT '  Created: IX_EMPRESA_FECHAMODIFICA';
+END
+GO
+
+-- =====================================================================
+-- HU001: Company rows for the search index
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerEmpresasIndice
+    @Desde DATETIME = NULL              -- NULL = bulk load of all active companies
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- RESULT SET 1: Server time taken before reading; the caller passes it
+    -- back as @Desde on the next refresh
+    SELECT GETDATE() AS WATERMARK;
+
+    -- RESULT SET 2: Companies (ACTIVO tells the caller to add or drop them)
+    IF @Desde IS NULL
+        SELECT
+            e.IDEMPRESA,
+            e.NOMBRECOMERCIAL,
+            e.RAZONSOCIAL,
+            e.RUC,
+            e.TIPOCLIENTE,
+            e.TIPOCARTERA,
+            e.CONTACTO_NOMBRE,
+            e.CONTACTO_EMAIL,
+            e.CONTACTO_TELEFONO,
+            e.ACTIVO
+        FROM TM_EMPRESA e
+        WHERE e.ACTIVO = 1;
+    ELSE
+        SELECT
+            e.IDEMPRESA,
+            e.NOMBRECOMERCIAL,
+            e.RAZONSOCIAL,
+            e.RUC,
+            e.TIPOCLIENTE,
+            e.TIPOCARTERA,
+            e.CONTACTO_NOMBRE,
+            e.CONTACTO_EMAIL,
+            e.CONTACTO_TELEFONO,
+            e.ACTIVO
+        FROM TM_EMPRESA e
+        WHERE e.IDEMPRESA IN (
+            SELECT IDEMPRESA FROM TM_EMPRESA WHERE FECHACREA >= @Desde
+            UNION
+            SELECT IDEMPRESA FROM TM_EMPRESA WHERE FECHAMODIFICA >= @Desde
+        );
+END;
+GO
+PRINT '  Created: usp_ObtenerEmpresasIndice';
+GO
+
+-- Verification
+EXEC usp_ObtenerEmpresasIndice @Desde = '2000-01-01';
+GO
@@ -0,0 +1,393 @@
+-- =====================================================================
+-- 17_empresas_normalized_search_keys.sql
+-- Description: Accent-, case- and punctuation-insensitive company search
+--              - fn_ClaveBusqueda folds text ("Compañía S.A.C." ->
+--                "compania s a c"); fn_RucCompacto keeps only the digits
+--                of a RUC typed with spaces, dots or dashes
+--              - Stored keys on TM_EMPRESA (NOMBRE_BUSQUEDA,
+--                RAZONSOCIAL_BUSQUEDA, RUC_COMPACTO) plus one row per key
+--                word in TM_EMPRESA_PALABRA, maintained by
+--                usp_InsertarEmpresa / usp_ActualizarEmpresa
+--              - usp_BuscarEmpresas matches every query word as a word
+--                prefix through index seeks on the stored keys, instead of
+--                LIKE '%texto%' on the raw columns
+-- Requires: SQL Server 2017+ (TRANSLATE, STRING_SPLIT)
+-- Used by: TB1_empresa_buscar_lambda, TB1_empresa_insertar_lambda,
+--          TB1_empresa_actualizar_lambda
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Function: Folded search key (lower case, no accents, punctuation as
+-- single spaces). NULL for empty input.
+-- ---------------------------------------------------------------------
+CREATE OR ALTER FUNCTION dbo.fn_ClaveBusqueda (@Texto NVARCHAR(512))
+RETURNS NVARCHAR(512)
+WITH SCHEMABINDING
+AS
+BEGIN
+    DECLARE @t NVARCHAR(512) = LOWER(ISNULL(@Texto, N''));
+
+    SET @t = TRANSLATE(@t, N'áàäâãéèëêíìïîóòöôõúùüûñç', N'aaaaaeeeeiiiiooooouuuunc');
+    SET @t = TRANSLATE(@t, N'.,;:-_/\&()''"!?¿¡#@*+%[]{}<>=|~^`$ºª°', REPLICATE(N' ', 37));
+    SET @t = REPLACE(REPLACE(REPLACE(@t, CHAR(9), N' '), CHAR(10), N' '), CHAR(13), N' ');
+
+    WHILE CHARINDEX(N'  ', @t) > 0
+        SET @t = REPLACE(@t, N'  ', N' ');
+
+    RETURN NULLIF(LTRIM(RTRIM(@t)), N'');
+END;
+GO
+PRINT '  Created: fn_ClaveBusqueda';
+GO
+
+-- ---------------------------------------------------------------------
+-- Function: RUC without separators ("20 123-456.789" -> "20123456789")
+-- ---------------------------------------------------------------------
+CREATE OR ALTER FUNCTION dbo.fn_RucCompacto (@RUC NVARCHAR(128))
+RETURNS NVARCHAR(32)
+WITH SCHEMABINDING
+AS
+BEGIN
+    RETURN NULLIF(LEFT(
+        REPLACE(REPLACE(REPLACE(REPLACE(ISNULL(@RUC, N''), N' ', N''), N'-', N''), N'.', N''), N'/', N''),
+        32), N'');
+END;
+GO
+PRINT '  Created: fn_RucCompacto';
+GO
+
+-- ---------------------------------------------------------------------
+-- Stored keys on TM_EMPRESA
+-- ---------------------------------------------------------------------
+IF COL_LENGTH('TM_EMPRESA', 'NOMBRE_BUSQUEDA') IS NULL
+BEGIN
+    ALTER TABLE TM_EMPRESA ADD
+        NOMBRE_BUSQUEDA      NVARCHAR(256) NULL,
+        RAZONSOCIAL_BUSQUEDA NVARCHAR(256) NULL,
+        RUC_COMPACTO         NVARCHAR(32) NULL;
+    PRINT '  Added: TM_EMPRESA search key columns';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Table: TM_EMPRESA_PALABRA - One row per distinct word of a company's
+-- folded name, business name and contact (word-prefix lookups)
+-- ---------------------------------------------------------------------
+IF OBJECT_ID('TM_EMPRESA_PALABRA', 'U') IS NULL
+BEGIN
+    CREATE TABLE TM_EMPRESA_PALABRA (
+        PALABRA     NVARCHAR(128) NOT NULL,
+        IDEMPRESA   INT NOT NULL,
+        CONSTRAINT PK_EMPRESA_PALABRA PRIMARY KEY (PALABRA, IDEMPRESA),
+        CONSTRAINT FK_PALABRA_EMPRESA FOREIGN KEY (IDEMPRESA) REFERENCES TM_EMPRESA(IDEMPRESA) ON DELETE CASCADE
+    );
+    PRINT '  Created: TM_EMPRESA_PALABRA';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_PALABRA_EMPRESA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_PALABRA_EMPRESA
+    ON TM_EMPRESA_PALABRA (IDEMPRESA, PALABRA);
+    PRINT '  Created: IX_EMPRESA_PALABRA_EMPRESA';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_RUC_COMPACTO')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_RUC_COMPACTO
+    ON TM_EMPRESA (RUC_COMPACTO)
+    WHERE RUC_COMPACTO IS NOT NULL;
+    PRINT '  Created: IX_EMPRESA_RUC_COMPACTO';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_NOMBRE_BUSQUEDA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_NOMBRE_BUSQUEDA
+    ON TM_EMPRESA (NOMBRE_BUSQUEDA)
+    WHERE NOMBRE_BUSQUEDA IS NOT NULL;
+    PRINT '  Created: IX_EMPRESA_NOMBRE_BUSQUEDA';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Maintenance: recompute the keys and words of one company
+-- ---------------------------------------------------------------------
+CREATE OR ALTER PROCEDURE usp_ActualizarClavesBusquedaEmpresa
+    @IdEmpresa INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    UPDATE TM_EMPRESA
+    SET NOMBRE_BUSQUEDA = dbo.fn_ClaveBusqueda(NOMBRECOMERCIAL),
+        RAZONSOCIAL_BUSQUEDA = dbo.fn_ClaveBusqueda(RAZONSOCIAL),
+        RUC_COMPACTO = dbo.fn_RucCompacto(RUC)
+    WHERE IDEMPRESA = @IdEmpresa;
+
+    DELETE FROM TM_EMPRESA_PALABRA WHERE IDEMPRESA = @IdEmpresa;
+
+    INSERT INTO TM_EMPRESA_PALABRA (PALABRA, IDEMPRESA)
+    SELECT DISTINCT LEFT(w.value, 128), e.IDEMPRESA
+    FROM TM_EMPRESA e
+    CROSS APPLY STRING_SPLIT(CONCAT(e.NOMBRE_BUSQUEDA, N' ', e.RAZONSOCIAL_BUSQUEDA, N' ',
+                                    dbo.fn_ClaveBusqueda(e.CONTACTO_NOMBRE)), N' ') w
+    WHERE e.IDEMPRESA = @IdEmpresa
+      AND w.value <> N'';
+END;
+GO
+PRINT '  Created: usp_ActualizarClavesBusquedaEmpresa';
+GO
+
+-- ---------------------------------------------------------------------
+-- Maintenance: recompute the keys and words of every company (set-based).
+-- Used for the backfill below and after bulk loads that bypass
+-- usp_InsertarEmpresa (synthetic data generator, imports).
+-- ---------------------------------------------------------------------
+CREATE OR ALTER PROCEDURE usp_RegenerarClavesBusquedaEmpresas
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    UPDATE TM_EMPRESA
+    SET NOMBRE_BUSQUEDA = dbo.fn_ClaveBusqueda(NOMBRECOMERCIAL),
+        RAZONSOCIAL_BUSQUEDA = dbo.fn_ClaveBusqueda(RAZONSOCIAL),
+        RUC_COMPACTO = dbo.fn_RucCompacto(RUC);
+
+    TRUNCATE TABLE TM_EMPRESA_PALABRA;
+
+    INSERT INTO TM_EMPRESA_PALABRA (PALABRA, IDEMPRESA)
+    SELECT DISTINCT LEFT(w.value, 128), e.IDEMPRESA
+    FROM TM_EMPRESA e
+    CROSS APPLY STRING_SPLIT(CONCAT(e.NOMBRE_BUSQUEDA, N' ', e.RAZONSOCIAL_BUSQUEDA, N' ',
+                                    dbo.fn_ClaveBusqueda(e.CONTACTO_NOMBRE)), N' ') w
+    WHERE w.value <> N'';
+END;
+GO
+PRINT '  Created: usp_RegenerarClavesBusquedaEmpresas';
+GO
+
+-- Backfill existing companies
+EXEC usp_RegenerarClavesBusquedaEmpresas;
+GO
+PRINT '  Backfilled: TM_EMPRESA search keys';
+GO
+
+-- =====================================================================
+-- Company writes keep the search keys current
+-- =====================================================================
+-- usp_InsertarEmpresa - Creates a new company
+CREATE OR ALTER PROCEDURE usp_InsertarEmpresa
+    @NombreComercial NVARCHAR(256),
+    @RazonSocial NVARCHAR(256) = NULL,
+    @RUC NVARCHAR(11) = NULL,
+    @SedePrincipal NVARCHAR(256) = NULL,
+    @Domicilio NVARCHAR(512) = NULL,
+    @ContactoNombre NVARCHAR(128) = NULL,
+    @ContactoEmail NVARCHAR(128) = NULL,
+    @ContactoTelefono NVARCHAR(20) = NULL,
+    @ContactoCargo NVARCHAR(64) = NULL,
+    @TipoCliente NVARCHAR(64) = NULL,
+    @LineaNegocio NVARCHAR(128) = NULL,
+    @SublineaNegocio NVARCHAR(128) = NULL,
+    @TipoCredito NVARCHAR(64) = NULL,
+    @TipoCartera NVARCHAR(64) = NULL,
+    @ActividadEconomica NVARCHAR(256) = NULL,
+    @Riesgo NVARCHAR(32) = NULL,
+    @NumTrabajadores INT = NULL,
+    @UsuarioCrea INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    INSERT INTO TM_EMPRESA (
+        NOMBRECOMERCIAL, RAZONSOCIAL, RUC, SEDEPRINCIPAL, DOMICILIO,
+        CONTACTO_NOMBRE, CONTACTO_EMAIL, CONTACTO_TELEFONO, CONTACTO_CARGO,
+        TIPOCLIENTE, LINEANEGOCIO, SUBLINEANEGOCIO, TIPOCREDITO, TIPOCARTERA,
+        ACTIVIDADECONOMICA, RIESGO, NUMTRABAJADORES, USUARIOCREA
+    )
+    VALUES (
+        @NombreComercial, @RazonSocial, @RUC, @SedePrincipal, @Domicilio,
+        @ContactoNombre, @ContactoEmail, @ContactoTelefono, @ContactoCargo,
+        @TipoCliente, @LineaNegocio, @SublineaNegocio, @TipoCredito, @TipoCartera,
+        @ActividadEconomica, @Riesgo, @NumTrabajadores, @UsuarioCrea
+    );
+    
+    DECLARE @IdEmpresa INT = SCOPE_IDENTITY();
+
+    EXEC usp_ActualizarClavesBusquedaEmpresa @IdEmpresa = @IdEmpresa;
+
+    SELECT @IdEmpresa AS IdEmpresa;
+END;
+GO
+PRINT '  Created: usp_InsertarEmpresa (search keys)';
+GO
+
+-- usp_ActualizarEmpresa - Updates an existing company
+CREATE OR ALTER PROCEDURE usp_ActualizarEmpresa
+    @IdEmpresa INT,
+    @NombreComercial NVARCHAR(256) = NULL,
+    @RazonSocial NVARCHAR(256) = NULL,
+    @RUC NVARCHAR(11) = NULL,
+    @SedePrincipal NVARCHAR(256) = NULL,
+    @Domicilio NVARCHAR(512) = NULL,
+    @ContactoNombre NVARCHAR(128) = NULL,
+    @ContactoEmail NVARCHAR(128) = NULL,
+    @ContactoTelefono NVARCHAR(20) = NULL,
+    @ContactoCargo NVARCHAR(64) = NULL,
+    @TipoCliente NVARCHAR(64) = NULL,
+    @LineaNegocio NVARCHAR(128) = NULL,
+    @SublineaNegocio NVARCHAR(128) = NULL,
+    @TipoCredito NVARCHAR(64) = NULL,
+    @TipoCartera NVARCHAR(64) = NULL,
+    @ActividadEconomica NVARCHAR(256) = NULL,
+    @Riesgo NVARCHAR(32) = NULL,
+    @NumTrabajadores INT = NULL,
+    @UsuarioModifica INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    UPDATE TM_EMPRESA
+    SET 
+        NOMBRECOMERCIAL = ISNULL(@NombreComercial, NOMBRECOMERCIAL),
+        RAZONSOCIAL = ISNULL(@RazonSocial, RAZONSOCIAL),
+        RUC = ISNULL(@RUC, RUC),
+        SEDEPRINCIPAL = ISNULL(@SedePrincipal, SEDEPRINCIPAL),
+        DOMICILIO = ISNULL(@Domicilio, DOMICILIO),
+        CONTACTO_NOMBRE = ISNULL(@ContactoNombre, CONTACTO_NOMBRE),
+        CONTACTO_EMAIL = ISNULL(@ContactoEmail, CONTACTO_EMAIL),
+        CONTACTO_TELEFONO = ISNULL(@ContactoTelefono, CONTACTO_TELEFONO),
+        CONTACTO_CARGO = ISNULL(@ContactoCargo, CONTACTO_CARGO),
+        TIPOCLIENTE = ISNULL(@TipoCliente, TIPOCLIENTE),
+        LINEANEGOCIO = ISNULL(@LineaNegocio, LINEANEGOCIO),
+        SUBLINEANEGOCIO = ISNULL(@SublineaNegocio, SUBLINEANEGOCIO),
+        TIPOCREDITO = ISNULL(@TipoCredito, TIPOCREDITO),
+        TIPOCARTERA = ISNULL(@TipoCartera, TIPOCARTERA),
+        ACTIVIDADECONOMICA = ISNULL(@ActividadEconomica, ACTIVIDADECONOMICA),
+        RIESGO = ISNULL(@Riesgo, RIESGO),
+        NUMTRABAJADORES = ISNULL(@NumTrabajadores, NUMTRABAJADORES),
+        USUARIOMODIFICA = @UsuarioModifica,
+        FECHAMODIFICA = GETDATE()
+    WHERE IDEMPRESA = @IdEmpresa;
+
+    DECLARE @Affected INT = @@ROWCOUNT;
+
+    IF @Affected > 0
+        EXEC usp_ActualizarClavesBusquedaEmpresa @IdEmpresa = @IdEmpresa;
+
+    SELECT @Affected AS Affected;
+END;
+GO
+PRINT '  Created: usp_ActualizarEmpresa (search keys)';
+GO
+
+-- =====================================================================
+-- HU001: Company search on the normalized keys (keyset pagination as in 15)
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_BuscarEmpresas
+    @Criterio NVARCHAR(128) = NULL,         -- Words matched by prefix, accent/case-insensitive; or RUC digits
+    @TipoCliente NVARCHAR(64) = NULL,
+    @TipoCartera NVARCHAR(64) = NULL,
+    @Limite INT = 100,                      -- Page size
+    @CursorNombre NVARCHAR(256) = NULL,     -- Last NOMBRECOMERCIAL of the previous page
+    @CursorId INT = NULL,                   -- Last IDEMPRESA of the previous page
+    @IncluirTotal BIT = 0                   -- 1 = also return the total match count
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @Limite IS NULL OR @Limite < 1 SET @Limite = 100;
+    IF @Limite > 500 SET @Limite = 500;
+
+    -- First page: start before every key (NOMBRECOMERCIAL is NOT NULL)
+    IF @CursorNombre IS NULL
+    BEGIN
+        SET @CursorNombre = N'';
+        SET @CursorId = 0;
+    END
+    SET @CursorId = ISNULL(@CursorId, 0);
+
+    -- Search keys: folded text and compact digits (see fn_ClaveBusqueda)
+    DECLARE @Clave NVARCHAR(512) = dbo.fn_ClaveBusqueda(@Criterio);
+    DECLARE @RucClave NVARCHAR(32) = dbo.fn_RucCompacto(@Criterio);
+    IF @RucClave IS NOT NULL AND (LEN(@RucClave) < 3 OR @RucClave LIKE '%[^0-9]%')
+        SET @RucClave = NULL;
+
+    -- Companies with a word starting with each query word; the first word
+    -- drives an index seek on TM_EMPRESA_PALABRA, the rest are checked per company
+    DECLARE @Candidatas TABLE (IDEMPRESA INT PRIMARY KEY);
+    IF @Clave IS NOT NULL
+    BEGIN
+        DECLARE @Palabras TABLE (ORDEN INT IDENTITY(1,1), PALABRA NVARCHAR(128));
+        INSERT INTO @Palabras (PALABRA)
+        SELECT value FROM STRING_SPLIT(@Clave, N' ') WHERE value <> N'';
+
+        -- Longest word first: it is the most selective prefix
+        DECLARE @Primera NVARCHAR(128) =
+            (SELECT TOP 1 PALABRA FROM @Palabras ORDER BY LEN(PALABRA) DESC, ORDEN);
+
+        INSERT INTO @Candidatas (IDEMPRESA)
+        SELECT DISTINCT p.IDEMPRESA
+        FROM TM_EMPRESA_PALABRA p
+        WHERE p.PALABRA LIKE @Primera + N'%'
+          AND NOT EXISTS (
+              SELECT 1 FROM @Palabras q
+              WHERE NOT EXISTS (
+                  SELECT 1 FROM TM_EMPRESA_PALABRA p2
+                  WHERE p2.IDEMPRESA = p.IDEMPRESA
+                    AND p2.PALABRA LIKE q.PALABRA + N'%'));
+
+        IF @RucClave IS NOT NULL
+            INSERT INTO @Candidatas (IDEMPRESA)
+            SELECT e.IDEMPRESA
+            FROM TM_EMPRESA e
+            WHERE e.RUC_COMPACTO LIKE @RucClave + N'%'
+              AND NOT EXISTS (SELECT 1 FROM @Candidatas c WHERE c.IDEMPRESA = e.IDEMPRESA);
+    END
+
+    -- RESULT SET 1: One row more than the page size; the extra row only
+    -- tells the caller that another page exists.
+    -- The >= prefix makes the keyset condition an index seek.
+    SELECT TOP (@Limite + 1)
+        e.IDEMPRESA,
+        e.NOMBRECOMERCIAL,
+        e.RAZONSOCIAL,
+        e.RUC,
+        e.TIPOCLIENTE,
+        e.TIPOCARTERA,
+        e.CONTACTO_NOMBRE,
+        e.CONTACTO_EMAIL,
+        e.CONTACTO_TELEFONO,
+        e.ACTIVO
+    FROM TM_EMPRESA e
+    WHERE e.ACTIVO = 1
+      AND e.NOMBRECOMERCIAL >= @CursorNombre
+      AND (e.NOMBRECOMERCIAL > @CursorNombre OR e.IDEMPRESA > @CursorId)
+      AND (@Clave IS NULL OR e.IDEMPRESA IN (SELECT IDEMPRESA FROM @Candidatas))
+      AND (@TipoCliente IS NULL OR e.TIPOCLIENTE = @TipoCliente)
+      AND (@TipoCartera IS NULL OR e.TIPOCARTERA = @TipoCartera)
+    ORDER BY e.NOMBRECOMERCIAL, e.IDEMPRESA;
+
+    -- RESULT SET 2 (optional): Total matches, independent of the page
+    IF @IncluirTotal = 1
+        SELECT COUNT(*) AS TOTAL
+        FROM TM_EMPRESA e
+        WHERE e.ACTIVO = 1
+          AND (@Clave IS NULL OR e.IDEMPRESA IN (SELECT IDEMPRESA FROM @Candidatas))
+          AND (@TipoCliente IS NULL OR e.TIPOCLIENTE = @TipoCliente)
+          AND (@TipoCartera IS NULL OR e.TIPOCARTERA = @TipoCartera);
+END;
+GO
+PRINT '  Created: usp_BuscarEmpresas (normalized keys)';
+GO
+
+-- Verification
+SELECT dbo.fn_ClaveBusqueda(N'Compañía Minera Ñuñoa S.A.C.') AS Clave,
+       dbo.fn_RucCompacto(N'20 123-456.789') AS Ruc;
+EXEC usp_BuscarEmpresas @Criterio = N'COMPANIA', @Limite = 5;
+GO
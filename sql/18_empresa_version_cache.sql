@@ -0,0 +1,61 @@
+-- =====================================================================
+-- 18_empresa_version_cache.sql
+-- Description: Change marker of a company detail (GET /empresa cache)
+--              - TB1_empresa_obtener_lambda keeps serialized company
+--                details in an in-process cache (entity_cache). Writers
+--                run in other Lambda containers, so their invalidation
+--                never reaches it
+--              - usp_ObtenerVersionEmpresa returns, in one small indexed
+--                query, what the detail is built from: the last change of
+--                the company, and the count / last change of its
+--                follow-ups and locations. A cached entry is only served
+--                while the marker is unchanged
+-- Used by: TB1_empresa_obtener_lambda (GET /empresa)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Last change of a company's follow-ups
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_EMPRESA_CAMBIO')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_EMPRESA_CAMBIO
+    ON TM_SEGUIMIENTO (IDEMPRESA)
+    INCLUDE (FECHACREA, FECHAMODIFICA);
+    PRINT '  Created: IX_SEGUIMIENTO_EMPRESA_CAMBIO';
+END
+GO
+
+-- =====================================================================
+-- HU001: Change marker of a company detail
+-- One row; every column NULL (counts 0) when the company does not exist.
+-- Writers stamp FECHAMODIFICA; the counts catch inserts and deletes.
+-- TM_SEGUIMIENTO_TIPO has no modification date, so a renamed follow-up
+-- type is only seen once the entry expires (EMPRESA_CACHE_TTL_SECONDS).
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerVersionEmpresa
+    @IdEmpresa INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT
+        (SELECT ISNULL(FECHAMODIFICA, FECHACREA) FROM TM_EMPRESA WHERE IDEMPRESA = @IdEmpresa) AS CAMBIO_EMPRESA,
+        (SELECT COUNT_BIG(*) FROM TM_SEGUIMIENTO WHERE IDEMPRESA = @IdEmpresa) AS SEGUIMIENTOS,
+        (SELECT MAX(ISNULL(FECHAMODIFICA, FECHACREA)) FROM TM_SEGUIMIENTO WHERE IDEMPRESA = @IdEmpresa) AS CAMBIO_SEGUIMIENTOS,
+        (SELECT COUNT_BIG(*) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = @IdEmpresa) AS SEDES,
+        (SELECT MAX(ISNULL(FECHAMODIFICA, FECHACREA)) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = @IdEmpresa) AS CAMBIO_SEDES;
+END;
+GO
+PRINT '  Created: usp_ObtenerVersionEmpresa';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+EXEC usp_ObtenerVersionEmpresa @IdEmpresa = 1;
+UPDATE TM_EMPRESA SET FECHAMODIFICA = DATEADD(SECOND, 1, GETDATE()) WHERE IDEMPRESA = 1;
+EXEC usp_ObtenerVersionEmpresa @IdEmpresa = 1;  -- later CAMBIO_EMPRESA
+ROLLBACK TRANSACTION;
+GO
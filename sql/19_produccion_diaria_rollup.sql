@@ -0,0 +1,264 @@
+-- =====================================================================
+-- 19_produccion_diaria_rollup.sql
+-- Description: Daily production per user, pre-aggregated
+--              - TM_PRODUCCION_DIARIA keeps one row per (day, user) with
+--                the contacts (active interactions) and the pending
+--                seguimientos (PENDIENTE / EN_PROGRESO) of that day
+--              - Triggers on TM_INTERACCION and TM_SEGUIMIENTO apply the
+--                +1 / -1 of every insert, update and delete, so the rollup
+--                is exact whatever writes the rows (procedures, imports,
+--                the synthetic data generator)
+--              - usp_RecalcularProduccionDiaria rebuilds any date range
+--                from the base tables (history backfill, repairs)
+--              - usp_ObtenerProduccionDiaria reads one rollup row per
+--                visible user instead of four correlated COUNT subqueries
+--                with CAST(FECHAINTERACCION AS DATE) per user
+-- Used by: TB1_produccion_diaria_lambda (GET /produccion)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Table: TM_PRODUCCION_DIARIA - Contacts and pending work per user and day.
+-- Clustered by day first: the endpoint reads every user of one day.
+-- ---------------------------------------------------------------------
+IF OBJECT_ID('TM_PRODUCCION_DIARIA', 'U') IS NULL
+BEGIN
+    CREATE TABLE TM_PRODUCCION_DIARIA (
+        FECHA               DATE NOT NULL,
+        IDUSUARIO           INT NOT NULL,
+        CONTACTOS           INT NOT NULL DEFAULT 0,
+        PENDIENTES          INT NOT NULL DEFAULT 0,
+        FECHAACTUALIZACION  DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT PK_PRODUCCION_DIARIA PRIMARY KEY CLUSTERED (FECHA, IDUSUARIO),
+        CONSTRAINT FK_PRODUCCION_USUARIO FOREIGN KEY (IDUSUARIO) REFERENCES TM_USUARIO(IDUSUARIO)
+    );
+    PRINT '  Created: TM_PRODUCCION_DIARIA';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Trigger: contacts. An interaction counts on the day of FECHAINTERACCION
+-- while ACTIVO = 1; updates are applied as -1 (old row) / +1 (new row).
+-- ---------------------------------------------------------------------
+CREATE OR ALTER TRIGGER TR_INTERACCION_PRODUCCION
+ON TM_INTERACCION
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    WITH Cambios AS (
+        SELECT IDUSUARIO, CAST(FECHAINTERACCION AS DATE) AS FECHA, 1 AS N
+        FROM inserted WHERE ACTIVO = 1
+        UNION ALL
+        SELECT IDUSUARIO, CAST(FECHAINTERACCION AS DATE), -1
+        FROM deleted WHERE ACTIVO = 1
+    )
+    MERGE TM_PRODUCCION_DIARIA WITH (HOLDLOCK) AS p
+    USING (
+        SELECT FECHA, IDUSUARIO, SUM(N) AS N
+        FROM Cambios
+        GROUP BY FECHA, IDUSUARIO
+        HAVING SUM(N) <> 0
+    ) AS d
+    ON p.FECHA = d.FECHA AND p.IDUSUARIO = d.IDUSUARIO
+    WHEN MATCHED THEN
+        UPDATE SET CONTACTOS = p.CONTACTOS + d.N, FECHAACTUALIZACION = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (FECHA, IDUSUARIO, CONTACTOS, PENDIENTES) VALUES (d.FECHA, d.IDUSUARIO, d.N, 0);
+END;
+GO
+PRINT '  Created: TR_INTERACCION_PRODUCCION';
+GO
+
+-- ---------------------------------------------------------------------
+-- Trigger: pending work. A seguimiento counts on FECHAPROGRAMADA for its
+-- assignee while it is active and PENDIENTE / EN_PROGRESO; completing,
+-- cancelling or rescheduling it moves or removes the count.
+-- ---------------------------------------------------------------------
+CREATE OR ALTER TRIGGER TR_SEGUIMIENTO_PRODUCCION
+ON TM_SEGUIMIENTO
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Updates that touch none of the counted columns change nothing
+    IF NOT EXISTS (SELECT 1 FROM deleted)
+       OR UPDATE(ESTADO) OR UPDATE(ACTIVO) OR UPDATE(FECHAPROGRAMADA) OR UPDATE(IDUSUARIOASIGNADO)
+       OR NOT EXISTS (SELECT 1 FROM inserted)
+    BEGIN
+        WITH Cambios AS (
+            SELECT IDUSUARIOASIGNADO AS IDUSUARIO, FECHAPROGRAMADA AS FECHA, 1 AS N
+            FROM inserted WHERE ACTIVO = 1 AND ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+            UNION ALL
+            SELECT IDUSUARIOASIGNADO, FECHAPROGRAMADA, -1
+            FROM deleted WHERE ACTIVO = 1 AND ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+        )
+        MERGE TM_PRODUCCION_DIARIA WITH (HOLDLOCK) AS p
+        USING (
+            SELECT FECHA, IDUSUARIO, SUM(N) AS N
+            FROM Cambios
+            GROUP BY FECHA, IDUSUARIO
+            HAVING SUM(N) <> 0
+        ) AS d
+        ON p.FECHA = d.FECHA AND p.IDUSUARIO = d.IDUSUARIO
+        WHEN MATCHED THEN
+            UPDATE SET PENDIENTES = p.PENDIENTES + d.N, FECHAACTUALIZACION = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (FECHA, IDUSUARIO, CONTACTOS, PENDIENTES) VALUES (d.FECHA, d.IDUSUARIO, 0, d.N);
+    END
+END;
+GO
+PRINT '  Created: TR_SEGUIMIENTO_PRODUCCION';
+GO
+
+-- ---------------------------------------------------------------------
+-- Maintenance: rebuild the rollup of a date range from the base tables,
+-- one month per transaction. NULL bounds take the oldest / newest date
+-- found in TM_INTERACCION and TM_SEGUIMIENTO.
+-- ---------------------------------------------------------------------
+CREATE OR ALTER PROCEDURE usp_RecalcularProduccionDiaria
+    @FechaInicio DATE = NULL,
+    @FechaFin DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @FechaInicio IS NULL
+        SELECT @FechaInicio = MIN(F) FROM (
+            SELECT CAST(MIN(FECHAINTERACCION) AS DATE) AS F FROM TM_INTERACCION
+            UNION ALL
+            SELECT MIN(FECHAPROGRAMADA) FROM TM_SEGUIMIENTO
+        ) x;
+    IF @FechaFin IS NULL
+        SELECT @FechaFin = MAX(F) FROM (
+            SELECT CAST(MAX(FECHAINTERACCION) AS DATE) AS F FROM TM_INTERACCION
+            UNION ALL
+            SELECT MAX(FECHAPROGRAMADA) FROM TM_SEGUIMIENTO
+        ) x;
+    IF @FechaInicio IS NULL OR @FechaFin IS NULL OR @FechaFin < @FechaInicio
+    BEGIN
+        SELECT 0 AS DiasProcesados, 0 AS FilasGeneradas;
+        RETURN;
+    END
+
+    DECLARE @Desde DATE = @FechaInicio;
+    DECLARE @Hasta DATE;
+    DECLARE @Filas INT = 0;
+
+    WHILE @Desde <= @FechaFin
+    BEGIN
+        SET @Hasta = EOMONTH(@Desde);
+        IF @Hasta > @FechaFin SET @Hasta = @FechaFin;
+
+        BEGIN TRANSACTION;
+
+        DELETE FROM TM_PRODUCCION_DIARIA WITH (TABLOCKX)
+        WHERE FECHA BETWEEN @Desde AND @Hasta;
+
+        INSERT INTO TM_PRODUCCION_DIARIA (FECHA, IDUSUARIO, CONTACTOS, PENDIENTES)
+        SELECT FECHA, IDUSUARIO, SUM(CONTACTOS), SUM(PENDIENTES)
+        FROM (
+            SELECT CAST(i.FECHAINTERACCION AS DATE) AS FECHA, i.IDUSUARIO, COUNT(*) AS CONTACTOS, 0 AS PENDIENTES
+            FROM TM_INTERACCION i
+            WHERE i.FECHAINTERACCION >= @Desde
+              AND i.FECHAINTERACCION < DATEADD(DAY, 1, CAST(@Hasta AS DATETIME))
+              AND i.ACTIVO = 1
+            GROUP BY CAST(i.FECHAINTERACCION AS DATE), i.IDUSUARIO
+            UNION ALL
+            SELECT s.FECHAPROGRAMADA, s.IDUSUARIOASIGNADO, 0, COUNT(*)
+            FROM TM_SEGUIMIENTO s
+            WHERE s.FECHAPROGRAMADA BETWEEN @Desde AND @Hasta
+              AND s.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+              AND s.ACTIVO = 1
+            GROUP BY s.FECHAPROGRAMADA, s.IDUSUARIOASIGNADO
+        ) x
+        GROUP BY FECHA, IDUSUARIO;
+        SET @Filas += @@ROWCOUNT;
+
+        COMMIT TRANSACTION;
+
+        SET @Desde = DATEADD(DAY, 1, @Hasta);
+    END
+
+    SELECT DATEDIFF(DAY, @FechaInicio, @FechaFin) + 1 AS DiasProcesados, @Filas AS FilasGeneradas;
+END;
+GO
+PRINT '  Created: usp_RecalcularProduccionDiaria';
+GO
+
+-- ---------------------------------------------------------------------
+-- Backfill: the whole history (rows written before the triggers existed)
+-- ---------------------------------------------------------------------
+EXEC usp_RecalcularProduccionDiaria;
+GO
+PRINT '  Backfilled: TM_PRODUCCION_DIARIA';
+GO
+
+-- =====================================================================
+-- HU010: Produccion Diaria - one rollup row per visible user
+-- Same result shape as 12_fix_cerrados_produccion.sql
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerProduccionDiaria
+    @IdUsuario INT,
+    @Fecha DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @IdPerfil INT;
+    SELECT @IdPerfil = IDPERFIL FROM TM_USUARIO WHERE IDUSUARIO = @IdUsuario;
+
+    IF @Fecha IS NULL SET @Fecha = CAST(GETDATE() AS DATE);
+
+    -- Visible users (supervisors and ejecutivos), one branch per role so
+    -- each query seeks its own index instead of a role OR
+    DECLARE @Usuarios TABLE (IDUSUARIO INT PRIMARY KEY);
+
+    IF @IdPerfil = 1
+        INSERT INTO @Usuarios (IDUSUARIO)
+        SELECT IDUSUARIO FROM TM_USUARIO
+        WHERE ACTIVO = 1 AND IDPERFIL IN (2, 3);
+    ELSE IF @IdPerfil = 2
+        INSERT INTO @Usuarios (IDUSUARIO)
+        SELECT IDUSUARIO FROM TM_USUARIO
+        WHERE IDSUPERVISOR = @IdUsuario AND ACTIVO = 1 AND IDPERFIL IN (2, 3)
+        UNION
+        SELECT IDUSUARIO FROM TM_USUARIO
+        WHERE IDUSUARIO = @IdUsuario AND ACTIVO = 1 AND IDPERFIL IN (2, 3);
+    ELSE IF @IdPerfil = 3
+        INSERT INTO @Usuarios (IDUSUARIO)
+        SELECT IDUSUARIO FROM TM_USUARIO
+        WHERE IDUSUARIO = @IdUsuario AND ACTIVO = 1;
+
+    SELECT
+        u.IDUSUARIO,
+        u.LOGINUSUARIO AS USUARIO,
+        u.NOMBRES + ' ' + u.APELLIDOPATERNO AS NOMBRE,
+        ISNULL(p.CONTACTOS, 0) AS CONTACTOS_DEL_DIA,
+        ISNULL(p.PENDIENTES, 0) AS PENDIENTES_DEL_DIA,
+        ISNULL(p.CONTACTOS, 0) + ISNULL(p.PENDIENTES, 0) AS TOTAL_DEL_DIA
+    FROM @Usuarios v
+    INNER JOIN TM_USUARIO u ON u.IDUSUARIO = v.IDUSUARIO
+    LEFT JOIN TM_PRODUCCION_DIARIA p ON p.FECHA = @Fecha AND p.IDUSUARIO = u.IDUSUARIO
+    ORDER BY NOMBRE;
+END;
+GO
+PRINT '  Updated: usp_ObtenerProduccionDiaria (reads TM_PRODUCCION_DIARIA)';
+GO
+
+-- Verification: rollup vs. base tables for today (both columns must match)
+DECLARE @Hoy DATE = CAST(GETDATE() AS DATE);
+SELECT p.IDUSUARIO, p.CONTACTOS, p.PENDIENTES,
+       (SELECT COUNT(*) FROM TM_INTERACCION i
+        WHERE i.IDUSUARIO = p.IDUSUARIO AND CAST(i.FECHAINTERACCION AS DATE) = @Hoy AND i.ACTIVO = 1) AS CONTACTOS_BASE,
+       (SELECT COUNT(*) FROM TM_SEGUIMIENTO s
+        WHERE s.IDUSUARIOASIGNADO = p.IDUSUARIO AND s.FECHAPROGRAMADA = @Hoy
+          AND s.ESTADO IN ('PENDIENTE', 'EN_PROGRESO') AND s.ACTIVO = 1) AS PENDIENTES_BASE
+FROM TM_PRODUCCION_DIARIA p
+WHERE p.FECHA = @Hoy;
+EXEC usp_ObtenerProduccionDiaria @IdUsuario = 1, @Fecha = NULL;
+GO
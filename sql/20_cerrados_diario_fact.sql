@@ -0,0 +1,358 @@
+-- =====================================================================
+-- 20_cerrados_diario_fact.sql
+-- Description: Closed deals per executive and day, pre-aggregated
+--              - TM_CERRADOS_DIARIO keeps one row per (user, day) with the
+--                sales of that day (count, MONTO, days-to-close) and the
+--                seguimientos completed that day, by RESULTADO
+--              - Triggers on TM_VENTA (sale inserted, moved, deactivated)
+--                and TM_SEGUIMIENTO (completed, reopened) apply the +1 / -1
+--                of every write, whatever writes the rows
+--              - usp_RecalcularCerradosDiario rebuilds any date range from
+--                the base tables (history backfill, repairs)
+--              - usp_ObtenerCerradosSemana reads its three result sets from
+--                range scans over the fact table instead of aggregating
+--                TM_VENTA and joining on CAST(FECHAVENTA AS DATE) per day
+-- Used by: TB1_cerrados_semana_lambda (GET /cerrados)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Table: TM_CERRADOS_DIARIO - Closed deals per user and day.
+-- Clustered by user first: the endpoint reads a date range for each
+-- member of a team, i.e. one range seek per user.
+-- ---------------------------------------------------------------------
+IF OBJECT_ID('TM_CERRADOS_DIARIO', 'U') IS NULL
+BEGIN
+    CREATE TABLE TM_CERRADOS_DIARIO (
+        IDUSUARIO           INT NOT NULL,
+        FECHA               DATE NOT NULL,
+        CERRADOS            INT NOT NULL DEFAULT 0,            -- active sales of the day
+        MONTO               DECIMAL(18,2) NOT NULL DEFAULT 0,  -- SUM(TM_VENTA.MONTO)
+        DIASCIERRE          INT NOT NULL DEFAULT 0,            -- SUM of DATEDIFF(DAY, FECHACREA, FECHAVENTA)
+        COMPLETADOS         INT NOT NULL DEFAULT 0,            -- seguimientos completed that day
+        EXITOSOS            INT NOT NULL DEFAULT 0,
+        SINRESPUESTA        INT NOT NULL DEFAULT 0,
+        NOINTERESADOS       INT NOT NULL DEFAULT 0,
+        FECHAACTUALIZACION  DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT PK_CERRADOS_DIARIO PRIMARY KEY CLUSTERED (IDUSUARIO, FECHA),
+        CONSTRAINT FK_CERRADOS_USUARIO FOREIGN KEY (IDUSUARIO) REFERENCES TM_USUARIO(IDUSUARIO)
+    );
+    PRINT '  Created: TM_CERRADOS_DIARIO';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Trigger: sales. A sale counts on FECHAVENTA for its IDUSUARIO while
+-- ACTIVO = 1; updates are applied as -1 (old row) / +1 (new row).
+-- ---------------------------------------------------------------------
+CREATE OR ALTER TRIGGER TR_VENTA_CERRADOS
+ON TM_VENTA
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF NOT EXISTS (SELECT 1 FROM deleted)
+       OR UPDATE(IDUSUARIO) OR UPDATE(FECHAVENTA) OR UPDATE(MONTO) OR UPDATE(ACTIVO) OR UPDATE(FECHACREA)
+       OR NOT EXISTS (SELECT 1 FROM inserted)
+    BEGIN
+        WITH Cambios AS (
+            SELECT IDUSUARIO, FECHAVENTA AS FECHA, 1 AS N, MONTO,
+                   DATEDIFF(DAY, ISNULL(FECHACREA, FECHAVENTA), FECHAVENTA) AS DIAS
+            FROM inserted WHERE ACTIVO = 1
+            UNION ALL
+            SELECT IDUSUARIO, FECHAVENTA, -1, -MONTO,
+                   -DATEDIFF(DAY, ISNULL(FECHACREA, FECHAVENTA), FECHAVENTA)
+            FROM deleted WHERE ACTIVO = 1
+        )
+        MERGE TM_CERRADOS_DIARIO WITH (HOLDLOCK) AS c
+        USING (
+            SELECT IDUSUARIO, FECHA, SUM(N) AS N, SUM(MONTO) AS MONTO, SUM(DIAS) AS DIAS
+            FROM Cambios
+            GROUP BY IDUSUARIO, FECHA
+            HAVING SUM(N) <> 0 OR SUM(MONTO) <> 0 OR SUM(DIAS) <> 0
+        ) AS d
+        ON c.IDUSUARIO = d.IDUSUARIO AND c.FECHA = d.FECHA
+        WHEN MATCHED THEN
+            UPDATE SET CERRADOS = c.CERRADOS + d.N, MONTO = c.MONTO + d.MONTO,
+                       DIASCIERRE = c.DIASCIERRE + d.DIAS, FECHAACTUALIZACION = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (IDUSUARIO, FECHA, CERRADOS, MONTO, DIASCIERRE)
+            VALUES (d.IDUSUARIO, d.FECHA, d.N, d.MONTO, d.DIAS);
+    END
+END;
+GO
+PRINT '  Created: TR_VENTA_CERRADOS';
+GO
+
+-- ---------------------------------------------------------------------
+-- Trigger: completions. A seguimiento counts on the day of
+-- FECHACOMPLETADO for its assignee while it is active and COMPLETADO;
+-- reopening, cancelling or reassigning it moves or removes the count.
+-- ---------------------------------------------------------------------
+CREATE OR ALTER TRIGGER TR_SEGUIMIENTO_CERRADOS
+ON TM_SEGUIMIENTO
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Updates that touch none of the counted columns change nothing
+    IF NOT EXISTS (SELECT 1 FROM deleted)
+       OR UPDATE(ESTADO) OR UPDATE(ACTIVO) OR UPDATE(FECHACOMPLETADO) OR UPDATE(RESULTADO) OR UPDATE(IDUSUARIOASIGNADO)
+       OR NOT EXISTS (SELECT 1 FROM inserted)
+    BEGIN
+        WITH Cambios AS (
+            SELECT IDUSUARIOASIGNADO AS IDUSUARIO, CAST(FECHACOMPLETADO AS DATE) AS FECHA, 1 AS N, RESULTADO
+            FROM inserted WHERE ACTIVO = 1 AND ESTADO = 'COMPLETADO' AND FECHACOMPLETADO IS NOT NULL
+            UNION ALL
+            SELECT IDUSUARIOASIGNADO, CAST(FECHACOMPLETADO AS DATE), -1, RESULTADO
+            FROM deleted WHERE ACTIVO = 1 AND ESTADO = 'COMPLETADO' AND FECHACOMPLETADO IS NOT NULL
+        )
+        MERGE TM_CERRADOS_DIARIO WITH (HOLDLOCK) AS c
+        USING (
+            SELECT * FROM (
+                SELECT IDUSUARIO, FECHA,
+                       SUM(N) AS N,
+                       SUM(CASE WHEN RESULTADO = 'EXITOSO' THEN N ELSE 0 END) AS EXITOSOS,
+                       SUM(CASE WHEN RESULTADO = 'SIN_RESPUESTA' THEN N ELSE 0 END) AS SINRESPUESTA,
+                       SUM(CASE WHEN RESULTADO = 'NO_INTERESADO' THEN N ELSE 0 END) AS NOINTERESADOS
+                FROM Cambios
+                GROUP BY IDUSUARIO, FECHA
+            ) x
+            WHERE N <> 0 OR EXITOSOS <> 0 OR SINRESPUESTA <> 0 OR NOINTERESADOS <> 0
+        ) AS d
+        ON c.IDUSUARIO = d.IDUSUARIO AND c.FECHA = d.FECHA
+        WHEN MATCHED THEN
+            UPDATE SET COMPLETADOS = c.COMPLETADOS + d.N, EXITOSOS = c.EXITOSOS + d.EXITOSOS,
+                       SINRESPUESTA = c.SINRESPUESTA + d.SINRESPUESTA,
+                       NOINTERESADOS = c.NOINTERESADOS + d.NOINTERESADOS,
+                       FECHAACTUALIZACION = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (IDUSUARIO, FECHA, COMPLETADOS, EXITOSOS, SINRESPUESTA, NOINTERESADOS)
+            VALUES (d.IDUSUARIO, d.FECHA, d.N, d.EXITOSOS, d.SINRESPUESTA, d.NOINTERESADOS);
+    END
+END;
+GO
+PRINT '  Created: TR_SEGUIMIENTO_CERRADOS';
+GO
+
+-- ---------------------------------------------------------------------
+-- Maintenance: rebuild the fact table for a date range from the base
+-- tables, one month per transaction. NULL bounds take the oldest / newest
+-- date found in TM_VENTA and TM_SEGUIMIENTO.FECHACOMPLETADO.
+-- ---------------------------------------------------------------------
+CREATE OR ALTER PROCEDURE usp_RecalcularCerradosDiario
+    @FechaInicio DATE = NULL,
+    @FechaFin DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @FechaInicio IS NULL
+        SELECT @FechaInicio = MIN(F) FROM (
+            SELECT MIN(FECHAVENTA) AS F FROM TM_VENTA
+            UNION ALL
+            SELECT CAST(MIN(FECHACOMPLETADO) AS DATE) FROM TM_SEGUIMIENTO
+        ) x;
+    IF @FechaFin IS NULL
+        SELECT @FechaFin = MAX(F) FROM (
+            SELECT MAX(FECHAVENTA) AS F FROM TM_VENTA
+            UNION ALL
+            SELECT CAST(MAX(FECHACOMPLETADO) AS DATE) FROM TM_SEGUIMIENTO
+        ) x;
+    IF @FechaInicio IS NULL OR @FechaFin IS NULL OR @FechaFin < @FechaInicio
+    BEGIN
+        SELECT 0 AS DiasProcesados, 0 AS FilasGeneradas;
+        RETURN;
+    END
+
+    DECLARE @Desde DATE = @FechaInicio;
+    DECLARE @Hasta DATE;
+    DECLARE @Filas INT = 0;
+
+    WHILE @Desde <= @FechaFin
+    BEGIN
+        SET @Hasta = EOMONTH(@Desde);
+        IF @Hasta > @FechaFin SET @Hasta = @FechaFin;
+
+        BEGIN TRANSACTION;
+
+        DELETE FROM TM_CERRADOS_DIARIO WITH (TABLOCKX)
+        WHERE FECHA BETWEEN @Desde AND @Hasta;
+
+        INSERT INTO TM_CERRADOS_DIARIO
+            (IDUSUARIO, FECHA, CERRADOS, MONTO, DIASCIERRE, COMPLETADOS, EXITOSOS, SINRESPUESTA, NOINTERESADOS)
+        SELECT IDUSUARIO, FECHA, SUM(CERRADOS), SUM(MONTO), SUM(DIASCIERRE),
+               SUM(COMPLETADOS), SUM(EXITOSOS), SUM(SINRESPUESTA), SUM(NOINTERESADOS)
+        FROM (
+            SELECT v.IDUSUARIO, v.FECHAVENTA AS FECHA, COUNT(*) AS CERRADOS, SUM(v.MONTO) AS MONTO,
+                   SUM(DATEDIFF(DAY, ISNULL(v.FECHACREA, v.FECHAVENTA), v.FECHAVENTA)) AS DIASCIERRE,
+                   0 AS COMPLETADOS, 0 AS EXITOSOS, 0 AS SINRESPUESTA, 0 AS NOINTERESADOS
+            FROM TM_VENTA v
+            WHERE v.FECHAVENTA BETWEEN @Desde AND @Hasta
+              AND v.ACTIVO = 1
+            GROUP BY v.IDUSUARIO, v.FECHAVENTA
+            UNION ALL
+            SELECT s.IDUSUARIOASIGNADO, CAST(s.FECHACOMPLETADO AS DATE), 0, 0, 0,
+                   COUNT(*),
+                   SUM(CASE WHEN s.RESULTADO = 'EXITOSO' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN s.RESULTADO = 'SIN_RESPUESTA' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN s.RESULTADO = 'NO_INTERESADO' THEN 1 ELSE 0 END)
+            FROM TM_SEGUIMIENTO s
+            WHERE s.FECHACOMPLETADO >= @Desde
+              AND s.FECHACOMPLETADO < DATEADD(DAY, 1, CAST(@Hasta AS DATETIME))
+              AND s.ESTADO = 'COMPLETADO'
+              AND s.ACTIVO = 1
+            GROUP BY s.IDUSUARIOASIGNADO, CAST(s.FECHACOMPLETADO AS DATE)
+        ) x
+        GROUP BY IDUSUARIO, FECHA;
+        SET @Filas += @@ROWCOUNT;
+
+        COMMIT TRANSACTION;
+
+        SET @Desde = DATEADD(DAY, 1, @Hasta);
+    END
+
+    SELECT DATEDIFF(DAY, @FechaInicio, @FechaFin) + 1 AS DiasProcesados, @Filas AS FilasGeneradas;
+END;
+GO
+PRINT '  Created: usp_RecalcularCerradosDiario';
+GO
+
+-- ---------------------------------------------------------------------
+-- Backfill: the whole history (rows written before the triggers existed)
+-- ---------------------------------------------------------------------
+EXEC usp_RecalcularCerradosDiario;
+GO
+PRINT '  Backfilled: TM_CERRADOS_DIARIO';
+GO
+
+-- =====================================================================
+-- HU008: Cerrados Semana - result sets from TM_CERRADOS_DIARIO
+-- Same result sets as 13_fix_monitoreo_cerrados.sql; the metrics also
+-- return Exitosos / SinRespuesta / NoInteresados (completed seguimientos
+-- of the range), which the lambda already maps
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerCerradosSemana
+    @IdUsuario INT,
+    @FechaInicio DATE = NULL,
+    @FechaFin DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @IdPerfil INT;
+    SELECT @IdPerfil = IDPERFIL FROM TM_USUARIO WHERE IDUSUARIO = @IdUsuario;
+
+    -- Default to current week
+    IF @FechaInicio IS NULL
+        SET @FechaInicio = DATEADD(DAY, -(DATEPART(WEEKDAY, GETDATE()) - 1), CAST(GETDATE() AS DATE));
+    IF @FechaFin IS NULL
+        SET @FechaFin = DATEADD(DAY, 7 - DATEPART(WEEKDAY, GETDATE()), CAST(GETDATE() AS DATE));
+
+    -- Team members based on role, keyed so each joins as one range seek
+    -- on PK_CERRADOS_DIARIO (IDUSUARIO, FECHA)
+    DECLARE @TeamMembers TABLE (IDUSUARIO INT PRIMARY KEY);
+
+    IF @IdPerfil = 1
+        INSERT INTO @TeamMembers SELECT IDUSUARIO FROM TM_USUARIO WHERE ACTIVO = 1;
+    ELSE IF @IdPerfil = 2
+        INSERT INTO @TeamMembers SELECT IDUSUARIO FROM TM_USUARIO WHERE IDSUPERVISOR = @IdUsuario AND ACTIVO = 1;
+    ELSE
+        INSERT INTO @TeamMembers VALUES (@IdUsuario);
+
+    -- RESULT SET 1: Historial Reciente (last 10 closed deals). The fact
+    -- table gives the oldest day still needed for 10 sales, so TM_VENTA is
+    -- only read from that day on (IX_VENTA_USUARIO_FECHA)
+    DECLARE @Corte DATE;
+
+    ;WITH DiasConVentas AS (
+        SELECT c.FECHA, SUM(c.CERRADOS) AS CERRADOS
+        FROM @TeamMembers t
+        INNER JOIN TM_CERRADOS_DIARIO c ON c.IDUSUARIO = t.IDUSUARIO
+        WHERE c.CERRADOS > 0
+        GROUP BY c.FECHA
+    ),
+    Acumulado AS (
+        SELECT FECHA,
+               SUM(CERRADOS) OVER (ORDER BY FECHA DESC ROWS UNBOUNDED PRECEDING) - CERRADOS AS POSTERIORES
+        FROM DiasConVentas
+    )
+    SELECT @Corte = MIN(FECHA) FROM Acumulado WHERE POSTERIORES < 10;
+
+    SELECT TOP 10
+        e.NOMBRECOMERCIAL AS EMPRESA,
+        ISNULL(v.PRODUCTO, 'Servicio Estándar') AS SERVICIO,
+        v.MONTO,
+        FORMAT(v.FECHAVENTA, 'yyyy-MM-dd') AS FECHA
+    FROM TM_VENTA v
+    INNER JOIN @TeamMembers t ON v.IDUSUARIO = t.IDUSUARIO
+    INNER JOIN TM_EMPRESA e ON v.IDEMPRESA = e.IDEMPRESA
+    WHERE v.FECHAVENTA >= @Corte
+      AND v.ACTIVO = 1
+    ORDER BY v.FECHAVENTA DESC;
+
+    -- RESULT SET 2: Metrics for the range (integer average, as AVG(INT))
+    SELECT
+        ISNULL(SUM(c.CERRADOS), 0) AS TOTAL_CERRADOS,
+        ISNULL(SUM(c.MONTO), 0) AS MontoTotal,
+        CASE
+            WHEN ISNULL(SUM(c.CERRADOS), 0) = 0 THEN 0
+            ELSE ABS(SUM(c.DIASCIERRE) / SUM(c.CERRADOS))
+        END AS DiasPromedioCierre,
+        ISNULL(SUM(c.EXITOSOS), 0) AS Exitosos,
+        ISNULL(SUM(c.SINRESPUESTA), 0) AS SinRespuesta,
+        ISNULL(SUM(c.NOINTERESADOS), 0) AS NoInteresados
+    FROM @TeamMembers t
+    INNER JOIN TM_CERRADOS_DIARIO c ON c.IDUSUARIO = t.IDUSUARIO
+    WHERE c.FECHA BETWEEN @FechaInicio AND @FechaFin;
+
+    -- RESULT SET 3: Data for Rendimiento Diario chart (per day breakdown)
+    -- Every day of the week, including days without sales
+    ;WITH DiasSemanaCTE AS (
+        SELECT 0 AS DiaOffset
+        UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3
+        UNION ALL SELECT 4 UNION ALL SELECT 5 UNION ALL SELECT 6
+    ),
+    FechasSemanaCTE AS (
+        SELECT
+            DATEADD(DAY, DiaOffset, @FechaInicio) AS FECHA,
+            DATENAME(WEEKDAY, DATEADD(DAY, DiaOffset, @FechaInicio)) AS DIA_SEMANA
+        FROM DiasSemanaCTE
+        WHERE DATEADD(DAY, DiaOffset, @FechaInicio) <= @FechaFin
+    ),
+    VentasPorDia AS (
+        SELECT c.FECHA, SUM(c.CERRADOS) AS CANTIDAD
+        FROM @TeamMembers t
+        INNER JOIN TM_CERRADOS_DIARIO c ON c.IDUSUARIO = t.IDUSUARIO
+        WHERE c.FECHA BETWEEN @FechaInicio AND @FechaFin
+        GROUP BY c.FECHA
+    )
+    SELECT
+        LEFT(f.DIA_SEMANA, 3) AS DIA_SEMANA,
+        FORMAT(f.FECHA, 'yyyy-MM-dd') AS FECHA,
+        ISNULL(d.CANTIDAD, 0) AS CANTIDAD
+    FROM FechasSemanaCTE f
+    LEFT JOIN VentasPorDia d ON d.FECHA = f.FECHA
+    ORDER BY f.FECHA;
+END;
+GO
+PRINT '  Updated: usp_ObtenerCerradosSemana (reads TM_CERRADOS_DIARIO)';
+GO
+
+-- Verification: fact table vs. TM_VENTA for the last 30 days (both
+-- column pairs must match)
+DECLARE @Desde DATE = DATEADD(DAY, -30, CAST(GETDATE() AS DATE));
+SELECT c.IDUSUARIO, c.FECHA, c.CERRADOS, c.MONTO,
+       (SELECT COUNT(*) FROM TM_VENTA v
+        WHERE v.IDUSUARIO = c.IDUSUARIO AND v.FECHAVENTA = c.FECHA AND v.ACTIVO = 1) AS CERRADOS_BASE,
+       (SELECT ISNULL(SUM(v.MONTO), 0) FROM TM_VENTA v
+        WHERE v.IDUSUARIO = c.IDUSUARIO AND v.FECHAVENTA = c.FECHA AND v.ACTIVO = 1) AS MONTO_BASE
+FROM TM_CERRADOS_DIARIO c
+WHERE c.FECHA >= @Desde
+ORDER BY c.FECHA DESC, c.IDUSUARIO;
+EXEC usp_ObtenerCerradosSemana @IdUsuario = 1, @FechaInicio = NULL, @FechaFin = NULL;
+GO
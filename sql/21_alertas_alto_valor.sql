@@ -0,0 +1,244 @@
+-- =====================================================================
+-- 21_alertas_alto_valor.sql
+-- Description: High-value alerts materialized as notifications (HU007)
+--              - usp_MaterializarAlertasAltoValor evaluates, in one
+--                set-based pass for every user, the ALTA / PENDIENTE
+--                seguimientos unattended for 24+ hours and keeps exactly
+--                one active TM_NOTIFICACION per seguimiento
+--                (TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR',
+--                IDREFERENCIAENTIDAD = IDSEGUIMIENTO); alerts whose
+--                seguimiento no longer qualifies are retired (ACTIVO = 0)
+--              - Runs on a schedule (TB1_alertas_materializar_lambda,
+--                EventBridge rate(15 minutes))
+--              - usp_ObtenerNotificacionesUsuario reads the alerts of a
+--                user with one index seek instead of evaluating
+--                DATEDIFF(HOUR, ...) and UPPER(PRIORIDAD) on every poll
+-- Used by: TB1_alertas_materializar_lambda, TB1_notificaciones_lambda
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Dedup, one active alert per seguimiento
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_NOTIFICACION_ALERTA_ALTO_VALOR')
+BEGIN
+    CREATE UNIQUE NONCLUSTERED INDEX UX_NOTIFICACION_ALERTA_ALTO_VALOR
+    ON TM_NOTIFICACION (IDREFERENCIAENTIDAD)
+    INCLUDE (IDUSUARIO)
+    WHERE TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND ACTIVO = 1;
+    PRINT '  Created: UX_NOTIFICACION_ALERTA_ALTO_VALOR';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Active alerts of a user (read path)
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_NOTIFICACION_ALERTA_USUARIO')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_NOTIFICACION_ALERTA_USUARIO
+    ON TM_NOTIFICACION (IDUSUARIO, IDREFERENCIAENTIDAD)
+    WHERE TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND ACTIVO = 1;
+    PRINT '  Created: IX_NOTIFICACION_ALERTA_USUARIO';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Latest notifications page, now also covering
+-- TIPOENTIDAD (alerts are served apart from the page)
+-- ---------------------------------------------------------------------
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_NOTIFICACION_USUARIO_FECHA')
+   AND NOT EXISTS (
+    SELECT 1 FROM sys.index_columns ic
+    INNER JOIN sys.indexes i ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+    WHERE i.name = 'IX_NOTIFICACION_USUARIO_FECHA'
+      AND COL_NAME(ic.object_id, ic.column_id) = 'TIPOENTIDAD'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_NOTIFICACION_USUARIO_FECHA
+    ON TM_NOTIFICACION (IDUSUARIO, FECHACREACION DESC)
+    INCLUDE (TITULO, MENSAJE, TIPO, LEIDA, TIPOENTIDAD)
+    WHERE ACTIVO = 1
+    WITH (DROP_EXISTING = ON);
+    PRINT '  Updated: IX_NOTIFICACION_USUARIO_FECHA (includes TIPOENTIDAD)';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Pending high priority work by date (batch scan)
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_ALTA_PENDIENTE')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_ALTA_PENDIENTE
+    ON TM_SEGUIMIENTO (FECHAPROGRAMADA)
+    INCLUDE (HORAPROGRAMADA, IDUSUARIOASIGNADO, IDEMPRESA, IDTIPOSEGUIMIENTO)
+    WHERE PRIORIDAD = 'ALTA' AND ESTADO = 'PENDIENTE' AND ACTIVO = 1;
+    PRINT '  Created: IX_SEGUIMIENTO_ALTA_PENDIENTE';
+END
+GO
+
+-- =====================================================================
+-- HU007: Materialize the high-value alerts of every user
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_MaterializarAlertasAltoValor
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    -- DATEDIFF(HOUR, programado, GETDATE()) >= 24 counts hour boundaries:
+    -- it holds exactly when programado is before the start of the current
+    -- hour minus 23 hours, which turns the test into a range
+    DECLARE @Corte DATETIME = DATEADD(HOUR, DATEDIFF(HOUR, 0, GETDATE()) - 23, 0);
+    DECLARE @Creadas INT, @Retiradas INT;
+
+    CREATE TABLE #Vencidos (
+        IDSEGUIMIENTO   INT PRIMARY KEY,
+        IDUSUARIO       INT NOT NULL,
+        EMPRESA         NVARCHAR(256) NULL
+    );
+
+    INSERT INTO #Vencidos (IDSEGUIMIENTO, IDUSUARIO, EMPRESA)
+    SELECT S.IDSEGUIMIENTO, S.IDUSUARIOASIGNADO, E.NOMBRECOMERCIAL
+    FROM dbo.TM_SEGUIMIENTO S
+    INNER JOIN dbo.TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+    INNER JOIN dbo.TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+    WHERE S.PRIORIDAD = 'ALTA'
+      AND S.ESTADO = 'PENDIENTE'
+      AND S.ACTIVO = 1
+      AND S.FECHAPROGRAMADA <= CAST(@Corte AS DATE)
+      AND CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME) < @Corte;
+
+    BEGIN TRANSACTION;
+
+    -- Retire alerts whose seguimiento was attended, reprioritized,
+    -- deactivated or reassigned (the new assignee gets a fresh one below)
+    UPDATE N
+    SET ACTIVO = 0
+    FROM dbo.TM_NOTIFICACION N WITH (UPDLOCK, HOLDLOCK)
+    WHERE N.TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR'
+      AND N.ACTIVO = 1
+      AND NOT EXISTS (
+          SELECT 1 FROM #Vencidos V
+          WHERE V.IDSEGUIMIENTO = N.IDREFERENCIAENTIDAD AND V.IDUSUARIO = N.IDUSUARIO
+      );
+    SET @Retiradas = @@ROWCOUNT;
+
+    -- New alerts, at most one active per seguimiento (UX_NOTIFICACION_ALERTA_ALTO_VALOR)
+    INSERT INTO dbo.TM_NOTIFICACION (IDUSUARIO, TITULO, MENSAJE, TIPO, LEIDA, TIPOENTIDAD, IDREFERENCIAENTIDAD)
+    SELECT V.IDUSUARIO,
+           'Seguimiento de alto valor sin atender',
+           LEFT('Seguimiento de alta prioridad con ' + ISNULL(V.EMPRESA, '') + ' sin atender por más de 24 horas', 500),
+           'ALERTA',
+           0,
+           'SEGUIMIENTO_ALTO_VALOR',
+           V.IDSEGUIMIENTO
+    FROM #Vencidos V
+    WHERE NOT EXISTS (
+        SELECT 1 FROM dbo.TM_NOTIFICACION N WITH (UPDLOCK, HOLDLOCK)
+        WHERE N.TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR'
+          AND N.ACTIVO = 1
+          AND N.IDREFERENCIAENTIDAD = V.IDSEGUIMIENTO
+    );
+    SET @Creadas = @@ROWCOUNT;
+
+    COMMIT TRANSACTION;
+
+    SELECT @Creadas AS AlertasCreadas,
+           @Retiradas AS AlertasRetiradas,
+           (SELECT COUNT(*) FROM #Vencidos) AS AlertasActivas;
+END;
+GO
+PRINT '  Created: usp_MaterializarAlertasAltoValor';
+GO
+
+-- =====================================================================
+-- HU007: Notifications + alerts + unread count in a single call
+-- Same result sets as 14_notifications_single_roundtrip.sql; alerts are
+-- read from the materialized rows and kept out of the page and the
+-- unread count (the lambda adds them to noLeidos itself)
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerNotificacionesUsuario
+    @IdUsuario INT,
+    @Limite INT = 50                    -- Max notifications returned
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @Limite IS NULL OR @Limite < 1 SET @Limite = 50;
+    IF @Limite > 200 SET @Limite = 200;
+
+    -- RESULT SET 1: High-value alerts (IX_NOTIFICACION_ALERTA_USUARIO seek).
+    -- The seguimiento is re-checked on its primary key, so one attended
+    -- since the last batch run is not shown again
+    SELECT
+        S.IDSEGUIMIENTO,
+        S.FECHAPROGRAMADA,
+        S.HORAPROGRAMADA,
+        S.PRIORIDAD,
+        S.ESTADO,
+        E.IDEMPRESA,
+        E.NOMBRECOMERCIAL AS EMPRESA,
+        E.CONTACTO_NOMBRE AS CONTACTO,
+        T.NOMBRE AS TIPOSEGUIMIENTO,
+        DATEDIFF(HOUR,
+            CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
+            GETDATE()
+        ) AS HORAS_SIN_ATENCION,
+        D.PRESUPUESTO
+    FROM dbo.TM_NOTIFICACION A
+    INNER JOIN dbo.TM_SEGUIMIENTO S ON S.IDSEGUIMIENTO = A.IDREFERENCIAENTIDAD
+    INNER JOIN dbo.TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+    INNER JOIN dbo.TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+    LEFT JOIN dbo.TM_SEGUIMIENTO_DETALLE D ON S.IDSEGUIMIENTO = D.IDSEGUIMIENTO AND D.ACTIVO = 1
+    WHERE A.IDUSUARIO = @IdUsuario
+      AND A.TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR'
+      AND A.ACTIVO = 1
+      AND S.IDUSUARIOASIGNADO = @IdUsuario
+      AND S.PRIORIDAD = 'ALTA'
+      AND S.ESTADO = 'PENDIENTE'
+      AND S.ACTIVO = 1
+    ORDER BY S.FECHAPROGRAMADA;
+
+    -- RESULT SET 2: Latest notifications (bounded page)
+    -- (TM_NOTIFICACION uses LEIDA/FECHACREACION; aliased to the names the frontend expects)
+    SELECT TOP (@Limite)
+        N.IDNOTIFICACION,
+        N.TITULO,
+        N.MENSAJE,
+        N.TIPO,
+        N.LEIDA AS LEIDO,
+        N.FECHACREACION AS FECHAENVIO
+    FROM dbo.TM_NOTIFICACION N
+    WHERE N.IDUSUARIO = @IdUsuario
+      AND N.ACTIVO = 1
+      AND ISNULL(N.TIPOENTIDAD, '') <> 'SEGUIMIENTO_ALTO_VALOR'
+    ORDER BY N.FECHACREACION DESC;
+
+    -- RESULT SET 3: Unread count (over all notifications, not just the page)
+    SELECT COUNT(*) AS UNREAD_COUNT
+    FROM dbo.TM_NOTIFICACION
+    WHERE IDUSUARIO = @IdUsuario AND LEIDA = 0 AND ACTIVO = 1
+      AND ISNULL(TIPOENTIDAD, '') <> 'SEGUIMIENTO_ALTO_VALOR';
+END;
+GO
+PRINT '  Updated: usp_ObtenerNotificacionesUsuario (reads materialized alerts)';
+GO
+
+-- First run, so the alerts exist before the schedule is enabled
+EXEC usp_MaterializarAlertasAltoValor;
+GO
+
+-- Verification: materialized alerts vs. the live condition (counts must match)
+SELECT
+    (SELECT COUNT(*) FROM TM_NOTIFICACION
+     WHERE TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND ACTIVO = 1) AS ALERTAS_MATERIALIZADAS,
+    (SELECT COUNT(*) FROM TM_SEGUIMIENTO S
+     INNER JOIN TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+     WHERE S.PRIORIDAD = 'ALTA' AND S.ESTADO = 'PENDIENTE' AND S.ACTIVO = 1
+       AND DATEDIFF(HOUR,
+             CAST(S.FECHAPROGRAMADA AS DATETIME) + CAST(ISNULL(S.HORAPROGRAMADA, '00:00:00') AS DATETIME),
+             GETDATE()) >= 24) AS ALERTAS_VIGENTES;
+EXEC usp_ObtenerNotificacionesUsuario @IdUsuario = 4, @Limite = 10;
+GO
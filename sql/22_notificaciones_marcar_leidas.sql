@@ -0,0 +1,118 @@
+-- =====================================================================
+-- 22_notificaciones_marcar_leidas.sql
+-- Description: Mark many notifications as read in one call (HU007)
+--              - usp_MarcarNotificacionesLeidas takes a list of IDs, or
+--                "every notification of the user up to a timestamp", and
+--                runs one set-based UPDATE that also fills FECHALEIDA
+--              - Returns one row per requested ID (MARCADA / YA_LEIDA /
+--                NO_ENCONTRADA) plus a summary, so clearing a badge of 40
+--                notifications is one invocation, one connection and one
+--                commit instead of 40
+-- Used by: TB1_notificaciones_marcar_leidas_lambda (PUT /notificaciones/leidas)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Unread notifications of a user by date
+-- (mark-all-read up to a timestamp)
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_NOTIFICACION_USUARIO_NOLEIDA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_NOTIFICACION_USUARIO_NOLEIDA
+    ON TM_NOTIFICACION (IDUSUARIO, FECHACREACION)
+    WHERE LEIDA = 0 AND ACTIVO = 1;
+    PRINT '  Created: IX_NOTIFICACION_USUARIO_NOLEIDA';
+END
+GO
+
+-- =====================================================================
+-- HU007: Bulk mark-as-read
+-- @Ids: comma separated IDNOTIFICACION list ('12,15,31'); when NULL every
+-- unread notification of the user created up to @Hasta (default now) is
+-- marked. Only notifications of @IdUsuario are touched.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_MarcarNotificacionesLeidas
+    @IdUsuario INT,
+    @Ids NVARCHAR(MAX) = NULL,
+    @Hasta DATETIME = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Ahora DATETIME = GETDATE();
+    DECLARE @Marcadas TABLE (IDNOTIFICACION INT PRIMARY KEY);
+
+    IF @Ids IS NOT NULL
+    BEGIN
+        DECLARE @Solicitadas TABLE (IDNOTIFICACION INT PRIMARY KEY);
+
+        INSERT INTO @Solicitadas (IDNOTIFICACION)
+        SELECT DISTINCT TRY_CAST(value AS INT)
+        FROM STRING_SPLIT(@Ids, ',')
+        WHERE TRY_CAST(value AS INT) IS NOT NULL;
+
+        UPDATE N
+        SET LEIDA = 1,
+            FECHALEIDA = @Ahora
+        OUTPUT inserted.IDNOTIFICACION INTO @Marcadas
+        FROM dbo.TM_NOTIFICACION N
+        INNER JOIN @Solicitadas S ON S.IDNOTIFICACION = N.IDNOTIFICACION
+        WHERE N.IDUSUARIO = @IdUsuario
+          AND N.LEIDA = 0
+          AND N.ACTIVO = 1;
+
+        -- RESULT SET 1: One row per requested ID
+        SELECT
+            S.IDNOTIFICACION,
+            CASE
+                WHEN M.IDNOTIFICACION IS NOT NULL THEN 'MARCADA'
+                WHEN N.IDNOTIFICACION IS NOT NULL THEN 'YA_LEIDA'
+                ELSE 'NO_ENCONTRADA'
+            END AS RESULTADO,
+            N.FECHALEIDA
+        FROM @Solicitadas S
+        LEFT JOIN @Marcadas M ON M.IDNOTIFICACION = S.IDNOTIFICACION
+        LEFT JOIN dbo.TM_NOTIFICACION N
+            ON N.IDNOTIFICACION = S.IDNOTIFICACION AND N.IDUSUARIO = @IdUsuario AND N.ACTIVO = 1
+        ORDER BY S.IDNOTIFICACION;
+    END
+    ELSE
+    BEGIN
+        IF @Hasta IS NULL SET @Hasta = @Ahora;
+
+        UPDATE N
+        SET LEIDA = 1,
+            FECHALEIDA = @Ahora
+        OUTPUT inserted.IDNOTIFICACION INTO @Marcadas
+        FROM dbo.TM_NOTIFICACION N
+        WHERE N.IDUSUARIO = @IdUsuario
+          AND N.LEIDA = 0
+          AND N.ACTIVO = 1
+          AND N.FECHACREACION <= @Hasta;
+
+        -- RESULT SET 1: The notifications marked
+        SELECT IDNOTIFICACION, 'MARCADA' AS RESULTADO, @Ahora AS FECHALEIDA
+        FROM @Marcadas
+        ORDER BY IDNOTIFICACION;
+    END
+
+    -- RESULT SET 2: Summary and what is still unread
+    SELECT
+        (SELECT COUNT(*) FROM @Marcadas) AS Marcadas,
+        @Ahora AS FechaLeida,
+        (SELECT COUNT(*) FROM dbo.TM_NOTIFICACION
+         WHERE IDUSUARIO = @IdUsuario AND LEIDA = 0 AND ACTIVO = 1
+           AND ISNULL(TIPOENTIDAD, '') <> 'SEGUIMIENTO_ALTO_VALOR') AS NoLeidas;
+END;
+GO
+PRINT '  Created: usp_MarcarNotificacionesLeidas';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+EXEC usp_MarcarNotificacionesLeidas @IdUsuario = 4, @Ids = N'1,2,3,999999';
+EXEC usp_MarcarNotificacionesLeidas @IdUsuario = 4, @Ids = NULL, @Hasta = NULL;
+ROLLBACK TRANSACTION;
+GO
@@ -0,0 +1,131 @@
+-- =====================================================================
+-- 23_seguimientos_crear_lote.sql
+-- Description: Batch creation of follow-ups (HU009)
+--              - TM_SEGUIMIENTO_LOTE: staging rows of one batch, loaded by
+--                the Lambda with a single fast_executemany INSERT
+--              - usp_CrearSeguimientosLote validates the references of the
+--                whole batch set-wise, inserts the valid rows with one
+--                MERGE and returns one row per item (new ID or error)
+--              - Staging, insert and cleanup run in the caller's
+--                transaction, so a week of follow-ups is one round trip
+--                for the rows, one EXEC and one commit
+-- Used by: TB1_seguimiento_crear_lote_lambda (POST /seguimientos/lote)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Table: TM_SEGUIMIENTO_LOTE (Staging rows of a batch create)
+-- Rows only live inside the creating transaction; ITEM is the position
+-- of the follow-up in the request.
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'TM_SEGUIMIENTO_LOTE')
+BEGIN
+    CREATE TABLE TM_SEGUIMIENTO_LOTE (
+        IDLOTE              UNIQUEIDENTIFIER NOT NULL,
+        ITEM                INT NOT NULL,
+        IDEMPRESA           INT NOT NULL,
+        IDTIPOSEGUIMIENTO   INT NULL,
+        IDUSUARIOASIGNADO   INT NOT NULL,
+        FECHAPROGRAMADA     DATE NOT NULL,
+        HORAPROGRAMADA      TIME NULL,
+        PRIORIDAD           NVARCHAR(16) NOT NULL,
+        NOTAS               NVARCHAR(1024) NULL,
+        USUARIOCREA         INT NOT NULL,
+        CONSTRAINT PK_SEGUIMIENTO_LOTE PRIMARY KEY CLUSTERED (IDLOTE, ITEM)
+    );
+    PRINT '  Created: TM_SEGUIMIENTO_LOTE';
+END
+GO
+
+-- =====================================================================
+-- HU009: Batch create
+-- @Atomico = 1 creates nothing when any item of the batch is invalid;
+-- otherwise the valid items are created and the rest reported.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_CrearSeguimientosLote
+    @IdLote UNIQUEIDENTIFIER,
+    @Atomico BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Resultado TABLE (
+        ITEM INT PRIMARY KEY,
+        IDSEGUIMIENTO INT NULL,
+        ERROR NVARCHAR(128) NULL
+    );
+    DECLARE @Creados TABLE (ITEM INT PRIMARY KEY, IDSEGUIMIENTO INT NOT NULL);
+
+    -- One pass over the batch checks every reference
+    INSERT INTO @Resultado (ITEM, ERROR)
+    SELECT
+        L.ITEM,
+        CASE
+            WHEN E.IDEMPRESA IS NULL THEN N'Empresa no encontrada o inactiva'
+            WHEN U.IDUSUARIO IS NULL THEN N'Usuario asignado no encontrado o inactivo'
+            WHEN L.IDTIPOSEGUIMIENTO IS NOT NULL AND T.IDTIPOSEGUIMIENTO IS NULL
+                THEN N'Tipo de seguimiento no encontrado o inactivo'
+        END
+    FROM dbo.TM_SEGUIMIENTO_LOTE L
+    LEFT JOIN dbo.TM_EMPRESA E ON E.IDEMPRESA = L.IDEMPRESA AND E.ACTIVO = 1
+    LEFT JOIN dbo.TM_USUARIO U ON U.IDUSUARIO = L.IDUSUARIOASIGNADO AND U.ACTIVO = 1
+    LEFT JOIN dbo.TM_SEGUIMIENTO_TIPO T ON T.IDTIPOSEGUIMIENTO = L.IDTIPOSEGUIMIENTO AND T.ACTIVO = 1
+    WHERE L.IDLOTE = @IdLote;
+
+    IF @Atomico = 0 OR NOT EXISTS (SELECT 1 FROM @Resultado WHERE ERROR IS NOT NULL)
+    BEGIN
+        -- MERGE (instead of INSERT) so OUTPUT can map each new ID to its item
+        MERGE INTO dbo.TM_SEGUIMIENTO AS S
+        USING (
+            SELECT L.*
+            FROM dbo.TM_SEGUIMIENTO_LOTE L
+            INNER JOIN @Resultado R ON R.ITEM = L.ITEM AND R.ERROR IS NULL
+            WHERE L.IDLOTE = @IdLote
+        ) AS L
+        ON 1 = 0
+        WHEN NOT MATCHED THEN
+            INSERT (
+                IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO,
+                FECHAPROGRAMADA, HORAPROGRAMADA, PRIORIDAD, NOTAS, USUARIOCREA
+            )
+            VALUES (
+                L.IDEMPRESA, L.IDTIPOSEGUIMIENTO, L.IDUSUARIOASIGNADO,
+                L.FECHAPROGRAMADA, L.HORAPROGRAMADA, L.PRIORIDAD, L.NOTAS, L.USUARIOCREA
+            )
+        OUTPUT L.ITEM, inserted.IDSEGUIMIENTO INTO @Creados (ITEM, IDSEGUIMIENTO);
+
+        UPDATE R
+        SET IDSEGUIMIENTO = C.IDSEGUIMIENTO
+        FROM @Resultado R
+        INNER JOIN @Creados C ON C.ITEM = R.ITEM;
+    END
+    ELSE
+    BEGIN
+        UPDATE @Resultado
+        SET ERROR = N'No creado: otro seguimiento del lote es inválido'
+        WHERE ERROR IS NULL;
+    END
+
+    DELETE FROM dbo.TM_SEGUIMIENTO_LOTE WHERE IDLOTE = @IdLote;
+
+    -- RESULT SET 1: One row per item (IDSEGUIMIENTO when created, ERROR when rejected)
+    SELECT ITEM, IDSEGUIMIENTO, ERROR
+    FROM @Resultado
+    ORDER BY ITEM;
+END;
+GO
+PRINT '  Created: usp_CrearSeguimientosLote (HU009)';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+DECLARE @Lote UNIQUEIDENTIFIER = NEWID();
+INSERT INTO TM_SEGUIMIENTO_LOTE (IDLOTE, ITEM, IDEMPRESA, IDTIPOSEGUIMIENTO, IDUSUARIOASIGNADO,
+                                 FECHAPROGRAMADA, HORAPROGRAMADA, PRIORIDAD, NOTAS, USUARIOCREA)
+VALUES (@Lote, 0, 1, 1, 4, CAST(GETDATE() AS DATE), '10:00', 'ALTA', N'Verificación', 1),
+       (@Lote, 1, 999999, 1, 4, CAST(GETDATE() AS DATE), '11:00', 'MEDIA', NULL, 1);
+EXEC usp_CrearSeguimientosLote @IdLote = @Lote;
+ROLLBACK TRANSACTION;
+GO
@@ -0,0 +1,244 @@
+-- =====================================================================
+-- 24_empresas_importacion.sql
+-- Description: Bulk company import (HU001 support)
+--              - TM_EMPRESA_IMPORTACION: staging rows of one import, loaded
+--                in chunks with fast_executemany (empresa_import)
+--              - usp_ImportarEmpresas merges the staged rows into
+--                TM_EMPRESA and TM_EMPRESA_SEDE set-wise, keeps the search
+--                keys of script 17 current for the affected companies and
+--                returns a summary plus a report keyed on RUC (repeated in
+--                the file, already registered, updated)
+--              - Staging, merge and cleanup run in the caller's
+--                transaction: an import is all or nothing
+-- Requires: 17_empresas_normalized_search_keys.sql
+-- Used by: TB1_empresa_importar_lambda (POST /empresas/importar),
+--          tools/import_empresas.py
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Table: TM_EMPRESA_IMPORTACION (Staging rows of a company import)
+-- FILA is the row number in the source file (header = 1). RUC arrives
+-- already compacted to its 11 digits.
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.tables WHERE name = 'TM_EMPRESA_IMPORTACION')
+BEGIN
+    CREATE TABLE TM_EMPRESA_IMPORTACION (
+        IDIMPORTACION       UNIQUEIDENTIFIER NOT NULL,
+        FILA                INT NOT NULL,
+        NOMBRECOMERCIAL     NVARCHAR(256) NOT NULL,
+        RAZONSOCIAL         NVARCHAR(256) NULL,
+        RUC                 NVARCHAR(11) NOT NULL,
+        SEDEPRINCIPAL       NVARCHAR(256) NULL,
+        DOMICILIO           NVARCHAR(512) NULL,
+        CONTACTO_NOMBRE     NVARCHAR(128) NULL,
+        CONTACTO_EMAIL      NVARCHAR(128) NULL,
+        CONTACTO_TELEFONO   NVARCHAR(20) NULL,
+        CONTACTO_CARGO      NVARCHAR(64) NULL,
+        TIPOCLIENTE         NVARCHAR(64) NULL,
+        LINEANEGOCIO        NVARCHAR(128) NULL,
+        SUBLINEANEGOCIO     NVARCHAR(128) NULL,
+        TIPOCREDITO         NVARCHAR(64) NULL,
+        TIPOCARTERA         NVARCHAR(64) NULL,
+        ACTIVIDADECONOMICA  NVARCHAR(256) NULL,
+        RIESGO              NVARCHAR(32) NULL,
+        NUMTRABAJADORES     INT NULL,
+        USUARIOCREA         INT NOT NULL,
+        CONSTRAINT PK_EMPRESA_IMPORTACION PRIMARY KEY CLUSTERED (IDIMPORTACION, FILA)
+    );
+    PRINT '  Created: TM_EMPRESA_IMPORTACION';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_EMPRESA_IMPORTACION_RUC')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_EMPRESA_IMPORTACION_RUC
+    ON TM_EMPRESA_IMPORTACION (IDIMPORTACION, RUC, FILA);
+    PRINT '  Created: IX_EMPRESA_IMPORTACION_RUC';
+END
+GO
+
+-- =====================================================================
+-- HU001: Merge an import
+-- The first row of each RUC wins; later ones are reported as
+-- DUPLICADO_ARCHIVO. A RUC that is already registered is reported as
+-- EXISTENTE, or updated (ACTUALIZADA, non-empty fields only) when
+-- @Actualizar = 1. New companies get their principal sede.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ImportarEmpresas
+    @IdImportacion UNIQUEIDENTIFIER,
+    @Actualizar BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    CREATE TABLE #Resultado (
+        FILA            INT PRIMARY KEY,
+        RUC             NVARCHAR(11) NOT NULL,
+        RESULTADO       NVARCHAR(32) NULL,
+        IDEMPRESA       INT NULL,
+        FILAORIGINAL    INT NULL
+    );
+
+    -- Classify every staged row by its RUC
+    INSERT INTO #Resultado (FILA, RUC, RESULTADO, IDEMPRESA, FILAORIGINAL)
+    SELECT
+        I.FILA,
+        I.RUC,
+        CASE
+            WHEN I.FILA <> I.FILAORIGINAL THEN 'DUPLICADO_ARCHIVO'
+            WHEN E.IDEMPRESA IS NOT NULL AND @Actualizar = 1 THEN 'ACTUALIZADA'
+            WHEN E.IDEMPRESA IS NOT NULL THEN 'EXISTENTE'
+        END,
+        CASE WHEN I.FILA = I.FILAORIGINAL THEN E.IDEMPRESA END,
+        I.FILAORIGINAL
+    FROM (
+        SELECT FILA, RUC, MIN(FILA) OVER (PARTITION BY RUC) AS FILAORIGINAL
+        FROM dbo.TM_EMPRESA_IMPORTACION
+        WHERE IDIMPORTACION = @IdImportacion
+    ) I
+    OUTER APPLY (
+        SELECT MIN(X.IDEMPRESA) AS IDEMPRESA
+        FROM dbo.TM_EMPRESA X
+        WHERE X.RUC_COMPACTO = I.RUC
+    ) E;
+
+    -- New companies; MERGE (instead of INSERT) so OUTPUT can map each ID to its row
+    DECLARE @Creadas TABLE (FILA INT PRIMARY KEY, IDEMPRESA INT NOT NULL);
+
+    MERGE INTO dbo.TM_EMPRESA AS T
+    USING (
+        SELECT I.*
+        FROM dbo.TM_EMPRESA_IMPORTACION I
+        INNER JOIN #Resultado R ON R.FILA = I.FILA AND R.RESULTADO IS NULL
+        WHERE I.IDIMPORTACION = @IdImportacion
+    ) AS I
+    ON 1 = 0
+    WHEN NOT MATCHED THEN
+        INSERT (
+            NOMBRECOMERCIAL, RAZONSOCIAL, RUC, SEDEPRINCIPAL, DOMICILIO,
+            CONTACTO_NOMBRE, CONTACTO_EMAIL, CONTACTO_TELEFONO, CONTACTO_CARGO,
+            TIPOCLIENTE, LINEANEGOCIO, SUBLINEANEGOCIO, TIPOCREDITO, TIPOCARTERA,
+            ACTIVIDADECONOMICA, RIESGO, NUMTRABAJADORES, USUARIOCREA
+        )
+        VALUES (
+            I.NOMBRECOMERCIAL, I.RAZONSOCIAL, I.RUC, I.SEDEPRINCIPAL, I.DOMICILIO,
+            I.CONTACTO_NOMBRE, I.CONTACTO_EMAIL, I.CONTACTO_TELEFONO, I.CONTACTO_CARGO,
+            I.TIPOCLIENTE, I.LINEANEGOCIO, I.SUBLINEANEGOCIO, I.TIPOCREDITO, I.TIPOCARTERA,
+            I.ACTIVIDADECONOMICA, I.RIESGO, I.NUMTRABAJADORES, I.USUARIOCREA
+        )
+    OUTPUT I.FILA, inserted.IDEMPRESA INTO @Creadas (FILA, IDEMPRESA);
+
+    UPDATE R
+    SET RESULTADO = 'CREADA',
+        IDEMPRESA = C.IDEMPRESA
+    FROM #Resultado R
+    INNER JOIN @Creadas C ON C.FILA = R.FILA;
+
+    -- Duplicates point at the company of their first row
+    UPDATE D
+    SET IDEMPRESA = O.IDEMPRESA
+    FROM #Resultado D
+    INNER JOIN #Resultado O ON O.FILA = D.FILAORIGINAL
+    WHERE D.RESULTADO = 'DUPLICADO_ARCHIVO';
+
+    -- Registered companies (only with @Actualizar = 1)
+    UPDATE E
+    SET NOMBRECOMERCIAL = I.NOMBRECOMERCIAL,
+        RAZONSOCIAL = ISNULL(I.RAZONSOCIAL, E.RAZONSOCIAL),
+        SEDEPRINCIPAL = ISNULL(I.SEDEPRINCIPAL, E.SEDEPRINCIPAL),
+        DOMICILIO = ISNULL(I.DOMICILIO, E.DOMICILIO),
+        CONTACTO_NOMBRE = ISNULL(I.CONTACTO_NOMBRE, E.CONTACTO_NOMBRE),
+        CONTACTO_EMAIL = ISNULL(I.CONTACTO_EMAIL, E.CONTACTO_EMAIL),
+        CONTACTO_TELEFONO = ISNULL(I.CONTACTO_TELEFONO, E.CONTACTO_TELEFONO),
+        CONTACTO_CARGO = ISNULL(I.CONTACTO_CARGO, E.CONTACTO_CARGO),
+        TIPOCLIENTE = ISNULL(I.TIPOCLIENTE, E.TIPOCLIENTE),
+        LINEANEGOCIO = ISNULL(I.LINEANEGOCIO, E.LINEANEGOCIO),
+        SUBLINEANEGOCIO = ISNULL(I.SUBLINEANEGOCIO, E.SUBLINEANEGOCIO),
+        TIPOCREDITO = ISNULL(I.TIPOCREDITO, E.TIPOCREDITO),
+        TIPOCARTERA = ISNULL(I.TIPOCARTERA, E.TIPOCARTERA),
+        ACTIVIDADECONOMICA = ISNULL(I.ACTIVIDADECONOMICA, E.ACTIVIDADECONOMICA),
+        RIESGO = ISNULL(I.RIESGO, E.RIESGO),
+        NUMTRABAJADORES = ISNULL(I.NUMTRABAJADORES, E.NUMTRABAJADORES),
+        USUARIOMODIFICA = I.USUARIOCREA,
+        FECHAMODIFICA = GETDATE()
+    FROM dbo.TM_EMPRESA E
+    INNER JOIN #Resultado R ON R.IDEMPRESA = E.IDEMPRESA AND R.RESULTADO = 'ACTUALIZADA'
+    INNER JOIN dbo.TM_EMPRESA_IMPORTACION I ON I.IDIMPORTACION = @IdImportacion AND I.FILA = R.FILA;
+
+    -- Principal sede of the new companies
+    INSERT INTO dbo.TM_EMPRESA_SEDE (
+        IDEMPRESA, NOMBRESEDE, DOMICILIO, TELEFONO, CONTACTO_NOMBRE,
+        CONTACTO_EMAIL, CONTACTO_TELEFONO, ESPRINCIPAL, USUARIOCREA
+    )
+    SELECT
+        R.IDEMPRESA, LEFT(ISNULL(I.SEDEPRINCIPAL, N'Principal'), 128), I.DOMICILIO, I.CONTACTO_TELEFONO,
+        I.CONTACTO_NOMBRE, I.CONTACTO_EMAIL, I.CONTACTO_TELEFONO, 1, I.USUARIOCREA
+    FROM #Resultado R
+    INNER JOIN dbo.TM_EMPRESA_IMPORTACION I ON I.IDIMPORTACION = @IdImportacion AND I.FILA = R.FILA
+    WHERE R.RESULTADO = 'CREADA';
+
+    -- Search keys and words of the affected companies (script 17)
+    UPDATE E
+    SET NOMBRE_BUSQUEDA = dbo.fn_ClaveBusqueda(E.NOMBRECOMERCIAL),
+        RAZONSOCIAL_BUSQUEDA = dbo.fn_ClaveBusqueda(E.RAZONSOCIAL),
+        RUC_COMPACTO = dbo.fn_RucCompacto(E.RUC)
+    FROM dbo.TM_EMPRESA E
+    INNER JOIN #Resultado R ON R.IDEMPRESA = E.IDEMPRESA AND R.RESULTADO IN ('CREADA', 'ACTUALIZADA');
+
+    DELETE P
+    FROM dbo.TM_EMPRESA_PALABRA P
+    INNER JOIN #Resultado R ON R.IDEMPRESA = P.IDEMPRESA AND R.RESULTADO = 'ACTUALIZADA';
+
+    INSERT INTO dbo.TM_EMPRESA_PALABRA (PALABRA, IDEMPRESA)
+    SELECT DISTINCT LEFT(w.value, 128), E.IDEMPRESA
+    FROM dbo.TM_EMPRESA E
+    INNER JOIN #Resultado R ON R.IDEMPRESA = E.IDEMPRESA AND R.RESULTADO IN ('CREADA', 'ACTUALIZADA')
+    CROSS APPLY STRING_SPLIT(CONCAT(E.NOMBRE_BUSQUEDA, N' ', E.RAZONSOCIAL_BUSQUEDA, N' ',
+                                    dbo.fn_ClaveBusqueda(E.CONTACTO_NOMBRE)), N' ') w
+    WHERE w.value <> N'';
+
+    DELETE FROM dbo.TM_EMPRESA_IMPORTACION WHERE IDIMPORTACION = @IdImportacion;
+
+    -- RESULT SET 1: Summary
+    SELECT
+        COUNT(*) AS Filas,
+        SUM(CASE WHEN RESULTADO = 'CREADA' THEN 1 ELSE 0 END) AS Creadas,
+        SUM(CASE WHEN RESULTADO = 'ACTUALIZADA' THEN 1 ELSE 0 END) AS Actualizadas,
+        SUM(CASE WHEN RESULTADO = 'EXISTENTE' THEN 1 ELSE 0 END) AS Existentes,
+        SUM(CASE WHEN RESULTADO = 'DUPLICADO_ARCHIVO' THEN 1 ELSE 0 END) AS Duplicadas
+    FROM #Resultado;
+
+    -- RESULT SET 2: Report of every row that did not create a company, by RUC
+    SELECT
+        FILA,
+        RUC,
+        RESULTADO,
+        IDEMPRESA,
+        CASE RESULTADO
+            WHEN 'DUPLICADO_ARCHIVO' THEN CONCAT(N'RUC repetido; se usó la fila ', FILAORIGINAL)
+            WHEN 'EXISTENTE' THEN N'RUC ya registrado'
+            WHEN 'ACTUALIZADA' THEN N'RUC ya registrado; datos actualizados'
+        END AS DETALLE
+    FROM #Resultado
+    WHERE RESULTADO <> 'CREADA'
+    ORDER BY RUC, FILA;
+
+    DROP TABLE #Resultado;
+END;
+GO
+PRINT '  Created: usp_ImportarEmpresas (HU001)';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+DECLARE @Importacion UNIQUEIDENTIFIER = NEWID();
+INSERT INTO TM_EMPRESA_IMPORTACION (IDIMPORTACION, FILA, NOMBRECOMERCIAL, RUC, TIPOCLIENTE, TIPOCARTERA, USUARIOCREA)
+VALUES (@Importacion, 2, N'Importada Uno', '20999999991', 'EMPRESA', 'ESTANDAR', 1),
+       (@Importacion, 3, N'Importada Uno (copia)', '20999999991', 'EMPRESA', 'ESTANDAR', 1),
+       (@Importacion, 4, N'TechCorp Peru', '20123456789', 'EMPRESA', 'PREMIUM', 1);
+EXEC usp_ImportarEmpresas @IdImportacion = @Importacion;
+ROLLBACK TRANSACTION;
+GO
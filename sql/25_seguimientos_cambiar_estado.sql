@@ -0,0 +1,109 @@
+-- =====================================================================
+-- 25_seguimientos_cambiar_estado.sql
+-- Description: Status transitions for many follow-ups in one call (HU009)
+--              - usp_CambiarEstadoSeguimientos takes a list of IDs, or
+--                "every follow-up of a user on a date" (a supervisor
+--                cancelling a day of visits), and runs one set-based
+--                UPDATE that also fills FECHACOMPLETADO
+--              - Only open follow-ups (PENDIENTE / EN_PROGRESO) move;
+--                COMPLETADO and CANCELADO are final
+--              - Returns one row per follow-up (ACTUALIZADO / SIN_CAMBIO /
+--                ESTADO_FINAL / NO_ENCONTRADO) plus a summary: one
+--                invocation, one statement and one commit per action
+-- Used by: TB1_seguimientos_estado_lambda (PUT /seguimientos/estado)
+-- Note: single follow-up edits keep using usp_ActualizarSeguimiento,
+--       now called once with every changed field (PUT /seguimiento)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- =====================================================================
+-- HU009: Batch status transition
+-- @Ids: comma separated IDSEGUIMIENTO list ('12,15,31'); when NULL every
+-- active follow-up of @IdUsuarioAsignado scheduled on @Fecha is targeted
+-- (IX_SEGUIMIENTO_FECHA_USUARIO). @Resultado / @Notas are optional and
+-- only overwrite when given.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_CambiarEstadoSeguimientos
+    @Estado NVARCHAR(32),
+    @UsuarioModifica INT,
+    @Ids NVARCHAR(MAX) = NULL,
+    @IdUsuarioAsignado INT = NULL,
+    @Fecha DATE = NULL,
+    @Resultado NVARCHAR(64) = NULL,
+    @Notas NVARCHAR(1024) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Ahora DATETIME = GETDATE();
+    DECLARE @Solicitados TABLE (IDSEGUIMIENTO INT PRIMARY KEY);
+    DECLARE @Actualizados TABLE (IDSEGUIMIENTO INT PRIMARY KEY, ESTADOANTERIOR NVARCHAR(32) NOT NULL);
+
+    IF @Ids IS NOT NULL
+    BEGIN
+        INSERT INTO @Solicitados (IDSEGUIMIENTO)
+        SELECT DISTINCT TRY_CAST(value AS INT)
+        FROM STRING_SPLIT(@Ids, ',')
+        WHERE TRY_CAST(value AS INT) IS NOT NULL;
+    END
+    ELSE
+    BEGIN
+        INSERT INTO @Solicitados (IDSEGUIMIENTO)
+        SELECT IDSEGUIMIENTO
+        FROM dbo.TM_SEGUIMIENTO
+        WHERE FECHAPROGRAMADA = @Fecha
+          AND IDUSUARIOASIGNADO = @IdUsuarioAsignado
+          AND ACTIVO = 1;
+    END
+
+    UPDATE S
+    SET ESTADO = @Estado,
+        RESULTADO = ISNULL(@Resultado, S.RESULTADO),
+        NOTAS = ISNULL(@Notas, S.NOTAS),
+        FECHACOMPLETADO = CASE WHEN @Estado = 'COMPLETADO' THEN @Ahora ELSE S.FECHACOMPLETADO END,
+        USUARIOMODIFICA = @UsuarioModifica,
+        FECHAMODIFICA = @Ahora
+    OUTPUT inserted.IDSEGUIMIENTO, deleted.ESTADO INTO @Actualizados (IDSEGUIMIENTO, ESTADOANTERIOR)
+    FROM dbo.TM_SEGUIMIENTO S
+    INNER JOIN @Solicitados Q ON Q.IDSEGUIMIENTO = S.IDSEGUIMIENTO
+    WHERE S.ACTIVO = 1
+      AND S.ESTADO IN ('PENDIENTE', 'EN_PROGRESO')
+      AND S.ESTADO <> @Estado;
+
+    -- RESULT SET 1: One row per targeted follow-up
+    SELECT
+        Q.IDSEGUIMIENTO,
+        CASE
+            WHEN A.IDSEGUIMIENTO IS NOT NULL THEN 'ACTUALIZADO'
+            WHEN S.IDSEGUIMIENTO IS NULL THEN 'NO_ENCONTRADO'
+            WHEN S.ESTADO = @Estado THEN 'SIN_CAMBIO'
+            ELSE 'ESTADO_FINAL'
+        END AS RESULTADO,
+        S.IDEMPRESA,
+        ISNULL(A.ESTADOANTERIOR, S.ESTADO) AS ESTADOANTERIOR,
+        S.ESTADO
+    FROM @Solicitados Q
+    LEFT JOIN @Actualizados A ON A.IDSEGUIMIENTO = Q.IDSEGUIMIENTO
+    LEFT JOIN dbo.TM_SEGUIMIENTO S ON S.IDSEGUIMIENTO = Q.IDSEGUIMIENTO AND S.ACTIVO = 1
+    ORDER BY Q.IDSEGUIMIENTO;
+
+    -- RESULT SET 2: Summary
+    SELECT
+        (SELECT COUNT(*) FROM @Solicitados) AS Solicitados,
+        (SELECT COUNT(*) FROM @Actualizados) AS Actualizados,
+        @Ahora AS FechaModifica;
+END;
+GO
+PRINT '  Created: usp_CambiarEstadoSeguimientos (HU009)';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+EXEC usp_CambiarEstadoSeguimientos @Estado = 'CANCELADO', @UsuarioModifica = 2, @Ids = N'1,2,3,999999';
+DECLARE @Hoy DATE = CAST(GETDATE() AS DATE);
+EXEC usp_CambiarEstadoSeguimientos @Estado = 'CANCELADO', @UsuarioModifica = 2,
+     @IdUsuarioAsignado = 4, @Fecha = @Hoy, @Resultado = N'Cancelado por supervisor';
+ROLLBACK TRANSACTION;
+GO
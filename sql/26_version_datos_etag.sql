@@ -0,0 +1,280 @@
+-- =====================================================================
+-- 26_version_datos_etag.sql
+-- Description: Change markers for conditional GET (ETag / 304)
+--              - VERSIONFILA ROWVERSION on the tables the polled views
+--                read (TM_SEGUIMIENTO, TM_EMPRESA, TM_USUARIO,
+--                TM_NOTIFICACION, TM_SEGUIMIENTO_TIPO): SQL Server bumps it
+--                on every insert and update, whoever writes the row
+--              - usp_ObtenerVersionDatos returns, for the rows a view
+--                would read, the row count and the highest VERSIONFILA of
+--                each table. Same values => same response, so the handler
+--                answers If-None-Match with 304 without running the view
+--              - Soft-deleted rows (ACTIVO = 0) are counted too, so
+--                deactivating a row also changes the marker
+--              - usp_ObtenerEmpresa lists its company columns instead of
+--                e.*: VERSIONFILA (BINARY(8), bytes in pyodbc) and the
+--                search keys of script 17 stay out of GET /empresa
+--              - usp_ObtenerVersionEmpresa (18_empresa_version_cache.sql)
+--                moves from modification dates to VERSIONFILA, which also
+--                catches renamed follow-up types and same-tick writes
+-- Used by: TB1_agenda_dia_lambda (GET /agenda),
+--          TB1_calendario_supervisor_lambda (GET /calendario),
+--          TB1_notificaciones_lambda (GET /notificaciones)
+--          through lambdas/conditional_get.py,
+--          TB1_empresa_obtener_lambda (GET /empresa)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Columns: VERSIONFILA (ROWVERSION)
+-- ---------------------------------------------------------------------
+IF COL_LENGTH('TM_SEGUIMIENTO', 'VERSIONFILA') IS NULL
+BEGIN
+    ALTER TABLE TM_SEGUIMIENTO ADD VERSIONFILA ROWVERSION;
+    PRINT '  Created: TM_SEGUIMIENTO.VERSIONFILA';
+END
+GO
+
+IF COL_LENGTH('TM_EMPRESA', 'VERSIONFILA') IS NULL
+BEGIN
+    ALTER TABLE TM_EMPRESA ADD VERSIONFILA ROWVERSION;
+    PRINT '  Created: TM_EMPRESA.VERSIONFILA';
+END
+GO
+
+IF COL_LENGTH('TM_USUARIO', 'VERSIONFILA') IS NULL
+BEGIN
+    ALTER TABLE TM_USUARIO ADD VERSIONFILA ROWVERSION;
+    PRINT '  Created: TM_USUARIO.VERSIONFILA';
+END
+GO
+
+IF COL_LENGTH('TM_NOTIFICACION', 'VERSIONFILA') IS NULL
+BEGIN
+    ALTER TABLE TM_NOTIFICACION ADD VERSIONFILA ROWVERSION;
+    PRINT '  Created: TM_NOTIFICACION.VERSIONFILA';
+END
+GO
+
+-- Type names and colors are shown in agenda, calendario and alert rows
+IF COL_LENGTH('TM_SEGUIMIENTO_TIPO', 'VERSIONFILA') IS NULL
+BEGIN
+    ALTER TABLE TM_SEGUIMIENTO_TIPO ADD VERSIONFILA ROWVERSION;
+    PRINT '  Created: TM_SEGUIMIENTO_TIPO.VERSIONFILA';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Marker of a date range (agenda, calendario)
+-- Covers the marker query: no lookups and no ACTIVO filter
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_FECHA_VERSION')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_FECHA_VERSION
+    ON TM_SEGUIMIENTO (FECHAPROGRAMADA, IDUSUARIOASIGNADO)
+    INCLUDE (IDEMPRESA, VERSIONFILA);
+    PRINT '  Created: IX_SEGUIMIENTO_FECHA_VERSION';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_NOTIFICACION - Marker of a user's notifications
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_NOTIFICACION_USUARIO_VERSION')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_NOTIFICACION_USUARIO_VERSION
+    ON TM_NOTIFICACION (IDUSUARIO)
+    INCLUDE (VERSIONFILA, TIPOENTIDAD, IDREFERENCIAENTIDAD);
+    PRINT '  Created: IX_NOTIFICACION_USUARIO_VERSION';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Highest VERSIONFILA of a company's follow-ups
+-- Replaces IX_SEGUIMIENTO_EMPRESA_CAMBIO (18_empresa_version_cache.sql)
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_EMPRESA_VERSION')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_EMPRESA_VERSION
+    ON TM_SEGUIMIENTO (IDEMPRESA)
+    INCLUDE (VERSIONFILA, IDTIPOSEGUIMIENTO);
+    PRINT '  Created: IX_SEGUIMIENTO_EMPRESA_VERSION';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_EMPRESA_CAMBIO')
+BEGIN
+    DROP INDEX IX_SEGUIMIENTO_EMPRESA_CAMBIO ON TM_SEGUIMIENTO;
+    PRINT '  Dropped: IX_SEGUIMIENTO_EMPRESA_CAMBIO';
+END
+GO
+
+-- =====================================================================
+-- Change marker of a view
+-- @Vista: 'AGENDA' / 'CALENDARIO' (follow-ups scheduled between
+-- @FechaInicio and @FechaFin visible to @IdUsuario, with the role rules
+-- of usp_ObtenerAgendaDia) or 'NOTIFICACIONES' (notifications of
+-- @IdUsuario and the follow-ups / companies / types their alerts show).
+-- One row: PERFIL, FILAS and the highest VERSIONFILA per table.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerVersionDatos
+    @Vista NVARCHAR(32),
+    @IdUsuario INT,
+    @FechaInicio DATE = NULL,
+    @FechaFin DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @IdPerfil INT;
+    DECLARE @VersionUsuario BINARY(8);
+    SELECT @IdPerfil = IDPERFIL, @VersionUsuario = VERSIONFILA
+    FROM TM_USUARIO WHERE IDUSUARIO = @IdUsuario;
+
+    IF @Vista = 'NOTIFICACIONES'
+    BEGIN
+        SELECT
+            @IdPerfil AS PERFIL,
+            COUNT_BIG(*) AS FILAS,
+            MAX(N.VERSIONFILA) AS VERSION_NOTIFICACION,
+            MAX(S.VERSIONFILA) AS VERSION_SEGUIMIENTO,
+            MAX(E.VERSIONFILA) AS VERSION_EMPRESA,
+            @VersionUsuario AS VERSION_USUARIO,
+            MAX(T.VERSIONFILA) AS VERSION_TIPO
+        FROM TM_NOTIFICACION N
+        LEFT JOIN TM_SEGUIMIENTO S
+            ON N.TIPOENTIDAD = 'SEGUIMIENTO_ALTO_VALOR' AND S.IDSEGUIMIENTO = N.IDREFERENCIAENTIDAD
+        LEFT JOIN TM_EMPRESA E ON E.IDEMPRESA = S.IDEMPRESA
+        LEFT JOIN TM_SEGUIMIENTO_TIPO T ON T.IDTIPOSEGUIMIENTO = S.IDTIPOSEGUIMIENTO
+        WHERE N.IDUSUARIO = @IdUsuario;
+    END
+    ELSE
+    BEGIN
+        IF @FechaFin IS NULL SET @FechaFin = @FechaInicio;
+
+        SELECT
+            @IdPerfil AS PERFIL,
+            COUNT_BIG(*) AS FILAS,
+            MAX(S.VERSIONFILA) AS VERSION_SEGUIMIENTO,
+            MAX(E.VERSIONFILA) AS VERSION_EMPRESA,
+            MAX(U.VERSIONFILA) AS VERSION_USUARIO,
+            MAX(T.VERSIONFILA) AS VERSION_TIPO
+        FROM TM_SEGUIMIENTO S
+        INNER JOIN TM_EMPRESA E ON S.IDEMPRESA = E.IDEMPRESA
+        INNER JOIN TM_USUARIO U ON S.IDUSUARIOASIGNADO = U.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO T ON S.IDTIPOSEGUIMIENTO = T.IDTIPOSEGUIMIENTO
+        WHERE S.FECHAPROGRAMADA BETWEEN @FechaInicio AND @FechaFin
+          AND (
+              @IdPerfil = 1
+              OR (@IdPerfil = 2 AND U.IDSUPERVISOR = @IdUsuario)
+              OR (@IdPerfil = 3 AND S.IDUSUARIOASIGNADO = @IdUsuario)
+          );
+    END
+END;
+GO
+PRINT '  Created: usp_ObtenerVersionDatos';
+GO
+
+-- =====================================================================
+-- HU001: Company details (same result sets as 04_stored_procedures.sql)
+-- The company columns are listed: e.* would now also return VERSIONFILA,
+-- which json.dumps cannot serialize, and the search keys of script 17.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerEmpresa
+    @IdEmpresa INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Company info
+    SELECT
+        e.IDEMPRESA,
+        e.NOMBRECOMERCIAL,
+        e.RAZONSOCIAL,
+        e.RUC,
+        e.SEDEPRINCIPAL,
+        e.DOMICILIO,
+        e.CONTACTO_NOMBRE,
+        e.CONTACTO_EMAIL,
+        e.CONTACTO_TELEFONO,
+        e.CONTACTO_CARGO,
+        e.TIPOCLIENTE,
+        e.LINEANEGOCIO,
+        e.SUBLINEANEGOCIO,
+        e.TIPOCREDITO,
+        e.TIPOCARTERA,
+        e.ACTIVIDADECONOMICA,
+        e.RIESGO,
+        e.NUMTRABAJADORES,
+        e.ACTIVO,
+        e.USUARIOCREA,
+        e.FECHACREA,
+        e.USUARIOMODIFICA,
+        e.FECHAMODIFICA
+    FROM TM_EMPRESA e
+    WHERE e.IDEMPRESA = @IdEmpresa;
+
+    -- Company locations
+    SELECT
+        s.*
+    FROM TM_EMPRESA_SEDE s
+    WHERE s.IDEMPRESA = @IdEmpresa AND s.ACTIVO = 1
+    ORDER BY s.ESPRINCIPAL DESC, s.NOMBRESEDE;
+
+    -- Recent follow-ups
+    SELECT TOP 10
+        seg.IDSEGUIMIENTO,
+        seg.FECHAPROGRAMADA,
+        seg.ESTADO,
+        seg.RESULTADO,
+        st.NOMBRE AS TIPOSEGUIMIENTO
+    FROM TM_SEGUIMIENTO seg
+    LEFT JOIN TM_SEGUIMIENTO_TIPO st ON seg.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+    WHERE seg.IDEMPRESA = @IdEmpresa AND seg.ACTIVO = 1
+    ORDER BY seg.FECHAPROGRAMADA DESC;
+END;
+GO
+PRINT '  Updated: usp_ObtenerEmpresa (explicit company columns)';
+GO
+
+-- =====================================================================
+-- HU001: Change marker of a company detail
+-- Same role as in 18_empresa_version_cache.sql, on VERSIONFILA: the
+-- company's, the highest of its follow-ups and of their types.
+-- Locations have no VERSIONFILA (usp_ObtenerEmpresa returns s.*), so
+-- their row count and latest FECHACREA / FECHAMODIFICA stand in for it.
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerVersionEmpresa
+    @IdEmpresa INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT
+        (SELECT VERSIONFILA FROM TM_EMPRESA WHERE IDEMPRESA = @IdEmpresa) AS VERSION_EMPRESA,
+        (SELECT MAX(S.VERSIONFILA) FROM TM_SEGUIMIENTO S WHERE S.IDEMPRESA = @IdEmpresa) AS VERSION_SEGUIMIENTO,
+        (SELECT MAX(T.VERSIONFILA)
+         FROM TM_SEGUIMIENTO_TIPO T
+         WHERE T.IDTIPOSEGUIMIENTO IN (
+             SELECT S.IDTIPOSEGUIMIENTO FROM TM_SEGUIMIENTO S WHERE S.IDEMPRESA = @IdEmpresa
+         )) AS VERSION_TIPO,
+        (SELECT COUNT_BIG(*) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = @IdEmpresa) AS SEDES,
+        (SELECT MAX(ISNULL(FECHAMODIFICA, FECHACREA)) FROM TM_EMPRESA_SEDE WHERE IDEMPRESA = @IdEmpresa) AS CAMBIO_SEDES;
+END;
+GO
+PRINT '  Updated: usp_ObtenerVersionEmpresa (VERSIONFILA)';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+DECLARE @Hoy DATE = CAST(GETDATE() AS DATE);
+EXEC usp_ObtenerVersionDatos @Vista = 'AGENDA', @IdUsuario = 4, @FechaInicio = @Hoy;
+UPDATE TM_SEGUIMIENTO SET NOTAS = NOTAS WHERE IDUSUARIOASIGNADO = 4 AND FECHAPROGRAMADA = @Hoy;
+EXEC usp_ObtenerVersionDatos @Vista = 'AGENDA', @IdUsuario = 4, @FechaInicio = @Hoy;  -- higher VERSION_SEGUIMIENTO
+EXEC usp_ObtenerVersionDatos @Vista = 'NOTIFICACIONES', @IdUsuario = 4;
+EXEC usp_ObtenerEmpresa @IdEmpresa = 1;  -- no VERSIONFILA column
+EXEC usp_ObtenerVersionEmpresa @IdEmpresa = 1;
+ROLLBACK TRANSACTION;
+GO
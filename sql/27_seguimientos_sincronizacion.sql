@@ -0,0 +1,174 @@
+-- =====================================================================
+-- 27_seguimientos_sincronizacion.sql
+-- Description: Delta sync for the agenda and the calendar
+--              - usp_ObtenerCambiosSeguimientos returns the follow-ups of
+--                a view (agenda of a day, calendar of a range) created or
+--                modified since a watermark, instead of the whole range
+--              - Follow-ups that left the view since then (ACTIVO = 0,
+--                rescheduled out of the range, reassigned) come back as
+--                IDs for the client to drop
+--              - Indexes on FECHACREA / FECHAMODIFICA so the changed rows
+--                are two range seeks instead of a table scan (same scheme
+--                as 16_empresas_search_index_feed.sql)
+-- Used by: TB1_agenda_dia_lambda (GET /agenda?since=...),
+--          TB1_calendario_supervisor_lambda (GET /calendario?since=...)
+-- Note: every writer of TM_SEGUIMIENTO must stamp FECHAMODIFICA
+--       (usp_ActualizarSeguimiento, usp_CambiarEstadoSeguimientos do)
+-- =====================================================================
+
+USE DB_APPCOMERCIAL;
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Created since watermark
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_FECHACREA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_FECHACREA
+    ON TM_SEGUIMIENTO (FECHACREA);
+    PRINT '  Created: IX_SEGUIMIENTO_FECHACREA';
+END
+GO
+
+-- ---------------------------------------------------------------------
+-- Index: TM_SEGUIMIENTO - Modified since watermark
+-- ---------------------------------------------------------------------
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SEGUIMIENTO_FECHAMODIFICA')
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_SEGUIMIENTO_FECHAMODIFICA
+    ON TM_SEGUIMIENTO (FECHAMODIFICA)
+    WHERE FECHAMODIFICA IS NOT NULL;
+    PRINT '  Created: IX_SEGUIMIENTO_FECHAMODIFICA';
+END
+GO
+
+-- =====================================================================
+-- HU002 / HU006: Follow-ups of a view changed since a watermark
+-- @Vista: 'AGENDA' (columns of usp_ObtenerAgendaDia) or 'CALENDARIO'
+-- (columns of usp_ObtenerCalendarioSupervisor); @FechaFin defaults to
+-- @FechaInicio. Role rules as in 08_role_based_access_fix_v2.sql.
+-- @Desde NULL = the whole view (first sync).
+-- =====================================================================
+CREATE OR ALTER PROCEDURE usp_ObtenerCambiosSeguimientos
+    @Vista NVARCHAR(32),
+    @IdUsuario INT,
+    @FechaInicio DATE,
+    @FechaFin DATE = NULL,
+    @Desde DATETIME = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @FechaFin IS NULL SET @FechaFin = @FechaInicio;
+
+    DECLARE @IdPerfil INT;
+    SELECT @IdPerfil = IDPERFIL FROM TM_USUARIO WHERE IDUSUARIO = @IdUsuario;
+
+    -- RESULT SET 1: Server time taken before reading; the caller passes it
+    -- back as @Desde on the next sync
+    SELECT GETDATE() AS WATERMARK;
+
+    DECLARE @Cambios TABLE (IDSEGUIMIENTO INT PRIMARY KEY);
+    IF @Desde IS NOT NULL
+        INSERT INTO @Cambios (IDSEGUIMIENTO)
+        SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO WHERE FECHACREA >= @Desde
+        UNION
+        SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO WHERE FECHAMODIFICA >= @Desde;
+
+    -- RESULT SET 2: Follow-ups in the view (all of them on a first sync)
+    IF @Vista = 'AGENDA'
+        SELECT
+            s.IDSEGUIMIENTO,
+            s.FECHAPROGRAMADA,
+            s.HORAPROGRAMADA,
+            s.PRIORIDAD,
+            s.ESTADO,
+            s.NOTAS,
+            e.IDEMPRESA,
+            e.NOMBRECOMERCIAL,
+            e.CONTACTO_NOMBRE,
+            e.CONTACTO_TELEFONO,
+            e.CONTACTO_EMAIL,
+            st.IDTIPOSEGUIMIENTO,
+            st.NOMBRE AS TIPOSEGUIMIENTO,
+            st.COLOR,
+            u.NOMBRES + ' ' + u.APELLIDOPATERNO AS EJECUTIVO_ASIGNADO
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA BETWEEN @FechaInicio AND @FechaFin
+          AND s.ACTIVO = 1
+          AND (@Desde IS NULL OR s.IDSEGUIMIENTO IN (SELECT IDSEGUIMIENTO FROM @Cambios))
+          AND (
+              @IdPerfil = 1
+              OR (@IdPerfil = 2 AND u.IDSUPERVISOR = @IdUsuario)
+              OR (@IdPerfil = 3 AND s.IDUSUARIOASIGNADO = @IdUsuario)
+          )
+        ORDER BY
+            CASE s.PRIORIDAD WHEN 'ALTA' THEN 1 WHEN 'MEDIA' THEN 2 ELSE 3 END,
+            s.HORAPROGRAMADA
+        OPTION (RECOMPILE);
+    ELSE
+        SELECT
+            s.IDSEGUIMIENTO,
+            s.FECHAPROGRAMADA,
+            s.HORAPROGRAMADA,
+            s.PRIORIDAD,
+            s.ESTADO,
+            s.NOTAS,
+            e.IDEMPRESA,
+            e.NOMBRECOMERCIAL,
+            u.IDUSUARIO,
+            u.NOMBRES + ' ' + u.APELLIDOPATERNO AS NombreEjecutivo,
+            st.NOMBRE AS TIPOSEGUIMIENTO,
+            st.COLOR
+        FROM TM_SEGUIMIENTO s
+        INNER JOIN TM_EMPRESA e ON s.IDEMPRESA = e.IDEMPRESA
+        INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+        LEFT JOIN TM_SEGUIMIENTO_TIPO st ON s.IDTIPOSEGUIMIENTO = st.IDTIPOSEGUIMIENTO
+        WHERE s.FECHAPROGRAMADA BETWEEN @FechaInicio AND @FechaFin
+          AND s.ACTIVO = 1
+          AND (@Desde IS NULL OR s.IDSEGUIMIENTO IN (SELECT IDSEGUIMIENTO FROM @Cambios))
+          AND (
+              @IdPerfil = 1
+              OR (@IdPerfil = 2 AND u.IDSUPERVISOR = @IdUsuario)
+              OR (@IdPerfil = 3 AND s.IDUSUARIOASIGNADO = @IdUsuario)
+          )
+        ORDER BY s.FECHAPROGRAMADA, s.HORAPROGRAMADA
+        OPTION (RECOMPILE);
+
+    -- RESULT SET 3: Modified follow-ups no longer in the view (soft-deleted,
+    -- rescheduled out of the range or reassigned), limited to the ones the
+    -- client could hold: in the range or visible to the user. A row only
+    -- created since @Desde was never in the client's copy
+    SELECT s.IDSEGUIMIENTO
+    FROM @Cambios c
+    INNER JOIN TM_SEGUIMIENTO s ON s.IDSEGUIMIENTO = c.IDSEGUIMIENTO AND s.FECHAMODIFICA >= @Desde
+    INNER JOIN TM_USUARIO u ON s.IDUSUARIOASIGNADO = u.IDUSUARIO
+    CROSS APPLY (SELECT
+        CASE WHEN s.FECHAPROGRAMADA BETWEEN @FechaInicio AND @FechaFin THEN 1 ELSE 0 END AS ENRANGO,
+        CASE WHEN @IdPerfil = 1
+                  OR (@IdPerfil = 2 AND u.IDSUPERVISOR = @IdUsuario)
+                  OR (@IdPerfil = 3 AND s.IDUSUARIOASIGNADO = @IdUsuario)
+             THEN 1 ELSE 0 END AS VISIBLE) v
+    WHERE (v.ENRANGO = 1 OR v.VISIBLE = 1)
+      AND NOT (s.ACTIVO = 1 AND v.ENRANGO = 1 AND v.VISIBLE = 1)
+    ORDER BY s.IDSEGUIMIENTO;
+END;
+GO
+PRINT '  Created: usp_ObtenerCambiosSeguimientos';
+GO
+
+-- Verification (inside a transaction that is rolled back)
+BEGIN TRANSACTION;
+DECLARE @Hoy DATE = CAST(GETDATE() AS DATE);
+DECLARE @Desde DATETIME = DATEADD(MINUTE, -1, GETDATE());
+EXEC usp_ObtenerCambiosSeguimientos @Vista = 'AGENDA', @IdUsuario = 4, @FechaInicio = @Hoy, @Desde = @Desde;
+UPDATE TM_SEGUIMIENTO SET ACTIVO = 0, FECHAMODIFICA = GETDATE()
+WHERE IDUSUARIOASIGNADO = 4 AND FECHAPROGRAMADA = @Hoy;
+EXEC usp_ObtenerCambiosSeguimientos @Vista = 'AGENDA', @IdUsuario = 4, @FechaInicio = @Hoy, @Desde = @Desde;  -- IDs in set 3
+EXEC usp_ObtenerCambiosSeguimientos @Vista = 'CALENDARIO', @IdUsuario = 2,
+     @FechaInicio = @Hoy, @FechaFin = @Hoy, @Desde = @Desde;
+ROLLBACK TRANSACTION;
+GO
@@ -1149,6 +1149,7 @@ export class AppComercialComponent implements OnInit, OnDestroy {
       if (this.selected.follow.idSeguimiento) {
         const updateData = {
           idSeguimiento: this.selected.follow.idSeguimiento,
+          idEmpresa: this.selected.id,
           estado: formValues.estatusCliente || 'PENDIENTE',
           detalle: {
             tipoComunicacion: formValues.tipoComunic || '',
@@ -49,6 +49,12 @@ export interface ApiResponse<T> {
   data: T;
 }
 
+export interface PagedApiResponse<T> extends ApiResponse<T> {
+  next: string | null;
+  pageSize: number;
+  total?: number;
+}
+
 @Injectable({
   providedIn: 'root',
 })
@@ -58,14 +64,17 @@ export class EmpresaService {
   constructor(private http: HttpClient) {}
 
   /**
-   * Search companies with optional filters
+   * Search companies with optional filters.
+   * Pass the `next` token of the previous response as `cursor` to get the following page.
    */
-  buscarEmpresas(searchText?: string, usuario?: string): Observable<ApiResponse<Empresa[]>> {
+  buscarEmpresas(searchText?: string, usuario?: string, cursor?: string, limite?: number): Observable<PagedApiResponse<Empresa[]>> {
     let params = new HttpParams();
     if (searchText) params = params.set('search', searchText);
     if (usuario) params = params.set('usuario', usuario);
+    if (cursor) params = params.set('cursor', cursor);
+    if (limite) params = params.set('limite', limite);
 
-    return this.http.get<ApiResponse<Empresa[]>>(`${this.apiUrl}/empresas`, { params });
+    return this.http.get<PagedApiResponse<Empresa[]>>(`${this.apiUrl}/empresas`, { params });
   }
 
   /**
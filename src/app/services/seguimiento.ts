@@ -30,6 +30,7 @@ export interface SeguimientoCreate {
 
 export interface SeguimientoUpdate {
   idSeguimiento: number;
+  idEmpresa?: number;
   estado?: string;
   detalle?: {
     tipoComunicacion?: string;
@@ -0,0 +1,17 @@
+"""
+Shared pytest setup for the Lambda shared modules.
+
+Handlers and shared modules import each other as top-level modules (they
+are packaged side by side), so lambdas/ goes on sys.path. Everything runs
+on the offline backend, in a temporary database of the test process (never
+a DB_BACKEND / OFFLINE_DB_PATH from the shell); no SQL Server or ODBC
+driver is needed.
+"""
+import os
+import sys
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lambdas')
+sys.path.insert(0, LAMBDAS_DIR)
+
+os.environ['DB_BACKEND'] = 'offline'
+os.environ.pop('OFFLINE_DB_PATH', None)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import benchmark_handlers
+
+
+def test_only_selects_known_endpoints():
+    args = benchmark_handlers.parse_args(['--only', 'login, agenda'])
+    assert args.only == ['login', 'agenda']
+    assert benchmark_handlers.parse_args([]).only is None
+
+
+@pytest.mark.parametrize('only', ['login,agenda,busqueda', ',', 'Agenda'])
+def test_only_rejects_unknown_endpoints(only, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark_handlers.parse_args(['--only', only])
+    assert exit_info.value.code == 2
+    error = capsys.readouterr().err
+    assert 'valid names:' in error and 'calendario' in error
+
+
+def test_only_rejects_writes_that_would_be_skipped(capsys):
+    with pytest.raises(SystemExit):
+        benchmark_handlers.parse_args(['--backend', 'pyodbc', '--only', 'agenda,seguimiento_crear'])
+    assert 'seguimiento_crear' in capsys.readouterr().err
+    args = benchmark_handlers.parse_args(['--backend', 'pyodbc', '--writes', '--only', 'seguimiento_crear'])
+    assert args.only == ['seguimiento_crear']
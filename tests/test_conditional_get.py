@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+import offline_db
+from conditional_get import add_etag, fetch_etag, is_fresh, not_modified
+
+ETAG = 'W/"0123456789abcdef"'
+
+
+def _event(if_none_match=None, name='If-None-Match'):
+    return {'headers': {name: if_none_match} if if_none_match is not None else {}}
+
+
+@pytest.mark.parametrize('header', [
+    ETAG,
+    '"0123456789abcdef"',                      # strong form of the same tag
+    f'"other", {ETAG}',
+    f'W/"other",W/"0123456789abcdef"',
+    '*',
+])
+def test_fresh(header):
+    assert is_fresh(_event(header), ETAG)
+
+
+@pytest.mark.parametrize('header', [None, '', 'W/"other"', '"0123456789abcdef0"', 'W/'])
+def test_not_fresh(header):
+    assert not is_fresh(_event(header), ETAG)
+
+
+def test_header_name_is_case_insensitive():
+    assert is_fresh(_event(ETAG, name='if-none-match'), ETAG)
+
+
+class MarkerCursor:
+    """Returns a fixed usp_ObtenerVersionDatos row and records the call."""
+
+    def __init__(self, marker):
+        self.marker = marker
+        self.executed = None
+
+    def execute(self, sql, params):
+        self.executed = (sql, params)
+
+    def fetchone(self):
+        return self.marker
+
+
+def test_etag_follows_the_marker():
+    marker = (12, b'\x00\x00\x00\x00\x00\x00\x01\x00')
+    etag = fetch_etag(MarkerCursor(marker), 'AGENDA', 4, '2025-03-03')
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert fetch_etag(MarkerCursor(marker), 'AGENDA', 4, '2025-03-03') == etag
+    assert fetch_etag(MarkerCursor((12, b'\x00\x00\x00\x00\x00\x00\x01\x01')), 'AGENDA', 4, '2025-03-03') != etag
+    assert fetch_etag(MarkerCursor(marker), 'AGENDA', 5, '2025-03-03') != etag
+    assert fetch_etag(MarkerCursor(marker), 'AGENDA', 4, '2025-03-03', variant=(50,)) != etag
+
+
+def test_etag_passes_the_view_to_the_marker_query():
+    cursor = MarkerCursor(None)
+    fetch_etag(cursor, 'CALENDARIO', 2, '2025-03-01', '2025-03-31')
+    assert cursor.executed[1] == ('CALENDARIO', 2, '2025-03-01', '2025-03-31')
+
+
+def test_not_modified_response():
+    response = not_modified(ETAG, {'Access-Control-Allow-Origin': '*'})
+    assert response['statusCode'] == 304 and response['body'] == ''
+    assert response['headers']['ETag'] == ETAG
+    assert response['headers']['Access-Control-Expose-Headers'] == 'ETag'
+
+
+def test_add_etag_keeps_exposed_headers():
+    response = add_etag({'statusCode': 200, 'headers': {'Access-Control-Expose-Headers': 'Server-Timing'}}, ETAG)
+    assert response['headers']['Access-Control-Expose-Headers'] == 'Server-Timing,ETag'
+    assert response['headers']['Cache-Control'] == 'private, no-cache'
+
+
+def test_agenda_revalidation():
+    import TB1_agenda_dia_lambda as handler
+
+    def get(etag=None):
+        event = {'httpMethod': 'GET', 'path': '/agenda',
+                 'headers': {'If-None-Match': etag} if etag else {},
+                 'queryStringParameters': {'userId': '1', 'fecha': datetime.date.today().isoformat()}}
+        return handler.lambda_handler(event, None)
+
+    first = get()
+    assert first['statusCode'] == 200
+    etag = first['headers']['ETag']
+    assert get(etag)['statusCode'] == 304
+
+    # A follow-up type shown in the agenda changes color: the data changed
+    db = offline_db.connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute("UPDATE TM_SEGUIMIENTO_TIPO SET COLOR = '#123456'")
+        db.commit()
+    finally:
+        db.close()
+
+    assert get(etag)['statusCode'] == 200
@@ -0,0 +1,96 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+import content_encoding
+from content_encoding import choose_encoding, compress_response, decode_text_body
+
+# br is only offered when the brotli package is installed
+BEST = 'br' if content_encoding.brotli is not None else 'gzip'
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('GZIP', 'gzip'),
+    ('gzip, deflate, br', BEST),
+    ('gzip;q=0', None),
+    ('gzip; q=0.0, identity', None),
+    ('*', BEST),
+    ('*;q=0', None),
+    ('*, gzip;q=0', 'br' if BEST == 'br' else None),
+    ('gzip;q=0.5, br;q=0.4', 'gzip'),
+    ('gzip;q=bogus', None),
+])
+def test_choose_encoding(accept, expected):
+    assert choose_encoding(accept) == expected
+
+
+@pytest.mark.skipif(content_encoding.brotli is None, reason='brotli not installed')
+def test_brotli_preferred_on_a_tie():
+    assert choose_encoding('gzip, br') == 'br'
+    assert choose_encoding('br;q=0.5, gzip') == 'gzip'
+
+
+def _response(size):
+    body = json.dumps({'data': [{'IDEMPRESA': i, 'NOMBRECOMERCIAL': 'Empresa'} for i in range(size)]})
+    return {'statusCode': 200, 'headers': {}, 'body': body}
+
+
+def test_compresses_large_bodies():
+    response = _response(200)
+    body = response['body']
+    sent = compress_response({'headers': {'Accept-Encoding': 'gzip'}}, response)
+    assert response['isBase64Encoded'] is True
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+    compressed = base64.b64decode(response['body'])
+    assert sent == len(compressed) < len(body)
+    assert gzip.decompress(compressed).decode('utf-8') == body
+
+
+def test_small_bodies_are_left_alone():
+    response = _response(1)
+    assert len(response['body']) < content_encoding.COMPRESS_MIN_BYTES
+    assert compress_response({'headers': {'Accept-Encoding': 'gzip'}}, response) is None
+    assert 'Content-Encoding' not in response['headers'] and 'Vary' not in response['headers']
+
+
+def test_identity_still_varies():
+    response = _response(200)
+    body = response['body']
+    assert compress_response({'headers': {}}, response) is None
+    assert response['body'] == body
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+
+
+def test_already_encoded_bodies_are_left_alone():
+    response = _response(200)
+    response['headers']['Content-Encoding'] = 'identity'
+    assert compress_response({'headers': {'Accept-Encoding': 'gzip'}}, response) is None
+    response = {'statusCode': 200, 'headers': {}, 'body': 'AAAA' * 1000, 'isBase64Encoded': True}
+    assert compress_response({'headers': {'Accept-Encoding': 'gzip'}}, response) is None
+
+
+def test_decodes_base64_text_bodies():
+    event = {'headers': {'content-type': 'application/json; charset=utf-8'}, 'isBase64Encoded': True,
+             'body': base64.b64encode('{"nombre": "Compañía"}'.encode('utf-8')).decode('ascii')}
+    decode_text_body(event)
+    assert event == {'headers': event['headers'], 'isBase64Encoded': False, 'body': '{"nombre": "Compañía"}'}
+
+
+def test_leaves_binary_bodies_encoded():
+    body = base64.b64encode(b'PK\x03\x04').decode('ascii')
+    event = {'headers': {'Content-Type': 'application/octet-stream'}, 'isBase64Encoded': True, 'body': body}
+    decode_text_body(event)
+    assert event['isBase64Encoded'] is True and event['body'] == body
+
+    # Declared as JSON but not UTF-8 text: left for the handler
+    body = base64.b64encode(b'\xff\xfe\x00').decode('ascii')
+    event = {'headers': {}, 'isBase64Encoded': True, 'body': body}
+    decode_text_body(event)
+    assert event['isBase64Encoded'] is True and event['body'] == body
@@ -0,0 +1,104 @@
+import pytest
+
+import db_connection
+import offline_db
+
+
+class FakeConnection:
+    """Driver connection whose link can be cut."""
+
+    def __init__(self):
+        self.dead = False
+        self.closed = False
+        self.pings = 0
+
+    def _check(self):
+        if self.dead:
+            raise offline_db.Error('08S01', '[08S01] Communication link failure')
+
+    def rollback(self):
+        self._check()
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def execute(self, sql):
+                connection.pings += 1
+                connection._check()
+                return self
+
+            def fetchone(self):
+                return (1,)
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    opened = []
+
+    def open_connection():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(db_connection, '_open_connection', open_connection)
+    db_connection.configure_pool(3)
+    yield opened
+    db_connection.configure_pool(1)
+
+
+def test_is_link_failure():
+    assert db_connection.is_link_failure(offline_db.Error('08S01', 'Communication link failure'))
+    assert db_connection.is_link_failure(offline_db.Error('08001', 'Cannot open server'))
+    assert not db_connection.is_link_failure(offline_db.Error('42000', 'Syntax error'))
+    assert not db_connection.is_link_failure(offline_db.Error())
+
+
+def test_reuses_recent_connections_without_a_ping(pool):
+    conn = db_connection.get_connection()
+    db_connection.release_connection(conn)
+    assert db_connection.get_connection() is conn
+    db_connection.release_connection(conn)
+    assert len(pool) == 1 and conn.pings == 0
+
+
+def test_link_failure_flags_every_idle_connection(pool):
+    a, b, c = (db_connection.get_connection() for _ in range(3))
+    db_connection.release_connection(b)
+    db_connection.release_connection(c)
+
+    # Failover: every connection to the old server is gone
+    for conn in (a, b, c):
+        conn.dead = True
+    db_connection.release_connection(a)
+    assert a.closed
+
+    # The next requests get fresh connections instead of failing one by one
+    fresh = [db_connection.get_connection() for _ in range(2)]
+    assert all(conn not in (a, b, c) for conn in fresh)
+    assert b.closed and c.closed and b.pings == c.pings == 1
+    for conn in fresh:
+        db_connection.release_connection(conn)
+
+
+def test_other_errors_keep_the_pool(pool):
+    a = db_connection.get_connection()
+    b = db_connection.get_connection()
+    db_connection.release_connection(b)
+
+    def rollback():
+        raise offline_db.Error('HY000', 'General error')
+
+    a.rollback = rollback
+    db_connection.release_connection(a)
+    assert a.closed
+    assert db_connection.get_connection() is b and b.pings == 0
+    db_connection.release_connection(b)
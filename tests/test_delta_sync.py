@@ -0,0 +1,83 @@
+import datetime
+import json
+
+import pytest
+
+import offline_db
+from delta_sync import SYNC_OVERLAP, parse_since, sync_requested
+from page_token import InvalidTokenError, encode_token
+
+WATERMARK = '2025-03-03T10:00:00'
+
+
+def _token(vista='AGENDA', user_id=4, fecha_inicio='2025-03-03', fecha_fin='2025-03-03', watermark=WATERMARK):
+    return encode_token([vista, user_id, fecha_inicio, fecha_fin], watermark)
+
+
+def test_sync_requested():
+    assert sync_requested({'queryStringParameters': {'since': ''}})
+    assert not sync_requested({'queryStringParameters': {'fecha': '2025-03-03'}})
+    assert not sync_requested({'queryStringParameters': None})
+
+
+def test_first_sync():
+    assert parse_since('', 'AGENDA', 4, '2025-03-03', '2025-03-03') is None
+    assert parse_since(None, 'AGENDA', 4, '2025-03-03', '2025-03-03') is None
+
+
+def test_reads_from_before_the_watermark():
+    desde = parse_since(_token(), 'AGENDA', 4, '2025-03-03', '2025-03-03')
+    assert desde == datetime.datetime.fromisoformat(WATERMARK) - SYNC_OVERLAP
+
+
+@pytest.mark.parametrize('token', [
+    _token(vista='CALENDARIO'),
+    _token(user_id=5),
+    _token(fecha_inicio='2025-03-02'),
+    _token(fecha_fin='2025-03-04'),
+    _token(watermark='ayer'),
+    encode_token('2025-03-03T10:00:00'),
+    'garbage',
+])
+def test_rejects_tokens_for_another_view(token):
+    with pytest.raises(InvalidTokenError):
+        parse_since(token, 'AGENDA', 4, '2025-03-03', '2025-03-03')
+
+
+def _agenda(fecha, since):
+    import TB1_agenda_dia_lambda as handler
+
+    event = {'httpMethod': 'GET', 'path': '/agenda', 'headers': {},
+             'queryStringParameters': {'userId': '1', 'fecha': fecha, 'since': since}}
+    response = handler.lambda_handler(event, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_agenda_sync_reports_removed_follow_ups():
+    fecha = datetime.date.today().isoformat()
+    status, body = _agenda(fecha, '')
+    assert status == 200
+    data = body['data']
+    assert data['completo'] is True and data['cambios'] and data['eliminados'] == []
+
+    id_seguimiento = data['cambios'][0]['IDSEGUIMIENTO']
+    db = offline_db.connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute('UPDATE TM_SEGUIMIENTO SET ACTIVO = 0, FECHAMODIFICA = GETDATE() WHERE IDSEGUIMIENTO = ?',
+                       (id_seguimiento,))
+        db.commit()
+    finally:
+        db.close()
+
+    status, body = _agenda(fecha, data['syncToken'])
+    assert status == 200
+    assert body['data']['completo'] is False
+    assert body['data']['eliminados'] == [id_seguimiento]
+    assert id_seguimiento not in [row['IDSEGUIMIENTO'] for row in body['data']['cambios']]
+
+
+def test_agenda_token_is_bound_to_the_day():
+    token = _token(vista='AGENDA', user_id=1, fecha_inicio='2025-03-03', fecha_fin='2025-03-03')
+    status, body = _agenda('2025-03-04', token)
+    assert status == 400 and body['errorMessage'] == 'Token de sincronización inválido'
@@ -0,0 +1,108 @@
+import io
+
+import pytest
+
+import offline_db
+from empresa_import import (EmpresaImporter, FIELDS, InvalidFileError, map_header, normalize_row,
+                            read_csv)
+
+COLUMNS = [name for name, _ in FIELDS]
+
+
+def _values(row):
+    return dict(zip(COLUMNS, row))
+
+
+def test_header_aliases_and_spelling():
+    columns = map_header(['Nombre Comercial', 'ruc', 'Teléfono', 'contacto_email', 'Notas'])
+    assert columns == ['NOMBRECOMERCIAL', 'RUC', 'CONTACTO_TELEFONO', 'CONTACTO_EMAIL', None]
+
+
+def test_repeated_header_is_ignored():
+    assert map_header(['RUC', 'NombreComercial', 'RUC']) == ['RUC', 'NOMBRECOMERCIAL', None]
+
+
+def test_required_columns():
+    with pytest.raises(InvalidFileError, match='RUC'):
+        map_header(['Nombre Comercial', 'Email'])
+
+
+def test_csv_delimiter_and_bom():
+    rows = list(read_csv(io.StringIO('\ufeffNombre Comercial;RUC\nAcme;20100000001\n')))
+    assert rows == [['Nombre Comercial', 'RUC'], ['Acme', '20100000001']]
+
+
+def test_empty_csv():
+    with pytest.raises(InvalidFileError):
+        list(read_csv(io.StringIO('')))
+
+
+def test_normalizes_ruc_and_text():
+    columns = map_header(['NombreComercial', 'RUC', 'TipoCliente', 'Riesgo', 'NumTrabajadores'])
+    row, error = normalize_row(columns, ['  Acme   Perú ', '20-100.000 001', 'pyme', 'Médio', '12.0'])
+    assert error is None
+    values = _values(row)
+    assert values['NOMBRECOMERCIAL'] == 'Acme Perú'
+    assert values['RUC'] == '20100000001'
+    assert values['TIPOCLIENTE'] == 'PYME'
+    assert values['RIESGO'] == 'MEDIO'
+    assert values['NUMTRABAJADORES'] == 12
+
+
+def test_classifications_are_free_text():
+    # Whatever POST /empresa accepts is imported, only case and accents change
+    columns = map_header(['NombreComercial', 'RUC', 'TipoCliente', 'TipoCartera'])
+    row, error = normalize_row(columns, ['Acme', '20100000001', 'Mayorista', 'Cartera Estándar-2'])
+    assert error is None
+    values = _values(row)
+    assert values['TIPOCLIENTE'] == 'MAYORISTA'
+    assert values['TIPOCARTERA'] == 'CARTERA ESTANDAR-2'
+
+
+def test_ruc_typed_as_excel_number():
+    columns = map_header(['NombreComercial', 'RUC'])
+    row, error = normalize_row(columns, ['Acme', 20100000001.0])
+    assert error is None and _values(row)['RUC'] == '20100000001'
+
+
+@pytest.mark.parametrize('cells, message', [
+    (['', '20100000001', ''], 'NOMBRECOMERCIAL es requerido'),
+    (['Acme', '', ''], 'RUC es requerido'),
+    (['Acme', '2010000000', ''], 'RUC debe tener 11 dígitos'),
+    (['Acme', '2010000000A', ''], 'RUC debe tener 11 dígitos'),
+])
+def test_invalid_rows(cells, message):
+    columns = map_header(['NombreComercial', 'RUC', 'TipoCliente'])
+    row, error = normalize_row(columns, cells)
+    assert row is None and error.startswith(message)
+
+
+def test_import_classifies_rows():
+    conn = offline_db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT RUC FROM TM_EMPRESA WHERE IDEMPRESA = 1')
+        existente = cursor.fetchone()[0]
+        cursor.close()
+
+        csv_text = (
+            'Nombre Comercial;RUC\n'
+            'Nueva Uno;20999000001\n'        # fila 2: created
+            f'Ya Registrada;{existente}\n'   # fila 3: RUC already in TM_EMPRESA
+            'Nueva Uno Bis;20-999-000-001\n' # fila 4: same RUC as fila 2
+            'Sin RUC;\n'                     # fila 5: invalid
+            ';;\n'                           # blank line, not counted
+        )
+        report = []
+        summary = EmpresaImporter(conn, 'test', on_report=report.append).run(read_csv(io.StringIO(csv_text)))
+
+        assert summary['Leidas'] == 4 and summary['Invalidas'] == 1
+        assert summary['Creadas'] == 1 and summary['Existentes'] == 1 and summary['Duplicadas'] == 1
+        resultados = {row['FILA']: (row['RESULTADO'], row['IDEMPRESA']) for row in report}
+        assert resultados[3] == ('EXISTENTE', 1)
+        assert resultados[4][0] == 'DUPLICADO_ARCHIVO' and resultados[4][1] is not None
+        assert resultados[5] == ('INVALIDA', None)
+        assert 2 not in resultados
+    finally:
+        conn.rollback()
+        conn.close()
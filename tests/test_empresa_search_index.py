@@ -0,0 +1,167 @@
+import threading
+
+import pytest
+
+import empresa_search_index as search_index
+from empresa_search_index import EmpresaSearchIndex, fold_text, compact_ruc
+
+
+def _index(*rows):
+    index = EmpresaSearchIndex()
+    for id_empresa, nombre, ruc in rows:
+        index.upsert({'IDEMPRESA': id_empresa, 'NOMBRECOMERCIAL': nombre, 'RAZONSOCIAL': None,
+                      'RUC': ruc, 'CONTACTO_NOMBRE': None, 'ACTIVO': True})
+    return index
+
+
+def _ids(rows):
+    return [row['IDEMPRESA'] for row in rows]
+
+
+def test_fold_text():
+    assert fold_text('  Compañía  Andina S.A.C. ') == 'compania andina s a c'
+    assert fold_text(None) == ''
+
+
+def test_compact_ruc():
+    assert compact_ruc('20 123-456.789') == '20123456789'
+
+
+def test_accent_and_case_insensitive_substring():
+    index = _index((1, 'Panadería El Sol', '20100000001'), (2, 'Ferretería Lima', '20100000002'))
+    rows, _, total = index.search('PANADERIA', 10)
+    assert _ids(rows) == [1] and total == 1
+    assert _ids(index.search('rreter', 10)[0]) == [2]
+
+
+def test_every_word_must_match():
+    index = _index((1, 'Transportes Rápidos del Sur', '20100000001'), (2, 'Transportes Norte', '20100000002'))
+    assert _ids(index.search('transportes sur', 10)[0]) == [1]
+
+
+def test_ranks_exact_then_prefix_then_anywhere():
+    index = _index((1, 'Grupo Inca', '20100000001'), (2, 'Inca Kola', '20100000002'), (3, 'Inca', '20100000003'))
+    assert _ids(index.search('inca', 10)[0]) == [3, 2, 1]
+
+
+def test_ruc_typed_in_groups():
+    index = _index((1, 'Minera Andes', '20512345678'))
+    assert _ids(index.search('20 512 345', 10)[0]) == [1]
+
+
+def test_pages_with_the_last_key():
+    index = _index(*((i, f'Comercial {i:02d}', f'201000000{i:02d}') for i in range(1, 6)))
+    rows, keys, total = index.search('comercial', 2)
+    assert total == 5 and len(rows) == 3  # limit + 1 signals another page
+    rows, keys, _ = index.search('comercial', 2, after=keys[1])
+    assert _ids(rows) == [3, 4, 5]
+
+
+def test_upsert_replaces_and_inactive_removes():
+    index = _index((1, 'Textil Norte', '20100000001'))
+    index.upsert({'IDEMPRESA': 1, 'NOMBRECOMERCIAL': 'Textil Sur', 'RUC': '20100000001'})
+    assert _ids(index.search('norte', 10)[0]) == []
+    assert _ids(index.search('sur', 10)[0]) == [1]
+    index.upsert({'IDEMPRESA': 1, 'NOMBRECOMERCIAL': 'Textil Sur', 'ACTIVO': False})
+    assert len(index) == 0 and index.search('textil', 10)[2] == 0
+
+
+def test_copy_leaves_the_original_untouched():
+    index = _index((1, 'Textil Norte', '20100000001'), (2, 'Textil Sur', '20100000002'))
+    copy = index.copy()
+    copy.upsert({'IDEMPRESA': 3, 'NOMBRECOMERCIAL': 'Textil Centro', 'RUC': '20100000003'})
+    copy.upsert({'IDEMPRESA': 1, 'NOMBRECOMERCIAL': 'Textil Norte', 'ACTIVO': False})
+    assert _ids(index.search('textil', 10)[0]) == [1, 2]
+    assert _ids(copy.search('textil', 10)[0]) == [3, 2]
+
+
+class IndexFeed:
+    """Connection whose usp_ObtenerEmpresasIndice returns the given rows."""
+
+    COLUMNS = ('IDEMPRESA', 'NOMBRECOMERCIAL', 'RAZONSOCIAL', 'RUC', 'CONTACTO_NOMBRE', 'ACTIVO')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = []
+
+    def cursor(self):
+        feed = self
+
+        class Cursor:
+            def execute(self, sql, params):
+                feed.loads.append(params[0])
+                self._sets = [
+                    ((('WATERMARK', str),), [('2025-03-03T10:00:00',)]),
+                    (tuple((name, object) for name in IndexFeed.COLUMNS), list(feed.rows)),
+                ]
+                self.nextset()
+
+            def nextset(self):
+                if not self._sets:
+                    return False
+                self.description, self._rows = self._sets.pop(0)
+                return True
+
+            def fetchone(self):
+                return self._rows.pop(0) if self._rows else None
+
+            def fetchmany(self, size):
+                batch, self._rows = self._rows[:size], self._rows[size:]
+                return batch
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+
+@pytest.fixture
+def shared_index(monkeypatch):
+    monkeypatch.setattr(search_index, '_index', None)
+    monkeypatch.setattr(search_index, '_watermark', None)
+    monkeypatch.setattr(search_index, '_last_refresh', 0.0)
+    monkeypatch.setattr(search_index, '_last_rebuild', 0.0)
+
+
+def test_connection_only_taken_when_a_load_is_due(shared_index):
+    feed = IndexFeed([(1, 'Minera Andes', None, '20512345678', None, True)])
+    calls = []
+
+    def get_conn():
+        calls.append(1)
+        return feed
+
+    assert _ids(search_index.search_empresas(get_conn, 'andes', 10)[0]) == [1]
+    assert _ids(search_index.search_empresas(get_conn, 'minera', 10)[0]) == [1]
+    assert len(calls) == 1 and feed.loads == [None]
+
+
+def test_searches_do_not_wait_for_a_refresh(shared_index, monkeypatch):
+    feed = IndexFeed([(1, 'Minera Andes', None, '20512345678', None, True)])
+    search_index.search_empresas(lambda: feed, 'andes', 10)
+
+    # Another request is in the middle of a refresh
+    monkeypatch.setattr(search_index, '_last_refresh', 0.0)
+    assert search_index._refresh_lock.acquire(blocking=False)
+    try:
+        done = []
+        thread = threading.Thread(target=lambda: done.append(
+            search_index.search_empresas(lambda: feed, 'andes', 10)))
+        thread.start()
+        thread.join(timeout=5)
+        assert done and _ids(done[0][0]) == [1]
+    finally:
+        search_index._refresh_lock.release()
+
+
+def test_refresh_swaps_in_a_new_index(shared_index, monkeypatch):
+    feed = IndexFeed([(1, 'Minera Andes', None, '20512345678', None, True)])
+    search_index.search_empresas(lambda: feed, 'andes', 10)
+    before = search_index._index
+
+    feed.rows = [(2, 'Minera Sur', None, '20512345679', None, True)]
+    monkeypatch.setattr(search_index, '_last_refresh', 0.0)
+    assert _ids(search_index.search_empresas(lambda: feed, 'minera', 10)[0]) == [1, 2]
+    assert search_index._index is not before
+    assert _ids(before.search('minera', 10)[0]) == [1]
+    assert feed.loads[1] is not None  # incremental, from the watermark
@@ -0,0 +1,111 @@
+import pytest
+
+import entity_cache
+from entity_cache import LRUCache
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(entity_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_hit_and_miss(clock):
+    cache = LRUCache(10, 60)
+    assert cache.get(1) is None
+    cache.put(1, 'body')
+    assert cache.get(1) == 'body'
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+
+def test_evicts_least_recently_used(clock):
+    cache = LRUCache(2, 60)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    cache.get(1)          # 2 is now the least recently used
+    cache.put(3, 'c')
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a' and cache.get(3) == 'c'
+
+
+def test_entries_expire(clock):
+    cache = LRUCache(10, 60)
+    cache.put(1, 'a')
+    clock.now += 59
+    assert cache.get(1) == 'a'
+    clock.now += 1
+    assert cache.get(1) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_fill_started_before_an_invalidation_is_dropped(clock):
+    cache = LRUCache(10, 60)
+    epoch = cache.epoch()     # reader takes the epoch, then queries
+    cache.invalidate(1)       # a writer changes the company meanwhile
+    cache.put(1, 'old', epoch)
+    assert cache.get(1) is None
+    cache.put(1, 'new', cache.epoch())
+    assert cache.get(1) == 'new'
+
+
+def test_clear_also_bumps_the_epoch(clock):
+    cache = LRUCache(10, 60)
+    epoch = cache.epoch()
+    cache.clear()
+    cache.put(1, 'old', epoch)
+    assert cache.get(1) is None
+
+
+def test_version_mismatch_is_a_miss(clock):
+    cache = LRUCache(10, 60)
+    cache.put(1, 'v1', version=(b'\x01', 3))
+    assert cache.get(1, (b'\x01', 3)) == 'v1'
+    assert cache.get(1, (b'\x02', 3)) is None
+    # The stale entry is gone, even for the version it was stored at
+    assert cache.get(1, (b'\x01', 3)) is None
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = LRUCache(0, 60)
+    cache.put(1, 'a')
+    assert cache.get(1) is None
+
+
+def test_empresa_detail_sees_writes_from_another_process():
+    import offline_db
+    import TB1_empresa_obtener_lambda as handler
+
+    def get():
+        event = {'httpMethod': 'GET', 'path': '/empresa', 'headers': {},
+                 'queryStringParameters': {'id': '1'}}
+        response = handler.lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        return response['headers']['X-Cache'], response['body']
+
+    handler.empresa_cache.clear()
+    assert get()[0] == 'MISS'
+    assert get()[0] == 'HIT'
+
+    # A writer in another container: this process never hears about it
+    db = offline_db.connect()
+    try:
+        db.cursor().execute("UPDATE TM_EMPRESA SET CONTACTO_CARGO = 'Gerente de Pruebas', "
+                            "FECHAMODIFICA = GETDATE() WHERE IDEMPRESA = 1")
+        db.commit()
+    finally:
+        db.close()
+
+    status, body = get()
+    assert status == 'MISS' and 'Gerente de Pruebas' in body
+    assert get()[0] == 'HIT'
@@ -0,0 +1,62 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+import local_gateway
+
+
+def test_keepalive_connections_time_out():
+    timeout = local_gateway.GatewayRequestHandler.timeout
+    assert timeout is not None and 0 < timeout <= 15
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # Same behavior as the configured timeout, without waiting for it
+    monkeypatch.setattr(local_gateway.GatewayRequestHandler, 'timeout', 1)
+    server = local_gateway.PooledHTTPServer(('127.0.0.1', 0), local_gateway.Gateway(), workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(conn, path='/_stats'):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    response.read()
+    return response
+
+
+def test_idle_keepalive_connections_do_not_starve_new_requests(server):
+    port = server.server_address[1]
+    idle = [http.client.HTTPConnection('127.0.0.1', port, timeout=10) for _ in range(2)]
+    try:
+        # Both workers now hold a kept-alive connection that sends nothing more
+        for conn in idle:
+            assert _get(conn).status == 200
+
+        started = time.monotonic()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        try:
+            response = _get(conn)
+        finally:
+            conn.close()
+        assert response.status == 200
+        assert time.monotonic() - started < 5
+    finally:
+        for conn in idle:
+            conn.close()
+
+
+def test_keepalive_connection_is_reused_while_workers_are_free(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    try:
+        first = _get(conn)
+        assert first.status == 200 and first.getheader('Connection') != 'close'
+        assert _get(conn).status == 200
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+import base64
+
+import pytest
+
+from page_token import encode_token, decode_token, InvalidTokenError
+
+
+def test_round_trip():
+    token = encode_token('Ñandú Comercial S.A.C.', 1042)
+    assert decode_token(token, 2) == ['Ñandú Comercial S.A.C.', 1042]
+
+
+def test_token_is_url_safe():
+    token = encode_token('a/b+c?d=e' * 10, 1)
+    assert '=' not in token
+    assert set(token) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+
+@pytest.mark.parametrize('token', [
+    '',
+    'not a token',
+    '!!!!',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode('ascii'),      # not a list
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),       # not UTF-8
+])
+def test_rejects_foreign_tokens(token):
+    with pytest.raises(InvalidTokenError):
+        decode_token(token, 2)
+
+
+def test_rejects_wrong_size():
+    with pytest.raises(InvalidTokenError):
+        decode_token(encode_token('Empresa', 1, 'extra'), 2)
+
+
+def test_rejects_truncated_token():
+    token = encode_token('Empresa', 7)
+    with pytest.raises(InvalidTokenError):
+        decode_token(token[:-3], 2)
+
+
+@pytest.mark.parametrize('cursor', [
+    'garbage',
+    encode_token('Empresa', 7)[:-3],
+    encode_token('Empresa', 'not-an-id'),
+    encode_token('Empresa'),
+])
+def test_search_rejects_bad_cursor(cursor):
+    import TB1_empresa_buscar_lambda as handler
+
+    event = {'httpMethod': 'GET', 'path': '/empresa/buscar', 'headers': {},
+             'queryStringParameters': {'cursor': cursor}}
+    response = handler.lambda_handler(event, None)
+    assert response['statusCode'] == 400
+
+
+def test_only_the_shape_is_checked():
+    # Unsigned: a hand-made token of the right shape decodes like ours
+    forged = base64.urlsafe_b64encode(b'["Otra", 99]').decode('ascii')
+    assert decode_token(forged, 2) == ['Otra', 99]
+
+
+def test_invalid_token_is_a_value_error():
+    assert issubclass(InvalidTokenError, ValueError)
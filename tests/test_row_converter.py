@@ -0,0 +1,67 @@
+import datetime
+from decimal import Decimal
+
+from row_converter import fetch_all_dicts, fetch_one_dict, get_row_converter
+
+
+class FakeCursor:
+    """Just enough of a pyodbc cursor: description and fetch calls."""
+
+    def __init__(self, description, rows):
+        self.description = description
+        self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+
+DESCRIPTION = (
+    ('IDEMPRESA', int), ('FECHACREA', datetime.datetime), ('FECHAPROGRAMADA', datetime.date),
+    ('HORAPROGRAMADA', datetime.time), ('MONTO', Decimal), ('VERSIONFILA', bytes),
+)
+
+
+def test_converts_each_column_by_type():
+    row = (7, datetime.datetime(2025, 3, 1, 9, 30), datetime.date(2025, 3, 2),
+           datetime.time(14, 5), Decimal('1250.50'), b'\x00\x00\x00\x00\x00\x00\x07\xd1')
+    assert fetch_one_dict(FakeCursor(DESCRIPTION, [row])) == {
+        'IDEMPRESA': 7,
+        'FECHACREA': '2025-03-01T09:30:00',
+        'FECHAPROGRAMADA': '2025-03-02',
+        'HORAPROGRAMADA': '14:05:00',
+        'MONTO': 1250.5,
+        'VERSIONFILA': '00000000000007d1',
+    }
+
+
+def test_nulls_pass_through():
+    row = (1, None, None, None, None, None)
+    assert fetch_one_dict(FakeCursor(DESCRIPTION, [row])) == dict.fromkeys(
+        [name for name, _ in DESCRIPTION], None) | {'IDEMPRESA': 1}
+
+
+def test_fetch_all_reads_every_batch():
+    rows = [(i, None, None, None, None, bytearray(b'\x01')) for i in range(7)]
+    data = fetch_all_dicts(FakeCursor(DESCRIPTION, rows), batch_size=3)
+    assert [item['IDEMPRESA'] for item in data] == list(range(7))
+    assert data[0]['VERSIONFILA'] == '01'
+
+
+def test_binary_column_reported_as_bytearray():
+    # pyodbc describes BINARY / ROWVERSION as bytearray and returns bytes
+    cursor = FakeCursor((('VERSIONFILA', bytearray),), [(b'\x00\xff',)])
+    assert fetch_one_dict(cursor) == {'VERSIONFILA': '00ff'}
+
+
+def test_converter_is_cached_per_shape():
+    assert get_row_converter(DESCRIPTION) is get_row_converter(DESCRIPTION)
+    assert get_row_converter(DESCRIPTION[:2]) is not get_row_converter(DESCRIPTION)
+
+
+def test_no_result_set():
+    assert fetch_one_dict(FakeCursor(None, [])) is None
+    assert fetch_all_dicts(FakeCursor(None, [])) == []
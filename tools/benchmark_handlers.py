@@ -0,0 +1,490 @@
+"""
+Tool: benchmark_handlers
+Description: Per-endpoint latency benchmark with JSON baselines and a regression gate
+Runtime: Python 3.13
+
+Replays API Gateway events (built by local_gateway, so they match what the
+handlers see in production) straight into each lambda_handler and reports,
+per endpoint:
+    - latency p50 / p95 / p99 and max (ms)
+    - throughput at the requested concurrency (requests/s)
+    - Python allocations per call (tracemalloc peak, KB)
+    - response size as sent (bytes; compressed with --accept-encoding)
+    - error responses (5xx)
+
+Handlers share the db_connection pool, sized to --concurrency. With
+DB_BACKEND=offline (the default here) no SQL Server is needed and the
+numbers isolate the Python side of each request; --empresas/--seguimientos
+first fill the offline database through generate_synthetic_data so the
+result sets have production-like sizes.
+
+Each endpoint is run --repeat times and every metric is the median across
+runs, so a single scheduler or checkpoint stall does not move the numbers.
+Results can be written as a JSON baseline (--output) and compared with a
+previous one (--baseline): the exit status is 1 when any endpoint got slower
+(p50; also p95 with --concurrency 1), allocates more or returns larger bodies
+than --tolerance allows, which makes the run usable as a pre-deploy gate.
+
+Usage:
+    python tools/benchmark_handlers.py --output baseline.json
+    python tools/benchmark_handlers.py --empresas 20000 --seguimientos 200000 --concurrency 8
+    python tools/benchmark_handlers.py --concurrency 1 --baseline baseline.json --tolerance 0.2
+    python tools/benchmark_handlers.py --only agenda,calendario --requests 500
+    python tools/benchmark_handlers.py --only calendario --accept-encoding 'br, gzip'
+
+Writes (seguimiento / empresa updates) only run against the offline backend
+unless --writes is given.
+"""
+import os
+import sys
+import json
+import base64
+import time
+import random
+import logging
+import argparse
+import platform
+import threading
+import tracemalloc
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('benchmark_handlers')
+
+# Metrics compared against the baseline (all lower is better). With several
+# caller threads a sub-millisecond call can wait a whole GIL switch interval
+# (5 ms) behind another one, which flips p95 from run to run, so the tail is
+# only gated on single-threaded runs
+GATED_METRICS = ('p50Ms', 'allocPeakKb', 'avgBytes')
+GATED_METRICS_SEQUENTIAL = GATED_METRICS + ('p95Ms',)
+
+# Latency changes below this many ms are noise, whatever the ratio
+DEFAULT_MIN_DELTA_MS = 0.5
+
+
+class Scenario:
+    """One endpoint call pattern; query/body builders pick random test data."""
+
+    def __init__(self, name, method, path, query=None, body=None, write=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.write = write
+
+
+def _week(today):
+    start = today - timedelta(days=(today.weekday() + 1) % 7)
+    return start.isoformat(), (start + timedelta(days=6)).isoformat()
+
+
+def _team_lead(data, rng):
+    return rng.choice(data.supervisors or data.executives)
+
+
+def _seguimiento(data, rng):
+    """One follow-up for this week, as sent to POST /seguimiento."""
+    return {
+        'idEmpresa': rng.choice(data.empresas), 'idUsuarioAsignado': rng.choice(data.executives),
+        'idTipoSeguimiento': rng.randint(1, 8), 'prioridad': rng.choice(('Alta', 'Media', 'Baja')),
+        'fechaProgramada': (data.today + timedelta(days=rng.randint(0, 6))).isoformat(),
+        'horaProgramada': f'{rng.randint(8, 17):02d}:00', 'notas': 'Benchmark',
+    }
+
+
+def _badge(data, rng):
+    """Bulk mark-read body: up to 40 notifications of one user."""
+    if not data.notificaciones_por_usuario:
+        return {'userId': rng.choice(data.executives), 'ids': [0]}
+    user_id = rng.choice(sorted(data.notificaciones_por_usuario))
+    ids = data.notificaciones_por_usuario[user_id]
+    return {'userId': user_id, 'ids': rng.sample(ids, min(40, len(ids)))}
+
+
+SCENARIOS = [
+    Scenario('login', 'POST', '/login',
+             body=lambda d, rng: dict(zip(('username', 'password'), rng.choice(d.logins)))),
+    Scenario('agenda', 'GET', '/agenda',
+             query=lambda d, rng: {'userId': rng.choice(d.executives), 'fecha': d.today.isoformat()}),
+    Scenario('agenda_supervisor', 'GET', '/agenda',
+             query=lambda d, rng: {'userId': _team_lead(d, rng), 'fecha': d.today.isoformat()}),
+    Scenario('calendario', 'GET', '/calendario',
+             query=lambda d, rng: dict(zip(('fechaIni', 'fechaFin'), _week(d.today)), userId=_team_lead(d, rng))),
+    Scenario('cerrados', 'GET', '/cerrados',
+             query=lambda d, rng: dict(zip(('fechaIni', 'fechaFin'), _week(d.today)), userId=_team_lead(d, rng))),
+    Scenario('dashboard', 'GET', '/dashboard',
+             query=lambda d, rng: {'userId': _team_lead(d, rng), 'fecha': d.today.isoformat()}),
+    Scenario('inicio', 'GET', '/inicio',
+             query=lambda d, rng: {'userId': _team_lead(d, rng), 'fecha': d.today.isoformat()}),
+    Scenario('produccion', 'GET', '/produccion',
+             query=lambda d, rng: {'userId': _team_lead(d, rng), 'fecha': d.today.isoformat()}),
+    Scenario('pendientes_acumulados', 'GET', '/pendientes-acumulados',
+             query=lambda d, rng: {'userId': rng.choice(d.executives)}),
+    Scenario('pendientes_olvidados', 'GET', '/pendientes-olvidados',
+             query=lambda d, rng: {'userId': rng.choice(d.executives)}),
+    Scenario('notificaciones', 'GET', '/notificaciones',
+             query=lambda d, rng: {'userId': rng.choice(d.executives)}),
+    Scenario('empresas_buscar', 'GET', '/empresas',
+             query=lambda d, rng: {'search': rng.choice(d.search_terms)}),
+    Scenario('empresas_listar', 'GET', '/empresas',
+             query=lambda d, rng: {'limite': 100}),
+    Scenario('empresa_obtener', 'GET', '/empresa',
+             query=lambda d, rng: {'id': rng.choice(d.empresas)}),
+    Scenario('seguimiento_crear', 'POST', '/seguimiento', write=True,
+             body=lambda d, rng: dict(_seguimiento(d, rng), usuarioCrea=1)),
+    Scenario('seguimientos_lote', 'POST', '/seguimientos/lote', write=True,
+             body=lambda d, rng: {'usuarioCrea': 1, 'seguimientos': [_seguimiento(d, rng) for _ in range(40)]}),
+    Scenario('seguimiento_actualizar', 'PUT', '/seguimiento', write=True,
+             body=lambda d, rng: {
+                 'idSeguimiento': rng.choice(d.seguimientos), 'estado': 'PENDIENTE',
+                 'detalle': {'observaciones': 'Benchmark'}, 'usuarioModifica': 1,
+             }),
+    Scenario('seguimientos_estado', 'PUT', '/seguimientos/estado', write=True,
+             body=lambda d, rng: {
+                 'estado': 'EN_PROGRESO', 'ids': rng.sample(d.seguimientos, min(40, len(d.seguimientos))),
+                 'usuarioModifica': 1,
+             }),
+    Scenario('empresa_actualizar', 'PUT', '/empresa', write=True,
+             body=lambda d, rng: {'idEmpresa': rng.choice(d.empresas), 'contactoCargo': 'Gerente', 'usuarioModifica': 1}),
+    Scenario('notificacion_leida', 'PUT', '/notificaciones/{id}/leida', write=True),
+    Scenario('notificaciones_leidas', 'PUT', '/notificaciones/leidas', write=True,
+             body=lambda d, rng: _badge(d, rng)),
+]
+
+
+class TestData:
+    """IDs and credentials sampled from the database the handlers will read."""
+
+    def __init__(self, today):
+        from db_connection import get_connection, release_connection
+
+        self.today = today
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT IDUSUARIO, IDPERFIL, LOGINUSUARIO, CLAVE FROM TM_USUARIO WHERE ACTIVO = 1')
+            users = cursor.fetchall()
+            self.executives = [row[0] for row in users if row[1] == 3]
+            self.supervisors = [row[0] for row in users if row[1] == 2]
+            self.logins = [(row[2], row[3]) for row in users]
+
+            cursor.execute('SELECT IDEMPRESA, NOMBRECOMERCIAL FROM TM_EMPRESA WHERE ACTIVO = 1')
+            empresas = cursor.fetchall()
+            self.empresas = [row[0] for row in empresas]
+            words = {word for row in empresas[:5000] for word in row[1].split() if len(word) >= 3}
+            self.search_terms = sorted(words)[:500] or ['a']
+
+            cursor.execute('SELECT IDSEGUIMIENTO FROM TM_SEGUIMIENTO WHERE ACTIVO = 1')
+            self.seguimientos = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute('SELECT IDNOTIFICACION, IDUSUARIO FROM TM_NOTIFICACION WHERE ACTIVO = 1')
+            self.notificaciones_por_usuario = {}
+            for id_notificacion, id_usuario in cursor.fetchall():
+                self.notificaciones_por_usuario.setdefault(id_usuario, []).append(id_notificacion)
+            self.notificaciones = [n for ids in self.notificaciones_por_usuario.values() for n in ids] or [0]
+        finally:
+            cursor.close()
+            release_connection(conn)
+
+        if not self.executives or not self.empresas or not self.seguimientos:
+            raise SystemExit('The database has no ejecutivos, empresas or seguimientos to benchmark with')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+class Runner:
+    """Builds events for a scenario and invokes the handler behind its route."""
+
+    def __init__(self, gateway, data, stream=False, seed=1, accept_encoding=None):
+        self.gateway = gateway
+        self.data = data
+        self.stream = stream
+        self.accept_encoding = accept_encoding
+        self.seed = seed
+        self._local = threading.local()
+
+    def _rng(self):
+        rng = getattr(self._local, 'rng', None)
+        if rng is None:
+            rng = self._local.rng = random.Random(f'{self.seed}-{threading.current_thread().name}')
+        return rng
+
+    def build(self, scenario):
+        rng = self._rng()
+        path = scenario.path
+        if '{id}' in path:
+            path = path.replace('{id}', str(rng.choice(self.data.notificaciones)))
+        route, path_params = self.gateway.match(scenario.method, path)
+        if route is None:
+            raise SystemExit(f'No route for {scenario.method} {path}')
+        query = urlencode(scenario.query(self.data, rng)) if scenario.query else ''
+        body = json.dumps(scenario.body(self.data, rng)) if scenario.body else None
+        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+        if self.accept_encoding:
+            headers['Accept-Encoding'] = self.accept_encoding
+        event = self.gateway.build_event(route, scenario.method, path, path_params, query, headers, body)
+        if not self.stream:
+            # API Gateway REST buffers the whole response
+            event['requestContext'].pop('streamingResponse', None)
+        return route, event
+
+    def invoke(self, scenario):
+        """One call. Returns (elapsed seconds, status code, body bytes as sent)."""
+        from local_gateway import LambdaContext
+
+        route, event = self.build(scenario)
+        started = time.perf_counter()
+        response = route.handler(event, LambdaContext(route.module_name))
+        body = response.get('body') or ''
+        if not isinstance(body, str):
+            body = ''.join(body)
+        elapsed = time.perf_counter() - started
+        if response.get('isBase64Encoded'):
+            size = len(base64.b64decode(body))
+        else:
+            size = len(body.encode('utf-8'))
+        return elapsed, int(response.get('statusCode', 200)), size
+
+
+def run_scenario(runner, scenario, requests, concurrency, warmup, alloc_samples):
+    """Benchmark one scenario and return its metrics."""
+    for _ in range(warmup):
+        runner.invoke(scenario)
+
+    latencies = []
+    sizes = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(count):
+        nonlocal errors
+        local_latencies, local_sizes, local_errors = [], [], 0
+        for _ in range(count):
+            elapsed, status, size = runner.invoke(scenario)
+            local_latencies.append(elapsed)
+            local_sizes.append(size)
+            if status >= 500:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            sizes.extend(local_sizes)
+            errors += local_errors
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, share) for share in shares if share]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    # Allocations are measured on a separate sequential pass: tracemalloc
+    # slows every allocation down and would distort the latencies above
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_samples):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            runner.invoke(scenario)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'throughputRps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50Ms': ms(percentile(latencies, 50)),
+        'p95Ms': ms(percentile(latencies, 95)),
+        'p99Ms': ms(percentile(latencies, 99)),
+        'maxMs': ms(latencies[-1]) if latencies else 0.0,
+        'allocPeakKb': round(percentile(sorted(peaks), 50) / 1024, 1) if peaks else 0.0,
+        'avgBytes': round(sum(sizes) / len(sizes)) if sizes else 0,
+        'maxBytes': max(sizes) if sizes else 0,
+    }
+
+
+def median_metrics(runs):
+    """Per-metric median of repeated runs of one scenario."""
+    merged = {}
+    for key in runs[0]:
+        values = sorted(run[key] for run in runs)
+        merged[key] = values[len(values) // 2]
+    merged['requests'] = sum(run['requests'] for run in runs)
+    merged['errors'] = sum(run['errors'] for run in runs)
+    return merged
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Regressions of the gated metrics against a baseline, as readable lines."""
+    regressions = []
+    gated = GATED_METRICS_SEQUENTIAL if results['meta']['concurrency'] == 1 else GATED_METRICS
+    for name, metrics in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for key in gated:
+            old, new = previous.get(key), metrics.get(key)
+            if not old or new is None:
+                continue
+            if key.endswith('Ms') and new - old < min_delta_ms:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append(f'{name}: {key} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)')
+        if metrics['errors'] > previous.get('errors', 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {metrics['errors']}")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'endpoint':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'allocKB':>10}{'bytes':>10}{'err':>6}"
+    print(header)
+    print('-' * len(header))
+    for name, m in results['scenarios'].items():
+        print(f"{name:<24}{m['p50Ms']:>9.2f}{m['p95Ms']:>9.2f}{m['p99Ms']:>9.2f}{m['throughputRps']:>9.1f}"
+              f"{m['allocPeakKb']:>10.1f}{m['avgBytes']:>10}{m['errors']:>6}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every App Comercial handler.')
+    parser.add_argument('--backend', choices=('offline', 'pyodbc'), default=os.environ.get('DB_BACKEND', 'offline'),
+                        help='Database backend (DB_BACKEND); offline needs no SQL Server')
+    parser.add_argument('--requests', type=int, default=200, help='Timed calls per endpoint')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent callers (and pooled connections)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per endpoint; each metric is the median across runs')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed calls per endpoint first')
+    parser.add_argument('--alloc-samples', type=int, default=20, help='Calls traced for allocations')
+    parser.add_argument('--only', help='Comma-separated endpoint names (default: all)')
+    parser.add_argument('--writes', action='store_true', help='Include write endpoints on the pyodbc backend')
+    parser.add_argument('--stream', action='store_true', help='Let handlers stream their bodies (local gateway mode)')
+    parser.add_argument('--accept-encoding', default='',
+                        help="Accept-Encoding sent with every call, e.g. 'gzip, br' (default: none, plain bodies)")
+    parser.add_argument('--empresas', type=int, default=0, help='Offline: synthetic companies to generate first')
+    parser.add_argument('--seguimientos', type=int, default=0, help='Offline: synthetic seguimientos to generate first')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the results as a JSON baseline')
+    parser.add_argument('--baseline', help='Compare against this JSON baseline and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative growth per metric (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='Ignore latency changes smaller than this')
+    args = parser.parse_args(argv)
+
+    # A misspelled name must not shrink a regression gate unnoticed
+    if args.only is not None:
+        args.only = [name.strip() for name in args.only.split(',') if name.strip()]
+        known = {scenario.name: scenario for scenario in SCENARIOS}
+        unknown = [name for name in args.only if name not in known]
+        if unknown or not args.only:
+            parser.error(f"unknown endpoint(s) in --only: {', '.join(unknown) or '(none given)'}; "
+                         f"valid names: {', '.join(known)}")
+        skipped = [name for name in args.only
+                   if known[name].write and args.backend != 'offline' and not args.writes]
+        if skipped:
+            parser.error(f"write endpoint(s) in --only need --writes on the pyodbc backend: {', '.join(skipped)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DB_BACKEND'] = args.backend
+
+    # Imported after DB_BACKEND is set: db_connection reads it at import time
+    import db_connection
+    from local_gateway import Gateway
+
+    db_connection.configure_pool(args.concurrency)
+
+    if args.backend == 'offline' and (args.empresas or args.seguimientos):
+        import generate_synthetic_data
+        generate_synthetic_data.main([
+            '--empresas', str(args.empresas or 1000), '--seguimientos', str(args.seguimientos or 10000),
+            '--prefix', 'bench', '--seed', str(args.seed),
+        ])
+        # The alerts of GET /notificaciones are materialized by a scheduled job
+        conn = db_connection.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('EXEC usp_MaterializarAlertasAltoValor')
+            cursor.fetchall()
+            cursor.close()
+            conn.commit()
+        finally:
+            db_connection.release_connection(conn)
+
+    gateway = Gateway()
+    data = TestData(date.today())
+    runner = Runner(gateway, data, stream=args.stream, seed=args.seed, accept_encoding=args.accept_encoding)
+
+    selected = set(args.only) if args.only else None
+    scenarios = [
+        s for s in SCENARIOS
+        if (selected is None or s.name in selected) and (not s.write or args.backend == 'offline' or args.writes)
+    ]
+
+    # Handlers log every call at INFO; keep the benchmark output readable.
+    # The per-invocation metric line is still built (its cost is part of
+    # every production call), just not written
+    logging.getLogger().setLevel(logging.WARNING)
+    import request_timing
+    request_timing.metrics_stream = open(os.devnull, 'w')
+
+    results = {
+        'meta': {
+            'backend': args.backend,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'requests': args.requests,
+            'repeat': args.repeat,
+            'concurrency': args.concurrency,
+            'acceptEncoding': args.accept_encoding,
+            'empresas': len(data.empresas),
+            'seguimientos': len(data.seguimientos),
+            'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {},
+    }
+    for scenario in scenarios:
+        runs = [
+            run_scenario(runner, scenario, args.requests, args.concurrency, args.warmup, args.alloc_samples)
+            for _ in range(max(1, args.repeat))
+        ]
+        results['scenarios'][scenario.name] = median_metrics(runs)
+        print(f'{scenario.name}: {results["scenarios"][scenario.name]["p50Ms"]} ms p50', file=sys.stderr)
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,514 @@
+"""
+Tool: generate_synthetic_data
+Description: Fill DB_APPCOMERCIAL with production-sized synthetic data
+Runtime: Python 3.13
+
+05_sample_data.sql and 07_additional_sample_data.sql insert a few dozen rows,
+which tells nothing about how the stored procedures behave on real volumes.
+This tool generates every table with consistent foreign keys and realistic
+distributions:
+    - TM_PERFIL / TM_SEGUIMIENTO_TIPO: the fixed catalogs of the sample data
+    - TM_USUARIO: admin -> supervisors -> ejecutivos hierarchy
+    - TM_EMPRESA (+ TM_EMPRESA_SEDE): each company owned by one ejecutivo
+    - TM_SEGUIMIENTO (+ DETALLE): skewed towards popular companies, weekday
+      office hours, past ones mostly closed, recent ones pending
+    - TM_INTERACCION, TM_VENTA: derived from the closed seguimientos
+    - TM_NOTIFICACION: reminders for high priority work plus general notices
+
+Rows are generated column-wise per chunk (random.choices over the whole
+chunk) and written with pyodbc fast_executemany in one transaction per
+chunk, so memory stays flat and millions of seguimientos load in minutes.
+With --csv the same rows are written to one CSV file per table instead
+(for BULK INSERT / bcp, or to inspect the data without a database).
+
+Usage:
+    python tools/generate_synthetic_data.py --seguimientos 2000000
+    python tools/generate_synthetic_data.py --empresas 5000 --csv out/
+
+Database connection: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD (db_connection).
+IDs continue after the current MAX() of each table, so the tool can also
+append to a database that already holds the sample data (use a different
+--prefix for each run; logins must be unique).
+"""
+import os
+import sys
+import csv
+import time
+import random
+import logging
+import argparse
+from datetime import date, datetime, time as dtime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('generate_synthetic_data')
+
+# Seguimientos generated (and written) per transaction
+DEFAULT_CHUNK_SIZE = 50000
+
+PERFILES = [
+    (1, 'ADMIN', 'Administrador del sistema con acceso total'),
+    (2, 'SUPERVISOR', 'Supervisor de equipo comercial'),
+    (3, 'EJECUTIVO', 'Ejecutivo comercial de ventas'),
+]
+
+TIPOS_SEGUIMIENTO = [
+    (1, 'Llamada Fría', 'Primer contacto telefónico con prospecto', '#3498db'),
+    (2, 'Llamada Seguimiento', 'Seguimiento a cliente existente', '#2ecc71'),
+    (3, 'Visita Presencial', 'Reunión en oficina del cliente', '#e74c3c'),
+    (4, 'Reunión Virtual', 'Videollamada con cliente', '#9b59b6'),
+    (5, 'Envío Propuesta', 'Envío de cotización o propuesta', '#f39c12'),
+    (6, 'Cierre Venta', 'Firma de contrato o cierre', '#1abc9c'),
+    (7, 'Post-Venta', 'Seguimiento después de venta', '#34495e'),
+    (8, 'Reactivación', 'Contacto con cliente inactivo', '#e67e22'),
+]
+TIPO_WEIGHTS = [20, 30, 10, 10, 12, 6, 7, 5]
+
+NOMBRES = ['Juan', 'Ana', 'Luis', 'Sofia', 'Pedro', 'Carlos', 'Maria', 'Jorge', 'Lucia', 'Diego',
+           'Valeria', 'Miguel', 'Camila', 'José', 'Rosa', 'Andrés', 'Patricia', 'Raúl', 'Elena', 'Iván']
+APELLIDOS = ['Perez', 'Rodriguez', 'Garcia', 'Torres', 'Sanchez', 'Martinez', 'Gonzales', 'Flores',
+             'Diaz', 'Vargas', 'Rojas', 'Mendoza', 'Quispe', 'Huamán', 'Castillo', 'Chávez', 'Ramos',
+             'Ñahui', 'Salazar', 'Córdova']
+NOMBRE_PREFIJOS = ['Andina', 'Pacífico', 'Inca', 'Sol', 'Nova', 'Grupo', 'Corporación', 'Inversiones',
+                   'Comercial', 'Industrias', 'Servicios', 'Distribuidora', 'Constructora', 'Agro',
+                   'Minera', 'Textil', 'Tecno', 'Global', 'Perú', 'Lima']
+NOMBRE_NUCLEOS = ['Huascarán', 'Titicaca', 'Misti', 'Condor', 'Amazonas', 'Vilcanota', 'Paracas',
+                  'Nazca', 'Chavín', 'Moche', 'Rímac', 'Urubamba', 'Colca', 'Salkantay', 'Ausangate']
+SUFIJOS_SOCIEDAD = ['S.A.C.', 'S.A.', 'E.I.R.L.', 'S.R.L.', 'S.A.A.']
+CIUDADES = ['Lima', 'Arequipa', 'Trujillo', 'Callao', 'Piura', 'Cusco', 'Chiclayo', 'Huancayo']
+CIUDAD_WEIGHTS = [55, 10, 8, 8, 5, 5, 5, 4]
+CALLES = ['Av. Javier Prado', 'Av. Arequipa', 'Jr. de la Unión', 'Av. Brasil', 'Av. La Marina',
+          'Calle Las Begonias', 'Av. Angamos', 'Av. Benavides']
+CARGOS = ['Gerente General', 'Jefe de Compras', 'Director Comercial', 'Administrador', 'Gerente de Operaciones']
+TIPOS_CLIENTE = ['EMPRESA', 'CORPORATIVO', 'PYME', 'GOBIERNO']
+TIPOS_CLIENTE_WEIGHTS = [50, 15, 30, 5]
+LINEAS_NEGOCIO = ['Tecnologia', 'Comercio', 'Manufactura', 'Construccion', 'Mineria', 'Agroindustria',
+                  'Servicios', 'Logistica']
+TIPOS_CARTERA = ['PREMIUM', 'ESTANDAR', 'BASICA']
+TIPOS_CARTERA_WEIGHTS = [15, 55, 30]
+RIESGOS = ['BAJO', 'MEDIO', 'ALTO']
+RIESGOS_WEIGHTS = [50, 35, 15]
+
+PRIORIDADES = ['ALTA', 'MEDIA', 'BAJA']
+PRIORIDAD_WEIGHTS = [20, 50, 30]
+# Past seguimientos: mostly closed, some forgotten (PENDIENTE) or in progress
+ESTADOS_PASADO = ['COMPLETADO', 'PENDIENTE', 'EN_PROGRESO', 'CANCELADO']
+ESTADOS_PASADO_WEIGHTS = [70, 15, 10, 5]
+ESTADOS_FUTURO = ['PENDIENTE', 'EN_PROGRESO']
+ESTADOS_FUTURO_WEIGHTS = [90, 10]
+RESULTADOS = ['EXITOSO', 'NO_CONTESTA', 'REPROGRAMADO', 'RECHAZADO']
+RESULTADOS_WEIGHTS = [35, 25, 25, 15]
+
+TIPOS_COMUNICACION = ['TELEFONO', 'EMAIL', 'PRESENCIAL', 'WHATSAPP']
+ESTATUS_CLIENTE = ['PROSPECTO', 'COTIZADO', 'NEGOCIACION', 'CLIENTE', 'PERDIDO']
+TIPOS_LLAMADA = ['SALIENTE', 'ENTRANTE', 'N/A']
+TIPOS_INTERACCION = ['LLAMADA', 'EMAIL', 'REUNION', 'WHATSAPP']
+TIPOS_INTERACCION_WEIGHTS = [50, 25, 10, 15]
+DESCRIPCIONES_INTERACCION = ['Llamada de seguimiento', 'Envío de cotización', 'Reunión con cliente',
+                             'Confirmación de términos', 'Consulta técnica']
+PRODUCTOS = ['Licencia anual', 'Servicio de soporte', 'Implementación', 'Equipamiento', 'Consultoría']
+NOTIFICACIONES_GENERALES = [
+    ('INFO', 'Meta semanal actualizada', 'Revisa tu avance de la semana'),
+    ('INFO', 'Nuevo cliente asignado', 'Se te asignó una nueva empresa'),
+    ('RECORDATORIO', 'Reporte pendiente', 'Completa el reporte de producción del día'),
+    ('ALERTA', 'Seguimientos vencidos', 'Tienes seguimientos sin atender'),
+]
+
+WEEKDAY_WEIGHTS = [22, 22, 21, 20, 12, 2, 1]    # Monday .. Sunday
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate production-sized synthetic data for DB_APPCOMERCIAL.')
+    parser.add_argument('--supervisors', type=int, default=10)
+    parser.add_argument('--executives-per-supervisor', type=int, default=8)
+    parser.add_argument('--empresas', type=int, default=50000)
+    parser.add_argument('--seguimientos', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=365,
+                        help='History length; seguimientos are spread over these past days plus 30 ahead')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--prefix', default='gen', help='Login prefix for generated users')
+    parser.add_argument('--today', type=date.fromisoformat, default=date.today(),
+                        help='Reference date (YYYY-MM-DD), default today')
+    parser.add_argument('--csv', metavar='DIR', help='Write CSV files to DIR instead of the database')
+    return parser.parse_args(argv)
+
+
+class DatabaseSink:
+    """Bulk-inserts rows with fast_executemany, one transaction per chunk."""
+
+    def __init__(self):
+        from db_connection import get_connection
+        self.conn = get_connection()
+        self.conn.autocommit = False
+        self.cursor = self.conn.cursor()
+        self.cursor.fast_executemany = True
+
+    def max_id(self, table, column):
+        self.cursor.execute(f'SELECT ISNULL(MAX({column}), 0) FROM {table}')
+        return self.cursor.fetchone()[0]
+
+    def count(self, table):
+        self.cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        return self.cursor.fetchone()[0]
+
+    def insert(self, table, columns, rows, identity=False):
+        if not rows:
+            return
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        if identity:
+            self.cursor.execute(f'SET IDENTITY_INSERT {table} ON')
+        try:
+            self.cursor.executemany(sql, rows)
+        finally:
+            if identity:
+                self.cursor.execute(f'SET IDENTITY_INSERT {table} OFF')
+
+    def commit(self):
+        self.conn.commit()
+
+    def finish(self):
+        # Bulk rows bypass usp_InsertarEmpresa, so rebuild the search keys (script 17)
+        self.cursor.execute("SELECT OBJECT_ID('usp_RegenerarClavesBusquedaEmpresas')")
+        if self.cursor.fetchone()[0] is not None:
+            logger.info('Rebuilding company search keys')
+            self.cursor.execute('EXEC usp_RegenerarClavesBusquedaEmpresas')
+            self.conn.commit()
+        from db_connection import release_connection
+        self.cursor.close()
+        release_connection(self.conn)
+
+
+class CsvSink:
+    """Writes one CSV file per table (header + rows, NULL as empty field)."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._files = {}
+
+    def max_id(self, table, column):
+        return 0
+
+    def count(self, table):
+        return 0
+
+    def insert(self, table, columns, rows, identity=False):
+        entry = self._files.get(table)
+        if entry is None:
+            handle = open(os.path.join(self.directory, f'{table}.csv'), 'w', newline='', encoding='utf-8')
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            entry = self._files[table] = (handle, writer)
+        entry[1].writerows(rows)
+
+    def commit(self):
+        for handle, _ in self._files.values():
+            handle.flush()
+
+    def finish(self):
+        for handle, _ in self._files.values():
+            handle.close()
+
+
+class Generator:
+    """Generates the tables in FK order and hands the rows to a sink."""
+
+    def __init__(self, args, sink):
+        self.args = args
+        self.sink = sink
+        self.rng = random.Random(args.seed)
+        self.today = args.today
+        self.counts = {}
+
+    def _write(self, table, columns, rows, identity=False):
+        self.sink.insert(table, columns, rows, identity)
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    # -----------------------------------------------------------------
+    # Catalogs and users
+    # -----------------------------------------------------------------
+    def catalogs(self):
+        if self.sink.count('TM_PERFIL') == 0:
+            self._write('TM_PERFIL', ('IDPERFIL', 'NOMBREPERFIL', 'DESCRIPCION', 'ACTIVO'),
+                        [(i, n, d, 1) for i, n, d in PERFILES], identity=True)
+        if self.sink.count('TM_SEGUIMIENTO_TIPO') == 0:
+            self._write('TM_SEGUIMIENTO_TIPO', ('IDTIPOSEGUIMIENTO', 'NOMBRE', 'DESCRIPCION', 'COLOR', 'ACTIVO'),
+                        [(i, n, d, c, 1) for i, n, d, c in TIPOS_SEGUIMIENTO], identity=True)
+        self.sink.commit()
+
+    def users(self):
+        rng = self.rng
+        prefix = self.args.prefix
+        next_id = self.sink.max_id('TM_USUARIO', 'IDUSUARIO') + 1
+        created = datetime.combine(self.today - timedelta(days=self.args.days + 30), dtime(9))
+        rows = []
+
+        def person(id_usuario, perfil, login, supervisor):
+            nombre = rng.choice(NOMBRES)
+            paterno, materno = rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+            rows.append((
+                id_usuario, perfil, login, 'gen123', nombre, paterno, materno,
+                f'{login}@empresa.com', f'9{id_usuario:08d}', 1, supervisor, created,
+            ))
+
+        admin_id = next_id
+        person(admin_id, 1, f'{prefix}_admin', None)
+        next_id += 1
+
+        self.supervisor_ids = []
+        self.executive_ids = []
+        for s in range(1, self.args.supervisors + 1):
+            supervisor_id = next_id
+            person(supervisor_id, 2, f'{prefix}_sup{s:03d}', admin_id)
+            self.supervisor_ids.append(supervisor_id)
+            next_id += 1
+            for e in range(1, self.args.executives_per_supervisor + 1):
+                person(next_id, 3, f'{prefix}_ejec{s:03d}_{e:02d}', supervisor_id)
+                self.executive_ids.append(next_id)
+                next_id += 1
+
+        self._write('TM_USUARIO', (
+            'IDUSUARIO', 'IDPERFIL', 'LOGINUSUARIO', 'CLAVE', 'NOMBRES', 'APELLIDOPATERNO',
+            'APELLIDOMATERNO', 'EMAIL', 'TELEFONO', 'ACTIVO', 'IDSUPERVISOR', 'FECHACREA',
+        ), rows, identity=True)
+        self.sink.commit()
+        self.admin_id = admin_id
+
+    # -----------------------------------------------------------------
+    # Companies
+    # -----------------------------------------------------------------
+    def empresas(self):
+        rng = self.rng
+        n = self.args.empresas
+        first_id = self.sink.max_id('TM_EMPRESA', 'IDEMPRESA') + 1
+        ids = range(first_id, first_id + n)
+        execs = self.executive_ids
+        horizon = (self.args.days + 3 * 365) * 24 * 3600
+
+        prefijos = rng.choices(NOMBRE_PREFIJOS, k=n)
+        nucleos = rng.choices(NOMBRE_NUCLEOS, k=n)
+        sufijos = rng.choices(SUFIJOS_SOCIEDAD, k=n)
+        ciudades = rng.choices(CIUDADES, CIUDAD_WEIGHTS, k=n)
+        calles = rng.choices(CALLES, k=n)
+        nombres = rng.choices(NOMBRES, k=n)
+        apellidos = rng.choices(APELLIDOS, k=n)
+        cargos = rng.choices(CARGOS, k=n)
+        tipos_cliente = rng.choices(TIPOS_CLIENTE, TIPOS_CLIENTE_WEIGHTS, k=n)
+        lineas = rng.choices(LINEAS_NEGOCIO, k=n)
+        carteras = rng.choices(TIPOS_CARTERA, TIPOS_CARTERA_WEIGHTS, k=n)
+        riesgos = rng.choices(RIESGOS, RIESGOS_WEIGHTS, k=n)
+        trabajadores = [int(rng.lognormvariate(3.5, 1.2)) + 1 for _ in ids]
+        activos = [0 if x < 0.03 else 1 for x in (rng.random() for _ in ids)]
+        now = datetime.combine(self.today, dtime(18))
+        creados = [now - timedelta(seconds=rng.randrange(horizon)) for _ in ids]
+        modificados = [
+            c + timedelta(seconds=int((now - c).total_seconds() * rng.random())) if rng.random() < 0.4 else None
+            for c in creados
+        ]
+
+        # Each company belongs to one ejecutivo's portfolio
+        self.empresa_ids = list(ids)
+        self.empresa_owner = {i: execs[(i - first_id) % len(execs)] for i in ids}
+
+        rows = []
+        sedes = []
+        for k, i in enumerate(ids):
+            nombre = f'{prefijos[k]} {nucleos[k]} {i}'
+            contacto = f'{nombres[k]} {apellidos[k]}'
+            domicilio = f'{calles[k]} {100 + i % 9000}, {ciudades[k]}'
+            # 11-digit RUC, unique per id (7919 is prime and coprime with 9e8)
+            ruc = f'20{(i * 7919) % 900000000 + 100000000:09d}'
+            owner = self.empresa_owner[i]
+            rows.append((
+                i, nombre, f'{nombre} {sufijos[k]}', ruc, ciudades[k], domicilio,
+                contacto, f'contacto{i}@cliente{i % 997}.pe', f'9{(i * 37) % 100000000:08d}', cargos[k],
+                tipos_cliente[k], lineas[k], carteras[k], riesgos[k], trabajadores[k], activos[k],
+                owner, creados[k], owner if modificados[k] else None, modificados[k],
+            ))
+            for s in range(rng.choices((0, 1, 2, 3), (20, 50, 20, 10))[0]):
+                sedes.append((
+                    i, 'Sede Principal' if s == 0 else f'Sede {rng.choice(CIUDADES)} {s}',
+                    domicilio if s == 0 else f'{rng.choice(CALLES)} {rng.randrange(100, 9999)}',
+                    f'01{rng.randrange(1000000, 9999999)}', contacto, 1 if s == 0 else 0, 1, owner, creados[k],
+                ))
+
+            if len(rows) >= self.args.chunk_size:
+                self._flush_empresas(rows, sedes)
+                rows, sedes = [], []
+        self._flush_empresas(rows, sedes)
+
+    def _flush_empresas(self, rows, sedes):
+        self._write('TM_EMPRESA', (
+            'IDEMPRESA', 'NOMBRECOMERCIAL', 'RAZONSOCIAL', 'RUC', 'SEDEPRINCIPAL', 'DOMICILIO',
+            'CONTACTO_NOMBRE', 'CONTACTO_EMAIL', 'CONTACTO_TELEFONO', 'CONTACTO_CARGO',
+            'TIPOCLIENTE', 'LINEANEGOCIO', 'TIPOCARTERA', 'RIESGO', 'NUMTRABAJADORES', 'ACTIVO',
+            'USUARIOCREA', 'FECHACREA', 'USUARIOMODIFICA', 'FECHAMODIFICA',
+        ), rows, identity=True)
+        self._write('TM_EMPRESA_SEDE', (
+            'IDEMPRESA', 'NOMBRESEDE', 'DOMICILIO', 'TELEFONO', 'CONTACTO_NOMBRE',
+            'ESPRINCIPAL', 'ACTIVO', 'USUARIOCREA', 'FECHACREA',
+        ), sedes)
+        self.sink.commit()
+
+    # -----------------------------------------------------------------
+    # Seguimientos and everything derived from them
+    # -----------------------------------------------------------------
+    def _dates(self, n):
+        """Scheduled dates over [today - days, today + 30], weighted by weekday."""
+        if not hasattr(self, '_day_pool'):
+            start = self.today - timedelta(days=self.args.days)
+            self._day_pool = [start + timedelta(days=d) for d in range(self.args.days + 31)]
+            self._day_weights = [WEEKDAY_WEIGHTS[d.weekday()] for d in self._day_pool]
+        return self.rng.choices(self._day_pool, self._day_weights, k=n)
+
+    def seguimientos(self):
+        total = self.args.seguimientos
+        next_id = self.sink.max_id('TM_SEGUIMIENTO', 'IDSEGUIMIENTO') + 1
+        done = 0
+        started = time.perf_counter()
+        while done < total:
+            n = min(self.args.chunk_size, total - done)
+            self._seguimiento_chunk(next_id, n)
+            next_id += n
+            done += n
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            logger.info(f'Seguimientos: {done}/{total} ({rate:,.0f} rows/s)')
+
+    def _seguimiento_chunk(self, first_id, n):
+        rng = self.rng
+        empresas = self.empresa_ids
+        n_empresas = len(empresas)
+        today = self.today
+
+        # Popular companies get far more follow-ups (squared uniform skew)
+        empresa_col = [empresas[int(n_empresas * rng.random() ** 2)] for _ in range(n)]
+        tipo_col = rng.choices([t[0] for t in TIPOS_SEGUIMIENTO], TIPO_WEIGHTS, k=n)
+        fecha_col = self._dates(n)
+        hora_col = [dtime(h, m) for h, m in zip(rng.choices(range(8, 19), k=n), rng.choices((0, 15, 30, 45), k=n))]
+        prioridad_col = rng.choices(PRIORIDADES, PRIORIDAD_WEIGHTS, k=n)
+        estado_pasado = rng.choices(ESTADOS_PASADO, ESTADOS_PASADO_WEIGHTS, k=n)
+        estado_futuro = rng.choices(ESTADOS_FUTURO, ESTADOS_FUTURO_WEIGHTS, k=n)
+        resultado_col = rng.choices(RESULTADOS, RESULTADOS_WEIGHTS, k=n)
+        randoms = [rng.random() for _ in range(n)]
+
+        seguimientos = []
+        detalles = []
+        interacciones = []
+        ventas = []
+        notificaciones = []
+        for k in range(n):
+            id_seg = first_id + k
+            id_empresa = empresa_col[k]
+            usuario = self.empresa_owner[id_empresa]
+            fecha = fecha_col[k]
+            hora = hora_col[k]
+            programada = datetime.combine(fecha, hora)
+            creado = programada - timedelta(days=1 + int(randoms[k] * 10))
+            estado = estado_pasado[k] if fecha < today else estado_futuro[k]
+            completado = None
+            resultado = None
+            if estado == 'COMPLETADO':
+                completado = programada + timedelta(minutes=5 + int(randoms[k] * 240))
+                resultado = resultado_col[k]
+            modificado = completado or (creado + timedelta(hours=2) if estado != 'PENDIENTE' else None)
+            seguimientos.append((
+                id_seg, id_empresa, tipo_col[k], usuario, fecha, hora, prioridad_col[k], estado,
+                None, completado, resultado, 1, usuario, creado,
+                usuario if modificado else None, modificado,
+            ))
+
+            if randoms[k] < 0.5:
+                detalles.append((
+                    id_seg, TIPOS_COMUNICACION[k % 4], fecha - timedelta(days=int(randoms[k] * 60)),
+                    ESTATUS_CLIENTE[k % 5], 'Detalle generado', TIPOS_LLAMADA[k % 3],
+                    round(rng.lognormvariate(9.5, 1.0), 2), None, 1, usuario, creado,
+                ))
+
+            if estado in ('COMPLETADO', 'EN_PROGRESO'):
+                for j in range(1 + int(randoms[k] * 3)):
+                    interacciones.append((
+                        id_empresa, id_seg, usuario,
+                        programada + timedelta(minutes=30 * j),
+                        rng.choices(TIPOS_INTERACCION, TIPOS_INTERACCION_WEIGHTS)[0],
+                        DESCRIPCIONES_INTERACCION[(k + j) % 5],
+                        resultado or 'EN_PROCESO', 5 + (k + j) % 55, 1, usuario,
+                        programada + timedelta(minutes=30 * j),
+                    ))
+
+            if resultado == 'EXITOSO':
+                ventas.append((
+                    id_empresa, id_seg, usuario, completado.date(),
+                    round(rng.lognormvariate(9.8, 0.8), 2), 'PEN', 'Venta generada',
+                    PRODUCTOS[k % 5], 'CERRADA', 1, usuario, completado,
+                ))
+
+            if prioridad_col[k] == 'ALTA' and estado == 'PENDIENTE' and randoms[k] < 0.6:
+                aviso = programada - timedelta(hours=2)
+                leida = aviso < datetime.combine(today, dtime()) - timedelta(days=3)
+                notificaciones.append((
+                    usuario, 'Seguimiento de alta prioridad', f'Seguimiento {id_seg} programado {fecha.isoformat()}',
+                    'RECORDATORIO', 1 if leida else 0, aviso, aviso + timedelta(hours=1) if leida else None,
+                    'SEGUIMIENTO', id_seg, 1,
+                ))
+
+        # General notices, roughly one per ejecutivo per 50 seguimientos
+        for _ in range(n // 50):
+            usuario = rng.choice(self.executive_ids)
+            tipo, titulo, mensaje = rng.choice(NOTIFICACIONES_GENERALES)
+            creada = datetime.combine(self._dates(1)[0], dtime(8)) + timedelta(minutes=rng.randrange(600))
+            leida = creada.date() < today - timedelta(days=2) and rng.random() < 0.9
+            notificaciones.append((
+                usuario, titulo, mensaje, tipo, 1 if leida else 0, creada,
+                creada + timedelta(hours=4) if leida else None, None, None, 1,
+            ))
+
+        self._write('TM_SEGUIMIENTO', (
+            'IDSEGUIMIENTO', 'IDEMPRESA', 'IDTIPOSEGUIMIENTO', 'IDUSUARIOASIGNADO', 'FECHAPROGRAMADA',
+            'HORAPROGRAMADA', 'PRIORIDAD', 'ESTADO', 'NOTAS', 'FECHACOMPLETADO', 'RESULTADO', 'ACTIVO',
+            'USUARIOCREA', 'FECHACREA', 'USUARIOMODIFICA', 'FECHAMODIFICA',
+        ), seguimientos, identity=True)
+        self._write('TM_SEGUIMIENTO_DETALLE', (
+            'IDSEGUIMIENTO', 'TIPOCOMUNICACION', 'FECHA1ERCONTACTO', 'ESTATUSCLIENTE', 'DETALLEESTATUS',
+            'TIPOLLAMADA', 'PRESUPUESTO', 'OBSERVACIONES', 'ACTIVO', 'USUARIOCREA', 'FECHACREA',
+        ), detalles)
+        self._write('TM_INTERACCION', (
+            'IDEMPRESA', 'IDSEGUIMIENTO', 'IDUSUARIO', 'FECHAINTERACCION', 'TIPOINTERACCION', 'DESCRIPCION',
+            'RESULTADO', 'DURACIONMINUTOS', 'ACTIVO', 'USUARIOCREA', 'FECHACREA',
+        ), interacciones)
+        self._write('TM_VENTA', (
+            'IDEMPRESA', 'IDSEGUIMIENTO', 'IDUSUARIO', 'FECHAVENTA', 'MONTO', 'MONEDA', 'DESCRIPCION',
+            'PRODUCTO', 'ESTADO', 'ACTIVO', 'USUARIOCREA', 'FECHACREA',
+        ), ventas)
+        self._write('TM_NOTIFICACION', (
+            'IDUSUARIO', 'TITULO', 'MENSAJE', 'TIPO', 'LEIDA', 'FECHACREACION', 'FECHALEIDA',
+            'TIPOENTIDAD', 'IDREFERENCIAENTIDAD', 'ACTIVO',
+        ), notificaciones)
+        self.sink.commit()
+
+    def run(self):
+        started = time.perf_counter()
+        self.catalogs()
+        self.users()
+        logger.info(f'Users: {len(self.supervisor_ids)} supervisors, {len(self.executive_ids)} ejecutivos')
+        self.empresas()
+        logger.info(f'Empresas: {self.counts.get("TM_EMPRESA", 0)}')
+        self.seguimientos()
+        self.sink.finish()
+        elapsed = time.perf_counter() - started
+        for table, count in sorted(self.counts.items()):
+            logger.info(f'  {table}: {count:,} rows')
+        logger.info(f'Done in {elapsed:.1f}s')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.supervisors < 1 or args.executives_per_supervisor < 1 or args.empresas < 1:
+        raise SystemExit('At least one supervisor, one ejecutivo and one empresa are required')
+    sink = CsvSink(args.csv) if args.csv else DatabaseSink()
+    Generator(args, sink).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Tool: import_empresas
+Description: Import a portfolio of companies from a CSV or XLSX file
+Runtime: Python 3.13
+
+Same pipeline as POST /empresas/importar (lambdas/empresa_import.py), for
+files of any size: the file is read row by row, valid rows are staged in
+TM_EMPRESA_IMPORTACION in chunks with fast_executemany, and
+usp_ImportarEmpresas merges them into TM_EMPRESA / TM_EMPRESA_SEDE in one
+transaction. Memory stays flat whatever the file size.
+
+Every row that did not create a company (invalid, RUC repeated in the file,
+RUC already registered or updated) is written to the report CSV as it
+arrives, ordered by RUC for the rows the database classified.
+
+Usage:
+    python tools/import_empresas.py cartera.csv
+    python tools/import_empresas.py cartera.xlsx --actualizar --report reporte.csv
+
+Database connection: DB_HOST, DB_NAME, DB_USER, DB_PASSWORD (db_connection);
+DB_BACKEND=offline imports into the SQLite stand-in.
+"""
+import os
+import sys
+import csv
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('import_empresas')
+
+REPORT_COLUMNS = ('FILA', 'RUC', 'RESULTADO', 'IDEMPRESA', 'DETALLE')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Import companies from a CSV or XLSX file.')
+    parser.add_argument('file', help='CSV (UTF-8, "," or ";") or XLSX file with a header row')
+    parser.add_argument('--actualizar', action='store_true',
+                        help='Update companies whose RUC is already registered (default: only report them)')
+    parser.add_argument('--usuario', type=int, default=1, help='IDUSUARIO recorded as creator')
+    parser.add_argument('--chunk-size', type=int, default=None, help='Rows per fast_executemany call')
+    parser.add_argument('--report', metavar='CSV', help='Report file (default: <file>.reporte.csv)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from db_connection import get_connection, release_connection
+    from empresa_import import DEFAULT_CHUNK_SIZE, EmpresaImporter, read_csv, read_xlsx
+
+    report_path = args.report or f'{os.path.splitext(args.file)[0]}.reporte.csv'
+    started = time.perf_counter()
+
+    conn = get_connection()
+    try:
+        with open(report_path, 'w', newline='', encoding='utf-8-sig') as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            importer = EmpresaImporter(conn, args.usuario, args.actualizar,
+                                       chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE,
+                                       on_report=writer.writerow)
+
+            if args.file.lower().endswith(('.xlsx', '.xlsm')):
+                summary = importer.run(read_xlsx(args.file))
+            else:
+                with open(args.file, newline='', encoding='utf-8-sig') as source:
+                    summary = importer.run(read_csv(source))
+        conn.commit()
+    finally:
+        release_connection(conn)
+
+    logger.info(f"Imported {args.file} in {time.perf_counter() - started:.1f}s: {summary}")
+    logger.info(f"Report written to {report_path}")
+
+
+if __name__ == '__main__':
+    main()
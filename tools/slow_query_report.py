@@ -0,0 +1,140 @@
+"""
+Tool: slow_query_report
+Description: Worst offenders of the slow query log
+Runtime: Python 3.13
+
+Reads the JSON lines written by lambdas/slow_query_log.py (the current file
+and its rotated backups) and summarizes them per procedure:
+    - calls above the threshold, total / average / p95 / max duration
+    - share of the time spent executing vs fetching
+    - average rows returned
+    - the slowest call: route, parameters (already redacted) and plan file
+
+Procedures are ranked by total slow time, so one that is a little slow on
+every request ranks above a single outlier (use --sort max for outliers).
+
+Usage:
+    python tools/slow_query_report.py
+    python tools/slow_query_report.py --log /var/log/appcomercial/slow.log --top 5
+    python tools/slow_query_report.py --since 2025-12-01 --sort max --json
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+
+from slow_query_log import SLOW_QUERY_LOG
+
+SORT_KEYS = {
+    'total': 'totalMs',
+    'max': 'maxMs',
+    'count': 'calls',
+    'avg': 'avgMs',
+}
+
+
+def log_files(path):
+    """The log and its rotated backups (path.1, path.2, ...), oldest first."""
+    files = [name for name in glob.glob(f'{glob.escape(path)}.*') if name.rsplit('.', 1)[1].isdigit()]
+    files.sort(key=lambda name: int(name.rsplit('.', 1)[1]), reverse=True)
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_records(files, since=None):
+    """Yield the log records, skipping malformed lines and those before `since`."""
+    for name in files:
+        with open(name, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since and record.get('ts', '') < since:
+                    continue
+                yield record
+
+
+def summarize(records):
+    """Aggregate the records per procedure."""
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record['procedure'], {'durations': [], 'executeMs': 0.0, 'rows': 0, 'worst': None})
+        group['durations'].append(record['durationMs'])
+        group['executeMs'] += record.get('executeMs', 0.0)
+        group['rows'] += sum(record.get('rows') or [])
+        if group['worst'] is None or record['durationMs'] > group['worst']['durationMs']:
+            group['worst'] = record
+
+    summary = []
+    for procedure, group in groups.items():
+        durations = sorted(group['durations'])
+        calls = len(durations)
+        total = sum(durations)
+        worst = group['worst']
+        summary.append({
+            'procedure': procedure,
+            'calls': calls,
+            'totalMs': round(total, 1),
+            'avgMs': round(total / calls, 1),
+            'p95Ms': durations[min(calls - 1, int(calls * 0.95))],
+            'maxMs': durations[-1],
+            'executeShare': round(group['executeMs'] / total, 2) if total else 0.0,
+            'avgRows': round(group['rows'] / calls, 1),
+            'slowest': {
+                'ts': worst.get('ts'),
+                'route': worst.get('route'),
+                'params': worst.get('params'),
+                'rows': worst.get('rows'),
+                'plan': worst.get('plan'),
+            },
+        })
+    return summary
+
+
+def print_report(summary, log_path):
+    if not summary:
+        print(f'No slow queries recorded in {log_path}')
+        return
+    header = f"{'procedure':<36}{'calls':>7}{'total ms':>11}{'avg':>9}{'p95':>9}{'max':>9}{'exec%':>7}{'rows':>8}"
+    print(header)
+    print('-' * len(header))
+    for item in summary:
+        print(f"{item['procedure'][:35]:<36}{item['calls']:>7}{item['totalMs']:>11.0f}{item['avgMs']:>9.0f}"
+              f"{item['p95Ms']:>9.0f}{item['maxMs']:>9.0f}{item['executeShare'] * 100:>6.0f}%{item['avgRows']:>8.0f}")
+    print('\nSlowest call per procedure:')
+    for item in summary:
+        slowest = item['slowest']
+        plan = f", plan {slowest['plan']}" if slowest.get('plan') else ''
+        print(f"  {item['procedure']} {item['maxMs']:.0f} ms at {slowest['ts']} ({slowest['route']}), "
+              f"rows {slowest['rows']}, params {json.dumps(slowest['params'], ensure_ascii=False)}{plan}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize the slow query log.')
+    parser.add_argument('--log', default=SLOW_QUERY_LOG, help='Slow query log file (SLOW_QUERY_LOG)')
+    parser.add_argument('--top', type=int, default=10, help='Procedures to show')
+    parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total', help='Ranking criterion')
+    parser.add_argument('--since', help='Only records at or after this ISO timestamp (e.g. 2025-12-01)')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = log_files(args.log)
+    summary = summarize(read_records(files, args.since))
+    summary.sort(key=lambda item: item[SORT_KEYS[args.sort]], reverse=True)
+    summary = summary[:args.top]
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_report(summary, args.log)
+
+
+if __name__ == '__main__':
+    main()